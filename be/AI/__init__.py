@@ -1,5 +1,15 @@
 # Lazy imports to avoid circular dependencies
 # Import submodules only when needed, not at package initialization
+# (importing the agent pulls in qdrant_client, ollama and the document
+# parsers, roughly a second of startup time)
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "true" to load the AI stack in a background thread at application startup
+# instead of on the first AI request
+AI_WARMUP = os.getenv("AI_WARMUP", "false").lower() == "true"
 
 __all__ = [
     "BOQAgent",
@@ -10,9 +20,28 @@ __all__ = [
     "get_vector_store",
     "RAGEngine",
     "get_rag_engine",
-    "BOQTools"
+    "BOQTools",
+    "warm_up",
 ]
 
+
+def warm_up():
+    """
+    Import the AI stack and create the agent and RAG engine singletons.
+
+    Meant to run off the request path (see main.py); failures such as an
+    unreachable Qdrant are logged, and the next AI request retries.
+    """
+    try:
+        from .agent import get_agent
+        from .rag_engine import get_rag_engine
+        get_agent()
+        get_rag_engine()
+        logger.info("AI stack loaded")
+    except Exception as e:
+        logger.warning(f"AI stack warmup failed, will load on first use: {e}")
+
+
 def __getattr__(name):
     """Lazy load modules to avoid circular imports"""
     if name == "BOQAgent":
@@ -2,6 +2,7 @@
 Main AI Agent for BOQ Application
 Handles function calling, conversation management, and action execution
 """
+import threading
 import json
 import uuid
 from typing import Dict, Any, List, Optional
@@ -705,11 +706,15 @@ Sample data (first 3 rows):
 
 # Singleton instance
 _agent_instance: Optional[BOQAgent] = None
+_agent_lock = threading.Lock()
 
 
 def get_agent() -> BOQAgent:
     """Get or create BOQAgent singleton"""
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = BOQAgent()
+        # Startup warmup (AI_WARMUP) and the first request may race
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = BOQAgent()
     return _agent_instance
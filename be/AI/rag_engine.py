@@ -1,6 +1,7 @@
 """
 RAG (Retrieval-Augmented Generation) Engine for document Q&A
 """
+import threading
 import os
 import re
 from typing import List, Dict, Any, Optional, Tuple
@@ -545,11 +546,15 @@ Please answer based on the context above, citing sources."""
 
 # Singleton instance
 _rag_engine_instance: Optional[RAGEngine] = None
+_rag_engine_lock = threading.Lock()
 
 
 def get_rag_engine() -> RAGEngine:
     """Get or create RAGEngine singleton"""
     global _rag_engine_instance
     if _rag_engine_instance is None:
-        _rag_engine_instance = RAGEngine()
+        # Startup warmup (AI_WARMUP) and the first request may race
+        with _rag_engine_lock:
+            if _rag_engine_instance is None:
+                _rag_engine_instance = RAGEngine()
     return _rag_engine_instance
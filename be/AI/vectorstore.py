@@ -1,6 +1,7 @@
 """
 Vector store manager for document embeddings using Qdrant
 """
+import threading
 import uuid
 import os
 import ssl
@@ -263,6 +264,7 @@ class VectorStore:
 
 # Singleton instance
 _vector_store_instance: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
 
 
 def get_vector_store() -> VectorStore:
@@ -274,5 +276,8 @@ def get_vector_store() -> VectorStore:
     """
     global _vector_store_instance
     if _vector_store_instance is None:
-        _vector_store_instance = VectorStore()
+        # Startup warmup (AI_WARMUP) and the first request may race
+        with _vector_store_lock:
+            if _vector_store_instance is None:
+                _vector_store_instance = VectorStore()
     return _vector_store_instance
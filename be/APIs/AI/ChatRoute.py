@@ -2,15 +2,17 @@
 AI Chat API Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 
 from Schemas.AI import ChatMessage, ChatResponse, ConversationHistory
-from AI.agent import get_agent
-from APIs.Core import get_current_user, get_db
+from APIs.Core import get_current_user, get_db, get_async_read_db
 from Models.Admin.User import User
 from Models.AI import ChatHistory as ChatHistoryModel
+from utils.rate_limiter import rate_limit
 
 import logging
 
@@ -19,8 +21,8 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ai", tags=["AI"])
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(rate_limit("ai_chat", per="user"))])
+def chat(
     request: ChatMessage,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -43,6 +45,8 @@ async def chat(
         AI response with actions and data
     """
     try:
+        # Imported on first use: the AI stack is slow to import (see AI/__init__.py)
+        from AI.agent import get_agent
         agent = get_agent()
 
         response = agent.chat(
@@ -76,7 +80,7 @@ async def chat(
 async def get_conversation(
     conversation_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get conversation history
@@ -90,10 +94,12 @@ async def get_conversation(
         Conversation history with all messages
     """
     try:
-        messages = db.query(ChatHistoryModel).filter(
-            ChatHistoryModel.conversation_id == conversation_id,
-            ChatHistoryModel.user_id == current_user.id
-        ).order_by(ChatHistoryModel.timestamp.asc()).all()
+        messages = (await db.execute(
+            select(ChatHistoryModel).where(
+                ChatHistoryModel.conversation_id == conversation_id,
+                ChatHistoryModel.user_id == current_user.id
+            ).order_by(ChatHistoryModel.timestamp.asc())
+        )).scalars().all()
 
         if not messages:
             raise HTTPException(
@@ -132,7 +138,7 @@ async def get_conversation(
 @router.get("/conversations")
 async def list_conversations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     limit: int = 20
 ):
     """
@@ -148,46 +154,68 @@ async def list_conversations(
     """
     try:
         # Get distinct conversation IDs with their latest message
-        from sqlalchemy import func, distinct
-
-        subquery = db.query(
+        subquery = select(
             ChatHistoryModel.conversation_id,
             func.max(ChatHistoryModel.timestamp).label('last_message')
-        ).filter(
+        ).where(
             ChatHistoryModel.user_id == current_user.id
         ).group_by(
             ChatHistoryModel.conversation_id
         ).subquery()
 
-        conversations = db.query(
-            ChatHistoryModel.conversation_id,
-            subquery.c.last_message,
-            func.count(ChatHistoryModel.id).label('message_count')
-        ).join(
-            subquery,
-            ChatHistoryModel.conversation_id == subquery.c.conversation_id
-        ).filter(
-            ChatHistoryModel.user_id == current_user.id
-        ).group_by(
-            ChatHistoryModel.conversation_id,
-            subquery.c.last_message
-        ).order_by(
-            subquery.c.last_message.desc()
-        ).limit(limit).all()
+        conversations = (await db.execute(
+            select(
+                ChatHistoryModel.conversation_id,
+                subquery.c.last_message,
+                func.count(ChatHistoryModel.id).label('message_count')
+            ).join(
+                subquery,
+                ChatHistoryModel.conversation_id == subquery.c.conversation_id
+            ).where(
+                ChatHistoryModel.user_id == current_user.id
+            ).group_by(
+                ChatHistoryModel.conversation_id,
+                subquery.c.last_message
+            ).order_by(
+                subquery.c.last_message.desc()
+            ).limit(limit)
+        )).all()
+
+        # OPTIMIZED: First user message of every listed conversation in one query (was one per conversation)
+        previews = {}
+        conversation_ids = [conv_id for conv_id, _, _ in conversations]
+        if conversation_ids:
+            first_user_message = select(
+                ChatHistoryModel.conversation_id,
+                func.min(ChatHistoryModel.timestamp).label('first_message')
+            ).where(
+                ChatHistoryModel.conversation_id.in_(conversation_ids),
+                ChatHistoryModel.role == 'user'
+            ).group_by(
+                ChatHistoryModel.conversation_id
+            ).subquery()
+
+            rows = (await db.execute(
+                select(ChatHistoryModel.conversation_id, ChatHistoryModel.content).join(
+                    first_user_message,
+                    and_(
+                        ChatHistoryModel.conversation_id == first_user_message.c.conversation_id,
+                        ChatHistoryModel.timestamp == first_user_message.c.first_message
+                    )
+                ).where(ChatHistoryModel.role == 'user')
+            )).all()
+            for conv_id, content in rows:
+                previews.setdefault(conv_id, content)
 
-        # Get first user message for each conversation as preview
         result = []
         for conv_id, last_msg, msg_count in conversations:
-            first_message = db.query(ChatHistoryModel).filter(
-                ChatHistoryModel.conversation_id == conv_id,
-                ChatHistoryModel.role == 'user'
-            ).order_by(ChatHistoryModel.timestamp.asc()).first()
+            content = previews.get(conv_id)
 
             result.append({
                 "conversation_id": conv_id,
                 "last_message_at": last_msg.isoformat(),
                 "message_count": msg_count,
-                "preview": first_message.content[:100] + "..." if first_message and len(first_message.content) > 100 else first_message.content if first_message else ""
+                "preview": content[:100] + "..." if content and len(content) > 100 else content or ""
             })
 
         return {
@@ -204,7 +232,7 @@ async def list_conversations(
 
 
 @router.delete("/conversations/{conversation_id}")
-async def delete_conversation(
+def delete_conversation(
     conversation_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
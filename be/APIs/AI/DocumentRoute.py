@@ -18,9 +18,10 @@ from Schemas.AI import (
     DocumentAnswer,
     DocumentSearchResult
 )
-from AI.rag_engine import get_rag_engine
-from AI.agent import get_agent
-from APIs.Core import get_current_user, get_db
+from APIs.Core import get_current_user, get_db, get_read_db
+from utils.blocking import offload, PARSE
+from utils.rate_limiter import rate_limit
+from utils.jobs import job_handler, job_queue, JobContext, JobError, AI
 from Models.Admin.User import User
 from Models.AI import Document, DocumentChunk
 
@@ -38,54 +39,45 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL", "http://localhost:5678/webhook/boq-document-upload")
 
 
-def process_document_background(document_id: int, file_path: str, db_url: str, extract_tags: bool):
-    """Background task to process document - MUST RUN IN THREAD"""
-    logger.info(f"[THREAD] Starting processing thread for document {document_id}")
+@job_handler("ai.process_document", queue=AI, max_attempts=2)
+def run_process_document(ctx: JobContext, document_id: int, file_path: str, extract_tags: bool):
+    """
+    Job: extract text, chunk, embed and tag an uploaded document.
 
-    def _process():
-        """Actual processing logic in thread"""
-        logger.info(f"[THREAD] Thread started for document {document_id}")
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        from AI.rag_engine import get_rag_engine
-        import time
-
-        start_time = time.time()
-        engine = create_engine(db_url)
-        SessionLocal = sessionmaker(bind=engine)
-        db = SessionLocal()
-
-        try:
-            logger.info(f"[THREAD] Getting RAG engine for document {document_id}")
-            rag_engine = get_rag_engine()
-            logger.info(f"[THREAD] RAG engine loaded in {time.time()-start_time:.2f}s")
-
-            logger.info(f"[THREAD] Processing document {document_id}")
-            rag_engine.process_document(
-                file_path=file_path,
-                document_id=document_id,
-                db=db,
-                extract_tags=extract_tags
-            )
-            elapsed = time.time() - start_time
-            logger.info(f"[THREAD] Successfully processed document {document_id} in {elapsed:.2f}s")
-        except Exception as e:
-            logger.error(f"[THREAD] Processing error for doc {document_id}: {e}")
-            import traceback
-            logger.error(f"[THREAD] Traceback: {traceback.format_exc()}")
-        finally:
-            db.close()
-            logger.info(f"[THREAD] Closed DB session for document {document_id}")
-
-    # Start in non-daemon thread so it survives FastAPI shutdown
-    import threading
-    thread = threading.Thread(target=_process, daemon=False, name=f"doc-process-{document_id}")
-    thread.start()
-    logger.info(f"[THREAD] Processing thread started for document {document_id}")
+    process_document commits the chunks before tagging, so a retry first
+    removes the chunks and vectors of a failed attempt. Errors that a retry
+    cannot fix (document missing, unsupported file type) fail the job at once.
+    """
+    from AI.rag_engine import get_rag_engine
+
+    ctx.progress(0, 2, "Loading AI models")
+    rag_engine = get_rag_engine()
+
+    if ctx.db.query(DocumentChunk.id).filter(DocumentChunk.document_id == document_id).first():
+        logger.info(f"Removing chunks of an earlier attempt for document {document_id}")
+        rag_engine.vector_store.delete_document(document_id)
+        ctx.db.query(DocumentChunk).filter(
+            DocumentChunk.document_id == document_id
+        ).delete(synchronize_session=False)
+        ctx.db.commit()
+
+    ctx.progress(1, 2, "Processing document")
+    try:
+        result = rag_engine.process_document(
+            file_path=file_path,
+            document_id=document_id,
+            db=ctx.db,
+            extract_tags=extract_tags
+        )
+    except ValueError as e:
+        raise JobError(str(e))
+    logger.info(f"Document {document_id} processed by job {ctx.job_id}")
+    return {"document_id": document_id, "chunks_created": result.get("chunks_created")}
 
 
 @router.post("/upload", response_model=DocumentResponse)
-async def upload_document(
+@offload(PARSE)
+def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     project_type: Optional[str] = Form(None),
@@ -178,6 +170,7 @@ async def upload_document(
         logger.info(f"Document {document.id} uploaded by user {current_user.id}: {file.filename}")
 
         # Process in background if requested
+        job_id = None
         logger.info(f"auto_process={auto_process}, type={type(auto_process)}")
         if auto_process:
             # Check if n8n is available
@@ -195,17 +188,14 @@ async def upload_document(
                     token
                 )
             else:
-                # Use direct background processing (call directly, not via background_tasks)
-                db_url = os.getenv('DATABASE_URL')
-                logger.info(f"Starting thread processing for document {document.id}")
-                # Call directly - the function creates its own thread
-                process_document_background(
-                    document.id,
-                    str(file_path),
-                    db_url,
-                    extract_tags
+                # Process on the AI job queue (durable, bounded concurrency)
+                job = job_queue.submit(
+                    "ai.process_document",
+                    {"document_id": document.id, "file_path": str(file_path), "extract_tags": extract_tags},
+                    user_id=current_user.id,
                 )
-                logger.info(f"Processing thread launched for document {document.id}")
+                job_id = job.id
+                logger.info(f"Processing job {job_id} queued for document {document.id}")
 
         return DocumentResponse(
             document_id=document.id,
@@ -215,7 +205,8 @@ async def upload_document(
             processing_status=document.processing_status,
             tags=document.tags or [],
             summary=document.summary,
-            upload_date=document.upload_date
+            upload_date=document.upload_date,
+            job_id=job_id
         )
 
     except Exception as e:
@@ -231,9 +222,9 @@ async def upload_document(
 
 
 @router.get("/", response_model=List[DocumentResponse])
-async def list_documents(
+def list_documents(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     project_type: Optional[str] = None,
     project_id: Optional[int] = None,
     limit: int = 50
@@ -285,10 +276,10 @@ async def list_documents(
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-async def get_document(
+def get_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get document details
@@ -322,7 +313,7 @@ async def get_document(
 
 
 @router.delete("/{document_id}")
-async def delete_document(
+def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -378,7 +369,7 @@ async def delete_document(
 
 
 @router.post("/search", response_model=DocumentSearchResponse)
-async def search_documents(
+def search_documents(
     request: DocumentSearch,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -424,6 +415,7 @@ async def search_documents(
                 )
 
         # Search using RAG engine
+        from AI.rag_engine import get_rag_engine
         rag_engine = get_rag_engine()
         search_results = rag_engine.search_documents(
             query=request.query,
@@ -467,8 +459,8 @@ async def search_documents(
         )
 
 
-@router.post("/ask", response_model=DocumentAnswer)
-async def ask_question(
+@router.post("/ask", response_model=DocumentAnswer, dependencies=[Depends(rate_limit("ai_chat", per="user"))])
+def ask_question(
     request: DocumentQuestion,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -495,6 +487,7 @@ async def ask_question(
             document_ids = [row[0] for row in docs]
 
         # Get RAG answer
+        from AI.rag_engine import get_rag_engine
         rag_engine = get_rag_engine()
         result = rag_engine.answer_question(
             question=request.question,
@@ -539,9 +532,9 @@ async def ask_question(
 
 
 @router.get("/tags/all")
-async def get_all_tags(
+def get_all_tags(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all unique tags from documents
@@ -606,7 +599,7 @@ async def trigger_n8n_processing(document_id: int, token: str):
 
 
 @router.post("/process/{document_id}")
-async def process_document_endpoint(
+def process_document_endpoint(
     document_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -637,6 +630,7 @@ async def process_document_endpoint(
         db.commit()
 
         # Process with RAG engine
+        from AI.rag_engine import get_rag_engine
         rag_engine = get_rag_engine()
         rag_engine.process_document(
             file_path=document.file_path,
@@ -669,7 +663,7 @@ async def process_document_endpoint(
 
 
 @router.patch("/{document_id}/status")
-async def update_document_status(
+def update_document_status(
     document_id: int,
     status: str = Form(...),
     error: Optional[str] = Form(None),
@@ -711,7 +705,7 @@ async def update_document_status(
 
 
 @router.patch("/{document_id}/tags")
-async def update_document_tags(
+def update_document_tags(
     document_id: int,
     tags: List[str] = Form(...),
     current_user: User = Depends(get_current_user),
@@ -3,9 +3,10 @@ import json
 import logging
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import desc, or_, and_
-from sqlalchemy.orm import Session
-from APIs.Core import get_current_user, get_db
+from sqlalchemy import or_, and_, select
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
+from APIs.Core import get_current_user, get_db, get_read_db, get_async_read_db
 
 logger = logging.getLogger(__name__)
 from Models.Admin.AuditLog import AuditLog
@@ -28,13 +29,25 @@ from Schemas.Admin.LogSchema import AuditLogResponse, PaginatedAuditLogResponse
 from Schemas.Admin.UserSchema import UserRoleUpdateResponse, UserRoleUpdateRequest
 from utils.access_control import (
     get_all_user_accessible_project_ids,
-    get_all_accessible_project_ids_flat,
+    get_all_accessible_project_ids_flat_async,
     get_users_sharing_projects,
-    can_admin_manage_project
+    get_users_sharing_projects_async,
+    can_admin_manage_project,
+    invalidate_access_matrix
 )
+from utils.auth_cache import principal_cache
+from utils.audit_log import create_audit_log
+from utils.http_cache import conditional_get
+from utils.cache import cached
+from utils.fast_json import FastJSONResponse, schema_columns
+from utils.query_budget import query_budget
+from utils.pagination import CursorParams, Keyset, count_total_async
 
 adminRoute = APIRouter(prefix="/audit-logs",tags=["Admin"])
 
+# Newest first; id breaks ties between logs written in the same instant
+AUDIT_LOG_KEYSET = Keyset(AuditLog.timestamp, AuditLog.id, descending=True)
+
 # Allowed roles for admin operations (senior_admin has full access, admin has project-scoped access)
 ADMIN_ROLES = ["senior_admin", "admin"]
 
@@ -42,37 +55,6 @@ ADMIN_ROLES = ["senior_admin", "admin"]
 # HELPER FUNCTIONS
 # ===========================
 
-async def create_audit_log(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: Optional[str] = None,
-    resource_name: Optional[str] = None,
-    details: Optional[str] = None,
-    ip_address: Optional[str] = None,
-    user_agent: Optional[str] = None,
-    project_id: Optional[str] = None,
-    section: Optional[int] = None
-):
-    """Create an audit log entry with optional project tracking for access control."""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        resource_name=resource_name,
-        details=details,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        project_id=project_id,
-        section=section
-    )
-    db.add(audit_log)
-    db.commit()
-    return audit_log
-
-
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -86,7 +68,7 @@ def get_client_ip(request: Request) -> str:
 # ===========================
 
 @adminRoute.post("/grant_project_access", response_model=UserProjectAccessResponse)
-async def grant_project_access(
+def grant_project_access(
     access_data: UserProjectAccessCreate,
     request: Request,
     db: Session = Depends(get_db),
@@ -253,6 +235,7 @@ async def grant_project_access(
     db.add(new_access)
     db.commit()
     db.refresh(new_access)
+    invalidate_access_matrix(new_access.user_id)
 
     # 6. Create audit log
     try:
@@ -268,7 +251,7 @@ async def grant_project_access(
         else:
             project_name = "Unknown Project"
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="grant_access",
@@ -292,7 +275,7 @@ async def grant_project_access(
 
 
 @adminRoute.put("/update_project_access/{access_id}", response_model=UserProjectAccessResponse)
-async def update_project_access(
+def update_project_access(
     access_id: int,
     update_data: UserProjectAccessUpdate,
     request: Request,
@@ -371,6 +354,7 @@ async def update_project_access(
 
     db.commit()
     db.refresh(access_record)
+    invalidate_access_matrix(access_record.user_id)
 
     # Determine section and project_id for audit log
     if access_record.project_id:
@@ -386,7 +370,7 @@ async def update_project_access(
 
     # Create audit log
     try:
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_access",
@@ -410,7 +394,7 @@ async def update_project_access(
 
 
 @adminRoute.delete("/revoke_project_access/{access_id}")
-async def revoke_project_access(
+def revoke_project_access(
     access_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -465,13 +449,15 @@ async def revoke_project_access(
 
     # Store data before deletion
     deleted_permission = access_record.permission_level
+    revoked_user_id = access_record.user_id
 
     db.delete(access_record)
     db.commit()
+    invalidate_access_matrix(revoked_user_id)
 
     # Create audit log
     try:
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="revoke_access",
@@ -498,8 +484,9 @@ async def revoke_project_access(
 # ===========================
 
 @adminRoute.get("/users", response_model=List[UserWithProjectsResponse])
-async def get_all_users_with_projects(
-    db: Session = Depends(get_db),
+@query_budget(12)
+def get_all_users_with_projects(
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -517,10 +504,10 @@ async def get_all_users_with_projects(
     # For non-senior admins, filter to users who share projects
     if current_user.role.name != "senior_admin":
         shared_user_ids = get_users_sharing_projects(current_user, db)
-        users = db.query(User).join(Role).filter(User.id.in_(shared_user_ids)).all()
+        users = db.query(User).join(Role).options(contains_eager(User.role)).filter(User.id.in_(shared_user_ids)).all()
     else:
-        # OPTIMIZED: Get all users with their roles
-        users = db.query(User).join(Role).all()
+        # OPTIMIZED: Get all users with their roles (loaded by the join, not per user)
+        users = db.query(User).join(Role).options(contains_eager(User.role)).all()
 
     # For non-senior admins, get their accessible project IDs for filtering
     admin_accessible_projects = None
@@ -610,9 +597,9 @@ async def get_all_users_with_projects(
 
 
 @adminRoute.get("/user/{user_id}/projects", response_model=UserWithProjectsResponse)
-async def get_user_projects(
+def get_user_projects(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -729,15 +716,17 @@ async def get_audit_logs(
     action: Optional[str] = None,
     resource_type: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    paging: CursorParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get audit logs with pagination.
+    Get audit logs with pagination (skip/limit or keyset cursor).
     - senior_admin: Can see all logs
     - admin: Can see logs related to projects they have access to, plus their own actions
 
     OPTIMIZED: Returns total count for proper pagination + server-side search filtering.
+    User and role columns are selected with the log rows (no per-row lazy loads).
     """
 
     if current_user.role.name not in ADMIN_ROLES:
@@ -747,23 +736,22 @@ async def get_audit_logs(
         )
 
     try:
-        # Build query with eager loading to prevent N+1
-        query = db.query(AuditLog).join(User).join(Role)
+        filters = []
 
         # For non-senior admins, filter to show only:
         # 1. Logs for projects they have access to
         # 2. Their own actions (login, logout, etc.)
         # 3. Actions by users who share projects with them
         if current_user.role.name != "senior_admin":
-            accessible_projects = get_all_accessible_project_ids_flat(current_user, db)
-            shared_user_ids = get_users_sharing_projects(current_user, db)
+            accessible_projects = await get_all_accessible_project_ids_flat_async(current_user, db)
+            shared_user_ids = await get_users_sharing_projects_async(current_user, db)
 
             # Build filter: logs with matching project_id OR logs from shared users OR own logs
             project_filter = []
             if accessible_projects:
                 project_filter.append(AuditLog.project_id.in_(accessible_projects))
 
-            query = query.filter(
+            filters.append(
                 or_(
                     AuditLog.user_id == current_user.id,  # Own actions
                     AuditLog.user_id.in_(shared_user_ids),  # Actions by users sharing projects
@@ -773,16 +761,16 @@ async def get_audit_logs(
 
         # Apply additional filters
         if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
+            filters.append(AuditLog.user_id == user_id)
         if action:
-            query = query.filter(AuditLog.action == action)
+            filters.append(AuditLog.action == action)
         if resource_type:
-            query = query.filter(AuditLog.resource_type == resource_type)
+            filters.append(AuditLog.resource_type == resource_type)
 
         # OPTIMIZED: Server-side search filtering
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            filters.append(
                 or_(
                     User.username.ilike(search_term),
                     AuditLog.action.ilike(search_term),
@@ -791,42 +779,51 @@ async def get_audit_logs(
                 )
             )
 
-        # OPTIMIZED: Get total count before pagination
-        total_count = query.count()
+        # OPTIMIZED: Get total count before pagination (only when asked for in cursor mode)
+        total_count = await count_total_async(
+            db, paging, select(AuditLog.id).join(AuditLog.user).join(User.role).where(*filters), AuditLog
+        )
 
         # Order by timestamp descending (newest first) and apply pagination
-        audit_logs = query.order_by(desc(AuditLog.timestamp)).offset(skip).limit(limit).all()
+        # OPTIMIZED: Only the response columns are selected (no AuditLog entities)
+        # OPTIMIZED: keyset cursor on (timestamp, id) instead of OFFSET
+        rows = (await db.execute(AUDIT_LOG_KEYSET.paginate(
+            select(
+                *schema_columns(AuditLog, AuditLogResponse),
+                User.username,
+                User.email,
+                Role.name.label("role_name"),
+            )
+            .join(AuditLog.user)
+            .join(User.role)
+            .where(*filters),
+            paging, skip, limit
+        ))).all()
 
         # Format response
         result = []
-        for log in audit_logs:
-            result.append({
-                "id": log.id,
-                "user_id": log.user_id,
-                "action": log.action,
-                "resource_type": log.resource_type,
-                "resource_id": log.resource_id,
-                "resource_name": log.resource_name,
-                "details": log.details,
-                "ip_address": log.ip_address,
-                "user_agent": log.user_agent,
-                "timestamp": log.timestamp,
-                "user": {
-                    "id": log.user.id,
-                    "username": log.user.username,
-                    "email": log.user.email,
-                    "role": log.user.role.name
-                }
-            })
+        for row in rows:
+            record = row._asdict()
+            record["user"] = {
+                "id": record["user_id"],
+                "username": record.pop("username"),
+                "email": record.pop("email"),
+                "role": record.pop("role_name"),
+            }
+            result.append(record)
 
         # OPTIMIZED: Return paginated response with total count
-        return {
+        # (rows already match PaginatedAuditLogResponse; skip response_model validation)
+        return FastJSONResponse({
             "records": result,
             "total": total_count,
             "skip": skip,
-            "limit": limit
-        }
+            "limit": limit,
+            "next_cursor": AUDIT_LOG_KEYSET.next_cursor(rows, limit),
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching audit logs: {e}")
         # Return empty paginated response if there's an error
@@ -838,9 +835,19 @@ async def get_audit_logs(
         }
 
 
-@adminRoute.get("/actions")
+@cached("audit_log.actions", ttl=300, tables=(AuditLog,))
+async def load_audit_actions(db: AsyncSession):
+    return (await db.execute(select(AuditLog.action).distinct())).scalars().all()
+
+
+@cached("audit_log.resource_types", ttl=300, tables=(AuditLog,))
+async def load_audit_resource_types(db: AsyncSession):
+    return (await db.execute(select(AuditLog.resource_type).distinct())).scalars().all()
+
+
+@adminRoute.get("/actions", dependencies=[Depends(conditional_get(AuditLog))])
 async def get_available_actions(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all available actions for filtering. Admins can access this."""
@@ -853,16 +860,16 @@ async def get_available_actions(
 
     try:
         # Get distinct actions from audit logs
-        actions = db.query(AuditLog.action).distinct().all()
-        return {"actions": [action[0] for action in actions if action[0]]}
+        actions = await load_audit_actions(db)
+        return {"actions": [action for action in actions if action]}
     except Exception as e:
         logger.error(f"Error fetching actions: {e}")
         return {"actions": []}
 
 
-@adminRoute.get("/resource_types")
+@adminRoute.get("/resource_types", dependencies=[Depends(conditional_get(AuditLog))])
 async def get_available_resource_types(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all available resource types for filtering. Admins can access this."""
@@ -875,16 +882,16 @@ async def get_available_resource_types(
 
     try:
         # Get distinct resource types from audit logs
-        resource_types = db.query(AuditLog.resource_type).distinct().all()
-        return {"resource_types": [rt[0] for rt in resource_types if rt[0]]}
+        resource_types = await load_audit_resource_types(db)
+        return {"resource_types": [rt for rt in resource_types if rt]}
     except Exception as e:
         logger.error(f"Error fetching resource types: {e}")
         return {"resource_types": []}
 
 
-@adminRoute.get("/roles")
-async def get_all_roles(
-        db: Session = Depends(get_db),
+@adminRoute.get("/roles", dependencies=[Depends(conditional_get(Role))])
+def get_all_roles(
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get all available roles. Admins can access this."""
@@ -904,7 +911,7 @@ async def get_all_roles(
 
 
 @adminRoute.put("/update_user_role", response_model=UserRoleUpdateResponse)
-async def update_user_role(
+def update_user_role(
         role_data: UserRoleUpdateRequest,
         request: Request,
         db: Session = Depends(get_db),
@@ -949,9 +956,12 @@ async def update_user_role(
     db.commit()
     db.refresh(target_user)
 
+    # Cached principals still carry the old role
+    principal_cache.invalidate_user(target_user.id)
+
     # Create audit log
     try:
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_user_role",
@@ -983,7 +993,7 @@ async def update_user_role(
 # ===========================
 
 @adminRoute.put("/update_approval_stage_access", response_model=ApprovalStageAccessResponse)
-async def update_approval_stage_access(
+def update_approval_stage_access(
     access_data: ApprovalStageAccessUpdate,
     request: Request,
     db: Session = Depends(get_db),
@@ -1017,9 +1027,12 @@ async def update_approval_stage_access(
     db.commit()
     db.refresh(target_user)
 
+    # Cached principals still carry the old stage flags
+    principal_cache.invalidate_user(target_user.id)
+
     # Create audit log
     try:
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_approval_stage_access",
@@ -0,0 +1,93 @@
+"""
+Job Route - status, result download and cancellation of background jobs
+
+Long operations answer 202 Accepted with a job id (see utils.jobs); the
+client polls GET /jobs/{id} and downloads GET /jobs/{id}/result. Reads use the
+primary database: job rows change every second and replica lag would show
+stale progress.
+"""
+
+import json
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from APIs.Core import get_current_user, get_db
+from Models.Admin.Job import Job
+from Models.Admin.User import User
+from Schemas.Admin.JobSchema import JobResponse
+from utils.jobs import job_queue, SUCCEEDED
+
+jobRoute = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Roles that can see every user's jobs
+JOB_ADMIN_ROLES = ["senior_admin"]
+
+
+def _to_response(job: Job) -> JobResponse:
+    response = JobResponse.model_validate(job)
+    if job.result_data is not None:
+        response.result = json.loads(job.result_data)
+    return response
+
+
+def _get_own_job(job_id: str, db: Session, current_user: User) -> Job:
+    """Load a job the current user submitted (senior admins see all jobs)."""
+    job = db.get(Job, job_id)
+    if job is None or (job.user_id != current_user.id and current_user.role.name not in JOB_ADMIN_ROLES):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@jobRoute.get("", response_model=List[JobResponse])
+def list_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List the current user's most recent jobs."""
+    jobs = db.query(Job).filter(Job.user_id == current_user.id).order_by(Job.created_at.desc()).limit(limit).all()
+    return [_to_response(job) for job in jobs]
+
+
+@jobRoute.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get status, progress and (for non-file jobs) the result of a job."""
+    return _to_response(_get_own_job(job_id, db, current_user))
+
+
+@jobRoute.get("/{job_id}/result")
+def download_job_result(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download the file produced by a finished job."""
+    job = _get_own_job(job_id, db, current_user)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+    if not job.result_path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job has no file result")
+    if not os.path.exists(job.result_path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Job result has expired")
+    return FileResponse(job.result_path, media_type=job.result_media_type, filename=job.result_name)
+
+
+@jobRoute.delete("/{job_id}")
+def cancel_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a queued job, or ask a running job to stop."""
+    job = _get_own_job(job_id, db, current_user)
+    if not job_queue.cancel(job.id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status}")
+    return {"job_id": job.id, "cancel_requested": True}
@@ -0,0 +1,42 @@
+"""
+Metrics Route - admin-only Prometheus endpoint
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from APIs.Core import get_current_user
+from Models.Admin.User import User
+from utils.blocking import run_blocking, DB
+from utils.metrics import metrics
+
+metricsRoute = APIRouter(tags=["Metrics"])
+
+# Roles allowed to read operational metrics
+METRICS_ROLES = ["senior_admin", "admin"]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metricsRoute.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    """
+    Returns request latency, DB and event loop metrics in Prometheus text format.
+
+    - Per-route latency quantiles (p50/p95/p99), request counts by status
+    - SQL statement count and time per route
+    - Connection pool checkout wait and checked-out connections
+    - Event loop lag
+
+    With METRICS_BACKEND=redis the series of every worker process are merged,
+    labelled by `worker`.
+    """
+    if current_user.role.name not in METRICS_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to view this information"
+        )
+
+    # render_all() reads the other workers' series from Redis
+    text = await run_blocking(DB, metrics.render_all)
+    return PlainTextResponse(text, media_type=PROMETHEUS_CONTENT_TYPE)
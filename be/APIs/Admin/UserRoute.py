@@ -6,14 +6,17 @@ from pydantic import validate_email, BaseModel
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 import logging
-from APIs.Core import pwd_context, authenticate_user, create_access_token, create_refresh_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_db, get_current_user, oauth2_scheme, SECRET_KEY, ALGORITHM
+from APIs.Core import authenticate_user_async, create_access_token, create_refresh_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_db, get_current_user, oauth2_scheme, SECRET_KEY, ALGORITHM
 from Schemas.Admin.UserSchema import CreateUser
 from Models.Admin.User import User, Role
 from Models.Admin.RefreshToken import RefreshToken
 from Models.Admin.TokenBlacklist import TokenBlacklist
-from Models.Admin.AuditLog import AuditLog
 from utils.password_validator import validate_password_strength
 from utils.rate_limiter import check_auth_rate_limit
+from utils.auth_cache import principal_cache, token_blacklist_cache, token_digest
+from utils.audit_log import create_audit_log
+from utils.blocking import run_blocking, DB
+from utils.passwords import hash_password
 
 logger = logging.getLogger(__name__)
 
@@ -28,35 +31,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-async def create_audit_log(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
 # --- Pydantic Schemas ---
 class RefreshTokenRequest(BaseModel):
     """Schema for refresh token request."""
@@ -65,7 +39,7 @@ class RefreshTokenRequest(BaseModel):
 
 # --- Registration Endpoint ---
 @userRoute.post("/register")
-async def register(user: CreateUser, request: Request, db: Session = Depends(get_db)):
+def register(user: CreateUser, request: Request, db: Session = Depends(get_db)):
     # SECURITY: Rate limit registration attempts to prevent abuse
     client_ip = get_client_ip(request)
     check_auth_rate_limit(client_ip, "register")
@@ -85,7 +59,7 @@ async def register(user: CreateUser, request: Request, db: Session = Depends(get
     if not is_valid:
         raise HTTPException(status_code=400, detail=message)
 
-    hashed = pwd_context.hash(user.password)
+    hashed = hash_password(user.password)
     user_role = db.query(Role).filter(Role.name == "user").first()
     if not user_role:
         raise HTTPException(status_code=500, detail="Default 'user' role not found")
@@ -101,7 +75,7 @@ async def register(user: CreateUser, request: Request, db: Session = Depends(get
     db.refresh(new_user)
 
     # Create audit log for registration
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=new_user.id,
         action="register",
@@ -121,12 +95,18 @@ async def register(user: CreateUser, request: Request, db: Session = Depends(get
 async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # SECURITY: Rate limit login attempts to prevent brute force attacks
     client_ip = get_client_ip(request)
-    check_auth_rate_limit(client_ip, "login")
+    await run_blocking(DB, check_auth_rate_limit, client_ip, "login")
 
-    user = authenticate_user(form_data.username, form_data.password, db=db)
+    # bcrypt runs on the password pool; the event loop and DB threads stay free
+    user = await authenticate_user_async(form_data.username, form_data.password, db=db)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
+    return await run_blocking(DB, _issue_login_tokens, request, user, db)
+
+
+def _issue_login_tokens(request: Request, user: User, db: Session) -> dict:
+    """Create the token pair and audit log of a successful login."""
     # Create access token (30 minutes)
     access_token = create_access_token(
         data={"sub": user.username, "role": user.role.name},
@@ -141,7 +121,7 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
     )
 
     # Create audit log for login
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=user.id,
         action="login",
@@ -163,7 +143,7 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
 
 # --- Refresh Token Endpoint ---
 @userRoute.post("/auth/refresh")
-async def refresh_access_token(
+def refresh_access_token(
     token_request: RefreshTokenRequest,
     request: Request,
     db: Session = Depends(get_db)
@@ -187,7 +167,7 @@ async def refresh_access_token(
     """
     # SECURITY: Rate limit refresh attempts
     client_ip = get_client_ip(request)
-    check_auth_rate_limit(client_ip, "login")  # Use same limit as login
+    check_auth_rate_limit(client_ip, "refresh")
 
     try:
         # Decode and validate refresh token
@@ -200,7 +180,7 @@ async def refresh_access_token(
 
         # Check if token exists in database and is valid
         token_record = db.query(RefreshToken).filter(
-            RefreshToken.token == token_request.refresh_token,
+            RefreshToken.token_digest == token_digest(token_request.refresh_token),
             RefreshToken.revoked == False,
             RefreshToken.expires_at > datetime.now(timezone.utc)
         ).first()
@@ -232,7 +212,7 @@ async def refresh_access_token(
 
 # --- Logout Endpoint ---
 @userRoute.post("/logout")
-async def logout(
+def logout(
     request: Request,
     current_user: User = Depends(get_current_user),
     token: str = Depends(oauth2_scheme),
@@ -269,7 +249,7 @@ async def logout(
 
         # Add access token to blacklist
         blacklisted_token = TokenBlacklist(
-            token=token,
+            token_digest=token_digest(token),
             expires_at=expires_at
         )
         db.add(blacklisted_token)
@@ -278,7 +258,7 @@ async def logout(
         db.query(RefreshToken).filter(RefreshToken.user_id == current_user.id).update({"revoked": True})
 
         # Create audit log for logout
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="logout",
@@ -292,6 +272,10 @@ async def logout(
 
         db.commit()
 
+        # Keep the in-process auth caches in sync with the blacklist
+        token_blacklist_cache.add(token, exp_timestamp)
+        principal_cache.invalidate_token(token)
+
         return {"message": "Successfully logged out"}
 
     except JWTError:
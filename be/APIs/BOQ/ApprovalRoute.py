@@ -19,10 +19,12 @@ from Schemas.BOQ.ApprovalSchema import (
     BulkLogisticsDownload,
     BulkApprove
 )
-from APIs.Core import get_current_user, get_db
+from APIs.Core import get_current_user, get_db, get_read_db
 from Models.Admin.User import User
-from Models.Admin.AuditLog import AuditLog
-from utils.file_validation import validate_csv_file, validate_document_file
+from utils.file_validation import validate_csv_file_sync, validate_document_file_sync
+from utils.blocking import offload, RENDER
+from utils.audit_log import create_audit_log
+from utils.compression import compression_class
 from Models.BOQ.Approval import Approval
 
 logger = logging.getLogger(__name__)
@@ -36,34 +38,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-async def create_audit_log(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
 router = APIRouter(prefix="/approvals", tags=["Approvals"])
 
 # Use absolute path based on the backend directory location
@@ -88,7 +62,7 @@ def resolve_file_path(file_path_str: str) -> Path:
 
 
 @router.post("/upload", response_model=ApprovalResponse)
-async def upload_approval(
+def upload_approval(
     request: Request,
     csv_file: UploadFile = File(..., description="PAC CSV data file"),
     template_file: UploadFile = File(..., description="PAC Word template file"),
@@ -109,10 +83,10 @@ async def upload_approval(
         )
 
     # OPTIMIZED: Validate CSV file size and extension
-    await validate_csv_file(csv_file, max_size=50 * 1024 * 1024)  # 50 MB limit
+    validate_csv_file_sync(csv_file, max_size=50 * 1024 * 1024)  # 50 MB limit
 
     # OPTIMIZED: Validate Word template file size and extension
-    await validate_document_file(template_file, allowed_extensions=['.doc', '.docx'], max_size=10 * 1024 * 1024)  # 10 MB limit
+    validate_document_file_sync(template_file, allowed_extensions=['.doc', '.docx'], max_size=10 * 1024 * 1024)  # 10 MB limit
 
     try:
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
@@ -148,7 +122,7 @@ async def upload_approval(
         logger.info(f"Approval {approval.id} uploaded by user {current_user.id}: CSV={csv_file.filename}, Template={template_file.filename}")
 
         # Create audit log for upload
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload",
@@ -198,7 +172,7 @@ async def upload_approval(
 
 
 @router.get("/", response_model=ApprovalListResponse)
-async def list_approvals(
+def list_approvals(
     stage: Optional[str] = None,
     search: Optional[str] = None,
     project_type: Optional[str] = None,
@@ -206,7 +180,7 @@ async def list_approvals(
     page: int = 1,
     page_size: int = 50,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """List approvals filtered by stage, search term, project type, and project"""
 
@@ -288,10 +262,10 @@ async def list_approvals(
 
 
 @router.get("/{approval_id}", response_model=ApprovalResponse)
-async def get_approval(
+def get_approval(
     approval_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get single approval by ID.
@@ -339,7 +313,7 @@ async def get_approval(
 
 
 @router.post("/{approval_id}/approve")
-async def approve_item(
+def approve_item(
     approval_id: int,
     approval_data: ApprovalApprove,
     request: Request,
@@ -753,7 +727,7 @@ async def approve_item(
         logger.info(f"Approval {approval_id} moved to triggering stage by user {current_user.id}")
 
         # Create audit log for approval stage advancement
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="approve_to_triggering",
@@ -893,7 +867,7 @@ async def approve_item(
         logger.info(f"Approval {approval_id} moved to logistics stage by user {current_user.id}")
 
         # Create audit log for triggering stage advancement
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="approve_to_logistics",
@@ -920,7 +894,7 @@ async def approve_item(
         logger.info(f"Approval {approval_id} fully approved by user {current_user.id}")
 
         # Create audit log for final approval
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="approve_complete",
@@ -941,7 +915,7 @@ async def approve_item(
 
 
 @router.post("/{approval_id}/reject")
-async def reject_item(
+def reject_item(
     approval_id: int,
     rejection: ApprovalReject,
     request: Request,
@@ -963,7 +937,7 @@ async def reject_item(
         logger.info(f"Approval {approval_id} rejected by logistics team, sent back to triggering by user {current_user.id}")
 
         # Create audit log for rejection
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="reject",
@@ -991,7 +965,7 @@ async def reject_item(
         logger.info(f"Approval {approval_id} rejected by triggering team, sent back to approval by user {current_user.id}")
 
         # Create audit log for rejection
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="reject",
@@ -1017,7 +991,7 @@ async def reject_item(
         logger.info(f"Approval {approval_id} rejected at approval stage by user {current_user.id}")
 
         # Create audit log for rejection
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="reject",
@@ -1038,7 +1012,7 @@ async def reject_item(
 
 
 @router.delete("/{approval_id}")
-async def delete_approval(
+def delete_approval(
     approval_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -1082,7 +1056,7 @@ async def delete_approval(
         logger.info(f"Approval {approval_id} deleted by user {current_user.id}")
 
         # Create audit log for deletion
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -1108,10 +1082,11 @@ async def delete_approval(
 
 
 @router.get("/download/{approval_id}")
-async def download_approval_file(
+@compression_class("export")
+def download_approval_file(
     approval_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Download CSV file"""
     from fastapi.responses import FileResponse
@@ -1132,10 +1107,10 @@ async def download_approval_file(
 
 
 @router.get("/download-template/{approval_id}")
-async def download_approval_template(
+def download_approval_template(
     approval_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Download Word template file"""
     from fastapi.responses import FileResponse
@@ -1161,10 +1136,11 @@ async def download_approval_template(
 
 
 @router.get("/download-triggering/{approval_id}")
-async def download_triggering_csv(
+@compression_class("export")
+def download_triggering_csv(
     approval_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Download triggering CSV file"""
     from fastapi.responses import FileResponse
@@ -1194,10 +1170,11 @@ async def download_triggering_csv(
 
 
 @router.get("/download-logistics/{approval_id}")
-async def download_logistics_csv(
+@compression_class("export")
+def download_logistics_csv(
     approval_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Download logistics CSV file"""
     from fastapi.responses import FileResponse
@@ -1224,10 +1201,12 @@ async def download_logistics_csv(
 
 
 @router.post("/bulk-download-logistics")
-async def bulk_download_logistics(
+@compression_class("export")
+@offload(RENDER)
+def bulk_download_logistics(
     body: BulkLogisticsDownload,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Download multiple logistics CSVs combined into a single CSV"""
     import csv as csv_mod
@@ -1284,7 +1263,7 @@ async def bulk_download_logistics(
 
 
 @router.post("/bulk-approve")
-async def bulk_approve(
+def bulk_approve(
     body: BulkApprove,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -1424,7 +1403,7 @@ async def bulk_approve(
     db.commit()
 
     # Create audit log for bulk approval
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="bulk_approve",
@@ -1449,12 +1428,12 @@ async def bulk_approve(
 
 
 @router.get("/projects/{project_type}")
-async def get_projects_by_type(
+def get_projects_by_type(
     project_type: str,
     skip: int = 0,
     limit: int = 1000,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get projects list based on project type (MW or RAN) with pagination.
@@ -1482,9 +1461,9 @@ async def get_projects_by_type(
 
 
 @router.get("/user/permissions")
-async def get_user_approval_permissions(
+def get_user_approval_permissions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get current user's approval workflow stage permissions"""
     return {
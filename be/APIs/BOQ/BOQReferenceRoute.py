@@ -11,9 +11,12 @@ from sqlalchemy.orm import Session
 
 # Import PAC generator utility
 from utils.pac_generator import create_boq_zip_package
+from utils.access_control import check_project_access, get_user_accessible_project_ids
 
 # Core and Schema Imports
-from APIs.Core import _parse_interface_name, _sa_row_to_dict, get_db, get_current_user
+from APIs.Core import _parse_interface_name, _sa_row_to_dict, get_db, get_read_db, get_current_user
+from utils.blocking import offload, PARSE, RENDER
+from utils.jobs import job_handler, job_queue, job_accepted, JobContext, JobResult, EXPORT
 from Schemas.BOQ.BOQReferenceSchema import BOQReferenceOut, BOQReferenceCreate
 
 # Model Imports
@@ -24,7 +27,7 @@ from Models.BOQ.BOQReference import BOQReference
 from Models.BOQ.Site import Site
 from Models.BOQ.Dismantling import Dismantling
 from Models.BOQ.Project import Project
-from Models.Admin.User import User, UserProjectAccess
+from Models.Admin.User import User
 
 # Project Route for get_project_for_boq helper
 from APIs.BOQ.ProjectRoute import get_project_for_boq
@@ -33,52 +36,11 @@ BOQRouter = APIRouter(prefix="/boq", tags=["BOQ Generation"])
 EXPECTED_HEADERS = ["linkid", "InterfaceName", "SiteIPA", "SiteIPB"]
 
 
-# --- ADMINISTRATION & ACCESS CONTROL HELPERS ---
-# NOTE: For better code organization, these helpers could be moved to a shared 'auth_utils.py' file.
-
-def check_project_access(current_user: User, project: Project, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if a user has access to a project with the required permission level.
-    """
-    if not project:
-        return False  # No project, no access.
-    if current_user.role.name == "senior_admin":
-        return True
-
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project.pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_project_ids(current_user: User, db: Session) -> List[str]:
-    """
-    Returns a list of project IDs (pid_po) that the current user has access to.
-    """
-    if current_user.role.name == "senior_admin":
-        return [p.pid_po for p in db.query(Project.pid_po).all()]
-
-    return [
-        access.project_id for access in db.query(UserProjectAccess.project_id).filter(
-            UserProjectAccess.user_id == current_user.id
-        ).all()
-    ]
-
-
 # --- CRUD AND FILE PROCESSING ENDPOINTS ---
 
 @BOQRouter.post("/upload-reference", response_model=Dict[str, int], status_code=status.HTTP_201_CREATED)
-async def upload_reference_csv(
+@offload(PARSE)
+def upload_reference_csv(
         project_id: str = Query(..., description="The Project ID (pid_po) to associate the references with."),
         file: UploadFile = File(...),
         db: Session = Depends(get_db),
@@ -97,7 +59,7 @@ async def upload_reference_csv(
 
     # 2. Original CSV Processing Logic
     try:
-        raw = await file.read()
+        raw = file.file.read()
         text = raw.decode("utf-8-sig", errors="ignore")
         if not text.strip():
             raise HTTPException(status_code=400, detail="Empty file")
@@ -168,7 +130,7 @@ def list_references(
         limit: int = Query(100, ge=1, le=500),
         search: Optional[str] = Query(None, description="Filter by linkid/interface/site IP (case-insensitive)"),
         project_id: Optional[str] = Query(None, description="Filter by specific project ID"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     # 1. Get accessible project IDs
@@ -235,7 +197,7 @@ def create_reference(
 
 
 @BOQRouter.get("/reference/{id}", response_model=BOQReferenceOut)
-def get_reference(id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_reference(id: str, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     ref = db.query(BOQReference).filter(BOQReference.id == id).first()
     if not ref:
         raise HTTPException(status_code=404, detail=f"Reference with id '{id}' not found")
@@ -612,9 +574,10 @@ def _generate_site_csv_content(site_ip: str, lvl3_rows: List, outdoor_inventory:
 
 
 @BOQRouter.post("/generate-boq", response_model=None)
+@offload(RENDER)
 def generate_boq(
         payload: Dict[str, Any] = Body(...),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     site_a_ip = payload.get("siteA")
@@ -662,10 +625,103 @@ def generate_boq(
     }
 
 
+def build_boq_zip(db: Session, current_user: User, payload: Dict[str, Any]) -> Tuple[Any, str]:
+    """
+    Build the BOQ ZIP (CSV + PAC Word document) for one link.
+
+    Args:
+        db: Database session
+        current_user: User whose project access applies
+        payload: csv_content, siteA and linkedIp (see download_boq_zip)
+
+    Returns:
+        (ZIP file buffer, filename)
+    """
+    csv_content = payload.get("csv_content")
+    site_a_ip = payload.get("siteA")
+    linked_ip = payload.get("linkedIp") or payload.get("linkid")
+
+    if not csv_content:
+        raise HTTPException(status_code=400, detail="csv_content is required")
+    if not linked_ip:
+        raise HTTPException(status_code=400, detail="linkedIp is required")
+    if not site_a_ip:
+        raise HTTPException(status_code=400, detail="siteA is required")
+
+    # 1. Get project info from BOQReference
+    ref = db.query(BOQReference).filter(BOQReference.linkid == linked_ip).first()
+    if not ref:
+        raise HTTPException(status_code=404, detail=f"No BOQ Reference found for linked_ip '{linked_ip}'.")
+
+    project = db.query(Project).filter(Project.pid_po == ref.pid_po).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found.")
+
+    # 2. Check access
+    if not check_project_access(current_user, project, db, "view"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to download BOQ for this project."
+        )
+
+    # 3. Extract site_id from both Site A and Site B
+    site_a_formatted = site_a_ip.replace(".", "_")
+
+    # Get Site B IP from the reference
+    site_b_ip = ref.site_ip_b
+    if site_b_ip:
+        site_b_formatted = site_b_ip.replace(".", "_")
+        site_id = f"{site_a_formatted}-{site_b_formatted}"
+    else:
+        site_id = site_a_formatted
+
+    # 4. Extract model name from "Implementation services" row
+    model_name = "Implementation services - New Site"  # Default fallback
+
+    try:
+        csv_reader = csv.DictReader(StringIO(csv_content))
+
+        for row in csv_reader:
+            # Look for row with "Implementation services" in Model Name column
+            model_col = row.get('Model Name', '').strip()
+
+            if 'Implementation services' in model_col:
+                model_name = model_col
+                break
+    except Exception:
+        # Use default model_name if extraction fails
+        pass
+
+    # 5. Get template path
+    template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "PAC_Template.docx")
+
+    # 6. Generate ZIP package
+    zip_buffer = create_boq_zip_package(
+        csv_content=csv_content,
+        site_id=site_id,
+        project_name=project.project_name,
+        project_po=project.pid_po,
+        link_id=linked_ip,  # Pass link ID for certificate number
+        template_path=template_path,
+        csv_filename=f"BOQ_{site_id}.csv",
+        model_name=model_name
+    )
+    return zip_buffer, f"BOQ_{site_id}.zip"
+
+
+@job_handler("boq.download_zip", queue=EXPORT)
+def run_boq_zip(ctx: JobContext, payload: Dict[str, Any]):
+    """Job: BOQ ZIP for POST /boq/download-zip?background=true."""
+    zip_buffer, filename = build_boq_zip(ctx.db, ctx.user, payload)
+    return JobResult.from_buffer(zip_buffer, filename, "application/zip")
+
+
 @BOQRouter.post("/download-zip")
+@offload(RENDER)
 def download_boq_zip(
         payload: Dict[str, Any] = Body(...),
-        db: Session = Depends(get_db),
+        background: bool = Query(False, description="Return a job id (202) instead of the file"),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -675,87 +731,22 @@ def download_boq_zip(
     - csv_content: The CSV content (potentially edited by user)
     - siteA: Site A IP address
     - linkedIp: Linked IP identifier
-    """
-    try:
-        csv_content = payload.get("csv_content")
-        site_a_ip = payload.get("siteA")
-        linked_ip = payload.get("linkedIp") or payload.get("linkid")
-
-        if not csv_content:
-            raise HTTPException(status_code=400, detail="csv_content is required")
-        if not linked_ip:
-            raise HTTPException(status_code=400, detail="linkedIp is required")
-        if not site_a_ip:
-            raise HTTPException(status_code=400, detail="siteA is required")
-
-        # 1. Get project info from BOQReference
-        ref = db.query(BOQReference).filter(BOQReference.linkid == linked_ip).first()
-        if not ref:
-            raise HTTPException(status_code=404, detail=f"No BOQ Reference found for linked_ip '{linked_ip}'.")
-
-        project = db.query(Project).filter(Project.pid_po == ref.pid_po).first()
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found.")
-
-        # 2. Check access
-        if not check_project_access(current_user, project, db, "view"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You are not authorized to download BOQ for this project."
-            )
-
-        # 3. Extract site_id from both Site A and Site B
-        site_a_formatted = site_a_ip.replace(".", "_")
-
-        # Get Site B IP from the reference
-        site_b_ip = ref.site_ip_b
-        if site_b_ip:
-            site_b_formatted = site_b_ip.replace(".", "_")
-            site_id = f"{site_a_formatted}-{site_b_formatted}"
-        else:
-            site_id = site_a_formatted
-
-        # 4. Extract model name from "Implementation services" row
-        model_name = "Implementation services - New Site"  # Default fallback
-
-        try:
-            import csv
-            from io import StringIO
-
-            csv_reader = csv.DictReader(StringIO(csv_content))
 
-            for row in csv_reader:
-                # Look for row with "Implementation services" in Model Name column
-                model_col = row.get('Model Name', '').strip()
-
-                if 'Implementation services' in model_col:
-                    model_name = model_col
-                    break
-        except Exception:
-            # Use default model_name if extraction fails
-            pass
+    With background=true the ZIP is built on the job queue; poll /jobs/{job_id} for it.
+    """
+    if background:
+        job = job_queue.submit("boq.download_zip", {"payload": payload}, user_id=current_user.id)
+        return job_accepted(job)
 
-        # 5. Get template path
-        template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "PAC_Template.docx")
-
-        # 6. Generate ZIP package
-        zip_buffer = create_boq_zip_package(
-            csv_content=csv_content,
-            site_id=site_id,
-            project_name=project.project_name,
-            project_po=project.pid_po,
-            link_id=linked_ip,  # Pass link ID for certificate number
-            template_path=template_path,
-            csv_filename=f"BOQ_{site_id}.csv",
-            model_name=model_name
-        )
+    try:
+        zip_buffer, filename = build_boq_zip(db, current_user, payload)
 
-        # 7. Return ZIP file as download
+        # Return ZIP file as download
         return StreamingResponse(
             zip_buffer,
             media_type="application/zip",
             headers={
-                "Content-Disposition": f"attachment; filename=BOQ_{site_id}.zip"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     except HTTPException:
@@ -7,12 +7,15 @@ from io import StringIO
 import csv
 import json
 
-from APIs.Admin.AdminRoute import create_audit_log, get_client_ip
-from APIs.BOQ.ProjectRoute import get_user_accessible_projects, get_project_for_boq, check_project_access
-from APIs.Core import get_db, get_current_user
+from APIs.Admin.AdminRoute import get_client_ip
+from utils.audit_log import create_audit_log
+from APIs.BOQ.ProjectRoute import get_project_for_boq
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.Admin.User import User
 from Models.BOQ.Dismantling import Dismantling
-from utils.file_validation import validate_csv_file  # SECURITY: File upload validation
+from utils.file_validation import validate_csv_file_sync  # SECURITY: File upload validation
+from utils.access_control import get_user_accessible_projects, check_project_access
+from utils.blocking import offload, PARSE
 
 from Schemas.BOQ.DismantlingSchema import DismantlingCreate, DismantlingUpdate, DismantlingOut, DismantlingPagination
 
@@ -24,7 +27,7 @@ DismantlingRouter = APIRouter(prefix="/dismantling", tags=["Dismantling"])
 @DismantlingRouter.get("/stats")
 def get_stats(
         project_id: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -61,7 +64,7 @@ def get_all(
         limit: int = 100,
         search: Optional[str] = None,
         project_id: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -104,7 +107,7 @@ def get_all(
 
 
 @DismantlingRouter.post("", response_model=DismantlingOut)
-async def create_dismantling(
+def create_dismantling(
         obj_in: DismantlingCreate,
         request: Request,
         db: Session = Depends(get_db),
@@ -115,7 +118,7 @@ async def create_dismantling(
     """
     # Check project access
     project = get_project_for_boq(obj_in.pid_po, db)
-    if not project or not check_project_access(current_user, project, db, "edit"):
+    if not project or not check_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to create dismantling records for this project."
@@ -127,7 +130,7 @@ async def create_dismantling(
     db.refresh(db_obj)
 
     # Create audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="create",
@@ -144,7 +147,7 @@ async def create_dismantling(
 @DismantlingRouter.get("/{id}", response_model=DismantlingOut)
 def get_by_id(
         id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -156,7 +159,7 @@ def get_by_id(
 
     # Check project access
     project = get_project_for_boq(obj.pid_po, db)
-    if not project or not check_project_access(current_user, project, db, "view"):
+    if not project or not check_project_access(current_user, project, db, "view", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view this record."
@@ -165,7 +168,7 @@ def get_by_id(
 
 
 @DismantlingRouter.put("/{id}", response_model=DismantlingOut)
-async def update_dismantling(
+def update_dismantling(
         id: int,
         obj_in: DismantlingUpdate,
         request: Request,
@@ -181,7 +184,7 @@ async def update_dismantling(
 
     # Check project access
     project = get_project_for_boq(db_obj.pid_po, db)
-    if not project or not check_project_access(current_user, project, db, "edit"):
+    if not project or not check_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to update this record."
@@ -197,7 +200,7 @@ async def update_dismantling(
     db.refresh(db_obj)
 
     # Create audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -212,7 +215,7 @@ async def update_dismantling(
 
 
 @DismantlingRouter.delete("/{id}")
-async def delete_dismantling(
+def delete_dismantling(
         id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -227,7 +230,7 @@ async def delete_dismantling(
 
     # Check project access
     project = get_project_for_boq(db_obj.pid_po, db)
-    if not project or not check_project_access(current_user, project, db, "all"):
+    if not project or not check_project_access(current_user, project, db, "all", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to delete this record."
@@ -237,7 +240,7 @@ async def delete_dismantling(
     db.commit()
 
     # Create audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -253,7 +256,8 @@ async def delete_dismantling(
 
 # ---------- CSV Upload with Access Control and Logging ----------
 @DismantlingRouter.post("/upload-csv")
-async def upload_csv(
+@offload(PARSE)
+def upload_csv(
         file: UploadFile = File(...),
         pid_po: str = Form(...),
         request: Request = None,
@@ -266,16 +270,16 @@ async def upload_csv(
     """
     # Check project access upfront
     project = get_project_for_boq(pid_po, db)
-    if not project or not check_project_access(current_user, project, db, "edit"):
+    if not project or not check_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to upload dismantling records for this project."
         )
 
     # SECURITY: Validate file size and type
-    await validate_csv_file(file, max_size=50 * 1024 * 1024)  # 50 MB limit
+    validate_csv_file_sync(file, max_size=50 * 1024 * 1024)  # 50 MB limit
 
-    content = await file.read()
+    content = file.file.read()
     csv_reader = csv.reader(StringIO(content.decode("utf-8")))
 
     # Get header row
@@ -321,7 +325,7 @@ async def upload_csv(
     db.commit()
 
     # Create a single audit log for the entire upload operation
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="upload_csv",
@@ -334,7 +338,7 @@ async def upload_csv(
     return {"inserted": inserted_count, "message": f"Successfully uploaded {inserted_count} dismantling records for project {pid_po}"}
 
 @DismantlingRouter.delete("/delete-all-dismantling/{project_id}")
-async def delete_all_dismantling_for_project(
+def delete_all_dismantling_for_project(
         project_id: str,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
@@ -349,7 +353,7 @@ async def delete_all_dismantling_for_project(
     """
     # Check project access
     project = get_project_for_boq(project_id, db)
-    if not project or not check_project_access(current_user, project, db, "all"):
+    if not project or not check_project_access(current_user, project, db, "all", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to delete dismantling records for this project."
@@ -3,57 +3,43 @@ import json
 import logging
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status, Request, Form
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from typing import Optional
 import csv
 from io import StringIO
 
 logger = logging.getLogger(__name__)
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_async_read_db, get_current_user
 from Models.BOQ.Inventory import Inventory
 from Models.BOQ.Site import Site
 from Models.BOQ.Project import Project
-from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
+from Models.Admin.User import User
 from Schemas.BOQ.InventoySchema import CreateInventory, InventoryOut, InventoryPagination, SitesResponse, \
     UploadResponse, SiteOut, AddSite
-from utils.file_validation import validate_csv_file  # SECURITY: File upload validation
+from utils.file_validation import validate_csv_file_sync  # SECURITY: File upload validation
+from utils.access_control import (
+    check_project_access,
+    filter_query_by_project_access,
+    filter_query_by_project_access_async,
+)
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
+from utils.query_budget import query_budget
+from utils.pagination import CursorParams, Keyset, count_total_async
 
 inventoryRoute = APIRouter(tags=["Inventory/Sites"])
 
+# Sort orders of the paginated lists (see utils.pagination)
+SITE_KEYSET = Keyset(Site.site_id, Site.id)
+INVENTORY_KEYSET = Keyset(Inventory.id)
+
 
 # ===========================
 # HELPER FUNCTIONS
 # ===========================
 
-async def create_audit_log(
-        db: Session,
-        user_id: int,
-        action: str,
-        resource_type: str,
-        resource_id: Optional[str] = None,
-        resource_name: Optional[str] = None,
-        details: Optional[str] = None,
-        ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
-):
-    """Create an audit log entry."""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        resource_name=resource_name,
-        details=details,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    db.add(audit_log)
-    db.commit()
-    return audit_log
-
-
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -62,72 +48,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def check_project_access(current_user: User, project: Project, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project with required permission level.
-
-    Args:
-        current_user: The current user
-        project: The project to check access for
-        db: Database session
-        required_permission: Required permission level ("view", "edit", "all")
-
-    Returns:
-        bool: True if user has access, False otherwise
-    """
-    # Senior admin has all permissions
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project.pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_projects(current_user: User, db: Session):
-    """
-    Get all projects that the current user has access to.
-
-    Args:
-        current_user: The current user
-        db: Database session
-
-    Returns:
-        List[Project]: List of accessible projects
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(Project).all()
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.project_id for access in user_accesses]
-
-    # Return projects that match those IDs
-    return db.query(Project).filter(Project.pid_po.in_(accessible_project_ids)).all()
-
-
 def check_site_access(current_user: User, site: Site, db: Session, required_permission: str = "view"):
     """
     Check if user has access to a site based on project access.
@@ -144,39 +64,7 @@ def filter_sites_by_user_access(current_user: User, query, db: Session):
     """
     Filter sites query based on user's project access.
     """
-    if current_user.role.name == "senior_admin":
-        return query
-
-    # Get accessible project IDs
-    accessible_projects = get_user_accessible_projects(current_user, db)
-    accessible_project_ids = [project.pid_po for project in accessible_projects]
-
-    if not accessible_project_ids:
-        # User has no project access, return empty query
-        return query.filter(Site.id == -1)  # This will return no results
-
-    # Filter sites by accessible projects
-    return query.filter(Site.project_id.in_(accessible_project_ids))
-
-
-def filter_inventory_by_user_access(current_user: User, query, db: Session):
-    """
-    Filter inventory query based on user's project access through sites.
-    """
-    if current_user.role.name == "senior_admin":
-        return query
-
-    # Get accessible project IDs
-    accessible_projects = get_user_accessible_projects(current_user, db)
-    accessible_project_ids = [project.pid_po for project in accessible_projects]
-
-    if not accessible_project_ids:
-        # User has no project access, return empty query
-        return query.filter(Inventory.id == -1)  # This will return no results
-
-
-    # Filter inventory by accessible sites
-    return query.filter(Inventory.pid_po.in_(accessible_project_ids))
+    return filter_query_by_project_access(current_user, query, Site.project_id, db, "boq")
 
 
 # ----------------------------
@@ -184,7 +72,7 @@ def filter_inventory_by_user_access(current_user: User, query, db: Session):
 # ----------------------------
 
 @inventoryRoute.post("/add-site", response_model=AddSite)
-async def add_site(
+def add_site(
         site_data: AddSite,
         request: Request,
         db: Session = Depends(get_db),
@@ -221,7 +109,7 @@ async def add_site(
         db.refresh(new_site)
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_site",
@@ -251,8 +139,9 @@ async def add_site(
 
 
 @inventoryRoute.get("/sites/stats")
-def get_sites_stats(
-        db: Session = Depends(get_db),
+@query_budget(5)
+async def get_sites_stats(
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -260,18 +149,13 @@ def get_sites_stats(
     IMPORTANT: This must be defined BEFORE /sites endpoint to avoid route conflicts.
     """
     try:
-        from sqlalchemy import func
-
-        query = db.query(Site)
+        # Both counts in one statement
+        stmt = select(func.count(Site.id), func.count(func.distinct(Site.project_id)))
 
         # Filter by user access
-        query = filter_sites_by_user_access(current_user, query, db)
-
-        total_sites = query.count()
+        stmt = await filter_query_by_project_access_async(current_user, stmt, Site.project_id, db, "boq")
 
-        # Count unique projects more efficiently
-        unique_projects_query = query.with_entities(func.count(func.distinct(Site.project_id)))
-        total_projects = unique_projects_query.scalar()
+        total_sites, total_projects = (await db.execute(stmt)).one()
 
         return {
             "total_sites": total_sites,
@@ -285,24 +169,27 @@ def get_sites_stats(
 
 
 @inventoryRoute.get("/sites", response_model=SitesResponse)
-def get_sites_paginated(
-        db: Session = Depends(get_db),
+@query_budget(6)
+async def get_sites_paginated(
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: User = Depends(get_current_user),
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=500),
         search: Optional[str] = Query(None),
-        project_id: Optional[str] = Query(None)
+        project_id: Optional[str] = Query(None),
+        paging: CursorParams = Depends()
 ):
     """
     Retrieves a paginated list of sites with optional search functionality.
+    Pages by skip/limit or by keyset cursor (next_cursor).
     Users can only see sites from projects they have access to.
     Optionally filter by project_id.
     """
     try:
-        query = db.query(Site)
+        query = select(Site)
 
         # Filter by user access
-        query = filter_sites_by_user_access(current_user, query, db)
+        query = await filter_query_by_project_access_async(current_user, query, Site.project_id, db, "boq")
 
         # Filter by project if specified
         if project_id:
@@ -318,8 +205,9 @@ def get_sites_paginated(
                 )
             )
 
-        total_count = query.count()
-        sites = query.order_by(Site.site_id).offset(skip).limit(limit).all()
+        # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+        total_count = await count_total_async(db, paging, query, Site)
+        sites = (await db.execute(SITE_KEYSET.paginate(query, paging, skip, limit))).scalars().all()
         records = [
             SiteOut(
                 id=site.id,
@@ -329,7 +217,11 @@ def get_sites_paginated(
             ) for site in sites
         ]
 
-        return SitesResponse(records=records, total=total_count)
+        return SitesResponse(
+            records=records, total=total_count, next_cursor=SITE_KEYSET.next_cursor(sites, limit)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -338,7 +230,7 @@ def get_sites_paginated(
 
 
 @inventoryRoute.put("/update-site/{id}", response_model=AddSite)
-async def update_site(
+def update_site(
         id: int,
         site_data: AddSite,
         request: Request,
@@ -373,7 +265,7 @@ async def update_site(
         db.refresh(site)
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_site",
@@ -403,7 +295,7 @@ async def update_site(
 
 
 @inventoryRoute.delete("/delete-site/{site_id}")
-async def delete_site(
+def delete_site(
         site_id: str,
         request: Request,
         db: Session = Depends(get_db),
@@ -438,7 +330,7 @@ async def delete_site(
         db.commit()
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_site",
@@ -463,7 +355,8 @@ async def delete_site(
 
 
 @inventoryRoute.post("/sites/upload-csv", response_model=UploadResponse)
-async def upload_sites_csv(
+@offload(PARSE)
+def upload_sites_csv(
         file: UploadFile = File(...),
         pid_po: str = Form(...),
         request: Request = None,
@@ -488,10 +381,10 @@ async def upload_sites_csv(
         )
 
     # SECURITY: Validate file size and type
-    await validate_csv_file(file, max_size=50 * 1024 * 1024)  # 50 MB limit
+    validate_csv_file_sync(file, max_size=50 * 1024 * 1024)  # 50 MB limit
 
     try:
-        content = await file.read()
+        content = file.file.read()
         csv_content = StringIO(content.decode('utf-8'))
         csv_reader = csv.reader(csv_content)
 
@@ -560,7 +453,7 @@ async def upload_sites_csv(
         db.commit()
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_upload_sites",
@@ -590,7 +483,7 @@ async def upload_sites_csv(
 def get_all_sites_legacy(
         skip: int = 0,
         limit: int = 10000,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -627,7 +520,7 @@ def get_all_sites_legacy(
 # ----------------------------
 
 @inventoryRoute.post("/create-inventory", response_model=InventoryOut)
-async def create_inventory(
+def create_inventory(
         inventory_data: CreateInventory,
         request: Request,
         db: Session = Depends(get_db),
@@ -676,7 +569,7 @@ async def create_inventory(
         db.refresh(new_inventory)
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_inventory",
@@ -703,9 +596,10 @@ async def create_inventory(
 
 
 @inventoryRoute.get("/inventory/stats")
-def get_inventory_stats(
+@query_budget(5)
+async def get_inventory_stats(
         project_id: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -713,22 +607,17 @@ def get_inventory_stats(
     Optionally filter by project_id.
     """
     try:
-        from sqlalchemy import func
-
-        query = db.query(Inventory)
+        # Both counts in one statement
+        stmt = select(func.count(Inventory.id), func.count(func.distinct(Inventory.site_id)))
 
         # Filter by user access
-        query = filter_inventory_by_user_access(current_user, query, db)
+        stmt = await filter_query_by_project_access_async(current_user, stmt, Inventory.pid_po, db, "boq")
 
         # Filter by project if specified
         if project_id:
-            query = query.filter(Inventory.pid_po == project_id)
-
-        total_items = query.count()
+            stmt = stmt.filter(Inventory.pid_po == project_id)
 
-        # Count unique sites more efficiently
-        unique_sites_query = query.with_entities(func.count(func.distinct(Inventory.site_id)))
-        unique_sites = unique_sites_query.scalar()
+        total_items, unique_sites = (await db.execute(stmt)).one()
 
         return {
             "total_items": total_items,
@@ -742,24 +631,26 @@ def get_inventory_stats(
 
 
 @inventoryRoute.get("/inventory", response_model=InventoryPagination)
-def get_inventory(
+@query_budget(6)
+async def get_inventory(
         skip: int = 0,
         limit: int = 50,
         search: Optional[str] = None,
         project_id: Optional[str] = None,
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
-    Get inventory with pagination and search.
+    Get inventory with pagination (skip/limit or keyset cursor) and search.
     Users can only see inventory from sites in projects they have access to.
     Optionally filter by project_id.
     """
     try:
-        query = db.query(Inventory)
+        query = select(Inventory)
 
         # Filter by user access
-        query = filter_inventory_by_user_access(current_user, query, db)
+        query = await filter_query_by_project_access_async(current_user, query, Inventory.pid_po, db, "boq")
 
         # Filter by project if specified
         if project_id:
@@ -773,9 +664,12 @@ def get_inventory(
                     Inventory.site_name.like(search_pattern)
                 )
             )
-        total_count = query.count()
-        records = query.order_by(Inventory.id).offset(skip).limit(limit).all()
-        return {"records": records, "total": total_count}
+        # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+        total_count = await count_total_async(db, paging, query, Inventory)
+        records = (await db.execute(INVENTORY_KEYSET.paginate(query, paging, skip, limit))).scalars().all()
+        return {"records": records, "total": total_count, "next_cursor": INVENTORY_KEYSET.next_cursor(records, limit)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -784,7 +678,7 @@ def get_inventory(
 
 
 @inventoryRoute.put("/update-inventory/{inventory_id}", response_model=InventoryOut)
-async def update_inventory(
+def update_inventory(
         inventory_id: int,
         inventory_data: CreateInventory,
         request: Request,
@@ -829,7 +723,7 @@ async def update_inventory(
         db.refresh(inventory)
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_inventory",
@@ -854,7 +748,7 @@ async def update_inventory(
 
 
 @inventoryRoute.delete("/delete-inventory/{inventory_id}")
-async def delete_inventory(
+def delete_inventory(
         inventory_id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -894,7 +788,7 @@ async def delete_inventory(
         db.commit()
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_inventory",
@@ -920,7 +814,8 @@ async def delete_inventory(
 # ----------------------------
 
 @inventoryRoute.post("/upload-inventory-csv")
-async def upload_inventory_csv(
+@offload(PARSE)
+def upload_inventory_csv(
         file: UploadFile = File(...),
         pid_po: str = Form(...),
         request: Request = None,
@@ -945,10 +840,10 @@ async def upload_inventory_csv(
         )
 
     # SECURITY: Validate file size and type
-    await validate_csv_file(file, max_size=50 * 1024 * 1024)  # 50 MB limit
+    validate_csv_file_sync(file, max_size=50 * 1024 * 1024)  # 50 MB limit
 
 
-    content = await file.read()
+    content = file.file.read()
     csv_reader = csv.DictReader(StringIO(content.decode("utf-8")))
 
     # Define a consistent mapping for CSV headers to model fields
@@ -1010,7 +905,7 @@ async def upload_inventory_csv(
 
 
 @inventoryRoute.delete("/delete-all-sites/{project_id}")
-async def delete_all_sites_for_project(
+def delete_all_sites_for_project(
         project_id: str,
         request: Request,
         db: Session = Depends(get_db),
@@ -1060,7 +955,7 @@ async def delete_all_sites_for_project(
         db.commit()
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_all_sites",
@@ -1092,7 +987,7 @@ async def delete_all_sites_for_project(
 
 
 @inventoryRoute.delete("/delete-all-inventory/{project_id}")
-async def delete_all_inventory_for_project(
+def delete_all_inventory_for_project(
         project_id: str,
         request: Request,
         db: Session = Depends(get_db),
@@ -1131,7 +1026,7 @@ async def delete_all_inventory_for_project(
         db.commit()
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_all_inventory",
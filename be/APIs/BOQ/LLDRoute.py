@@ -1,23 +1,24 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
 import csv
 import json
 import logging
 from io import StringIO
 
 # Core and Schema Imports
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.BOQ.LLD import LLD
-from Models.Admin.AuditLog import AuditLog
 from Schemas.BOQ.LLDSchema import LLDCreate, LLDOut, LLDListOut
 
 # Model Imports for Authentication & Authorization
-from Models.Admin.User import User, UserProjectAccess
+from Models.Admin.User import User
 from Models.BOQ.Project import Project
 
 # File validation utility
-from utils.file_validation import validate_csv_file
+from utils.file_validation import validate_csv_file_sync
+from utils.access_control import check_project_access, get_user_accessible_project_ids
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
 
 logger = logging.getLogger(__name__)
 lld_router = APIRouter(prefix="/lld", tags=["LLD"])
@@ -31,77 +32,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-# --- ADMINISTRATION & ACCESS CONTROL HELPERS ---
-# NOTE: For better code organization, these helpers could be moved to a shared 'auth_utils.py' file.
-
-def check_project_access(current_user: User, project: Project, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if a user has access to a project with the required permission level.
-    """
-    if not project:
-        return False  # No project, no access.
-    if current_user.role.name == "senior_admin":
-        return True
-
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project.pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-def get_user_accessible_project_ids(current_user: User, db: Session) -> List[str]:
-    """
-    Returns a list of project IDs (pid_po) that the current user has access to.
-    """
-    if current_user.role.name == "senior_admin":
-        # Return all project IDs if the user is a senior admin
-        return [p.pid_po for p in db.query(Project.pid_po).all()]
-
-    # Otherwise, return only the IDs the user has explicit access to
-    return [
-        access.project_id for access in db.query(UserProjectAccess.project_id).filter(
-            UserProjectAccess.user_id == current_user.id
-        ).all()
-    ]
-
-
 # ---------------- GET (list with pagination + search) ----------------
 @lld_router.get("", response_model=LLDListOut)
 def get_lld(
@@ -109,7 +39,7 @@ def get_lld(
     limit: int = 100,
     link_id: str = "",
     project_id: str = "",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     # 1. Get projects the user can access
@@ -162,7 +92,7 @@ def create_lld(
         db.refresh(db_obj)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -212,7 +142,7 @@ def update_lld(
     db.refresh(db_obj)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -254,7 +184,7 @@ def delete_lld(
     db.commit()
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -270,7 +200,8 @@ def delete_lld(
 
 # ---------------- CSV Upload ----------------
 @lld_router.post("/upload-csv")
-async def upload_csv(
+@offload(PARSE)
+def upload_csv(
     request: Request,
     project_id: str = Query(..., description="The Project ID (pid_po) to associate the LLD records with."),
     file: UploadFile = File(...),
@@ -295,7 +226,7 @@ async def upload_csv(
 
     # 2. Process CSV File
     # OPTIMIZED: Validate CSV file size and extension (50 MB limit)
-    await validate_csv_file(file, max_size=50 * 1024 * 1024)
+    validate_csv_file_sync(file, max_size=50 * 1024 * 1024)
 
     try:
         content = file.file.read().decode("utf-8-sig")
@@ -346,7 +277,7 @@ async def upload_csv(
         inserted = len(to_insert)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_csv",
@@ -366,7 +297,7 @@ async def upload_csv(
 
 
 @lld_router.delete("/delete-all-lld/{project_id}")
-async def delete_all_lld_for_project(
+def delete_all_lld_for_project(
         project_id: str,
         request: Request,
         db: Session = Depends(get_db),
@@ -405,7 +336,7 @@ async def delete_all_lld_for_project(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_all",
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from typing import List
 import json
 import logging
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.BOQ.Levels import Lvl3, ItemsForLvl3
 from Models.BOQ.Project import Project
-from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
+from Models.Admin.User import User
 from Schemas.BOQ.LevelsSchema import Lvl3Create, Lvl3Out, Lvl3Update, ItemsForLvl3Create, ItemsForLvl3Out
+from utils.access_control import check_project_access, get_user_accessible_project_ids, get_access_matrix
+from utils.audit_log import create_audit_log
+from utils.http_cache import conditional_get
+from utils.fast_json import FastJSONResponse, rows_to_dicts, schema_columns
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/lvl3", tags=["Lvl3"])
@@ -23,71 +26,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-def check_project_access(current_user: User, project_id: str, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project with required permission level.
-
-    Args:
-        current_user: The current user
-        project_id: The project ID to check access for
-        db: Database session
-        required_permission: Required permission level ("view", "edit", "all")
-
-    Returns:
-        bool: True if user has access, False otherwise
-    """
-    # Senior admin has all permissions
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project_id
-    ).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
 def verify_project_exists_and_access(project_id: str, current_user: User, db: Session,
                                      required_permission: str = "view"):
     """
@@ -118,30 +56,6 @@ def verify_project_exists_and_access(project_id: str, current_user: User, db: Se
     return project
 
 
-def get_user_accessible_projects(current_user: User, db: Session) -> List[str]:
-    """
-    Get all project IDs that the current user has access to.
-
-    Args:
-        current_user: The current user
-        db: Database session
-
-    Returns:
-        List[str]: List of accessible project IDs
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        projects = db.query(Project).all()
-        return [project.pid_po for project in projects]
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    return [access.project_id for access in user_accesses]
-
-
 # ---------- CREATE LVL3 ----------
 @router.post("/create", response_model=Lvl3Out)
 def create_lvl3(
@@ -176,7 +90,7 @@ def create_lvl3(
         db.refresh(lvl3)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -197,12 +111,20 @@ def create_lvl3(
         )
 
 
+def _parse_service_type(raw):
+    """Decode the stored service_type JSON like the Lvl3 / ItemsForLvl3 properties do."""
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
 # ---------- GET ALL ----------
-@router.get("/", response_model=List[Lvl3Out])
+@router.get("/", response_model=List[Lvl3Out], dependencies=[Depends(conditional_get(Lvl3, ItemsForLvl3, Project))])
 def get_all_lvl3(
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -213,21 +135,45 @@ def get_all_lvl3(
     OPTIMIZED: Added pagination (skip/limit) to prevent memory issues with large datasets.
     """
     try:
-        accessible_project_ids = get_user_accessible_projects(current_user, db)
+        accessible_project_ids = get_user_accessible_project_ids(current_user, db)
 
         if not accessible_project_ids:
             return []
 
         # OPTIMIZED: Added pagination with offset and limit
         # MSSQL requires ORDER BY when using OFFSET/LIMIT
-        # OPTIMIZED: Use joinedload to eagerly load items and prevent N+1 queries
-        lvl3_records = db.query(Lvl3).options(
-            joinedload(Lvl3.items)
-        ).filter(
-            Lvl3.project_id.in_(accessible_project_ids)
-        ).order_by(Lvl3.id).offset(skip).limit(limit).all()
-
-        return lvl3_records
+        # OPTIMIZED: Column-projected queries (page of Lvl3 rows + their items in one
+        # query) built straight into response dicts, no ORM objects or response_model pass
+        lvl3_records = rows_to_dicts(
+            db.query(
+                *schema_columns(Lvl3, Lvl3Out),
+                Lvl3._service_type.label("service_type"),
+            ).filter(
+                Lvl3.project_id.in_(accessible_project_ids)
+            ).order_by(Lvl3.id).offset(skip).limit(limit)
+        )
+        if not lvl3_records:
+            return FastJSONResponse([])
+
+        items_by_lvl3 = {}
+        for record in lvl3_records:
+            record["service_type"] = _parse_service_type(record["service_type"])
+            record["items"] = items_by_lvl3[record["id"]] = []
+
+        items = rows_to_dicts(
+            db.query(
+                ItemsForLvl3.lvl3_id,
+                *schema_columns(ItemsForLvl3, ItemsForLvl3Out),
+                ItemsForLvl3._service_type.label("service_type"),
+            ).filter(
+                ItemsForLvl3.lvl3_id.in_(list(items_by_lvl3))
+            ).order_by(ItemsForLvl3.id)
+        )
+        for item in items:
+            item["service_type"] = _parse_service_type(item["service_type"])
+            items_by_lvl3[item.pop("lvl3_id")].append(item)
+
+        return FastJSONResponse(lvl3_records)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -236,10 +182,10 @@ def get_all_lvl3(
 
 
 # ---------- GET BY ID ----------
-@router.get("/{lvl3_id}", response_model=Lvl3Out)
+@router.get("/{lvl3_id}", response_model=Lvl3Out, dependencies=[Depends(conditional_get(Lvl3, ItemsForLvl3))])
 def get_lvl3_by_id(
         lvl3_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -296,7 +242,7 @@ def update_lvl3(
         db.refresh(lvl3)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -350,7 +296,7 @@ def delete_lvl3(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -417,7 +363,7 @@ def add_item_to_lvl3(
         db.refresh(new_item)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -498,7 +444,7 @@ def bulk_add_items_to_lvl3(
         db.refresh(lvl3)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_create",
@@ -561,7 +507,7 @@ def update_item_for_lvl3(
         db.refresh(item)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -622,7 +568,7 @@ def delete_item_for_lvl3(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -644,10 +590,10 @@ def delete_item_for_lvl3(
 
 
 # ---------- SEARCH ITEMS ----------
-@router.get("/search/items", response_model=List[ItemsForLvl3Out])
+@router.get("/search/items", response_model=List[ItemsForLvl3Out], dependencies=[Depends(conditional_get(Lvl3, ItemsForLvl3, Project))])
 def search_items(
         name: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -655,7 +601,7 @@ def search_items(
     Users can only search items from projects they have access to.
     """
     try:
-        accessible_project_ids = get_user_accessible_projects(current_user, db)
+        accessible_project_ids = get_user_accessible_project_ids(current_user, db)
 
         if not accessible_project_ids:
             return []
@@ -678,10 +624,10 @@ def search_items(
 
 
 # ---------- GET ITEMS BY LVL3 ID ----------
-@router.get("/{lvl3_id}/items", response_model=List[ItemsForLvl3Out])
+@router.get("/{lvl3_id}/items", response_model=List[ItemsForLvl3Out], dependencies=[Depends(conditional_get(Lvl3, ItemsForLvl3))])
 def get_items_for_lvl3(
         lvl3_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -713,7 +659,7 @@ def get_items_for_lvl3(
 @router.get("/check_permission/{lvl3_id}")
 def check_lvl3_permission(
         lvl3_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -737,12 +683,9 @@ def check_lvl3_permission(
         }
 
     # Check access for other users
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == lvl3.project_id
-    ).first()
+    permission_level = get_access_matrix(current_user, db).permission_level("boq", lvl3.project_id)
 
-    if not access:
+    if not permission_level:
         return {
             "lvl3_id": lvl3_id,
             "project_id": lvl3.project_id,
@@ -756,13 +699,13 @@ def check_lvl3_permission(
     # Determine capabilities based on permission level (not role)
     # Users with "edit" or "all" permission can edit
     # Users with "all" permission can delete
-    can_edit = access.permission_level in ["edit", "all"]
-    can_delete = access.permission_level == "all"
+    can_edit = permission_level in ["edit", "all"]
+    can_delete = permission_level == "all"
 
     return {
         "lvl3_id": lvl3_id,
         "project_id": lvl3.project_id,
-        "permission_level": access.permission_level,
+        "permission_level": permission_level,
         "can_view": True,
         "can_edit": can_edit,
         "can_delete": can_delete,
@@ -3,13 +3,13 @@ from sqlalchemy.orm import Session
 import json
 import logging
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.BOQ.Levels import Lvl1
 from Models.Admin.User import User
-from Models.Admin.AuditLog import AuditLog
 from Schemas.BOQ.LevelsSchema import (
     Lvl1Create, Lvl1Out,
 )
+from utils.audit_log import create_audit_log
 
 logger = logging.getLogger(__name__)
 levelsRouter = APIRouter(tags=["Levels"])
@@ -23,34 +23,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
 # ---------------------------- Level 1 ----------------------------
 
 @levelsRouter.post("/create-lvl1")
@@ -69,7 +41,7 @@ def create_lvl1_entry(data: Lvl1Create, request: Request, db: Session = Depends(
     db.refresh(lvl1)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="create",
@@ -87,7 +59,7 @@ def create_lvl1_entry(data: Lvl1Create, request: Request, db: Session = Depends(
 def get_all_lvl1(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -128,7 +100,7 @@ def update_lvl1(id: int, data: Lvl1Create, request: Request, db: Session = Depen
     db.refresh(lvl1)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -156,7 +128,7 @@ def delete_lvl1(id: int, request: Request, db: Session = Depends(get_db), curren
     db.commit()
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -8,13 +8,14 @@ import json
 import logging
 
 # Core and Schema Imports
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
 from Schemas.BOQ.POReportSchema import POReportOut, POReportCreate, POReportUpdate, POReportUploadResponse
 
 # Model Imports
 from Models.BOQ.POReport import POReport
 from Models.Admin.User import User
-from Models.Admin.AuditLog import AuditLog
 
 logger = logging.getLogger(__name__)
 POReportRouter = APIRouter(prefix="/po-report", tags=["PO Report"])
@@ -28,35 +29,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
 def require_approval_access(current_user: User = Depends(get_current_user)) -> User:
     """
     Dependency that checks if user has access to any approval stage.
@@ -90,7 +62,7 @@ def list_reports(
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=500),
         search: Optional[str] = Query(None, description="Search across all fields"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(require_approval_access)
 ):
     """
@@ -141,7 +113,7 @@ def create_report(
     db.refresh(new_report)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="create",
@@ -159,7 +131,7 @@ def create_report(
 @POReportRouter.get("/report/{id}", response_model=POReportOut)
 def get_report(
         id: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(require_approval_access)
 ):
     """
@@ -203,7 +175,7 @@ def update_report(
     db.refresh(report)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -242,7 +214,7 @@ def delete_report(
     db.commit()
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -258,7 +230,8 @@ def delete_report(
 
 
 @POReportRouter.post("/upload-csv", response_model=POReportUploadResponse)
-async def upload_csv(
+@offload(PARSE)
+def upload_csv(
         request: Request,
         file: UploadFile = File(...),
         db: Session = Depends(get_db),
@@ -276,7 +249,7 @@ async def upload_csv(
 
     try:
         # Read CSV file with multiple encoding attempts
-        contents = await file.read()
+        contents = file.file.read()
 
         # Try different encodings
         encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
@@ -381,7 +354,7 @@ async def upload_csv(
             db.commit()
 
         # Create audit log for upload
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_csv",
@@ -442,7 +415,7 @@ def delete_all_reports(
     db.commit()
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete_all",
@@ -20,11 +20,16 @@ from Schemas.BOQ.PriceBookSchema import (
     PriceBookCreate,
     PriceBookUpdate
 )
-from APIs.Core import get_current_user, get_db
+from APIs.Core import get_current_user, get_db, get_read_db
 from Models.Admin.User import User
 from Models.BOQ.PriceBook import PriceBook
-from Models.Admin.AuditLog import AuditLog
-from utils.file_validation import validate_csv_file
+from utils.file_validation import validate_csv_file_sync
+from utils.blocking import offload, PARSE, RENDER
+from utils.audit_log import create_audit_log
+from utils.http_cache import conditional_get
+from utils.pagination import CursorParams, Keyset, count_total
+from utils.compression import compression_class
+from utils.cache import cached
 
 logger = logging.getLogger(__name__)
 
@@ -37,36 +42,11 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-async def create_audit_log(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
 router = APIRouter(prefix="/price-books", tags=["Price Books"])
 
+# Newest first (see utils.pagination)
+PRICE_BOOK_KEYSET = Keyset(PriceBook.created_at, PriceBook.id, descending=True)
+
 
 def require_approval_access(current_user: User = Depends(get_current_user)) -> User:
     """
@@ -100,7 +80,8 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
-async def upload_price_book_csv(
+@offload(PARSE)
+def upload_price_book_csv(
     request: Request,
     csv_file: UploadFile = File(..., description="Price Book CSV file"),
     current_user: User = Depends(require_approval_access),
@@ -111,11 +92,11 @@ async def upload_price_book_csv(
     CSV should contain columns matching the Price Book fields.
     """
     # Validate CSV file
-    await validate_csv_file(csv_file, max_size=50 * 1024 * 1024)  # 50 MB limit
+    validate_csv_file_sync(csv_file, max_size=50 * 1024 * 1024)  # 50 MB limit
 
     try:
         # Read CSV content
-        content = await csv_file.read()
+        content = csv_file.file.read()
 
         # Try multiple encodings
         csv_text = None
@@ -205,7 +186,7 @@ async def upload_price_book_csv(
         logger.info(f"Price Book upload: {records_created} records created by user {current_user.id}")
 
         # Create audit log for upload
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_csv",
@@ -243,15 +224,16 @@ async def upload_price_book_csv(
 
 
 @router.get("/", response_model=PriceBookListResponse)
-async def list_price_books(
+def list_price_books(
     search: Optional[str] = None,
     po_number: Optional[str] = None,
     page: int = 1,
     page_size: int = 50,
+    paging: CursorParams = Depends(),
     current_user: User = Depends(require_approval_access),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """List price books with optional filtering"""
+    """List price books with optional filtering (page/page_size or keyset cursor)"""
     # Validate pagination parameters
     if page < 1:
         page = 1
@@ -271,13 +253,17 @@ async def list_price_books(
     if po_number:
         query = query.filter(PriceBook.po_number == po_number)
 
-    # Use more efficient count query
-    total = query.with_entities(func.count(PriceBook.id)).scalar()
+    # Use more efficient count query (only when asked for in cursor mode)
+    total = count_total(
+        db, paging, query, PriceBook,
+        count=lambda: query.with_entities(func.count(PriceBook.id)).scalar()
+    )
 
     # Eager load uploader relationship to prevent N+1 queries
-    items = query.options(joinedload(PriceBook.uploader)).order_by(
-        PriceBook.created_at.desc()
-    ).offset((page - 1) * page_size).limit(page_size).all()
+    # OPTIMIZED: keyset cursor instead of OFFSET when the client sends one
+    items = PRICE_BOOK_KEYSET.paginate(
+        query.options(joinedload(PriceBook.uploader)), paging, (page - 1) * page_size, page_size
+    ).all()
 
     # Build response items efficiently
     response_items = [
@@ -330,16 +316,22 @@ async def list_price_books(
         items=response_items,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=PRICE_BOOK_KEYSET.next_cursor(items, page_size)
     )
 
 
-@router.get("/po-numbers")
-async def get_unique_po_numbers(
+@router.get("/po-numbers", dependencies=[Depends(conditional_get(PriceBook))])
+def get_unique_po_numbers(
     current_user: User = Depends(require_approval_access),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get list of unique PO numbers"""
+    return load_po_numbers(db)
+
+
+@cached("price_book.po_numbers", ttl=600, tables=(PriceBook,))
+def load_po_numbers(db: Session):
     po_numbers = db.query(PriceBook.po_number).filter(
         PriceBook.po_number.isnot(None),
         PriceBook.po_number != ''
@@ -349,10 +341,12 @@ async def get_unique_po_numbers(
 
 
 @router.get("/export/csv")
-async def export_price_books_csv(
+@compression_class("export")
+@offload(RENDER)
+def export_price_books_csv(
     po_number: Optional[str] = None,
     current_user: User = Depends(require_approval_access),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Export price books as CSV with optional PO number filter"""
     def generate_csv():
@@ -448,7 +442,7 @@ async def export_price_books_csv(
 
 
 @router.delete("/by-po-number/{po_number}")
-async def delete_by_po_number(
+def delete_by_po_number(
     po_number: str,
     request: Request,
     current_user: User = Depends(require_approval_access),
@@ -462,7 +456,7 @@ async def delete_by_po_number(
         logger.info(f"Deleted {deleted_count} price book records for PO# {po_number} by user {current_user.id}")
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_by_po",
@@ -486,10 +480,10 @@ async def delete_by_po_number(
 
 
 @router.get("/{price_book_id}", response_model=PriceBookResponse)
-async def get_price_book(
+def get_price_book(
     price_book_id: int,
     current_user: User = Depends(require_approval_access),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get single price book record by ID"""
     price_book = db.query(PriceBook).options(
@@ -544,7 +538,7 @@ async def get_price_book(
 
 
 @router.put("/{price_book_id}", response_model=PriceBookResponse)
-async def update_price_book(
+def update_price_book(
     price_book_id: int,
     update_data: PriceBookUpdate,
     request: Request,
@@ -573,7 +567,7 @@ async def update_price_book(
         logger.info(f"Price book {price_book_id} updated by user {current_user.id}")
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -643,7 +637,7 @@ async def update_price_book(
 
 
 @router.delete("/{price_book_id}")
-async def delete_price_book(
+def delete_price_book(
     price_book_id: int,
     request: Request,
     current_user: User = Depends(require_approval_access),
@@ -665,7 +659,7 @@ async def delete_price_book(
         logger.info(f"Price book {price_book_id} deleted by user {current_user.id}")
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
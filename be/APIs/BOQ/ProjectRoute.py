@@ -4,10 +4,16 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 import json
 import logging
-from APIs.Core import get_current_user, get_db
+from APIs.Core import get_current_user, get_db, get_read_db
 from Models.BOQ.Project import Project
 from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
+from utils.access_control import (
+    check_project_access,
+    get_user_accessible_projects,
+    get_access_matrix,
+    invalidate_access_matrix
+)
+from utils.audit_log import create_audit_log
 from Schemas.BOQ.ProjectSchema import CreateProject, UpdateProject, UpdatePOSchema, UpdatePOResponse
 from Models.BOQ.Levels import Lvl3
 from Models.BOQ.LLD import LLD
@@ -15,7 +21,6 @@ from Models.BOQ.BOQReference import BOQReference
 from Models.BOQ.Inventory import Inventory
 from Models.BOQ.Site import Site
 from Models.BOQ.Dismantling import Dismantling
-from typing import List
 
 logger = logging.getLogger(__name__)
 projectRoute = APIRouter(tags=["Projects"])
@@ -29,106 +34,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-def check_project_access(current_user: User, project: Project, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project with required permission level.
-
-    Args:
-        current_user: The current user
-        project: The project to check access for
-        db: Database session
-        required_permission: Required permission level ("view", "edit", "all")
-
-    Returns:
-        bool: True if user has access, False otherwise
-    """
-    # Senior admin has all permissions to all projects
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # Admin has all permissions but only to projects they have access to
-    # Check UserProjectAccess for both admin and other roles
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project.pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    # Admin with any access level gets full permissions (same as senior_admin) for their projects
-    if current_user.role.name == "admin":
-        return True
-
-    # For non-admin users, check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_projects(current_user: User, db: Session) -> List[Project]:
-    """
-    Get all projects that the current user has access to.
-
-    Args:
-        current_user: The current user
-        db: Database session
-
-    Returns:
-        List[Project]: List of accessible projects
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(Project).all()
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.project_id for access in user_accesses]
-
-    # Return projects that match those IDs
-    return db.query(Project).filter(Project.pid_po.in_(accessible_project_ids)).all()
-
-
 @projectRoute.post("/create_project", response_model=CreateProject)
 def add_project(
         project_data: CreateProject,
@@ -162,7 +67,7 @@ def add_project(
     db.refresh(new_project_db)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="create",
@@ -179,7 +84,7 @@ def add_project(
 
 @projectRoute.get("/get_project")
 def get_projects(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -201,7 +106,7 @@ def get_projects(
 @projectRoute.get("/get_project/{pid_po}")
 def get_project(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -213,7 +118,7 @@ def get_project(
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Check if user has access to this project
-    if not check_project_access(current_user, project, db, "view"):
+    if not check_project_access(current_user, project, db, "view", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to access this project. Contact the Senior Admin."
@@ -240,7 +145,7 @@ def update_project(
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Check if user has edit permission
-    if not check_project_access(current_user, project, db, "edit"):
+    if not check_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to update this project. Contact the Senior Admin."
@@ -262,7 +167,7 @@ def update_project(
         db.refresh(project)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -300,7 +205,7 @@ def delete_project(
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Check if user has "all" permission (required for deletion)
-    if not check_project_access(current_user, project, db, "all"):
+    if not check_project_access(current_user, project, db, "all", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to delete this project. Contact the Senior Admin."
@@ -315,7 +220,7 @@ def delete_project(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -340,7 +245,7 @@ def delete_project(
 @projectRoute.get("/check_project_permission/{pid_po}")
 def check_user_project_permission(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -363,12 +268,9 @@ def check_user_project_permission(
         }
 
     # Check access for other users
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project.pid_po
-    ).first()
+    permission_level = get_access_matrix(current_user, db).permission_level("boq", project.pid_po)
 
-    if not access:
+    if not permission_level:
         return {
             "project_id": pid_po,
             "permission_level": "none",
@@ -381,12 +283,12 @@ def check_user_project_permission(
     # Determine capabilities based on permission level (not role)
     # Users with "edit" or "all" permission can edit
     # Users with "all" permission can delete
-    can_edit = access.permission_level in ["edit", "all"]
-    can_delete = access.permission_level == "all"
+    can_edit = permission_level in ["edit", "all"]
+    can_delete = permission_level == "all"
 
     return {
         "project_id": pid_po,
-        "permission_level": access.permission_level,
+        "permission_level": permission_level,
         "can_view": True,
         "can_edit": can_edit,
         "can_delete": can_delete,
@@ -534,11 +436,14 @@ def update_project_purchase_order(
         db.commit()
         db.refresh(new_project)
 
+        # Access rows now point at the new PO
+        invalidate_access_matrix()
+
         # Calculate total records updated
         total_records_updated = sum(affected_tables.values())
 
         # Create audit log for PO update
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_purchase_order",
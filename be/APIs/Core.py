@@ -8,7 +8,7 @@ password hashing, user authentication, and various utility functions for data pr
 Key Components:
 1. Authentication & Security:
    - JWT token creation and validation
-   - Password hashing using bcrypt
+   - Password verification using bcrypt (on the utils.passwords pool)
    - OAuth2 authentication scheme
    - User authentication and authorization
 
@@ -20,7 +20,7 @@ Key Components:
 
 Dependencies:
 - python-jose: JWT token handling
-- passlib: Password hashing
+- passlib: Password hashing (via utils.passwords)
 - fastapi.security: OAuth2 implementation
 - python-dotenv: Environment variable management
 
@@ -42,22 +42,32 @@ from typing import Dict, Any
 from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from passlib.context import CryptContext
+from sqlalchemy.orm import joinedload
 from starlette import status
 
-from Database.session import Session
+from Database.session import (
+    Session,
+    ReadSession,
+    AsyncSessionLocal,
+    AsyncReadSessionLocal,
+    ThreadedAsyncSession,
+)
 from Models.Admin.User import User
 from Models.Admin.RefreshToken import RefreshToken
 from Models.Admin.TokenBlacklist import TokenBlacklist
+from utils.auth_cache import CachedPrincipal, principal_cache, token_blacklist_cache, token_digest
+from utils.blocking import run_blocking, DB
+from utils.passwords import verify_password_async
+from utils.passwords import verify_password as _verify_on_pool
+from utils.read_replica import set_request_user, use_primary_for_read
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Security configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")  # Password hashing context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")            # OAuth2 authentication scheme
 
 # JWT configuration from environment variables
@@ -73,14 +83,17 @@ def verify_password(plain_password, hashed_password):
     """
     Verify a plain text password against a hashed password.
 
+    Runs on the password pool (utils.passwords); call from `def` code only.
+
     Args:
         plain_password (str): The plain text password to verify
-        hashed_password (str): The hashed password to compare against
+        hashed_password (str): The hashed password to compare against, or
+            None to spend the same time on an unknown user
 
     Returns:
         bool: True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _verify_on_pool(plain_password, hashed_password)
 
 def get_user(username: str, db: Session):
     """
@@ -109,6 +122,65 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Async database dependency for `async def` routes.
+
+    Yields an AsyncSession when DB_ASYNC_ENABLED is set; otherwise a
+    ThreadedAsyncSession that runs the sync Session on worker threads.
+    Both support `await db.execute(select(...))`, `await db.scalar(...)`
+    and `await db.get(...)`.
+
+    Yields:
+        AsyncSession | ThreadedAsyncSession: Database session
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedAsyncSession(Session())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def get_read_db(request: Request):
+    """
+    Database dependency for list, stat and export routes.
+
+    Yields a read replica session (READ_DATABASE_URL), or a primary session
+    when no replica is configured or the user committed within the
+    read-your-writes window (see utils.read_replica). Never write through it.
+
+    Yields:
+        Session: SQLAlchemy database session
+    """
+    db = Session() if use_primary_for_read(request) else ReadSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """
+    Async counterpart of get_read_db for `async def` routes.
+
+    Yields:
+        AsyncSession | ThreadedAsyncSession: Database session
+    """
+    primary = use_primary_for_read(request)
+    if AsyncSessionLocal is not None:
+        async with (AsyncSessionLocal if primary else AsyncReadSessionLocal)() as db:
+            yield db
+        return
+
+    db = ThreadedAsyncSession(Session() if primary else ReadSession())
+    try:
+        yield db
+    finally:
+        await db.close()
+
 def authenticate_user(username: str, password: str, db: Session = Depends(get_db)):
     """
     Authenticate a user with username and password.
@@ -122,7 +194,26 @@ def authenticate_user(username: str, password: str, db: Session = Depends(get_db
         User: User object if authentication successful, False otherwise
     """
     user = get_user(username, db)
-    if not user or not verify_password(password, user.hashed_password):
+    # Unknown users are verified against a dummy hash so timing stays constant
+    if not verify_password(password, user.hashed_password if user else None) or not user:
+        return False
+    return user
+
+async def authenticate_user_async(username: str, password: str, db: Session):
+    """
+    Async counterpart of authenticate_user for `async def` routes.
+
+    The user lookup runs on the DB pool and bcrypt on the password pool, so
+    neither blocks the event loop nor holds a DB thread while hashing.
+
+    Returns:
+        User: User object if authentication successful, False otherwise
+
+    Raises:
+        PasswordHashingBusy: If too many verifications are already queued
+    """
+    user = await run_blocking(DB, get_user, username, db)
+    if not await verify_password_async(password, user.hashed_password if user else None) or not user:
         return False
     return user
 
@@ -175,7 +266,7 @@ def create_refresh_token(data: dict, user_id: int, db: Session) -> str:
     # Store in database
     refresh_token_record = RefreshToken(
         user_id=user_id,
-        token=encoded_token,
+        token_digest=token_digest(encoded_token),
         expires_at=expire
     )
     db.add(refresh_token_record)
@@ -327,12 +418,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     This function is used as a dependency in protected routes to ensure
     the user is authenticated and to retrieve their user information.
 
+    Resolved users are cached per token (see utils.auth_cache), so repeated
+    requests with the same token make no database calls. The blacklist is
+    checked in memory first; the database is only consulted on a cache miss.
+
     Args:
         token (str): JWT token from Authorization header (injected dependency)
         db (Session): Database session (injected dependency)
 
     Returns:
-        User: Current authenticated user object
+        CachedPrincipal: Read-only snapshot of the authenticated user
+                         (id, username, email, role.name, approval stage flags)
 
     Raises:
         HTTPException: 401 Unauthorized if token is invalid or user not found
@@ -348,6 +444,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    revoked_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
     try:
         # Decode the JWT token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -357,18 +458,53 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
 
-    # Check if token is blacklisted (revoked on logout)
-    is_blacklisted = db.query(TokenBlacklist).filter(TokenBlacklist.token == token).first()
+    # Fast path: in-memory blacklist and principal cache (no DB round trips).
+    # revoked is None when the Bloom filter cannot rule out a revocation.
+    revoked = token_blacklist_cache.check(token)
+    if revoked:
+        raise revoked_exception
+
+    if revoked is False:
+        principal = principal_cache.get(token)
+        if principal is not None:
+            set_request_user(principal.username)
+            return principal
+
+    # Slow path runs in the DB worker pool so a cache miss never blocks the event loop
+    is_blacklisted, principal = await run_blocking(
+        DB, _load_principal, db, token, username, check_blacklist=revoked is None
+    )
     if is_blacklisted:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        token_blacklist_cache.add(token, payload.get("exp"))
+        raise revoked_exception
+
+    if principal is None:
+        raise credentials_exception
+
+    principal_cache.set(token, principal, payload.get("exp"))
+    set_request_user(principal.username)
+    return principal
+
 
-    # Load user from database
-    user = db.query(User).filter(User.username == username).first()
+def _load_principal(db: Session, token: str, username: str, check_blacklist: bool = True):
+    """
+    Resolve a token that missed the principal cache.
+
+    Args:
+        check_blacklist: Look the token up in token_blacklist; False when the
+            in-memory Bloom filter already ruled out a revocation
 
+    Returns:
+        tuple: (is_blacklisted, CachedPrincipal or None)
+    """
+    # Check if token is blacklisted (revoked on logout, possibly by another worker)
+    if check_blacklist and db.query(TokenBlacklist.id).filter(
+        TokenBlacklist.token_digest == token_digest(token)
+    ).first():
+        return True, None
+
+    # Load user and role in a single query
+    user = db.query(User).options(joinedload(User.role)).filter(User.username == username).first()
     if user is None:
-        raise credentials_exception
-    return user
+        return False, None
+    return False, CachedPrincipal.from_user(user)
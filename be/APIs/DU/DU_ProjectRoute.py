@@ -8,15 +8,19 @@ It includes pagination, search, admin control, and cascading PO updates.
 
 import logging
 import json
-from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.Admin.User import UserProjectAccess, User
-from Models.Admin.AuditLog import AuditLog
+from utils.access_control import (
+    check_du_project_access,
+    get_accessible_projects,
+    get_access_matrix,
+    invalidate_access_matrix
+)
+from utils.audit_log import create_audit_log
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -43,33 +47,6 @@ DUProjectRoute = APIRouter(prefix="/du-projects", tags=["DU Projects"])
 # HELPER FUNCTIONS
 # ===========================
 
-async def create_audit_log(
-        db: Session,
-        user_id: int,
-        action: str,
-        resource_type: str,
-        resource_id: Optional[str] = None,
-        resource_name: Optional[str] = None,
-        details: Optional[str] = None,
-        ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
-):
-    """Create an audit log entry."""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        resource_name=resource_name,
-        details=details,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    db.add(audit_log)
-    db.commit()
-    return audit_log
-
-
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -78,86 +55,12 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def check_du_project_access(current_user: User, project: DUProject, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a DU project with required permission level.
-
-    Args:
-        current_user: The current user
-        project: The DU project to check access for
-        db: Database session
-        required_permission: Required permission level ("view", "edit", "all")
-
-    Returns:
-        bool: True if user has access, False otherwise
-    """
-    # Senior admin has all permissions to all projects
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # Admin has all permissions but only to projects they have access to
-    # Check UserProjectAccess for both admin and other roles
-    access = db.query(UserProjectAccess).filter(and_(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.DUproject_id == project.pid_po
-    )).first()
-
-    if not access:
-        return False
-
-    # Admin with any access level gets full permissions (same as senior_admin) for their projects
-    if current_user.role.name == "admin":
-        return True
-
-    # For non-admin users, check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_du_projects(current_user: User, db: Session) -> List[DUProjectOut]:
-    """
-    Get all DU projects that the current user has access to.
-
-    Args:
-        current_user: The current user
-        db: Database session
-
-    Returns:
-        List[DUProject]: List of accessible DU projects
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(DUProject).all()
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.DUproject_id for access in user_accesses if access.DUproject_id]
-
-    if not accessible_project_ids:
-        return []
-
-    # Return projects that match those IDs
-    return db.query(DUProject).filter(DUProject.pid_po.in_(accessible_project_ids)).all()
-
-
 # ===========================
 # CRUD OPERATIONS
 # ===========================
 
 @DUProjectRoute.post("", response_model=DUProjectOut)
-async def add_du_project(
+def add_du_project(
         project_data: CreateDUProject,
         request: Request,
         db: Session = Depends(get_db),
@@ -195,7 +98,7 @@ async def add_du_project(
         logger.info(f"DU project created successfully: {pid_po} by user {current_user.username}")
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_du_project",
@@ -225,7 +128,7 @@ def get_du_projects(
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=10000),
         search: str = Query(""),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -242,7 +145,7 @@ def get_du_projects(
     logger.info(f"User {current_user.username} (ID: {current_user.id}) requesting DU projects - skip: {skip}, limit: {limit}, search: '{search}'")
 
     try:
-        accessible_projects = get_user_accessible_du_projects(current_user, db)
+        accessible_projects = get_accessible_projects(current_user, db, "du")
         logger.debug(f"User {current_user.username} has access to {len(accessible_projects)} DU projects")
 
         # Apply search filter if provided
@@ -275,7 +178,7 @@ def get_du_projects(
 @DUProjectRoute.get("/check-permission/{pid_po}", response_model=DUProjectPermission)
 def check_user_du_project_permission(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -299,12 +202,9 @@ def check_user_du_project_permission(
         )
 
     # Check access for other users
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.DUproject_id == project.pid_po
-    ).first()
+    permission_level = get_access_matrix(current_user, db).permission_level("du", project.pid_po)
 
-    if not access:
+    if not permission_level:
         return DUProjectPermission(
             project_id=pid_po,
             permission_level="none",
@@ -316,13 +216,13 @@ def check_user_du_project_permission(
 
     # Determine capabilities based on permission level and role
     can_edit = (current_user.role.name == "admin" and
-                access.permission_level in ["edit", "all"])
+                permission_level in ["edit", "all"])
     can_delete = (current_user.role.name == "admin" and
-                  access.permission_level == "all")
+                  permission_level == "all")
 
     return DUProjectPermission(
         project_id=pid_po,
-        permission_level=access.permission_level,
+        permission_level=permission_level,
         can_view=True,
         can_edit=can_edit,
         can_delete=can_delete,
@@ -333,7 +233,7 @@ def check_user_du_project_permission(
 @DUProjectRoute.get("/{pid_po}", response_model=DUProjectOut)
 def get_du_project(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -345,7 +245,7 @@ def get_du_project(
         raise HTTPException(status_code=404, detail="DU Project not found")
 
     # Check if user has access to this project
-    if not check_du_project_access(current_user, project, db, "view"):
+    if not check_du_project_access(current_user, project, db, "view", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to access this DU project. Contact the Senior Admin."
@@ -355,7 +255,7 @@ def get_du_project(
 
 
 @DUProjectRoute.put("/{pid_po}", response_model=DUProjectOut)
-async def update_du_project(
+def update_du_project(
         pid_po: str,
         update_data: UpdateDUProject,
         request: Request,
@@ -372,7 +272,7 @@ async def update_du_project(
         raise HTTPException(status_code=404, detail="DU Project not found")
 
     # Check if user has edit permission
-    if not check_du_project_access(current_user, project, db, "edit"):
+    if not check_du_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to update this DU project. Contact the Senior Admin."
@@ -388,7 +288,7 @@ async def update_du_project(
         db.refresh(project)
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_du_project",
@@ -413,7 +313,7 @@ async def update_du_project(
 
 
 @DUProjectRoute.delete("/{pid_po}")
-async def delete_du_project(
+def delete_du_project(
         pid_po: str,
         request: Request,
         db: Session = Depends(get_db),
@@ -432,7 +332,7 @@ async def delete_du_project(
         raise HTTPException(status_code=404, detail="DU Project not found")
 
     # Check if user has "all" permission (required for deletion)
-    if not check_du_project_access(current_user, project, db, "all"):
+    if not check_du_project_access(current_user, project, db, "all", admin_full_access=True):
         logger.warning(f"User {current_user.username} denied permission to delete DU project: {pid_po}")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -452,7 +352,7 @@ async def delete_du_project(
         logger.info(f"DU project {pid_po} deleted successfully by user {current_user.username}")
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_du_project",
@@ -477,7 +377,7 @@ async def delete_du_project(
 
 
 @DUProjectRoute.put("/{old_pid_po}/update-po", response_model=UpdatePOResponse)
-async def update_project_purchase_order(
+def update_project_purchase_order(
         old_pid_po: str,
         update_data: UpdatePOSchema,
         request: Request,
@@ -566,11 +466,14 @@ async def update_project_purchase_order(
         db.commit()
         db.refresh(new_project)
 
+        # Access rows now point at the new PO
+        invalidate_access_matrix()
+
         # Calculate total records updated
         total_records_updated = sum(affected_tables.values())
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_du_project_po",
@@ -611,14 +514,14 @@ async def update_project_purchase_order(
 
 @DUProjectRoute.get("/stats/summary")
 def get_du_projects_stats(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Get statistics summary for DU projects accessible to the current user.
     """
     try:
-        accessible_projects = get_user_accessible_du_projects(current_user, db)
+        accessible_projects = get_accessible_projects(current_user, db, "du")
 
         total_projects = len(accessible_projects)
 
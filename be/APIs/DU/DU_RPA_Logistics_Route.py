@@ -25,7 +25,7 @@ from typing import Optional, List
 # Configure logging
 logger = logging.getLogger(__name__)
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.DU.DU_RPA_Logistics import (
     DURPAProject,
     DURPADescription,
@@ -33,7 +33,11 @@ from Models.DU.DU_RPA_Logistics import (
     DURPAInvoiceItem
 )
 from Models.Admin.User import User
-from Models.Admin.AuditLog import AuditLog
+from utils.blocking import offload, run_blocking, flag_blocking_call, DB, RENDER, PARSE
+from utils.audit_log import create_audit_log
+from utils.query_budget import query_budget
+from utils.fast_json import FastJSONResponse, rows_to_dicts, schema_columns
+from utils.pagination import CursorParams, Keyset, count_total
 from Schemas.DU.DU_RPA_Logistics_Schema import (
     CreateDURPAProject,
     UpdateDURPAProject,
@@ -55,38 +59,14 @@ from Schemas.DU.DU_RPA_Logistics_Schema import (
 
 duRPALogisticsRoute = APIRouter(tags=["DU RPA Logistics"])
 
+# Newest invoices first (see utils.pagination)
+INVOICE_KEYSET = Keyset(DURPAInvoice.created_at, DURPAInvoice.id, descending=True)
+
 
 # ===========================
 # HELPER FUNCTIONS
 # ===========================
 
-async def create_audit_log(
-        db: Session,
-        user_id: int,
-        action: str,
-        resource_type: str,
-        resource_id: Optional[str] = None,
-        resource_name: Optional[str] = None,
-        details: Optional[str] = None,
-        ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
-):
-    """Create an audit log entry."""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        resource_name=resource_name,
-        details=details,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    db.add(audit_log)
-    db.commit()
-    return audit_log
-
-
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -310,7 +290,7 @@ def calculate_projects_stats_bulk(db: Session, projects: List[DURPAProject]) ->
 # ===========================
 
 @duRPALogisticsRoute.post("/du-rpa/projects", response_model=DURPAProjectOut)
-async def create_project(
+def create_project(
         project_data: CreateDURPAProject,
         request: Request,
         db: Session = Depends(get_db),
@@ -331,7 +311,7 @@ async def create_project(
         db.commit()
         db.refresh(new_project)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_du_rpa_project",
@@ -353,11 +333,12 @@ async def create_project(
 
 
 @duRPALogisticsRoute.get("/du-rpa/projects", response_model=DURPAProjectPagination)
+@query_budget(8)
 def get_projects(
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=500),
         search: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get all DU RPA Projects with pagination. OPTIMIZED with bulk stats calculation."""
@@ -385,7 +366,7 @@ def get_projects(
 @duRPALogisticsRoute.get("/du-rpa/projects/{project_id}", response_model=DURPAProjectWithStats)
 def get_project(
         project_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get a specific DU RPA Project by ID."""
@@ -397,7 +378,7 @@ def get_project(
 
 
 @duRPALogisticsRoute.put("/du-rpa/projects/{project_id}", response_model=DURPAProjectOut)
-async def update_project(
+def update_project(
         project_id: int,
         project_data: UpdateDURPAProject,
         request: Request,
@@ -428,7 +409,7 @@ async def update_project(
         db.commit()
         db.refresh(project)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_du_rpa_project",
@@ -450,7 +431,7 @@ async def update_project(
 
 
 @duRPALogisticsRoute.delete("/du-rpa/projects/{project_id}")
-async def delete_project(
+def delete_project(
         project_id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -466,7 +447,7 @@ async def delete_project(
         db.delete(project)
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_du_rpa_project",
@@ -492,7 +473,7 @@ async def delete_project(
 # ===========================
 
 @duRPALogisticsRoute.post("/du-rpa/projects/{project_id}/descriptions", response_model=DURPADescriptionWithStats)
-async def create_description(
+def create_description(
         project_id: int,
         desc_data: CreateDURPADescription,
         request: Request,
@@ -517,7 +498,7 @@ async def create_description(
         db.commit()
         db.refresh(new_desc)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_du_rpa_description",
@@ -540,7 +521,7 @@ async def create_description(
 
 
 @duRPALogisticsRoute.post("/du-rpa/projects/{project_id}/descriptions/bulk", response_model=UploadResponse)
-async def bulk_create_descriptions(
+def bulk_create_descriptions(
         project_id: int,
         bulk_data: BulkDescriptionUpload,
         request: Request,
@@ -573,7 +554,7 @@ async def bulk_create_descriptions(
     try:
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_create_du_rpa_descriptions",
@@ -600,7 +581,8 @@ async def bulk_create_descriptions(
 
 
 @duRPALogisticsRoute.post("/du-rpa/projects/{project_id}/descriptions/upload-csv", response_model=UploadResponse)
-async def upload_descriptions_csv(
+@offload(PARSE)
+def upload_descriptions_csv(
         project_id: int,
         file: UploadFile = File(...),
         request: Request = None,
@@ -631,7 +613,7 @@ async def upload_descriptions_csv(
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
     try:
-        content = await file.read()
+        content = file.file.read()
         # Try multiple encodings
         try:
             csv_content = content.decode('utf-8-sig')
@@ -742,7 +724,7 @@ async def upload_descriptions_csv(
 
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_du_rpa_descriptions_csv",
@@ -776,7 +758,7 @@ def get_descriptions(
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=500),
         search: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get all descriptions for a project with calculated stats. OPTIMIZED with bulk calculation."""
@@ -813,7 +795,7 @@ def get_descriptions(
 @duRPALogisticsRoute.get("/du-rpa/descriptions/{description_id}", response_model=DURPADescriptionWithStats)
 def get_description(
         description_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get a specific description by ID."""
@@ -825,7 +807,7 @@ def get_description(
 
 
 @duRPALogisticsRoute.put("/du-rpa/descriptions/{description_id}", response_model=DURPADescriptionWithStats)
-async def update_description(
+def update_description(
         description_id: int,
         desc_data: UpdateDURPADescription,
         request: Request,
@@ -846,7 +828,7 @@ async def update_description(
         db.commit()
         db.refresh(description)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_du_rpa_description",
@@ -869,7 +851,7 @@ async def update_description(
 
 
 @duRPALogisticsRoute.delete("/du-rpa/descriptions/{description_id}")
-async def delete_description(
+def delete_description(
         description_id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -889,7 +871,7 @@ async def delete_description(
         db.delete(description)
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_du_rpa_description",
@@ -915,7 +897,8 @@ async def delete_description(
 # ===========================
 
 @duRPALogisticsRoute.post("/du-rpa/projects/{project_id}/invoices/upload-csv", response_model=UploadResponse)
-async def upload_invoices_csv(
+@offload(PARSE)
+def upload_invoices_csv(
         project_id: int,
         file: UploadFile = File(...),
         request: Request = None,
@@ -951,7 +934,7 @@ async def upload_invoices_csv(
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
     try:
-        content = await file.read()
+        content = file.file.read()
         # Try multiple encodings
         try:
             csv_content = content.decode('utf-8-sig')
@@ -1203,7 +1186,7 @@ async def upload_invoices_csv(
 
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_du_rpa_invoices_csv",
@@ -1237,20 +1220,23 @@ def get_invoices(
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=500),
         search: Optional[str] = None,
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
-    """Get all invoices for a project. OPTIMIZED: Uses eager loading to prevent N+1 queries."""
-    from sqlalchemy.orm import joinedload
+    """
+    Get all invoices for a project (skip/limit or keyset cursor pagination).
 
-    project = db.query(DURPAProject).filter(DURPAProject.id == project_id).first()
+    OPTIMIZED: Column-projected queries (invoice page + all its items with the
+    description text in one query) built straight into response dicts.
+    """
+    project = db.query(DURPAProject.id).filter(DURPAProject.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     try:
-        # OPTIMIZED: Eager load invoice items and descriptions
-        query = db.query(DURPAInvoice).filter(DURPAInvoice.project_id == project_id).options(
-            joinedload(DURPAInvoice.items).joinedload(DURPAInvoiceItem.description)
+        query = db.query(*schema_columns(DURPAInvoice, DURPAInvoiceOut)).filter(
+            DURPAInvoice.project_id == project_id
         )
 
         if search:
@@ -1262,46 +1248,33 @@ def get_invoices(
                 )
             )
 
-        total = query.count()
-
-        # OPTIMIZED: All data loaded in ~2 queries instead of 100+
-        invoices = query.order_by(DURPAInvoice.created_at.desc()).offset(skip).limit(limit).all()
+        total = count_total(db, paging, query, DURPAInvoice)
+        records = rows_to_dicts(INVOICE_KEYSET.paginate(query, paging, skip, limit))
+        next_cursor = INVOICE_KEYSET.next_cursor(records, limit)
+
+        items_by_invoice = {}
+        for record in records:
+            record["items"] = items_by_invoice[record["id"]] = []
+
+        if items_by_invoice:
+            items = rows_to_dicts(
+                db.query(
+                    *schema_columns(DURPAInvoiceItem, DURPAInvoiceItemOut),
+                    DURPADescription.description.label("description_text"),
+                ).outerjoin(
+                    DURPADescription, DURPAInvoiceItem.description_id == DURPADescription.id
+                ).filter(
+                    DURPAInvoiceItem.invoice_id.in_(list(items_by_invoice))
+                ).order_by(DURPAInvoiceItem.id)
+            )
+            for item in items:
+                items_by_invoice[item["invoice_id"]].append(item)
 
-        # Build response - NO additional queries needed
-        records = []
-        for inv in invoices:
-            items = []
-            for item in inv.items:
-                items.append(DURPAInvoiceItemOut(
-                    id=item.id,
-                    invoice_id=item.invoice_id,
-                    description_id=item.description_id,
-                    li_number=item.li_number,
-                    quantity=item.quantity,
-                    unit_price=item.unit_price,
-                    pac_date=item.pac_date,
-                    description_text=item.description.description if item.description else None
-                ))
-
-            records.append(DURPAInvoiceOut(
-                id=inv.id,
-                project_id=inv.project_id,
-                ppo_number=inv.ppo_number,
-                new_po_number=inv.new_po_number,
-                pr_number=inv.pr_number,
-                site_id=inv.site_id,
-                model=inv.model,
-                sap_invoice_number=inv.sap_invoice_number,
-                invoice_date=inv.invoice_date,
-                customer_invoice_number=inv.customer_invoice_number,
-                prf_percentage=inv.prf_percentage,
-                vat_rate=inv.vat_rate,
-                created_at=inv.created_at,
-                items=items
-            ))
-
-        return DURPAInvoicePagination(records=records, total=total)
+        # Rows already match DURPAInvoicePagination; skip response_model validation
+        return FastJSONResponse({"records": records, "total": total, "next_cursor": next_cursor})
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1315,7 +1288,7 @@ def get_all_invoices(
         limit: int = Query(50, ge=1, le=500),
         search: Optional[str] = None,
         po_filter: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -1401,7 +1374,7 @@ def get_all_invoices(
 @duRPALogisticsRoute.get("/du-rpa/invoices/{invoice_id}", response_model=DURPAInvoiceOut)
 def get_invoice(
         invoice_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get a specific invoice by ID. OPTIMIZED: Uses eager loading."""
@@ -1448,7 +1421,7 @@ def get_invoice(
 
 
 @duRPALogisticsRoute.patch("/du-rpa/invoices/{invoice_id}/customer-invoice")
-async def update_customer_invoice(
+def update_customer_invoice(
         invoice_id: int,
         customer_invoice: str,
         request: Request,
@@ -1465,7 +1438,7 @@ async def update_customer_invoice(
         invoice.customer_invoice_number = customer_invoice.strip() if customer_invoice else None
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_du_rpa_invoice_customer_invoice",
@@ -1488,7 +1461,7 @@ async def update_customer_invoice(
 
 
 @duRPALogisticsRoute.delete("/du-rpa/invoices/{invoice_id}")
-async def delete_invoice(
+def delete_invoice(
         invoice_id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -1504,7 +1477,7 @@ async def delete_invoice(
         db.delete(invoice)
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_du_rpa_invoice",
@@ -1526,7 +1499,7 @@ async def delete_invoice(
 
 
 @duRPALogisticsRoute.delete("/du-rpa/projects/{project_id}/invoices")
-async def delete_all_invoices(
+def delete_all_invoices(
         project_id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -1542,7 +1515,7 @@ async def delete_all_invoices(
         db.query(DURPAInvoice).filter(DURPAInvoice.project_id == project_id).delete(synchronize_session=False)
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_all_du_rpa_invoices",
@@ -1569,7 +1542,8 @@ async def delete_all_invoices(
 # ===========================
 
 @duRPALogisticsRoute.post("/du-rpa/import-consolidated-tracker")
-async def import_consolidated_tracker(
+@offload(PARSE)
+def import_consolidated_tracker(
         file: UploadFile = File(...),
         request: Request = None,
         db: Session = Depends(get_db),
@@ -1598,7 +1572,7 @@ async def import_consolidated_tracker(
         raise HTTPException(status_code=400, detail="File must be an Excel file (.xlsb or .xlsx)")
 
     try:
-        content = await file.read()
+        content = file.file.read()
         engine = 'pyxlsb' if fname.endswith('.xlsb') else None
         xls = pd.ExcelFile(BytesIO(content), engine=engine)
 
@@ -1830,7 +1804,7 @@ async def import_consolidated_tracker(
 
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="import_consolidated_tracker",
@@ -1869,6 +1843,7 @@ async def import_consolidated_tracker(
 
 def _generate_excel(invoice, vat_rate, exchange_rate, template_path):
     """Generate the Excel invoice from template. Returns BytesIO."""
+    flag_blocking_call("Excel rendering")
     wb = openpyxl.load_workbook(template_path)
     ws = wb['Invoice']
 
@@ -2008,10 +1983,31 @@ def _excel_to_pdf(excel_data):
         pdf_path.unlink(missing_ok=True)
 
 
+def _load_invoice_with_items(db: Session, invoice_id: int):
+    """Fetch an invoice with its items and their descriptions eagerly loaded."""
+    return db.query(DURPAInvoice).filter(DURPAInvoice.id == invoice_id).options(
+        joinedload(DURPAInvoice.items).joinedload(DURPAInvoiceItem.description)
+    ).first()
+
+
+def _build_invoice_zip(invoice, vat_rate: float, exchange_rate: float, template_path: Path, base_name: str) -> BytesIO:
+    """Generate the invoice Excel, convert it to PDF via Excel's own renderer and ZIP both."""
+    excel_buf = _generate_excel(invoice, vat_rate, exchange_rate, template_path)
+    excel_data = excel_buf.read()
+    pdf_buf = _excel_to_pdf(excel_data)
+
+    zip_output = BytesIO()
+    with zipfile.ZipFile(zip_output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{base_name}.xlsx", excel_data)
+        zf.writestr(f"{base_name}.pdf", pdf_buf.read())
+    zip_output.seek(0)
+    return zip_output
+
+
 @duRPALogisticsRoute.get("/du-rpa/invoices/{invoice_id}/download-excel")
 async def download_invoice_excel(
         invoice_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -2023,10 +2019,8 @@ async def download_invoice_excel(
     """
     from utils.exchange_rate import get_usd_aed_rate
 
-    # Fetch invoice with items and descriptions
-    invoice = db.query(DURPAInvoice).filter(DURPAInvoice.id == invoice_id).options(
-        joinedload(DURPAInvoice.items).joinedload(DURPAInvoiceItem.description)
-    ).first()
+    # Fetch invoice with items and descriptions (off the event loop)
+    invoice = await run_blocking(DB, _load_invoice_with_items, db, invoice_id)
 
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
@@ -2049,17 +2043,10 @@ async def download_invoice_excel(
         raw_name = f"Invoice_{invoice.customer_invoice_number or invoice.ppo_number or invoice.id}"
         base_name = "".join(c if (c.isalnum() or c in '-_.') else '_' for c in raw_name)
 
-        # Generate Excel, then convert it to PDF via Excel's own renderer
-        excel_buf = _generate_excel(invoice, vat_rate, exchange_rate, template_path)
-        excel_data = excel_buf.read()
-        pdf_buf = _excel_to_pdf(excel_data)
-
-        # Create ZIP
-        zip_output = BytesIO()
-        with zipfile.ZipFile(zip_output, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr(f"{base_name}.xlsx", excel_data)
-            zf.writestr(f"{base_name}.pdf", pdf_buf.read())
-        zip_output.seek(0)
+        # Excel + PDF rendering runs on the RENDER pool
+        zip_output = await run_blocking(
+            RENDER, _build_invoice_zip, invoice, vat_rate, exchange_rate, template_path, base_name
+        )
 
         return StreamingResponse(
             zip_output,
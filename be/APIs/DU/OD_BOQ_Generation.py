@@ -0,0 +1,248 @@
+"""
+OD BOQ Generation - batch BOQ engine for OD BOQ sites
+
+Generating BOQs site by site costs a join query, a DUProject lookup and an
+access check per site. BOQBatch loads everything a set of sites needs up
+front and renders every site from memory:
+- one ordered join of (site, product, qty) rows with qty_per_site > 0 for all
+  sites (one statement per 1000 sites, the MSSQL parameter limit)
+- one DUProject query for all their projects
+- the user's access matrix once; each distinct project is checked once
+
+Every BOQ row goes through the same formatter (whole-number quantities as int,
+USD / AED totals), for the CSV text and for the Excel data alike.
+
+Usage:
+    batch = BOQBatch(db, sites, current_user)
+    for site in sites:
+        if batch.allowed(site):
+            csv_content = batch.csv(site)
+"""
+
+import importlib
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from Models.Admin.User import User
+from Models.DU.OD_BOQ_Site import ODBOQSite
+from Models.DU.OD_BOQ_Product import ODBOQProduct
+from Models.DU.OD_BOQ_Site_Product import ODBOQSiteProduct
+from utils.access_control import get_access_matrix
+from utils.bulk_write import select_in_chunks
+
+DUProject = importlib.import_module("Models.DU.DU_Project").DUProject
+
+# ===========================
+# MODULE CONSTANTS
+# ===========================
+
+USD_TO_AED_RATE = 3.6735
+
+# Columns of the generated BOQ CSV
+BOQ_CSV_HEADERS = ['Description', 'Category', 'BU', 'UOM', 'BOQ Qty', 'Unit Price', 'Total USD', 'Total AED', 'Line Number', 'Code']
+
+
+class BOQItem(NamedTuple):
+    """One BOQ row of a site: a product with qty_per_site > 0."""
+    qty: Any  # int for whole numbers, else float
+    description: Optional[str]
+    category: Optional[str]
+    bu: Optional[str]
+    code: Optional[str]
+    line_number: Optional[str]
+    unit_price: Optional[float]
+    total_usd: Any  # Rounded to 2 decimals, '' without a unit price
+    total_aed: Any
+
+
+def format_boq_item(qty: float, product_row) -> BOQItem:
+    """Shared formatter: whole-number quantities as int, totals from the unit price."""
+    # Convert float to int if it's a whole number (e.g., 2.0 -> 2)
+    if isinstance(qty, float) and qty == int(qty):
+        qty = int(qty)
+
+    up = product_row.unit_price
+    total_usd = ''
+    total_aed = ''
+    if up is not None and qty is not None:
+        total_usd_val = up * (qty if isinstance(qty, (int, float)) else 0)
+        total_usd = round(total_usd_val, 2)
+        total_aed = round(total_usd_val * USD_TO_AED_RATE, 2)
+
+    return BOQItem(
+        qty=qty,
+        description=product_row.description,
+        category=product_row.category,
+        bu=product_row.bu,
+        code=product_row.code,
+        line_number=product_row.line_number,
+        unit_price=up,
+        total_usd=total_usd,
+        total_aed=total_aed,
+    )
+
+
+def _csv_cell(value) -> str:
+    value_str = str(value) if value is not None else ' '
+    if value_str == '' or value_str == 'None':
+        value_str = ' '
+    # Escape commas and quotes in values
+    if ',' in value_str or '"' in value_str:
+        value_str = f'"{value_str.replace(chr(34), chr(34) + chr(34))}"'
+    return value_str
+
+
+def load_sites(db: Session, site_record_ids: Sequence[int]) -> List[ODBOQSite]:
+    """Sites by id (one query per 1000 ids); unknown ids are left out."""
+    return [row[0] for row in select_in_chunks(
+        db, lambda chunk: select(ODBOQSite).where(ODBOQSite.id.in_(chunk)), site_record_ids
+    )]
+
+
+class BOQBatch:
+    """
+    BOQ rows, projects and access of a set of sites, loaded in a fixed number of queries.
+
+    Args:
+        db: Database session
+        sites: Sites to generate BOQs for
+        current_user: User whose DU project access allowed() checks (None: no check)
+        permission: Required permission level for allowed()
+    """
+
+    def __init__(self, db: Session, sites: Sequence[ODBOQSite], current_user: Optional[User] = None,
+                 permission: str = "view"):
+        self.db = db
+        self.current_user = current_user
+        self.permission = permission
+        self.date = datetime.now().strftime('%d-%b-%y')
+        self._access: Dict[str, bool] = {}
+        self._matrix = None
+
+        project_ids = {site.project_id for site in sites if site.project_id}
+        self.projects: Dict[str, Any] = {
+            project.pid_po: project for project in db.query(DUProject).filter(DUProject.pid_po.in_(project_ids)).all()
+        } if project_ids else {}
+
+        self.items: Dict[int, List[BOQItem]] = {site.id: [] for site in sites}
+        rows = select_in_chunks(
+            db,
+            lambda chunk: select(
+                ODBOQSiteProduct.site_record_id,
+                ODBOQSiteProduct.qty_per_site,
+                ODBOQProduct.description,
+                ODBOQProduct.category,
+                ODBOQProduct.bu,
+                ODBOQProduct.code,
+                ODBOQProduct.line_number,
+                ODBOQProduct.unit_price,
+            ).join(
+                ODBOQProduct, ODBOQSiteProduct.product_id == ODBOQProduct.id
+            ).where(
+                ODBOQSiteProduct.site_record_id.in_(chunk),
+                ODBOQSiteProduct.qty_per_site > 0
+            ).order_by(ODBOQSiteProduct.site_record_id, ODBOQSiteProduct.id),
+            list(self.items),
+        )
+        for row in rows:
+            self.items[row.site_record_id].append(format_boq_item(row.qty_per_site, row))
+
+    # ---------- access ----------
+
+    def allowed(self, site: ODBOQSite) -> bool:
+        """Whether current_user has the permission on the site's project (sites without one are open)."""
+        if self.current_user is None or not site.project_id:
+            return True
+        project_id = site.project_id
+        if project_id not in self._access:
+            if project_id not in self.projects:
+                self._access[project_id] = True  # No project means no restriction
+            else:
+                if self._matrix is None:
+                    self._matrix = get_access_matrix(self.current_user, self.db)
+                self._access[project_id] = self._matrix.has_permission(
+                    "du", project_id, self.permission, admin_full_access=True
+                )
+        return self._access[project_id]
+
+    def project_po(self, site: ODBOQSite) -> str:
+        project = self.projects.get(site.project_id)
+        return project.po if project else (site.project_id or 'N/A')
+
+    # ---------- renderers ----------
+
+    def csv(self, site: ODBOQSite) -> str:
+        """
+        BOQ CSV of one site: metadata header rows, then Description, Category, BU,
+        UOM, BOQ Qty, Unit Price, Total USD, Total AED, Line Number, Code.
+
+        Raises:
+            HTTPException: 404 if the site has no product with qty_per_site > 0
+        """
+        items = self.items.get(site.id)
+        if not items:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No products found with qty_per_site > 0 for site '{site.site_id}'."
+            )
+
+        csv_lines = [
+            f'" "," "," "," ",DU BOQ," "," "',
+            f'BPO Number:,{self.project_po(site)}," "," "," ",Date:,{self.date}',
+            f'Scope:,{site.scope or "N/A"}," "," "," ",Subscope:,{site.subscope or "N/A"}',
+            f'Vendor:,Nokia," "," "," ",Site ID:,{site.site_id}',
+            f'" "," "," "," "," "," "," "',  # Empty row separator
+            ','.join(BOQ_CSV_HEADERS),
+        ]
+        for item in items:
+            csv_lines.append(','.join(_csv_cell(value) for value in (
+                item.description or ' ',
+                item.category or ' ',
+                item.bu or ' ',
+                item.code or ' ',
+                item.qty,
+                item.unit_price if item.unit_price is not None else ' ',
+                item.total_usd if item.total_usd != '' else ' ',
+                item.total_aed if item.total_aed != '' else ' ',
+                item.line_number or ' ',
+                item.code or ' ',
+            )))
+        return '\n'.join(csv_lines)
+
+    def data(self, site: ODBOQSite) -> dict:
+        """
+        BOQ of one site in the format of the Excel template (see create_excel_from_boq_data).
+
+        Returns {'error': ...} if the site has no product with qty_per_site > 0.
+        """
+        items = self.items.get(site.id)
+        if not items:
+            return {'error': f"No products found with qty_per_site > 0 for site '{site.site_id}'."}
+
+        po_model = site.po_model or ''
+        return {
+            'site_record_id': site.id,
+            'site_id': site.site_id,
+            'scope': site.scope,
+            'subscope': site.subscope,
+            'project_po': self.project_po(site),
+            'sps_category': site.subscope or 'N/A',
+            'po_model': po_model,
+            'data': [{
+                'line': item.line_number,
+                'bu': item.bu,
+                'item_job': item.code,  # ERP Item Code
+                'description': item.description,
+                'budget_line': item.category,
+                'qty': item.qty,
+                'unit_price': item.unit_price if item.unit_price is not None else '',
+                'total_usd': item.total_usd,
+                'total_aed': item.total_aed,
+                'site_id_list': site.site_id,
+                'po_model': po_model
+            } for item in items]
+        }
@@ -19,11 +19,10 @@ import csv
 import logging
 import os
 import pandas as pd
-from io import StringIO
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status, Request, Form
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
-from typing import Optional, List, Dict, Any, Union, Tuple
+from typing import Optional, List, Dict, Any, Union, Tuple, Callable, BinaryIO
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -39,14 +38,13 @@ DEFAULT_PRODUCTS_LIMIT = 100
 MAX_SITES_LIMIT = 500
 MAX_PRODUCTS_LIMIT = 1000
 
-# CSV structure constants
-CSV_PRODUCT_START_COL = 7  # Column index where product quantities begin
-CSV_METADATA_FIELD_COUNT = 13  # Number of metadata fields per site row
-
 # Date/time formats
 DATE_FORMAT_DISPLAY = '%d-%b-%y'  # e.g., "09-Feb-26"
 DATE_FORMAT_ISO = '%Y-%m-%d'  # e.g., "2026-02-09"
 
+# Media type of generated Excel downloads
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 # Excel template path
 BOQ_TEMPLATE_FILENAME = 'BOQ Formate.xlsx'
 BOQ_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'templates', BOQ_TEMPLATE_FILENAME)
@@ -67,58 +65,46 @@ BOQ_EXCEL_COLUMNS = [
     (12, 'po_model')   # Model Name towards dU
 ]
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.DU.OD_BOQ_Site import ODBOQSite
 from Models.DU.OD_BOQ_Product import ODBOQProduct
 from Models.DU.OD_BOQ_Site_Product import ODBOQSiteProduct
+from APIs.DU.OD_BOQ_Generation import BOQBatch, load_sites
+from APIs.DU.OD_BOQ_Upload import TrackerReader, import_tracker, preview_tracker
 import importlib
 DU_Project_module = importlib.import_module("Models.DU.DU_Project")
 DUProject = DU_Project_module.DUProject
 
-from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
+from Models.Admin.User import User
+from utils.access_control import (
+    check_du_project_access, filter_query_by_project_access, get_accessible_project_ids, apply_project_filter
+)
+from utils.blocking import offload, PARSE, RENDER
+from utils.audit_log import create_audit_log
+from utils.http_cache import conditional_get
+from utils.pagination import CursorParams, Keyset, count_total
+from utils.compression import compression_class
+from utils.cache import cached
+from utils.jobs import job_handler, job_queue, job_accepted, JobContext, JobResult, EXPORT
 from Schemas.DU.OD_BOQ_Schema import (
     ODBOQSiteCreate, ODBOQSiteUpdate, ODBOQSiteOut, ODBOQSitePagination,
     ODBOQProductCreate, ODBOQProductUpdate, ODBOQProductOut, ODBOQProductPagination,
     ODBOQSiteProductCreate, ODBOQSiteProductUpdate, ODBOQSiteProductOut,
     SiteWithProductsOut, ProductWithQuantity,
-    ODBOQStatsResponse, FilterOptions, UploadResponse, BulkDeleteResponse
+    ODBOQStatsResponse, FilterOptions, UploadResponse, UploadPreviewResponse, BulkDeleteResponse
 )
 
 odBOQRoute = APIRouter(prefix="/od-boq", tags=["OD BOQ (New Structure)"])
 
+# Sort orders of the paginated lists (see utils.pagination)
+SITE_KEYSET = Keyset(ODBOQSite.site_id, ODBOQSite.id)
+PRODUCT_KEYSET = Keyset(ODBOQProduct.id)
+
 
 # ===========================
 # HELPER FUNCTIONS
 # ===========================
 
-async def create_audit_log(
-        db: Session,
-        user_id: int,
-        action: str,
-        resource_type: str,
-        resource_id: Optional[str] = None,
-        resource_name: Optional[str] = None,
-        details: Optional[str] = None,
-        ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
-):
-    """Create an audit log entry."""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        resource_name=resource_name,
-        details=details,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    db.add(audit_log)
-    db.commit()
-    return audit_log
-
-
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -127,38 +113,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def check_du_project_access(current_user: User, project: DUProject, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a DU project with required permission level.
-    """
-    # Senior admin has all permissions to all projects
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # Admin has all permissions but only to projects they have access to
-    # Check UserProjectAccess for both admin and other roles
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.DUproject_id == project.pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    # Admin with any access level gets full permissions (same as senior_admin) for their projects
-    if current_user.role.name == "admin":
-        return True
-
-    # For non-admin users, check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
 def validate_site_project_access(
     site: ODBOQSite,
     current_user: User,
@@ -178,7 +132,7 @@ def validate_site_project_access(
     if not project:
         return True, None  # No project means no restriction
 
-    if not check_du_project_access(current_user, project, db, required_permission):
+    if not check_du_project_access(current_user, project, db, required_permission, admin_full_access=True):
         return False, f"You do not have {required_permission} access to this site's project."
 
     return True, None
@@ -205,23 +159,6 @@ def safe_extract_float(value) -> Optional[float]:
         return None
 
 
-def parse_currency_value(value) -> Optional[float]:
-    """Parse a currency string like ' $1,126.28 ' to float."""
-    if pd.isna(value):
-        return None
-    val_str = str(value).strip()
-    if not val_str:
-        return None
-    # Remove $, commas, and whitespace
-    val_str = val_str.replace('$', '').replace(',', '').strip()
-    if not val_str:
-        return None
-    try:
-        return float(val_str)
-    except ValueError:
-        return None
-
-
 def format_quantity(qty_value: float) -> Union[int, float]:
     """Convert float to int if it's a whole number (e.g., 2.0 -> 2)."""
     if isinstance(qty_value, float) and qty_value == int(qty_value):
@@ -237,37 +174,9 @@ def write_boq_row_to_excel(ws, row_num: int, item: Dict[str, Any], template_bord
         ws.cell(row=row_num, column=col_idx).border = template_border
 
 
-def get_user_accessible_du_projects(current_user: User, db: Session):
-    """Get all DU projects that the current user has access to."""
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(DUProject).all()
-
-    # For admin and other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.DUproject_id.isnot(None)
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    accessible_project_ids = [access.DUproject_id for access in user_accesses]
-    return db.query(DUProject).filter(DUProject.pid_po.in_(accessible_project_ids)).all()
-
-
 def filter_sites_by_user_access(current_user: User, query, db: Session):
     """Filter sites query based on user's project access."""
-    if current_user.role.name == "senior_admin":
-        return query
-
-    accessible_projects = get_user_accessible_du_projects(current_user, db)
-    accessible_project_ids = [project.pid_po for project in accessible_projects]
-
-    if not accessible_project_ids:
-        return query.filter(ODBOQSite.site_id == "___NONE___")  # Return empty
-
-    return query.filter(ODBOQSite.project_id.in_(accessible_project_ids))
+    return filter_query_by_project_access(current_user, query, ODBOQSite.project_id, db, "du")
 
 
 # ===========================
@@ -275,7 +184,7 @@ def filter_sites_by_user_access(current_user: User, query, db: Session):
 # ===========================
 
 @odBOQRoute.post("/sites", response_model=ODBOQSiteOut)
-async def create_site(
+def create_site(
         site_data: ODBOQSiteCreate,
         request: Request,
         db: Session = Depends(get_db),
@@ -288,7 +197,7 @@ async def create_site(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        if not check_du_project_access(current_user, project, db, "edit"):
+        if not check_du_project_access(current_user, project, db, "edit", admin_full_access=True):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to add sites to this project."
@@ -308,7 +217,7 @@ async def create_site(
         db.commit()
         db.refresh(new_site)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_od_boq_site",
@@ -340,10 +249,11 @@ def get_sites(
         scope: Optional[str] = None,
         subscope: Optional[str] = None,
         region: Optional[str] = None,
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
-    """Get sites with pagination and filters."""
+    """Get sites with pagination and filters (skip/limit or keyset cursor)."""
     try:
         query = db.query(ODBOQSite)
         query = filter_sites_by_user_access(current_user, query, db)
@@ -370,11 +280,16 @@ def get_sites(
                 )
             )
 
-        total_count = query.count()
-        records = query.order_by(ODBOQSite.site_id).offset(skip).limit(limit).all()
+        # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+        total_count = count_total(db, paging, query, ODBOQSite)
+        records = SITE_KEYSET.paginate(query, paging, skip, limit).all()
 
-        return ODBOQSitePagination(records=records, total=total_count)
+        return ODBOQSitePagination(
+            records=records, total=total_count, next_cursor=SITE_KEYSET.next_cursor(records, limit)
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -385,7 +300,7 @@ def get_sites(
 @odBOQRoute.get("/sites/{id}", response_model=ODBOQSiteOut)
 def get_site(
         id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get a specific site by database ID."""
@@ -396,7 +311,7 @@ def get_site(
     # Check access
     if site.project_id:
         project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-        if project and not check_du_project_access(current_user, project, db, "view"):
+        if project and not check_du_project_access(current_user, project, db, "view", admin_full_access=True):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to view this site."
@@ -408,7 +323,7 @@ def get_site(
 @odBOQRoute.get("/sites/{id}/with-products", response_model=SiteWithProductsOut)
 def get_site_with_products(
         id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get a site with all its products and quantities."""
@@ -419,7 +334,7 @@ def get_site_with_products(
     # Check access
     if site.project_id:
         project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-        if project and not check_du_project_access(current_user, project, db, "view"):
+        if project and not check_du_project_access(current_user, project, db, "view", admin_full_access=True):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to view this site."
@@ -483,7 +398,7 @@ def get_site_with_products(
 
 
 @odBOQRoute.put("/sites/{id}", response_model=ODBOQSiteOut)
-async def update_site(
+def update_site(
         id: int,
         site_data: ODBOQSiteUpdate,
         request: Request,
@@ -498,7 +413,7 @@ async def update_site(
     # Check access
     if site.project_id:
         project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-        if project and not check_du_project_access(current_user, project, db, "edit"):
+        if project and not check_du_project_access(current_user, project, db, "edit", admin_full_access=True):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to update this site."
@@ -513,7 +428,7 @@ async def update_site(
         db.commit()
         db.refresh(site)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_od_boq_site",
@@ -536,7 +451,7 @@ async def update_site(
 
 
 @odBOQRoute.delete("/sites/{id}")
-async def delete_site(
+def delete_site(
         id: int,
         request: Request,
         db: Session = Depends(get_db),
@@ -550,7 +465,7 @@ async def delete_site(
     # Check access
     if site.project_id:
         project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-        if project and not check_du_project_access(current_user, project, db, "all"):
+        if project and not check_du_project_access(current_user, project, db, "all", admin_full_access=True):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to delete this site."
@@ -567,7 +482,7 @@ async def delete_site(
         db.delete(site)
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_od_boq_site",
@@ -590,7 +505,7 @@ async def delete_site(
 
 
 @odBOQRoute.delete("/sites/delete-all/{project_id}", response_model=BulkDeleteResponse)
-async def delete_all_sites_by_project(
+def delete_all_sites_by_project(
         project_id: str,
         request: Request,
         db: Session = Depends(get_db),
@@ -602,7 +517,7 @@ async def delete_all_sites_by_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if not check_du_project_access(current_user, project, db, "all"):
+    if not check_du_project_access(current_user, project, db, "all", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to delete sites from this project."
@@ -628,7 +543,7 @@ async def delete_all_sites_by_project(
 
         db.commit()
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_delete_od_boq_sites",
@@ -663,7 +578,7 @@ async def delete_all_sites_by_project(
 # ===========================
 
 @odBOQRoute.post("/products", response_model=ODBOQProductOut)
-async def create_product(
+def create_product(
         product_data: ODBOQProductCreate,
         request: Request,
         db: Session = Depends(get_db),
@@ -676,7 +591,7 @@ async def create_product(
         db.commit()
         db.refresh(new_product)
 
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create_od_boq_product",
@@ -697,16 +612,21 @@ async def create_product(
         )
 
 
-@odBOQRoute.get("/products", response_model=ODBOQProductPagination)
+@odBOQRoute.get(
+    "/products",
+    response_model=ODBOQProductPagination,
+    dependencies=[Depends(conditional_get(ODBOQProduct))],
+)
 def get_products(
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=1000),
         search: Optional[str] = None,
         category: Optional[str] = None,
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
-    """Get products with pagination and filters."""
+    """Get products with pagination and filters (skip/limit or keyset cursor)."""
     try:
         query = db.query(ODBOQProduct)
 
@@ -725,11 +645,16 @@ def get_products(
                 )
             )
 
-        total_count = query.count()
-        records = query.order_by(ODBOQProduct.id).offset(skip).limit(limit).all()
+        # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+        total_count = count_total(db, paging, query, ODBOQProduct)
+        records = PRODUCT_KEYSET.paginate(query, paging, skip, limit).all()
 
-        return ODBOQProductPagination(records=records, total=total_count)
+        return ODBOQProductPagination(
+            records=records, total=total_count, next_cursor=PRODUCT_KEYSET.next_cursor(records, limit)
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -741,36 +666,61 @@ def get_products(
 # STATISTICS & FILTER ENDPOINTS
 # ===========================
 
-@odBOQRoute.get("/stats", response_model=ODBOQStatsResponse)
+# Stats and filter options are cached per accessible project set (users with
+# the same access share entries); writes to the tables below invalidate them.
+
+@cached("od_boq.stats", ttl=300, tables=(ODBOQSite, ODBOQProduct, ODBOQSiteProduct, DUProject))
+def load_stats(db: Session, project_ids, project_id: Optional[str]) -> Dict[str, int]:
+    """Count sites, products and distinct values visible through `project_ids`."""
+    site_query = apply_project_filter(db.query(ODBOQSite), ODBOQSite.project_id, project_ids)
+    if project_id:
+        site_query = site_query.filter(ODBOQSite.project_id == project_id)
+
+    return {
+        "total_sites": site_query.count(),
+        "total_products": db.query(ODBOQProduct).count(),
+        "total_site_products": db.query(ODBOQSiteProduct).count(),
+        "unique_scopes": site_query.with_entities(func.count(func.distinct(ODBOQSite.scope))).scalar() or 0,
+        "unique_subscopes": site_query.with_entities(func.count(func.distinct(ODBOQSite.subscope))).scalar() or 0,
+        "unique_categories": db.query(ODBOQProduct).with_entities(
+            func.count(func.distinct(ODBOQProduct.category))
+        ).scalar() or 0,
+    }
+
+
+@cached("od_boq.filter_options", ttl=300, tables=(ODBOQSite, ODBOQProduct, DUProject))
+def load_filter_options(db: Session, project_ids, project_id: Optional[str]) -> Dict[str, List[str]]:
+    """Distinct region, scope, subscope, category and project values visible through `project_ids`."""
+    site_query = apply_project_filter(db.query(ODBOQSite), ODBOQSite.project_id, project_ids)
+    if project_id:
+        site_query = site_query.filter(ODBOQSite.project_id == project_id)
+
+    def distinct(query, column) -> List[str]:
+        return sorted(r[0] for r in query.with_entities(column).distinct().all() if r[0])
+
+    return {
+        "regions": distinct(site_query, ODBOQSite.region),
+        "scopes": distinct(site_query, ODBOQSite.scope),
+        "subscopes": distinct(site_query, ODBOQSite.subscope),
+        "categories": distinct(db.query(ODBOQProduct), ODBOQProduct.category),
+        "projects": distinct(site_query, ODBOQSite.project_id),
+    }
+
+
+@odBOQRoute.get(
+    "/stats",
+    response_model=ODBOQStatsResponse,
+    dependencies=[Depends(conditional_get(ODBOQSite, ODBOQProduct, ODBOQSiteProduct, DUProject))],
+)
 def get_stats(
         project_id: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get overall statistics."""
     try:
-        site_query = db.query(ODBOQSite)
-        site_query = filter_sites_by_user_access(current_user, site_query, db)
-
-        if project_id:
-            site_query = site_query.filter(ODBOQSite.project_id == project_id)
-
-        total_sites = site_query.count()
-        total_products = db.query(ODBOQProduct).count()
-        total_site_products = db.query(ODBOQSiteProduct).count()
-
-        unique_scopes = site_query.with_entities(func.count(func.distinct(ODBOQSite.scope))).scalar() or 0
-        unique_subscopes = site_query.with_entities(func.count(func.distinct(ODBOQSite.subscope))).scalar() or 0
-        unique_categories = db.query(ODBOQProduct).with_entities(func.count(func.distinct(ODBOQProduct.category))).scalar() or 0
-
-        return ODBOQStatsResponse(
-            total_sites=total_sites,
-            total_products=total_products,
-            total_site_products=total_site_products,
-            unique_scopes=unique_scopes,
-            unique_subscopes=unique_subscopes,
-            unique_categories=unique_categories
-        )
+        project_ids = get_accessible_project_ids(current_user, db, "du")
+        return ODBOQStatsResponse(**load_stats(db, project_ids, project_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -778,33 +728,20 @@ def get_stats(
         )
 
 
-@odBOQRoute.get("/filters/options", response_model=FilterOptions)
+@odBOQRoute.get(
+    "/filters/options",
+    response_model=FilterOptions,
+    dependencies=[Depends(conditional_get(ODBOQSite, ODBOQProduct, DUProject))],
+)
 def get_filter_options(
         project_id: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get available filter options."""
     try:
-        site_query = db.query(ODBOQSite)
-        site_query = filter_sites_by_user_access(current_user, site_query, db)
-
-        if project_id:
-            site_query = site_query.filter(ODBOQSite.project_id == project_id)
-
-        regions = [r[0] for r in site_query.with_entities(ODBOQSite.region).distinct().all() if r[0]]
-        scopes = [r[0] for r in site_query.with_entities(ODBOQSite.scope).distinct().all() if r[0]]
-        subscopes = [r[0] for r in site_query.with_entities(ODBOQSite.subscope).distinct().all() if r[0]]
-        categories = [r[0] for r in db.query(ODBOQProduct).with_entities(ODBOQProduct.category).distinct().all() if r[0]]
-        projects = [r[0] for r in site_query.with_entities(ODBOQSite.project_id).distinct().all() if r[0]]
-
-        return FilterOptions(
-            regions=sorted(regions),
-            scopes=sorted(scopes),
-            subscopes=sorted(subscopes),
-            categories=sorted(categories),
-            projects=sorted(projects)
-        )
+        project_ids = get_accessible_project_ids(current_user, db, "du")
+        return FilterOptions(**load_filter_options(db, project_ids, project_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -816,11 +753,85 @@ def get_filter_options(
 # CSV UPLOAD ENDPOINT (Populates all 3 tables)
 # ===========================
 
+def check_upload_target(file: UploadFile, project_id: str, db: Session, current_user: User) -> None:
+    """Raise 404 / 403 / 400 unless the user may upload this file to the project."""
+    project = db.query(DUProject).filter(DUProject.pid_po == project_id).first()
+    if not project:
+        logger.warning(f"OD BOQ CSV upload attempted for non-existent project: {project_id}")
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if not check_du_project_access(current_user, project, db, "edit", admin_full_access=True):
+        logger.warning(f"User {current_user.username} denied permission to upload OD BOQ for project {project_id}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to upload to this project."
+        )
+
+    if not file.filename.endswith('.csv'):
+        logger.warning(f"Invalid file type uploaded for OD BOQ: {file.filename}")
+        raise HTTPException(status_code=400, detail="File must be a CSV")
+
+
+@odBOQRoute.post("/upload-csv/preview", response_model=UploadPreviewResponse)
+@offload(PARSE)
+def preview_upload_csv(
+        file: UploadFile = File(...),
+        project_id: str = Form(...),
+        consumed_year: int = Form(2026),
+        limit: int = Query(200, ge=0, le=5000, description="Maximum entries per detail list"),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Compare a tracker CSV with the stored data without writing anything.
+
+    Returns the sites and products an upload of this file would add or change
+    (with the old and new value of every changed field and quantity), and the
+    project's sites that are not in the file. Counts cover everything; the
+    detail lists stop at `limit` entries each.
+    """
+    logger.info(f"User {current_user.username} previewing OD BOQ CSV: {file.filename} for project {project_id}")
+    check_upload_target(file, project_id, db, current_user)
+
+    try:
+        counts, report = preview_tracker(db, TrackerReader(file.file), project_id, consumed_year, detail_limit=limit)
+    except Exception as e:
+        logger.error(f"Error previewing OD BOQ CSV for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing CSV: {str(e)}"
+        )
+    finally:
+        db.rollback()
+
+    return UploadPreviewResponse(
+        sites_added=counts.sites_inserted,
+        sites_changed=report.sites_changed,
+        sites_unchanged=counts.sites_unchanged,
+        sites_removed=report.sites_removed,
+        products_added=counts.products_inserted,
+        products_changed=report.products_changed,
+        products_unchanged=counts.products_unchanged,
+        quantities_added=counts.site_products_inserted,
+        quantities_changed=counts.site_products_updated,
+        quantities_unchanged=counts.site_products_unchanged,
+        skipped=counts.skipped,
+        added_sites=report.added_sites,
+        changed_sites=report.changed_sites,
+        removed_sites=report.removed_sites,
+        added_products=report.added_products,
+        changed_products=report.changed_products,
+        truncated=report.truncated
+    )
+
+
 @odBOQRoute.post("/upload-csv", response_model=UploadResponse)
-async def upload_csv(
+@offload(PARSE)
+def upload_csv(
         file: UploadFile = File(...),
         project_id: str = Form(...),
         consumed_year: int = Form(2026),
+        delta: bool = Form(True),
         request: Request = None,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
@@ -837,289 +848,26 @@ async def upload_csv(
     - Same site_id can exist with different subscope (unique constraint on site_id + subscope)
     - Sum column: Calculated automatically, not read from CSV
     - New site metadata: AC ARMOD Cable, Additional Cost, Remark, Partner, Request Status, etc.
+    - Streamed and written set-based: the file is parsed in chunks of site rows, existing
+      rows are preloaded and all writes go out as bulk upserts (see APIs.DU.OD_BOQ_Upload)
+    - delta=true (default): only sites, quantities and products whose content differs
+      from what is stored are written; delta=false rewrites every row of the file
     """
     logger.info(f"User {current_user.username} uploading OD BOQ CSV: {file.filename} for project {project_id}, consumed_year: {consumed_year}")
-
-    # Check project access
-    project = db.query(DUProject).filter(DUProject.pid_po == project_id).first()
-    if not project:
-        logger.warning(f"OD BOQ CSV upload attempted for non-existent project: {project_id}")
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    if not check_du_project_access(current_user, project, db, "edit"):
-        logger.warning(f"User {current_user.username} denied permission to upload OD BOQ for project {project_id}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to upload to this project."
-        )
-
-    if not file.filename.endswith('.csv'):
-        logger.warning(f"Invalid file type uploaded for OD BOQ: {file.filename}")
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    check_upload_target(file, project_id, db, current_user)
 
     try:
-        content = await file.read()
-
-        # Try different encodings
-        csv_content = None
-        for encoding in ['utf-8', 'utf-8-sig', 'cp1252', 'latin-1']:
-            try:
-                csv_content = content.decode(encoding)
-                csv_content = csv_content.replace('\xa0', ' ')
-                break
-            except (UnicodeDecodeError, LookupError):
-                continue
-
-        if csv_content is None:
-            raise HTTPException(status_code=400, detail="Could not decode CSV file")
-
-        # Read CSV
-        df = pd.read_csv(StringIO(csv_content), header=None)
-
-        # Extract product headers (rows 0-6, starting from column 7)
-        # Row 0: Description, Row 1: #Line, Row 2: BU, Row 3: Unit Price ($),
-        # Row 4: #Code, Row 5: Category, Row 6: Total PO QTY,
-        # Row 7: Consumed (SKIP), Row 8: Remaining/Headers (SKIP)
-        descriptions = df.iloc[0, 7:].tolist()
-        line_numbers = df.iloc[1, 7:].tolist()
-        bus = df.iloc[2, 7:].tolist()
-        unit_prices = df.iloc[3, 7:].tolist()
-        codes = df.iloc[4, 7:].tolist()
-        categories = df.iloc[5, 7:].tolist()
-        total_pos = df.iloc[6, 7:].tolist()
-        # Row 7 (index 7) is consumed in year - SKIP
-        # Row 8 (index 8) is remaining in PO / column headers - SKIP
-
-        # Helper function to safely extract and clean string values from lists
-        def clean_value(lst, idx):
-            """Extract value from list, return cleaned string or None."""
-            if idx < len(lst) and not pd.isna(lst[idx]):
-                val = str(lst[idx]).strip()
-                return val if val else None
-            return None
-
-        # Create/update products (WITHOUT consumed_in_year and remaining_in_po)
-        products_inserted = 0
-        products_updated = 0
-        product_id_map = {}  # Maps column index to product ID
-
-        for idx, desc in enumerate(descriptions):
-            # Skip columns without description OR without #Line number (validates product column)
-            description = clean_value(descriptions, idx)
-            line_number = clean_value(line_numbers, idx)
-
-            if not description or not line_number:
-                continue
-
-            # Extract other product fields
-            bu = clean_value(bus, idx)
-            code = clean_value(codes, idx)
-            category = clean_value(categories, idx)
-            unit_price = parse_currency_value(unit_prices[idx]) if idx < len(unit_prices) else None
-            total_po_qty = float(total_pos[idx]) if not pd.isna(total_pos[idx]) and str(total_pos[idx]).strip() else None
-
-            # Check if product exists by code (upsert logic)
-            existing_product = db.query(ODBOQProduct).filter(ODBOQProduct.code == code).first() if code else None
-
-            if existing_product:
-                # Update existing product (WITHOUT consumed_in_year and remaining_in_po)
-                existing_product.description = description
-                existing_product.line_number = line_number
-                existing_product.bu = bu
-                existing_product.category = category
-                existing_product.unit_price = unit_price
-                existing_product.total_po_qty = total_po_qty
-                existing_product.consumed_year = consumed_year
-                # consumed_in_year and remaining_in_po will be calculated later
-                product_id_map[idx] = existing_product.id
-                products_updated += 1
-            else:
-                # Create new product (WITHOUT consumed_in_year and remaining_in_po)
-                new_product = ODBOQProduct(
-                    description=description,
-                    line_number=line_number,
-                    bu=bu,
-                    code=code,
-                    category=category,
-                    unit_price=unit_price,
-                    total_po_qty=total_po_qty,
-                    consumed_year=consumed_year,
-                    consumed_in_year=0,  # Will be calculated later
-                    remaining_in_po=0  # Will be calculated later
-                )
-                db.add(new_product)
-                db.flush()  # Get the ID without committing
-                product_id_map[idx] = new_product.id
-                products_inserted += 1
-
-        # Determine number of product columns
-        num_product_cols = len(product_id_map)
-
-        # Calculate metadata column indices (after products and Sum column)
-        # Structure: [Region, Distance, Scope, Subscope, Site ID, Model] + [Products...] + [Sum] + [Metadata...]
-        metadata_start_col = 7 + num_product_cols + 1  # +1 for Sum column
-
-        # Process site rows (row 9 onwards, which is index 9)
-        sites_inserted = 0
-        sites_updated = 0
-        site_products_inserted = 0
-        skipped = 0
-        site_record_id_map = {}  # Maps (site_id, subscope) to database record ID
-
-        # Helper function to safely extract cell value
-        def safe_extract(row, col_idx):
-            """Extract and clean cell value, return None if empty/invalid."""
-            if col_idx < len(row) and not pd.isna(row.iloc[col_idx]):
-                val = str(row.iloc[col_idx]).strip()
-                return val if val else None
-            return None
-
-        for row_idx in range(9, len(df)):
-            row = df.iloc[row_idx]
-
-            # Extract site basic data (columns 0-5)
-            region = safe_extract(row, 0)
-            distance = safe_extract(row, 1)
-            scope = safe_extract(row, 2)
-            subscope = safe_extract(row, 3)
-            site_id = safe_extract(row, 4)
-            po_model = safe_extract(row, 5)
-
-            # Skip if no site_id
-            if not site_id or site_id == '':
-                skipped += 1
-                continue
-
-            # Extract metadata columns (after products and Sum column) - 13 fields
-            metadata_values = [safe_extract(row, metadata_start_col + i) for i in range(13)]
-            (ac_armod_cable, additional_cost, remark, partner, request_status,
-             requested_date, du_po_number, smp, year_scope, integration_status,
-             integration_date, du_po_convention_name, po_year_issuance) = metadata_values
-
-            # Check for existing site with same site_id and subscope
-            existing_site = db.query(ODBOQSite).filter(
-                ODBOQSite.site_id == site_id,
-                ODBOQSite.subscope == subscope
-            ).first()
-
-            if existing_site:
-                # Update existing site
-                existing_site.region = region
-                existing_site.distance = distance
-                existing_site.scope = scope
-                existing_site.po_model = po_model
-                existing_site.project_id = project_id
-                existing_site.ac_armod_cable = ac_armod_cable
-                existing_site.additional_cost = additional_cost
-                existing_site.remark = remark
-                existing_site.partner = partner
-                existing_site.request_status = request_status
-                existing_site.requested_date = requested_date
-                existing_site.du_po_number = du_po_number
-                existing_site.smp = smp
-                existing_site.year_scope = year_scope
-                existing_site.integration_status = integration_status
-                existing_site.integration_date = integration_date
-                existing_site.du_po_convention_name = du_po_convention_name
-                existing_site.po_year_issuance = po_year_issuance
-                site_record_id_map[(site_id, subscope)] = existing_site.id
-                sites_updated += 1
-            else:
-                # Create new site
-                new_site = ODBOQSite(
-                    site_id=site_id,
-                    region=region,
-                    distance=distance,
-                    scope=scope,
-                    subscope=subscope,
-                    po_model=po_model,
-                    project_id=project_id,
-                    ac_armod_cable=ac_armod_cable,
-                    additional_cost=additional_cost,
-                    remark=remark,
-                    partner=partner,
-                    request_status=request_status,
-                    requested_date=requested_date,
-                    du_po_number=du_po_number,
-                    smp=smp,
-                    year_scope=year_scope,
-                    integration_status=integration_status,
-                    integration_date=integration_date,
-                    du_po_convention_name=du_po_convention_name,
-                    po_year_issuance=po_year_issuance
-                )
-                db.add(new_site)
-                db.flush()  # Get the ID
-                site_record_id_map[(site_id, subscope)] = new_site.id
-                sites_inserted += 1
-
-            # Get the site record ID for this site
-            current_site_record_id = site_record_id_map[(site_id, subscope)]
-
-            # Create site-product records (columns 7 to 7+num_product_cols-1)
-            for col_idx, product_id in product_id_map.items():
-                qty_value = row.iloc[7 + col_idx]
-                qty = float(qty_value) if not pd.isna(qty_value) and str(qty_value).strip() != '' else None
-
-                # Create or update site-product record
-                existing_sp = db.query(ODBOQSiteProduct).filter(
-                    ODBOQSiteProduct.site_record_id == current_site_record_id,
-                    ODBOQSiteProduct.product_id == product_id
-                ).first()
-
-                if existing_sp:
-                    existing_sp.qty_per_site = qty
-                else:
-                    new_sp = ODBOQSiteProduct(
-                        site_record_id=current_site_record_id,
-                        product_id=product_id,
-                        qty_per_site=qty
-                    )
-                    db.add(new_sp)
-                    site_products_inserted += 1
-
-        # Flush to ensure all site-products are in the database
-        db.flush()
-
-        # Calculate consumed_in_year and remaining_in_po for each product (optimized batch query)
-        product_ids = set(product_id_map.values())
-
-        if product_ids:
-            # Batch fetch all products at once
-            products_dict = {
-                p.id: p for p in db.query(ODBOQProduct).filter(
-                    ODBOQProduct.id.in_(product_ids)
-                ).all()
-            }
-
-            # Calculate all consumed amounts in a single query
-            consumed_data = db.query(
-                ODBOQSiteProduct.product_id,
-                func.sum(ODBOQSiteProduct.qty_per_site).label('total')
-            ).filter(
-                ODBOQSiteProduct.product_id.in_(product_ids),
-                ODBOQSiteProduct.qty_per_site.isnot(None)
-            ).group_by(ODBOQSiteProduct.product_id).all()
-
-            consumed_map = {cd[0]: cd[1] or 0.0 for cd in consumed_data}
-
-            # Update products with calculated values
-            for product_id, product in products_dict.items():
-                total_consumed = consumed_map.get(product_id, 0.0)
-                product.consumed_in_year = total_consumed
-
-                # Calculate remaining_in_po as total_po_qty - consumed_in_year
-                if product.total_po_qty is not None:
-                    product.remaining_in_po = product.total_po_qty - total_consumed
-                else:
-                    product.remaining_in_po = -total_consumed  # Negative if no total_po_qty
+        counts = import_tracker(db, TrackerReader(file.file), project_id, consumed_year, delta=delta)
+        sites_inserted, sites_updated = counts.sites_inserted, counts.sites_updated
+        products_inserted, products_updated = counts.products_inserted, counts.products_updated
+        site_products_inserted, skipped = counts.site_products_inserted, counts.skipped
 
         db.commit()
 
         logger.info(f"OD BOQ CSV upload completed: {sites_inserted} sites inserted, {sites_updated} updated, {products_inserted} products inserted, {products_updated} updated, {site_products_inserted} site-products inserted for project {project_id}")
 
         # Create audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_upload_od_boq",
@@ -1132,7 +880,10 @@ async def upload_csv(
                 "sites_updated": sites_updated,
                 "products_inserted": products_inserted,
                 "products_updated": products_updated,
-                "site_products_inserted": site_products_inserted
+                "site_products_inserted": site_products_inserted,
+                "site_products_updated": counts.site_products_updated,
+                "sites_unchanged": counts.sites_unchanged,
+                "delta": delta
             }),
             ip_address=get_client_ip(request),
             user_agent=request.headers.get("User-Agent")
@@ -1144,8 +895,13 @@ async def upload_csv(
             products_inserted=products_inserted,
             products_updated=products_updated,
             site_products_inserted=site_products_inserted,
+            site_products_updated=counts.site_products_updated,
             skipped=skipped,
-            message=f"Successfully processed CSV: {sites_inserted} sites inserted, {products_inserted} products inserted"
+            sites_unchanged=counts.sites_unchanged,
+            products_unchanged=counts.products_unchanged,
+            site_products_unchanged=counts.site_products_unchanged,
+            message=f"Successfully processed CSV: {sites_inserted} sites inserted, {products_inserted} products inserted, "
+                    f"{counts.sites_unchanged} sites unchanged"
         )
 
     except Exception as e:
@@ -1170,112 +926,24 @@ from io import BytesIO
 import zipfile
 from datetime import datetime
 import os
-from openpyxl import load_workbook
-from openpyxl.styles import Border, Side, Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
+from APIs.DU.OD_BOQ_Workbook import write_boq_workbook, iter_file
 
 
 def generate_boq_csv_for_site(site: ODBOQSite, db: Session) -> str:
     """
-    Generate BOQ CSV data for a single site.
+    Generate BOQ CSV data for a single site (see APIs.DU.OD_BOQ_Generation.BOQBatch.csv).
 
-    Logic:
-    1. Query ODBOQSiteProduct joined with ODBOQProduct where qty_per_site > 0
-    2. Apply category transformations (HW→1, SW→3, Service→1/2)
-    3. Return CSV string with columns: Description, Category, BU, UOM, BOQ Qty, Line Number, Code
+    Raises:
+        HTTPException: 404 if the site has no product with qty_per_site > 0
     """
-    # Query site products with qty > 0
-    site_products = db.query(
-        ODBOQSiteProduct,
-        ODBOQProduct
-    ).join(
-        ODBOQProduct, ODBOQSiteProduct.product_id == ODBOQProduct.id
-    ).filter(
-        ODBOQSiteProduct.site_record_id == site.id,
-        ODBOQSiteProduct.qty_per_site > 0
-    ).all()
-
-    if not site_products:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No products found with qty_per_site > 0 for site '{site.site_id}'."
-        )
-
-    # Build result data - use raw quantities as stored
-    result_data = []
-    for sp, product in site_products:
-        final_qty = sp.qty_per_site
-
-        # Convert float to int if it's a whole number (e.g., 2.0 -> 2)
-        if isinstance(final_qty, float) and final_qty == int(final_qty):
-            final_qty = int(final_qty)
-
-        up = product.unit_price
-        total_usd = ''
-        total_aed = ''
-        if up is not None and final_qty is not None:
-            total_usd_val = up * (final_qty if isinstance(final_qty, (int, float)) else 0)
-            total_aed_val = total_usd_val * 3.6735
-            total_usd = round(total_usd_val, 2)
-            total_aed = round(total_aed_val, 2)
-
-        result_data.append({
-            'Description': product.description or ' ',
-            'Category': product.category or ' ',
-            'BU': product.bu or ' ',
-            'UOM': product.code or ' ',
-            'BOQ Qty': final_qty,
-            'Unit Price': up if up is not None else ' ',
-            'Total USD': total_usd if total_usd != '' else ' ',
-            'Total AED': total_aed if total_aed != '' else ' ',
-            'Line Number': product.line_number or ' ',
-            'Code': product.code or ' '
-        })
-
-    # Get project details for header
-    project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-    project_name = project.project_name if project else (site.project_id or 'N/A')
-    project_po = project.po if project else (site.project_id or 'N/A')
-
-    # Get current date
-    current_date = datetime.now().strftime('%d-%b-%y')
-
-    # Generate CSV string with metadata headers
-    csv_lines = []
-
-    # Add metadata header rows
-    csv_lines.append(f'" "," "," "," ",DU BOQ," "," "')
-    csv_lines.append(f'BPO Number:,{project_po}," "," "," ",Date:,{current_date}')
-    csv_lines.append(f'Scope:,{site.scope or "N/A"}," "," "," ",Subscope:,{site.subscope or "N/A"}')
-    csv_lines.append(f'Vendor:,Nokia," "," "," ",Site ID:,{site.site_id}')
-    csv_lines.append(f'" "," "," "," "," "," "," "')  # Empty row separator
-
-    # Add data table headers
-    csv_headers = ['Description', 'Category', 'BU', 'UOM', 'BOQ Qty', 'Unit Price', 'Total USD', 'Total AED', 'Line Number', 'Code']
-    csv_lines.append(','.join(csv_headers))
-
-    # Add data rows
-    for row in result_data:
-        csv_row = []
-        for header in csv_headers:
-            value = row.get(header, ' ')
-            value_str = str(value) if value is not None else ' '
-            if value_str == '' or value_str == 'None':
-                value_str = ' '
-            # Escape commas and quotes in values
-            if ',' in value_str or '"' in value_str:
-                value_str = f'"{value_str.replace(chr(34), chr(34)+chr(34))}"'
-            csv_row.append(value_str)
-        csv_lines.append(','.join(csv_row))
-
-    return '\n'.join(csv_lines)
+    return BOQBatch(db, [site]).csv(site)
 
 
 @odBOQRoute.get("/sites/{site_record_id}/generate-boq")
-async def generate_boq_for_site(
+def generate_boq_for_site(
     site_record_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ) -> str:
     """
@@ -1290,20 +958,19 @@ async def generate_boq_for_site(
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
 
-    # Check project access if site has a project_id
-    if site.project_id:
-        project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-        if project and not check_du_project_access(current_user, project, db, "view"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You do not have access to this site's project."
-            )
+    # Check project access (the batch loads the project once for the check and the header)
+    batch = BOQBatch(db, [site], current_user)
+    if not batch.allowed(site):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to this site's project."
+        )
 
     # Generate BOQ CSV
-    csv_content = generate_boq_csv_for_site(site, db)
+    csv_content = batch.csv(site)
 
     # Audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="generate_boq",
@@ -1319,7 +986,8 @@ async def generate_boq_for_site(
 
 
 @odBOQRoute.post("/sites/bulk-generate-boq", response_model=BOQGenerationResponse)
-async def bulk_generate_boq(
+@compression_class("bulk")
+def bulk_generate_boq(
     body: BOQGenerationRequest,
     request: Request,
     db: Session = Depends(get_db),
@@ -1335,22 +1003,9 @@ async def bulk_generate_boq(
     successful = 0
     failed = 0
 
-    # Batch fetch all sites at once (fixes N+1 query)
-    sites_map = {
-        s.id: s for s in db.query(ODBOQSite).filter(
-            ODBOQSite.id.in_(body.site_record_ids)
-        ).all()
-    }
-
-    # Batch fetch all projects at once (fixes N+1 query)
-    project_ids = [s.project_id for s in sites_map.values() if s.project_id]
-    projects_map = {}
-    if project_ids:
-        projects_map = {
-            p.pid_po: p for p in db.query(DUProject).filter(
-                DUProject.pid_po.in_(project_ids)
-            ).all()
-        }
+    # Batch fetch all sites, their projects and BOQ rows at once (see BOQBatch)
+    sites_map = {s.id: s for s in load_sites(db, body.site_record_ids)}
+    batch = BOQBatch(db, list(sites_map.values()), current_user)
 
     for site_record_id in body.site_record_ids:
         site = sites_map.get(site_record_id)
@@ -1366,22 +1021,20 @@ async def bulk_generate_boq(
             continue
 
         try:
-            # Check project access using pre-fetched project
-            if site.project_id:
-                project = projects_map.get(site.project_id)
-                if project and not check_du_project_access(current_user, project, db, "view"):
-                    results.append(BOQGenerationResult(
-                        site_record_id=site_record_id,
-                        site_id=site.site_id,
-                        subscope=site.subscope,
-                        success=False,
-                        error="Access denied"
-                    ))
-                    failed += 1
-                    continue
+            # Check project access (each project is checked once)
+            if not batch.allowed(site):
+                results.append(BOQGenerationResult(
+                    site_record_id=site_record_id,
+                    site_id=site.site_id,
+                    subscope=site.subscope,
+                    success=False,
+                    error="Access denied"
+                ))
+                failed += 1
+                continue
 
             # Generate BOQ CSV
-            csv_content = generate_boq_csv_for_site(site, db)
+            csv_content = batch.csv(site)
 
             results.append(BOQGenerationResult(
                 site_record_id=site_record_id,
@@ -1413,7 +1066,7 @@ async def bulk_generate_boq(
             failed += 1
 
     # Audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="bulk_generate_boq",
@@ -1437,75 +1090,16 @@ async def bulk_generate_boq(
 
 def generate_boq_data_for_site(site: ODBOQSite, db: Session) -> dict:
     """
-    Generate BOQ data for a single site in the format expected by the Excel template.
-    Returns a dictionary with site metadata and BOQ items.
+    Generate BOQ data for a single site in the format expected by the Excel template
+    (see APIs.DU.OD_BOQ_Generation.BOQBatch.data).
     """
-    # Query site products with qty > 0
-    site_products = db.query(
-        ODBOQSiteProduct,
-        ODBOQProduct
-    ).join(
-        ODBOQProduct, ODBOQSiteProduct.product_id == ODBOQProduct.id
-    ).filter(
-        ODBOQSiteProduct.site_record_id == site.id,
-        ODBOQSiteProduct.qty_per_site > 0
-    ).all()
+    return BOQBatch(db, [site]).data(site)
 
-    if not site_products:
-        return {'error': f"No products found with qty_per_site > 0 for site '{site.site_id}'."}
 
-    # Build result data - use raw quantities as stored
-    result_data = []
-    for sp, product in site_products:
-        final_qty = sp.qty_per_site
-
-        # Convert float to int if it's a whole number (e.g., 2.0 -> 2)
-        if isinstance(final_qty, float) and final_qty == int(final_qty):
-            final_qty = int(final_qty)
-
-        # Calculate totals from unit_price if available
-        up = product.unit_price
-        total_usd = ''
-        total_aed = ''
-        if up is not None and final_qty is not None:
-            total_usd_val = up * (final_qty if isinstance(final_qty, (int, float)) else 0)
-            total_aed_val = total_usd_val * 3.6735  # USD to AED conversion
-            total_usd = round(total_usd_val, 2)
-            total_aed = round(total_aed_val, 2)
-
-        result_data.append({
-            'line': product.line_number,
-            'bu': product.bu,
-            'item_job': product.code,  # ERP Item Code
-            'description': product.description,
-            'budget_line': product.category,
-            'qty': final_qty,
-            'unit_price': up if up is not None else '',
-            'total_usd': total_usd,
-            'total_aed': total_aed,
-            'site_id_list': site.site_id,
-            'po_model': site.po_model or ''
-        })
-
-    # Get project details for header
-    project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-    project_po = project.po if project else (site.project_id or 'N/A')
-
-    return {
-        'site_record_id': site.id,
-        'site_id': site.site_id,
-        'scope': site.scope,
-        'subscope': site.subscope,
-        'project_po': project_po,
-        'sps_category': site.subscope or 'N/A',
-        'po_model': site.po_model or '',
-        'data': result_data
-    }
-
-
-def create_excel_from_boq_data(boq_entries: list, template_path: str, is_bulk: bool = False) -> BytesIO:
+def create_excel_from_boq_data(boq_entries: list, template_path: str, is_bulk: bool = False) -> Optional[BinaryIO]:
     """
-    Create an Excel file from the template with BOQ data.
+    Create an Excel file from the template with BOQ data
+    (see APIs.DU.OD_BOQ_Workbook.write_boq_workbook).
 
     Args:
         boq_entries: List of BOQ entry dictionaries from generate_boq_data_for_site
@@ -1513,296 +1107,17 @@ def create_excel_from_boq_data(boq_entries: list, template_path: str, is_bulk: b
         is_bulk: If True, combine all entries in one sheet
 
     Returns:
-        BytesIO object containing the Excel file
+        Binary file positioned at the start (stream it with iter_file), or None without data
     """
-    # Load the template
-    wb = load_workbook(template_path)
-    ws = wb.active
-
-    # Get max row and prepare template border
-    max_row = ws.max_row
-
-    # Get border style from template
-    template_border = None
-    if ws.max_row >= 9:
-        for col in range(2, 13):
-            sample_cell = ws.cell(row=9, column=col)
-            if sample_cell.border and sample_cell.border.left and sample_cell.border.left.style:
-                template_border = sample_cell.border.copy()
-                break
-
-    if template_border is None:
-        thin_side = Side(style='thin', color='000000')
-        template_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
-
-    # Save footer rows
-    footer_rows = []
-    footer_start = None
-    if max_row >= 10:
-        for row_idx in range(max(10, max_row - 20), max_row + 1):
-            has_fill = False
-            for col_idx in range(1, 15):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                if cell.fill and cell.fill.start_color and cell.fill.start_color.rgb and cell.fill.start_color.rgb != '00000000':
-                    has_fill = True
-                    footer_start = row_idx
-                    break
-            if has_fill:
-                break
-
-        if footer_start:
-            for row_idx in range(footer_start, max_row + 1):
-                row_data = []
-                for col_idx in range(1, 15):
-                    cell = ws.cell(row=row_idx, column=col_idx)
-                    row_data.append({
-                        'value': cell.value,
-                        'font': cell.font.copy() if cell.font else None,
-                        'fill': cell.fill.copy() if cell.fill else None,
-                        'border': cell.border.copy() if cell.border else None,
-                        'alignment': cell.alignment.copy() if cell.alignment else None
-                    })
-                footer_rows.append(row_data)
-            ws.delete_rows(10, max_row - 9)
-
-    if not is_bulk:
-        # Single site mode
-        if not boq_entries or len(boq_entries) == 0:
-            return None
-
-        entry = boq_entries[0]
-        if not entry.get('data') or len(entry['data']) == 0:
-            return None
-
-        # Update header
-        ws.cell(row=5, column=5).value = entry['project_po']
-        ws.cell(row=5, column=9).value = datetime.now().strftime('%d-%b-%y')
-        ws.cell(row=6, column=5).value = entry.get('scope', 'N/A')
-        ws.cell(row=6, column=9).value = entry.get('sps_category', 'N/A')
-        ws.cell(row=7, column=9).value = entry['site_id']
-
-        start_row = 10
-        sorted_data = sorted(entry['data'], key=lambda x: (x.get('line') is None, x.get('line') if x.get('line') is not None else 0))
-
-        for idx, item in enumerate(sorted_data):
-            row_num = start_row + idx
-
-            # Column mapping
-            ws.cell(row=row_num, column=1).value = ''
-            ws.cell(row=row_num, column=1).border = template_border
-            ws.cell(row=row_num, column=2).value = item.get('line')
-            ws.cell(row=row_num, column=2).border = template_border
-            ws.cell(row=row_num, column=3).value = item.get('bu')
-            ws.cell(row=row_num, column=3).border = template_border
-            ws.cell(row=row_num, column=4).value = item.get('item_job')
-            ws.cell(row=row_num, column=4).border = template_border
-            ws.cell(row=row_num, column=5).value = item.get('description')
-            ws.cell(row=row_num, column=5).border = template_border
-            ws.cell(row=row_num, column=6).value = ''
-            ws.cell(row=row_num, column=6).border = template_border
-            ws.cell(row=row_num, column=7).value = item.get('qty')
-            ws.cell(row=row_num, column=7).border = template_border
-            ws.cell(row=row_num, column=8).value = item.get('unit_price')
-            ws.cell(row=row_num, column=8).border = template_border
-            ws.cell(row=row_num, column=9).value = item.get('total_usd')
-            ws.cell(row=row_num, column=9).border = template_border
-            ws.cell(row=row_num, column=10).value = item.get('total_aed')
-            ws.cell(row=row_num, column=10).border = template_border
-            ws.cell(row=row_num, column=11).value = item.get('site_id_list')
-            ws.cell(row=row_num, column=11).border = template_border
-            ws.cell(row=row_num, column=12).value = item.get('po_model')
-            ws.cell(row=row_num, column=12).border = template_border
-
-        # Add totals row after data
-        if len(sorted_data) > 0:
-            last_data_row = start_row + len(sorted_data) - 1
-            totals_row = last_data_row + 1
-
-            thin_side = Side(style='thin', color='000000')
-            totals_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
-            bold_font = Font(bold=True)
-
-            # Empty bordered cells for non-total columns
-            for col in range(1, 13):
-                cell = ws.cell(row=totals_row, column=col)
-                cell.border = totals_border
-
-            # "Total" label in description column
-            ws.cell(row=totals_row, column=5).value = "Total"
-            ws.cell(row=totals_row, column=5).font = bold_font
-
-            # SUM formula for Total USD (col 9)
-            ws.cell(row=totals_row, column=9).value = f"=SUM(I{start_row}:I{last_data_row})"
-            ws.cell(row=totals_row, column=9).font = bold_font
-            ws.cell(row=totals_row, column=9).number_format = '#,##0.00'
-
-        # Restore footer
-        if footer_rows and len(sorted_data) > 0:
-            footer_start_row = start_row + len(sorted_data) + 2  # +2 to account for totals row
-            for footer_idx, footer_row_data in enumerate(footer_rows):
-                row_num = footer_start_row + footer_idx
-                for col_idx, cell_data in enumerate(footer_row_data):
-                    cell = ws.cell(row=row_num, column=col_idx + 1)
-                    cell.value = cell_data['value']
-                    if cell_data['font']:
-                        cell.font = cell_data['font']
-                    if cell_data['fill']:
-                        cell.fill = cell_data['fill']
-                    if cell_data['border']:
-                        cell.border = cell_data['border']
-                    if cell_data['alignment']:
-                        cell.alignment = cell_data['alignment']
-    else:
-        # Bulk mode
-        if boq_entries and len(boq_entries) > 0:
-            first_entry = boq_entries[0]
-            ws.cell(row=5, column=5).value = first_entry['project_po']
-            ws.cell(row=5, column=9).value = datetime.now().strftime('%d-%b-%y')
-            ws.cell(row=6, column=5).value = "Multiple Scopes (Bulk)"
-            ws.cell(row=6, column=9).value = "Multiple Sites"
-            ws.cell(row=7, column=9).value = f"{len(boq_entries)} sites"
-
-        all_data = []
-        for entry in boq_entries:
-            for item in entry.get('data', []):
-                item_with_site = item.copy()
-                item_with_site['site_id_list'] = entry['site_id']
-                item_with_site['po_model'] = entry.get('po_model', '')
-                all_data.append(item_with_site)
-
-        # Sort by line number numerically (convert string to int for proper sorting)
-        def get_line_number_key(x):
-            line = x.get('line')
-            if line is None:
-                return (True, 0)  # None values go last
-            try:
-                return (False, int(line))
-            except (ValueError, TypeError):
-                return (False, 0)  # Non-numeric values sorted as 0
-        sorted_data = sorted(all_data, key=get_line_number_key)
-        start_row = 10
-
-        for idx, item in enumerate(sorted_data):
-            row_num = start_row + idx
-
-            ws.cell(row=row_num, column=1).value = ''
-            ws.cell(row=row_num, column=1).border = template_border
-            ws.cell(row=row_num, column=2).value = item.get('line')
-            ws.cell(row=row_num, column=2).border = template_border
-            ws.cell(row=row_num, column=3).value = item.get('bu')
-            ws.cell(row=row_num, column=3).border = template_border
-            ws.cell(row=row_num, column=4).value = item.get('item_job')
-            ws.cell(row=row_num, column=4).border = template_border
-            ws.cell(row=row_num, column=5).value = item.get('description')
-            ws.cell(row=row_num, column=5).border = template_border
-            ws.cell(row=row_num, column=6).value = ''
-            ws.cell(row=row_num, column=6).border = template_border
-            ws.cell(row=row_num, column=7).value = item.get('qty')
-            ws.cell(row=row_num, column=7).border = template_border
-            ws.cell(row=row_num, column=8).value = item.get('unit_price')
-            ws.cell(row=row_num, column=8).border = template_border
-            ws.cell(row=row_num, column=9).value = item.get('total_usd')
-            ws.cell(row=row_num, column=9).border = template_border
-            ws.cell(row=row_num, column=10).value = item.get('total_aed')
-            ws.cell(row=row_num, column=10).border = template_border
-            ws.cell(row=row_num, column=11).value = item.get('site_id_list')
-            ws.cell(row=row_num, column=11).border = template_border
-            ws.cell(row=row_num, column=12).value = item.get('po_model')
-            ws.cell(row=row_num, column=12).border = template_border
-
-        # Add totals row after data
-        if len(sorted_data) > 0:
-            last_data_row = start_row + len(sorted_data) - 1
-            totals_row = last_data_row + 1
-
-            thin_side = Side(style='thin', color='000000')
-            totals_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
-            bold_font = Font(bold=True)
-
-            # Empty bordered cells for non-total columns
-            for col in range(1, 13):
-                cell = ws.cell(row=totals_row, column=col)
-                cell.border = totals_border
-
-            # "Total" label in description column
-            ws.cell(row=totals_row, column=5).value = "Total"
-            ws.cell(row=totals_row, column=5).font = bold_font
-
-            # SUM formula for Total USD (col 9)
-            ws.cell(row=totals_row, column=9).value = f"=SUM(I{start_row}:I{last_data_row})"
-            ws.cell(row=totals_row, column=9).font = bold_font
-            ws.cell(row=totals_row, column=9).number_format = '#,##0.00'
-
-        # Restore footer
-        if footer_rows and len(sorted_data) > 0:
-            footer_start_row = start_row + len(sorted_data) + 2  # +2 to account for totals row
-            for footer_idx, footer_row_data in enumerate(footer_rows):
-                row_num = footer_start_row + footer_idx
-                for col_idx, cell_data in enumerate(footer_row_data):
-                    cell = ws.cell(row=row_num, column=col_idx + 1)
-                    cell.value = cell_data['value']
-                    if cell_data['font']:
-                        cell.font = cell_data['font']
-                    if cell_data['fill']:
-                        cell.fill = cell_data['fill']
-                    if cell_data['border']:
-                        cell.border = cell_data['border']
-                    if cell_data['alignment']:
-                        cell.alignment = cell_data['alignment']
-
-    # --- Column widths and formatting ---
-    # Set column widths so data is visible without manual resizing
-    column_widths = {
-        'A': 4,    # Empty/index
-        'B': 12,   # BPO Line No
-        'C': 14,   # BU
-        'D': 18,   # ERP Item Code
-        'E': 45,   # Description (widest)
-        'F': 14,   # Budget Line
-        'G': 10,   # QTY
-        'H': 14,   # Unit Price
-        'I': 16,   # Total USD
-        'J': 16,   # Total AED
-        'K': 16,   # Site ID
-        'L': 30,   # Model Name towards dU
-    }
-    for col_letter, width in column_widths.items():
-        ws.column_dimensions[col_letter].width = width
-
-    # Apply text wrapping to all data cells so content is visible
-    wrap_alignment = Alignment(wrap_text=True, vertical='center')
-    data_start = 10
-    data_end = ws.max_row
-    for row_idx in range(data_start, data_end + 1):
-        for col_idx in range(1, 13):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            # Preserve existing alignment properties but add wrap_text
-            existing = cell.alignment
-            cell.alignment = Alignment(
-                horizontal=existing.horizontal if existing.horizontal else None,
-                vertical='center',
-                wrap_text=True
-            )
-
-    # Number formatting for currency columns in data rows
-    for row_idx in range(data_start, data_end + 1):
-        for col_idx in [8, 9, 10]:  # Unit Price, Total USD, Total AED
-            cell = ws.cell(row=row_idx, column=col_idx)
-            if cell.value and isinstance(cell.value, (int, float)):
-                cell.number_format = '#,##0.00'
-
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
+    return write_boq_workbook(boq_entries, template_path, is_bulk=is_bulk)
 
 
 @odBOQRoute.get("/sites/{site_record_id}/download-boq-excel")
-async def download_boq_excel(
+@offload(RENDER)
+def download_boq_excel(
     site_record_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1818,16 +1133,15 @@ async def download_boq_excel(
         raise HTTPException(status_code=404, detail="Site not found")
 
     # Check project access
-    if site.project_id:
-        project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-        if project and not check_du_project_access(current_user, project, db, "view"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You do not have access to this site's project."
-            )
+    batch = BOQBatch(db, [site], current_user)
+    if not batch.allowed(site):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to this site's project."
+        )
 
     # Generate BOQ data
-    boq_data = generate_boq_data_for_site(site, db)
+    boq_data = batch.data(site)
 
     if 'error' in boq_data:
         raise HTTPException(status_code=404, detail=boq_data['error'])
@@ -1852,7 +1166,7 @@ async def download_boq_excel(
     filename = f"BOQ_{site.site_id}_{date_str}.xlsx"
 
     # Audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="download_boq_excel",
@@ -1865,17 +1179,18 @@ async def download_boq_excel(
     )
 
     return StreamingResponse(
-        excel_file,
+        iter_file(excel_file),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @odBOQRoute.post("/download-boq-excel-from-csv")
-async def download_boq_excel_from_csv(
+@offload(RENDER)
+def download_boq_excel_from_csv(
     body: BOQExcelFromCSVRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1900,7 +1215,7 @@ async def download_boq_excel_from_csv(
     filename = f"BOQ_{body.site_id}_{date_str}.xlsx"
 
     # Audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="download_boq_excel_from_csv",
@@ -1919,18 +1234,25 @@ async def download_boq_excel_from_csv(
     )
 
 
-@odBOQRoute.post("/sites/bulk-download-boq-zip")
-async def bulk_download_boq_excel(
-    body: BOQGenerationRequest,
-    request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+def build_bulk_boq_excel(
+    db: Session,
+    current_user: User,
+    site_record_ids: List[int],
+    progress: Optional[Callable[..., None]] = None
+) -> Tuple[BinaryIO, str, int]:
     """
-    Bulk download BOQ as a single Excel file with all sites combined, ordered by BPO Line No.
+    Build the combined BOQ Excel of several sites, ordered by BPO Line No.
 
-    - body.site_record_ids: List of ODBOQSite.id values
-    - Returns: Single Excel file as StreamingResponse
+    Sites the user cannot view, or without BOQ data, are skipped.
+
+    Args:
+        db: Database session
+        current_user: User whose project access applies
+        site_record_ids: ODBOQSite.id values
+        progress: Optional callback(done, total, message) (see utils.jobs.JobContext)
+
+    Returns:
+        (Excel file, filename, number of sites included)
     """
     # Get template path
     template_path = os.path.join(os.path.dirname(__file__), '..', '..', 'templates', 'BOQ Formate.xlsx')
@@ -1944,22 +1266,26 @@ async def bulk_download_boq_excel(
     # Collect all BOQ data from all sites
     all_boq_entries = []
 
-    for site_record_id in body.site_record_ids:
+    # Batch fetch all sites, their projects and BOQ rows at once (see BOQBatch)
+    sites_map = {s.id: s for s in load_sites(db, site_record_ids)}
+    batch = BOQBatch(db, list(sites_map.values()), current_user)
+
+    total = len(site_record_ids)
+    for done, site_record_id in enumerate(site_record_ids):
+        if progress:
+            progress(done, total, f"Generating BOQ {done + 1} of {total}")
         try:
-            # Get the site
-            site = db.query(ODBOQSite).filter(ODBOQSite.id == site_record_id).first()
+            site = sites_map.get(site_record_id)
 
             if not site:
                 continue
 
-            # Check project access
-            if site.project_id:
-                project = db.query(DUProject).filter(DUProject.pid_po == site.project_id).first()
-                if project and not check_du_project_access(current_user, project, db, "view"):
-                    continue
+            # Check project access (each project is checked once)
+            if not batch.allowed(site):
+                continue
 
             # Generate BOQ data
-            boq_data = generate_boq_data_for_site(site, db)
+            boq_data = batch.data(site)
 
             if 'error' in boq_data:
                 logger.warning(f"No BOQ data for site {site_record_id}: {boq_data['error']}")
@@ -1977,6 +1303,9 @@ async def bulk_download_boq_excel(
             detail="No BOQ data found for any of the selected sites."
         )
 
+    if progress:
+        progress(total, total, "Writing Excel file")
+
     # Create single Excel from template with all entries combined (is_bulk=True)
     excel_file = create_excel_from_boq_data(all_boq_entries, template_path, is_bulk=True)
 
@@ -1986,9 +1315,52 @@ async def bulk_download_boq_excel(
     # Create filename
     date_str = datetime.now().strftime('%Y-%m-%d')
     filename = f"BOQ_Bulk_{len(all_boq_entries)}_sites_{date_str}.xlsx"
+    return excel_file, filename, len(all_boq_entries)
+
+
+@job_handler("od_boq.bulk_boq_excel", queue=EXPORT)
+def run_bulk_boq_excel(ctx: JobContext, site_record_ids: List[int]):
+    """Job: bulk BOQ Excel for POST /sites/bulk-download-boq-zip?background=true."""
+    excel_file, filename, _ = build_bulk_boq_excel(ctx.db, ctx.user, site_record_ids, ctx.progress)
+    return JobResult.from_file(excel_file, filename, XLSX_MEDIA_TYPE)
+
+
+@odBOQRoute.post("/sites/bulk-download-boq-zip")
+@offload(RENDER)
+def bulk_download_boq_excel(
+    body: BOQGenerationRequest,
+    request: Request,
+    background: bool = Query(False, description="Return a job id (202) instead of the file"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk download BOQ as a single Excel file with all sites combined, ordered by BPO Line No.
+
+    - body.site_record_ids: List of ODBOQSite.id values
+    - background: Build the file on the job queue; poll /jobs/{job_id} for it
+    - Returns: Single Excel file as StreamingResponse (202 with a job id when background=true)
+    """
+    if background:
+        job = job_queue.submit(
+            "od_boq.bulk_boq_excel", {"site_record_ids": body.site_record_ids}, user_id=current_user.id
+        )
+        create_audit_log(
+            db=db,
+            user_id=current_user.id,
+            action="bulk_download_boq_excel",
+            resource_type="od_boq_site",
+            resource_id="bulk",
+            details=json.dumps({"site_record_ids": body.site_record_ids, "job_id": job.id}),
+            ip_address=get_client_ip(request),
+            user_agent=request.headers.get("User-Agent")
+        )
+        return job_accepted(job)
+
+    excel_file, filename, sites_included = build_bulk_boq_excel(db, current_user, body.site_record_ids)
 
     # Audit log
-    await create_audit_log(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="bulk_download_boq_excel",
@@ -1996,7 +1368,7 @@ async def bulk_download_boq_excel(
         resource_id="bulk",
         details=json.dumps({
             "site_record_ids": body.site_record_ids,
-            "sites_included": len(all_boq_entries),
+            "sites_included": sites_included,
             "filename": filename
         }),
         ip_address=get_client_ip(request),
@@ -2004,17 +1376,18 @@ async def bulk_download_boq_excel(
     )
 
     return StreamingResponse(
-        excel_file,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        iter_file(excel_file),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @odBOQRoute.post("/sites/bulk-download-boq-excel-from-edited")
-async def bulk_download_boq_excel_from_edited(
+@offload(RENDER)
+def bulk_download_boq_excel_from_edited(
     body: BulkBOQExcelFromEditedRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -2145,7 +1518,7 @@ async def bulk_download_boq_excel_from_edited(
         filename = f"BOQ_Bulk_{len(all_boq_entries)}_sites_{date_str}.xlsx"
 
         # Audit log
-        await create_audit_log(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_download_boq_excel_from_edited",
@@ -2161,7 +1534,7 @@ async def bulk_download_boq_excel_from_edited(
         )
 
         return StreamingResponse(
-            excel_file,
+            iter_file(excel_file),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
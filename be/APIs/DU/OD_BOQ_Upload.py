@@ -0,0 +1,763 @@
+"""
+OD BOQ Upload - streaming, set-based import of the OD BOQ tracker CSV
+
+Tracker layout:
+- Rows 0-6, columns 7+: product header (Description, #Line, BU, Unit Price ($),
+  #Code, Category, Total PO QTY); rows 7-8 are skipped
+- Rows 9+: one site per row. Columns 0-5: Region, Distance, Scope, Subscope,
+  Site ID, Model; then one quantity column per product, a Sum column and
+  13 metadata columns
+
+The import streams the upload and works on whole sets of rows:
+1. TrackerReader sniffs the encoding from the first bytes, parses the 9
+   header rows into products, reads the (Site ID, Subscope) key of every
+   site row in a first pass over those two columns, and then yields the site
+   rows in chunks of
+   OD_BOQ_UPLOAD_CHUNK_ROWS as column arrays, with the quantity block
+   converted to numbers in one vectorized step. Peak memory follows the
+   chunk size, not the file size.
+2. TrackerImport preloads the matching products, sites and site-products of
+   each chunk (one IN query per 1000 keys)
+3. Inserts and updates are worked out in memory; in delta mode (default) a
+   matched site or product whose content equals the stored one is not
+   written at all, and of a changed site only the changed quantities are
+4. They are written with utils.bulk_write (MERGE on MSSQL, ON CONFLICT on
+   SQLite / PostgreSQL) in chunks
+5. consumed_in_year / remaining_in_po are recalculated for the uploaded products
+
+preview_tracker() runs steps 1-3 only and reports what would be added,
+changed and (project sites missing from the file) removed.
+
+Matching rules (unchanged from the row-by-row import):
+- Products match on #Code across all projects; products without a code are
+  always inserted
+- Sites match on (site_id, subscope) across all projects and are moved to the
+  uploading project; a NULL subscope matches a NULL subscope
+- A site or product repeated in the file is counted as updated and its last
+  occurrence wins; a repeated site is compared and written once, from its
+  last row, so the counts do not depend on OD_BOQ_UPLOAD_CHUNK_ROWS
+
+Environment Variables (optional):
+- OD_BOQ_UPLOAD_CHUNK_ROWS: Site rows parsed and written per chunk (default: 2000)
+"""
+
+import codecs
+import csv
+import io
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from Models.DU.OD_BOQ_Site import ODBOQSite
+from Models.DU.OD_BOQ_Product import ODBOQProduct
+from Models.DU.OD_BOQ_Site_Product import ODBOQSiteProduct
+from utils.bulk_write import bulk_update, bulk_upsert, chunked, select_in_chunks
+
+logger = logging.getLogger(__name__)
+
+# ===========================
+# MODULE CONSTANTS
+# ===========================
+
+# CSV structure constants
+CSV_HEADER_ROWS = 9  # Product header (0-6), Consumed (7), Remaining / column headers (8)
+CSV_PRODUCT_START_COL = 7  # Column index where product quantities begin
+
+# Encoding detection reads this many bytes; candidates in order of preference
+ENCODING_SNIFF_BYTES = 64 * 1024
+CSV_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+
+OD_BOQ_UPLOAD_CHUNK_ROWS = int(os.getenv("OD_BOQ_UPLOAD_CHUNK_ROWS", "2000"))
+
+# Site columns 0-5, then the metadata columns after the products and the Sum column
+SITE_BASE_FIELDS = ('region', 'distance', 'scope', 'subscope', 'site_id', 'po_model')
+SITE_METADATA_FIELDS = (
+    'ac_armod_cable', 'additional_cost', 'remark', 'partner', 'request_status',
+    'requested_date', 'du_po_number', 'smp', 'year_scope', 'integration_status',
+    'integration_date', 'du_po_convention_name', 'po_year_issuance'
+)
+SITE_FIELDS = SITE_BASE_FIELDS + SITE_METADATA_FIELDS
+# Written on a matched site (the key columns are not rewritten)
+SITE_UPDATE_FIELDS = tuple(f for f in SITE_FIELDS if f not in ('site_id', 'subscope')) + ('project_id',)
+PRODUCT_FIELDS = ('description', 'line_number', 'bu', 'category', 'unit_price', 'total_po_qty', 'consumed_year')
+
+# Site-product rows built and written per batch (bounds memory for wide sheets)
+SITE_PRODUCT_BATCH_ROWS = 20000
+
+SiteKey = Tuple[str, Optional[str]]  # (site_id, subscope)
+
+# Stored quantity of a (site, product) pair that has no row yet
+_MISSING = object()
+
+
+
+# ===========================
+# VALUE PARSING
+# ===========================
+
+def clean_cell(value) -> Optional[str]:
+    """Stripped string value of a cell, None if empty."""
+    if pd.isna(value):
+        return None
+    val = str(value).strip()
+    return val if val else None
+
+
+def parse_currency_value(value) -> Optional[float]:
+    """Parse a currency string like ' $1,126.28 ' to float."""
+    if pd.isna(value):
+        return None
+    val_str = str(value).strip()
+    if not val_str:
+        return None
+    # Remove $, commas, and whitespace
+    val_str = val_str.replace('$', '').replace(',', '').strip()
+    if not val_str:
+        return None
+    try:
+        return float(val_str)
+    except ValueError:
+        return None
+
+
+def _clean_column(values: pd.Series) -> List[Optional[str]]:
+    """clean_cell() for a whole column of strings."""
+    return [value or None if isinstance(value, str) else None for value in values.str.strip().tolist()]
+
+
+def _parse_quantities(block: pd.DataFrame) -> np.ndarray:
+    """
+    Quantity block (rows x products) as floats, NaN for empty cells.
+
+    Non-numeric text raises ValueError, like float() on the cell.
+    """
+    if block.shape[1] == 0:
+        return np.empty((len(block), 0))
+    stripped = block.apply(lambda column: column.str.strip()).replace('', np.nan)
+    return stripped.apply(pd.to_numeric).to_numpy(dtype=float)
+
+
+# ===========================
+# ENCODING
+# ===========================
+
+def _utf8_or_cp1252(error: UnicodeDecodeError):
+    """Decode a byte that is not valid UTF-8 as cp1252 (latin-1 for cp1252's unused bytes)."""
+    raw = error.object[error.start:error.end]
+    try:
+        return raw.decode('cp1252'), error.end
+    except UnicodeDecodeError:
+        return raw.decode('latin-1'), error.end
+
+
+codecs.register_error('od_boq_utf8_fallback', _utf8_or_cp1252)
+
+
+def sniff_encoding(prefix: bytes) -> Tuple[str, str]:
+    """
+    Encoding of an upload, judged from its first bytes only; returns it with the decoded prefix.
+
+    A byte sequence cut at the end of the prefix is not an error (incremental
+    decoding). Files sniffed as UTF-8 are decoded with a cp1252 fallback for
+    invalid bytes found further on, so a legacy file whose first non-ASCII
+    character comes late is still read.
+    """
+    candidates = ('utf-8-sig',) if prefix.startswith(codecs.BOM_UTF8) else CSV_ENCODINGS
+    for encoding in candidates:
+        try:
+            return encoding, codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1', prefix.decode('latin-1')
+
+
+class _TextStream:
+    """Decoded, non-breaking-space-free text view of a binary upload, read on demand."""
+
+    def __init__(self, raw: BinaryIO, encoding: str):
+        errors = 'od_boq_utf8_fallback' if encoding.startswith('utf-8') else 'strict'
+        self._reader = codecs.getreader(encoding)(raw, errors=errors)
+
+    def read(self, size: int = -1) -> str:
+        return self._reader.read(size).replace('\xa0', ' ')
+
+    def readline(self, size: int = -1) -> str:
+        return self._reader.readline(size).replace('\xa0', ' ')
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+# ===========================
+# PARSED SHEET
+# ===========================
+
+@dataclass
+class TrackerProduct:
+    """One valid product column of the tracker header."""
+    column: int  # Sheet column holding this product's quantities
+    description: str
+    line_number: str
+    bu: Optional[str]
+    code: Optional[str]
+    category: Optional[str]
+    unit_price: Optional[float]
+    total_po_qty: Optional[float]
+
+
+@dataclass
+class TrackerChunk:
+    """
+    A chunk of site rows as column arrays.
+
+    sites[field][i] and quantities[i, p] belong to the i-th site row of the
+    chunk that has a Site ID; column p of quantities is products[p].
+    first_row is the file-wide index (counting site rows only) of row 0.
+    """
+    sites: Dict[str, List[Optional[str]]]
+    quantities: np.ndarray
+    skipped: int = 0
+    first_row: int = 0
+
+    @property
+    def row_count(self) -> int:
+        return len(self.sites['site_id'])
+
+    def row_quantities(self, row: int) -> List[Optional[float]]:
+        """Quantities of one row, None for empty cells."""
+        return [None if qty != qty else qty for qty in self.quantities[row].tolist()]
+
+
+def parse_products(header_rows: List[List[Any]]) -> List[TrackerProduct]:
+    """
+    Product columns from header rows 0-6 (values from column 7 on).
+
+    Columns without a Description or a #Line are not product columns.
+    """
+    descriptions, line_numbers, bus, unit_prices, codes, categories, total_pos = header_rows[:7]
+
+    def cell(values, idx):
+        return values[idx] if idx < len(values) else None
+
+    products = []
+    for idx in range(len(descriptions)):
+        description = clean_cell(cell(descriptions, idx))
+        line_number = clean_cell(cell(line_numbers, idx))
+        if not description or not line_number:
+            continue
+        total_po = cell(total_pos, idx)
+        products.append(TrackerProduct(
+            column=CSV_PRODUCT_START_COL + idx,
+            description=description,
+            line_number=line_number,
+            bu=clean_cell(cell(bus, idx)),
+            code=clean_cell(cell(codes, idx)),
+            category=clean_cell(cell(categories, idx)),
+            unit_price=parse_currency_value(cell(unit_prices, idx)),
+            total_po_qty=float(total_po) if not pd.isna(total_po) and str(total_po).strip() else None,
+        ))
+    return products
+
+
+class TrackerReader:
+    """
+    Streams a tracker upload: products from the header, then site rows in chunks.
+
+    Every cell is read as text (dtype=str), so values reach the database as
+    written in the file; only the quantity block is converted to numbers.
+    site_keys holds the (site_id, subscope) of every site row in file order,
+    read in a first pass over the two key columns (the upload is seekable).
+
+    Usage:
+        reader = TrackerReader(file.file)
+        importer.write_products(reader.products)
+        importer.index_sites(reader.site_keys)
+        for chunk in reader.chunks():
+            importer.write_sites(chunk)
+    """
+
+    def __init__(self, raw: BinaryIO, chunk_rows: int = OD_BOQ_UPLOAD_CHUNK_ROWS):
+        prefix = raw.read(ENCODING_SNIFF_BYTES)
+        raw.seek(0)
+        self.encoding, prefix_text = sniff_encoding(prefix)
+        self.chunk_rows = max(1, chunk_rows)
+        # The first row fixes the column count, as for a whole-file read; without
+        # explicit names a chunk starting with a short row would narrow the frame
+        first_row = next(csv.reader(io.StringIO(prefix_text)), [])
+        self.site_keys = self._read_site_keys(raw, len(first_row))
+        raw.seek(0)
+        self._rows_read = 0
+        self._frames = pd.read_csv(
+            _TextStream(raw, self.encoding), header=None, names=range(len(first_row)), dtype=str,
+            chunksize=self.chunk_rows
+        )
+        header = self._frames.get_chunk(CSV_HEADER_ROWS)
+        if len(header) < 7:
+            raise ValueError("The file does not contain the 7 product header rows")
+        self.products = parse_products([header.iloc[r, CSV_PRODUCT_START_COL:].tolist() for r in range(7)])
+
+        # Metadata follows the product columns and the Sum column
+        metadata_start_col = CSV_PRODUCT_START_COL + len(self.products) + 1
+        self._site_columns = list(enumerate(SITE_BASE_FIELDS)) + [
+            (metadata_start_col + i, name) for i, name in enumerate(SITE_METADATA_FIELDS)
+        ]
+
+    def _read_site_keys(self, raw: BinaryIO, column_count: int) -> List[SiteKey]:
+        """(site_id, subscope) of the site rows, cleaned and filtered like _parse_chunk() does."""
+        site_col, subscope_col = SITE_BASE_FIELDS.index('site_id'), SITE_BASE_FIELDS.index('subscope')
+        if column_count <= site_col:
+            return []
+        keys: List[SiteKey] = []
+        header_rows = CSV_HEADER_ROWS
+        for frame in pd.read_csv(
+            _TextStream(raw, self.encoding), header=None, names=range(column_count),
+            usecols=[subscope_col, site_col], dtype=str, chunksize=self.chunk_rows
+        ):
+            if header_rows:
+                skip = min(header_rows, len(frame))
+                frame, header_rows = frame.iloc[skip:], header_rows - skip
+            site_ids = frame[site_col].str.strip()
+            keep = (site_ids.notna() & (site_ids != '')).to_numpy()
+            keys.extend(zip(_clean_column(frame[site_col][keep]), _clean_column(frame[subscope_col][keep])))
+        return keys
+
+    def chunks(self) -> Iterator[TrackerChunk]:
+        """Site rows (row 9 onwards) in chunks of chunk_rows; rows without a Site ID are counted as skipped."""
+        for frame in self._frames:
+            yield self._parse_chunk(frame)
+
+    def _parse_chunk(self, frame: pd.DataFrame) -> TrackerChunk:
+        column_count = frame.shape[1]
+
+        def column(col_idx: int) -> pd.Series:
+            if col_idx < column_count:
+                return frame.iloc[:, col_idx]
+            return pd.Series([None] * len(frame), index=frame.index, dtype=object)
+
+        site_ids = column(SITE_BASE_FIELDS.index('site_id')).str.strip()
+        keep = (site_ids.notna() & (site_ids != '')).to_numpy()
+        rows = frame[keep]
+        sites = {name: _clean_column(column(col_idx)[keep]) for col_idx, name in self._site_columns}
+        # Product columns come from the header, so they exist in every chunk
+        quantities = _parse_quantities(rows.iloc[:, [p.column for p in self.products]])
+        chunk = TrackerChunk(sites=sites, quantities=quantities, skipped=int((~keep).sum()),
+                             first_row=self._rows_read)
+        self._rows_read += chunk.row_count
+        return chunk
+
+
+# ===========================
+# CHANGES
+# ===========================
+
+def _changed_fields(names: Tuple[str, ...], old: tuple, new: tuple) -> Dict[str, Dict[str, Any]]:
+    return {name: {'old': o, 'new': n} for name, o, n in zip(names, old, new) if o != n}
+
+
+# ===========================
+# IMPORT
+# ===========================
+
+@dataclass
+class ImportCounts:
+    # sites_updated / products_updated count matched rows, changed or not
+    sites_inserted: int = 0
+    sites_updated: int = 0
+    sites_unchanged: int = 0
+    products_inserted: int = 0
+    products_updated: int = 0
+    products_unchanged: int = 0
+    site_products_inserted: int = 0
+    site_products_updated: int = 0
+    site_products_unchanged: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class ChangeReport:
+    """Added / changed / removed rows collected by a dry run, at most `limit` entries per list."""
+    limit: int
+    added_sites: List[Dict[str, Any]] = field(default_factory=list)
+    changed_sites: List[Dict[str, Any]] = field(default_factory=list)
+    removed_sites: List[Dict[str, Any]] = field(default_factory=list)
+    added_products: List[Dict[str, Any]] = field(default_factory=list)
+    changed_products: List[Dict[str, Any]] = field(default_factory=list)
+    sites_changed: int = 0
+    sites_removed: int = 0
+    products_changed: int = 0
+    truncated: bool = False
+
+    def add(self, entries: List[Dict[str, Any]], entry: Dict[str, Any]) -> None:
+        if len(entries) < self.limit:
+            entries.append(entry)
+        else:
+            self.truncated = True
+
+
+class TrackerImport:
+    """
+    Writes a parsed tracker into the three OD BOQ tables of one session.
+
+    Matched sites and products are compared with what is stored before
+    anything is written: every stored site row (its fields and its quantity
+    per uploaded product) and every product column (its header values) is
+    loaded by the same batch queries that preload them and compared with the
+    file as a tuple. In delta mode (default) only rows that differ are
+    written, and of those only the changed quantities. Nothing is persisted
+    for this, so edits made through the CRUD endpoints cannot make it stale.
+
+    A site repeated in the file is written once, from its last row: the
+    earlier rows are only counted as updates, even when they fall in an
+    earlier chunk, so the counts do not depend on the chunk size.
+
+    dry_run=True computes the same plan without writing and fills
+    self.report (see /od-boq/upload-csv/preview).
+
+    write_products() and index_sites() must run before write_sites(); finish()
+    recalculates the product consumption. The caller commits (or rolls back)
+    the session.
+    """
+
+    def __init__(self, db: Session, project_id: str, consumed_year: int,
+                 delta: bool = True, dry_run: bool = False, detail_limit: int = 200):
+        self.db = db
+        self.project_id = project_id
+        self.consumed_year = consumed_year
+        self.delta = delta
+        self.dry_run = dry_run
+        self.report = ChangeReport(detail_limit) if dry_run else None
+        self.counts = ImportCounts()
+        self.product_ids: List[int] = []  # Per sheet product, in sheet order
+        self.site_record_ids: Dict[SiteKey, int] = {}  # Sites matched or created by this upload
+        self._last_rows: Dict[SiteKey, int] = {}  # File-wide index of the last row of each site
+        self._product_labels: Dict[int, Dict[str, Any]] = {}
+        self._placeholder_ids = 0  # Dry run: negative ids for rows that would be inserted
+        # MSSQL's default collation compares strings case-insensitively: match keys the same way
+        self._fold = str.lower if db.get_bind().dialect.name == 'mssql' else (lambda value: value)
+
+    def _key(self, site_id: str, subscope: Optional[str]) -> SiteKey:
+        return self._fold(site_id), self._fold(subscope) if subscope is not None else None
+
+    def _placeholder(self) -> int:
+        self._placeholder_ids -= 1
+        return self._placeholder_ids
+
+    # ---------- products ----------
+
+    def write_products(self, products: List[TrackerProduct]) -> None:
+        """Upsert the header products by #Code; fills self.product_ids."""
+        db = self.db
+        fold = self._fold
+        codes = [p.code for p in products if p.code]
+        existing: Dict[str, int] = {}
+        stored: Dict[int, tuple] = {}
+        for row in sorted(select_in_chunks(
+            db,
+            lambda chunk: select(
+                ODBOQProduct.id, ODBOQProduct.code, *[getattr(ODBOQProduct, f) for f in PRODUCT_FIELDS]
+            ).where(ODBOQProduct.code.in_(chunk)),
+            codes,
+        )):
+            existing.setdefault(fold(row[1]), row[0])
+            stored[row[0]] = tuple(row[2:])
+
+        updates: Dict[int, Dict[str, Any]] = {}
+        created: Dict[str, Any] = {}
+        slots: List[Any] = []  # Product id, or the new ODBOQProduct until it is flushed
+        for product in products:
+            values = {name: getattr(product, name) for name in PRODUCT_FIELDS if name != 'consumed_year'}
+            values['consumed_year'] = self.consumed_year
+            label = {'code': product.code, 'description': product.description, 'line_number': product.line_number}
+            code = fold(product.code) if product.code else None
+            if code in existing:
+                product_id = existing[code]
+                new = tuple(values[f] for f in PRODUCT_FIELDS)
+                changed = stored[product_id] != new
+                if not changed:
+                    self.counts.products_unchanged += 1
+                elif self.report is not None:
+                    self.report.products_changed += 1
+                    self.report.add(self.report.changed_products,
+                                    {**label, 'fields': _changed_fields(PRODUCT_FIELDS, stored[product_id], new)})
+                if changed or not self.delta:
+                    updates[product_id] = {'id': product_id, **values}
+                stored[product_id] = new  # A repeated column compares with the previous one
+                slots.append(product_id)
+                self.counts.products_updated += 1
+            elif code in created:
+                if not self.dry_run:
+                    for name, value in values.items():
+                        setattr(created[code], name, value)
+                slots.append(created[code])
+                self.counts.products_updated += 1
+            else:
+                if self.dry_run:
+                    new_product = self._placeholder()
+                    self.report.add(self.report.added_products, label)
+                else:
+                    # consumed_in_year and remaining_in_po are calculated in finish()
+                    new_product = ODBOQProduct(code=product.code, consumed_in_year=0, remaining_in_po=0, **values)
+                    db.add(new_product)
+                if code:
+                    created[code] = new_product
+                slots.append(new_product)
+                self.counts.products_inserted += 1
+
+        if not self.dry_run:
+            db.flush()  # One flush assigns every new product id
+            bulk_update(db, ODBOQProduct, list(updates.values()))
+        self.product_ids = [slot if isinstance(slot, int) else slot.id for slot in slots]
+        for product, product_id in zip(products, self.product_ids):
+            self._product_labels[product_id] = {
+                'product_code': product.code, 'description': product.description, 'line_number': product.line_number
+            }
+
+    # ---------- sites ----------
+
+    def _preload_sites(self, keys: List[SiteKey]) -> Dict[SiteKey, int]:
+        """Ids of existing sites for `keys` (lowest id when a key is duplicated in the table)."""
+        found: Dict[SiteKey, int] = {}
+        wanted = set(keys)
+        rows = select_in_chunks(
+            self.db,
+            lambda chunk: select(ODBOQSite.id, ODBOQSite.site_id, ODBOQSite.subscope).where(ODBOQSite.site_id.in_(chunk)),
+            [site_id for site_id, _ in keys],
+        )
+        for site_record_id, site_id, subscope in sorted(rows):
+            key = self._key(site_id, subscope)
+            if key in wanted:
+                found.setdefault(key, site_record_id)
+        return found
+
+    def _load_stored_sites(self, site_record_ids: List[int], product_ids: List[int]):
+        """Stored fields and quantities of existing sites: ({id: fields}, {id: {product_id: qty}})."""
+        fields = {
+            row[0]: tuple(row[1:]) for row in select_in_chunks(
+                self.db,
+                lambda chunk: select(ODBOQSite.id, *[getattr(ODBOQSite, f) for f in SITE_UPDATE_FIELDS])
+                .where(ODBOQSite.id.in_(chunk)),
+                site_record_ids,
+            )
+        }
+        quantities: Dict[int, Dict[int, Optional[float]]] = {site_record_id: {} for site_record_id in site_record_ids}
+        stored_product_ids = [pid for pid in product_ids if pid > 0]
+        if stored_product_ids:
+            for site_record_id, product_id, qty in select_in_chunks(
+                self.db,
+                lambda chunk: select(
+                    ODBOQSiteProduct.site_record_id, ODBOQSiteProduct.product_id, ODBOQSiteProduct.qty_per_site
+                ).where(
+                    ODBOQSiteProduct.site_record_id.in_(chunk),
+                    ODBOQSiteProduct.product_id.in_(stored_product_ids)
+                ),
+                site_record_ids,
+            ):
+                quantities[site_record_id][product_id] = qty
+        return fields, quantities
+
+    def index_sites(self, site_keys: List[SiteKey]) -> None:
+        """Record the last row of every site of the file (TrackerReader.site_keys)."""
+        self._last_rows = {self._key(site_id, subscope): row for row, (site_id, subscope) in enumerate(site_keys)}
+
+    def write_sites(self, sheet: TrackerChunk) -> None:
+        """Upsert the site rows of `sheet` and their site-product quantities."""
+        db = self.db
+        self.counts.skipped += sheet.skipped
+        keys: List[SiteKey] = [self._key(site_id, subscope)
+                               for site_id, subscope in zip(sheet.sites['site_id'], sheet.sites['subscope'])]
+
+        # Last row per site in the file wins; earlier rows count as updates and are not written
+        last_row: Dict[SiteKey, int] = {}
+        for row, key in enumerate(keys):
+            if self._last_rows[key] == sheet.first_row + row:
+                last_row[key] = row
+            else:
+                self.counts.sites_updated += 1
+
+        known = self.site_record_ids
+        known.update(self._preload_sites([key for key in last_row if key not in known]))
+        new_keys: List[SiteKey] = []
+        for key in last_row:
+            if key in known:
+                self.counts.sites_updated += 1
+            else:
+                self.counts.sites_inserted += 1
+                new_keys.append(key)
+
+        fresh: set = set()
+        if new_keys:
+            if self.dry_run:
+                created = {key: self._placeholder() for key in new_keys}
+            else:
+                bulk_upsert(db, ODBOQSite, [
+                    {**{name: sheet.sites[name][last_row[key]] for name in SITE_FIELDS}, 'project_id': self.project_id}
+                    for key in new_keys
+                ], key_columns=('site_id', 'subscope'))
+                created = self._preload_sites(new_keys)
+            known.update(created)
+            fresh.update(created.values())
+
+        self._write_rows(sheet, [(known[key], row) for key, row in last_row.items()], fresh)
+
+    def _write_rows(self, sheet: TrackerChunk, site_rows: List[Tuple[int, int]], fresh: set) -> None:
+        """
+        Compare and write site fields and quantities, in batches of sites.
+
+        fresh: ids of sites inserted by this call (every quantity is new)
+        """
+        db = self.db
+        product_ids = self.product_ids
+        distinct_product_ids = list(dict.fromkeys(product_ids))
+        report = self.report
+
+        sites_per_batch = max(1, SITE_PRODUCT_BATCH_ROWS // max(1, len(product_ids)))
+        for batch in chunked(site_rows, sites_per_batch):
+            stored_ids = [site_record_id for site_record_id, _ in batch
+                          if site_record_id not in fresh and site_record_id > 0]
+            stored_fields, stored_quantities = self._load_stored_sites(stored_ids, distinct_product_ids) \
+                if stored_ids else ({}, {})
+
+            site_updates = []
+            quantity_rows = []
+            for site_record_id, row in batch:
+                fields = tuple(sheet.sites[name][row] for name in SITE_UPDATE_FIELDS[:-1]) + (self.project_id,)
+                # A product repeated in the header: its last column wins
+                quantities = dict(zip(product_ids, sheet.row_quantities(row)))
+                site_label = {'site_id': sheet.sites['site_id'][row], 'subscope': sheet.sites['subscope'][row]}
+
+                if site_record_id in fresh:
+                    self.counts.site_products_inserted += len(quantities)
+                    quantity_rows.extend(
+                        {'site_record_id': site_record_id, 'product_id': pid, 'qty_per_site': qty}
+                        for pid, qty in quantities.items()
+                    )
+                    if report is not None:
+                        report.add(report.added_sites, {**site_label, 'quantities': [
+                            {**self._product_labels[pid], 'old': None, 'new': qty}
+                            for pid, qty in quantities.items() if qty is not None
+                        ]})
+                    continue
+
+                old_fields = stored_fields[site_record_id]
+                old_quantities = stored_quantities[site_record_id]
+                stored_row = [old_quantities.get(pid, _MISSING) for pid in quantities]
+                if old_fields == fields and stored_row == list(quantities.values()):
+                    # Unchanged row: nothing to write in delta mode
+                    self.counts.sites_unchanged += 1
+                    self.counts.site_products_unchanged += len(quantities)
+                    if not self.delta:
+                        site_updates.append({'id': site_record_id, **dict(zip(SITE_UPDATE_FIELDS, fields))})
+                        quantity_rows.extend(
+                            {'site_record_id': site_record_id, 'product_id': pid, 'qty_per_site': qty}
+                            for pid, qty in quantities.items()
+                        )
+                    continue
+
+                changed_fields = _changed_fields(SITE_UPDATE_FIELDS, old_fields, fields)
+                if changed_fields or not self.delta:
+                    site_updates.append({'id': site_record_id, **dict(zip(SITE_UPDATE_FIELDS, fields))})
+                changed_quantities = []
+                for pid, qty in quantities.items():
+                    old = old_quantities.get(pid, _MISSING)
+                    if old is _MISSING:
+                        self.counts.site_products_inserted += 1
+                    elif old != qty:
+                        self.counts.site_products_updated += 1
+                    else:
+                        self.counts.site_products_unchanged += 1
+                        if self.delta:
+                            continue
+                    quantity_rows.append({'site_record_id': site_record_id, 'product_id': pid, 'qty_per_site': qty})
+                    if (old is _MISSING and qty is not None) or (old is not _MISSING and old != qty):
+                        changed_quantities.append({**self._product_labels[pid],
+                                                   'old': None if old is _MISSING else old, 'new': qty})
+                if report is not None and (changed_fields or changed_quantities):
+                    report.sites_changed += 1
+                    report.add(report.changed_sites,
+                               {**site_label, 'fields': changed_fields, 'quantities': changed_quantities})
+
+            if not self.dry_run:
+                bulk_update(db, ODBOQSite, site_updates)
+                bulk_upsert(db, ODBOQSiteProduct, quantity_rows, key_columns=('site_record_id', 'product_id'))
+
+    # ---------- finish ----------
+
+    def _report_removed_sites(self) -> None:
+        """Dry run: sites of the project that are not in the file (an upload keeps them)."""
+        report = self.report
+        for site_id, subscope in self.db.execute(
+            select(ODBOQSite.site_id, ODBOQSite.subscope)
+            .where(ODBOQSite.project_id == self.project_id)
+            .order_by(ODBOQSite.site_id, ODBOQSite.subscope)
+        ):
+            if self._key(site_id, subscope) not in self.site_record_ids:
+                report.sites_removed += 1
+                report.add(report.removed_sites, {'site_id': site_id, 'subscope': subscope})
+
+    def finish(self) -> ImportCounts:
+        """Recalculate consumed_in_year and remaining_in_po of the uploaded products."""
+        db = self.db
+        if self.dry_run:
+            self._report_removed_sites()
+            return self.counts
+
+        product_ids = set(self.product_ids)
+        if product_ids:
+            products_dict = {
+                p.id: p for p in db.query(ODBOQProduct).filter(ODBOQProduct.id.in_(product_ids)).all()
+            }
+
+            # Calculate all consumed amounts in a single query
+            consumed_data = db.query(
+                ODBOQSiteProduct.product_id,
+                func.sum(ODBOQSiteProduct.qty_per_site).label('total')
+            ).filter(
+                ODBOQSiteProduct.product_id.in_(product_ids),
+                ODBOQSiteProduct.qty_per_site.isnot(None)
+            ).group_by(ODBOQSiteProduct.product_id).all()
+
+            consumed_map = {cd[0]: cd[1] or 0.0 for cd in consumed_data}
+
+            for product_id, product in products_dict.items():
+                total_consumed = consumed_map.get(product_id, 0.0)
+                product.consumed_in_year = total_consumed
+                # Negative if no total_po_qty
+                if product.total_po_qty is not None:
+                    product.remaining_in_po = product.total_po_qty - total_consumed
+                else:
+                    product.remaining_in_po = -total_consumed
+        return self.counts
+
+
+def import_tracker(db: Session, reader: TrackerReader, project_id: str, consumed_year: int,
+                   delta: bool = True) -> ImportCounts:
+    """Write a tracker (products, then sites and quantities chunk by chunk) and recalculate consumption. Does not commit."""
+    importer = TrackerImport(db, project_id, consumed_year, delta=delta)
+    importer.write_products(reader.products)
+    importer.index_sites(reader.site_keys)
+    for chunk in reader.chunks():
+        importer.write_sites(chunk)
+    return importer.finish()
+
+
+def preview_tracker(db: Session, reader: TrackerReader, project_id: str, consumed_year: int,
+                    detail_limit: int = 200) -> Tuple[ImportCounts, ChangeReport]:
+    """What import_tracker would add and change, without writing anything."""
+    importer = TrackerImport(db, project_id, consumed_year, dry_run=True, detail_limit=detail_limit)
+    importer.write_products(reader.products)
+    importer.index_sites(reader.site_keys)
+    for chunk in reader.chunks():
+        importer.write_sites(chunk)
+    return importer.finish(), importer.report
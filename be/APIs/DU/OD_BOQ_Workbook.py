@@ -0,0 +1,461 @@
+"""
+OD BOQ Workbook - streaming BOQ Excel writer
+
+The BOQ Excel is the template (templates/BOQ Formate.xlsx) with the BOQ rows
+written between its header (rows 1-9) and its footer (the signature block,
+from the first filled row after row 9), followed by a totals row.
+
+Loading the template with load_workbook, copying the footer styles and
+styling every cell one by one on each download keeps the whole workbook in
+memory and costs several style lookups per cell. Instead:
+- BOQTemplate parses the template once per file version: header and footer
+  cells, merged ranges, row heights, column widths, sheet and print settings,
+  theme and the style of every cell, as named style definitions
+- write_boq_workbook() registers those named styles in a write-only workbook
+  (one named style per distinct cell format) and streams the rows into it;
+  data rows reuse one pre-styled cell per column, since write-only mode
+  writes a row out as soon as it is appended
+- the saved file is a SpooledTemporaryFile (in memory up to
+  OD_BOQ_EXCEL_SPOOL_BYTES, on disk beyond) that iter_file() streams to the
+  client in chunks
+
+Memory stays flat in the number of rows; only the BOQ entries passed in are
+held, as before.
+
+Usage:
+    excel_file = write_boq_workbook(boq_entries, BOQ_TEMPLATE_PATH, is_bulk=True)
+    return StreamingResponse(iter_file(excel_file), media_type=XLSX_MEDIA_TYPE, ...)
+
+Environment Variables (optional):
+- OD_BOQ_EXCEL_SPOOL_BYTES: Size up to which a generated workbook stays in memory (default: 8 MB)
+"""
+
+import copy
+import logging
+import os
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import ColumnDimension, RowDimension
+from openpyxl.worksheet.page import PrintPageSetup
+
+from utils.blocking import flag_blocking_call
+
+logger = logging.getLogger(__name__)
+
+# ===========================
+# MODULE CONSTANTS
+# ===========================
+
+OD_BOQ_EXCEL_SPOOL_BYTES = int(os.getenv("OD_BOQ_EXCEL_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+# Chunk size of iter_file()
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Template layout
+HEADER_ROWS = 9         # Rows 1-9: title, BPO / scope / site fields and the column headers
+DATA_START_ROW = 10
+DATA_COLUMNS = 12       # A-L
+FOOTER_COLUMNS = 14     # A-N
+FOOTER_SEARCH_ROWS = 20 # The footer starts within the last 20 template rows
+
+# Header fields filled per workbook: (row, column)
+HEADER_PROJECT_PO = (5, 5)
+HEADER_DATE = (5, 9)
+HEADER_SCOPE = (6, 5)
+HEADER_CATEGORY = (6, 9)
+HEADER_SITE_ID = (7, 9)
+
+# Item field per data column (None: empty column)
+DATA_FIELDS = (None, 'line', 'bu', 'item_job', 'description', None,
+               'qty', 'unit_price', 'total_usd', 'total_aed', 'site_id_list', 'po_model')
+AMOUNT_COLUMNS = (8, 9, 10)  # Unit Price, Total USD, Total AED
+TOTAL_LABEL_COLUMN = 5
+TOTAL_USD_COLUMN = 9
+AMOUNT_FORMAT = '#,##0.00'
+
+# Column widths so data is visible without manual resizing (other columns keep the template's)
+COLUMN_WIDTHS = {
+    'A': 4,    # Empty/index
+    'B': 12,   # BPO Line No
+    'C': 14,   # BU
+    'D': 18,   # ERP Item Code
+    'E': 45,   # Description (widest)
+    'F': 14,   # Budget Line
+    'G': 10,   # QTY
+    'H': 14,   # Unit Price
+    'I': 16,   # Total USD
+    'J': 16,   # Total AED
+    'K': 16,   # Site ID
+    'L': 30,   # Model Name towards dU
+}
+
+# Named styles of the generated rows
+LINE_STYLE = 'BOQ Line'
+LINE_AMOUNT_STYLE = 'BOQ Line Amount'
+TOTAL_STYLE = 'BOQ Total'
+TOTAL_LABEL_STYLE = 'BOQ Total Label'
+TOTAL_AMOUNT_STYLE = 'BOQ Total Amount'
+GAP_STYLE = 'BOQ Gap'
+
+
+def _wrapped(alignment: Optional[Alignment] = None) -> Alignment:
+    """Vertically centred, wrapped text, keeping the horizontal alignment."""
+    return Alignment(
+        horizontal=alignment.horizontal if alignment is not None and alignment.horizontal else None,
+        vertical='center',
+        wrap_text=True
+    )
+
+
+# ===========================
+# TEMPLATE
+# ===========================
+
+class BOQTemplate:
+    """
+    Everything write_boq_workbook() needs from the template, parsed once.
+
+    Cells are kept as (row, column, value, style name) with the row relative
+    to their block (header: 1-9, footer: 0-based); `styles` maps each style
+    name to its NamedStyle arguments.
+    """
+
+    def __init__(self, path: str):
+        wb = load_workbook(path)
+        ws = wb.active
+        max_row = ws.max_row
+
+        self.styles: Dict[str, Dict[str, Any]] = {}
+        self._style_names: Dict[tuple, str] = {}
+        default_font = copy.copy(wb._fonts[0])
+
+        thin_side = Side(style='thin', color='000000')
+        thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+
+        # Data rows take the border of the column headers
+        template_border = None
+        if max_row >= HEADER_ROWS:
+            for col in range(2, DATA_COLUMNS + 1):
+                border = ws.cell(row=HEADER_ROWS, column=col).border
+                if border and border.left and border.left.style:
+                    template_border = copy.copy(border)
+                    break
+        if template_border is None:
+            template_border = thin_border
+
+        self.styles[LINE_STYLE] = dict(font=default_font, border=template_border, alignment=_wrapped())
+        self.styles[LINE_AMOUNT_STYLE] = dict(self.styles[LINE_STYLE], number_format=AMOUNT_FORMAT)
+        self.styles[TOTAL_STYLE] = dict(font=default_font, border=thin_border, alignment=_wrapped())
+        self.styles[TOTAL_LABEL_STYLE] = dict(self.styles[TOTAL_STYLE], font=Font(bold=True))
+        self.styles[TOTAL_AMOUNT_STYLE] = dict(self.styles[TOTAL_LABEL_STYLE], number_format=AMOUNT_FORMAT)
+        self.styles[GAP_STYLE] = dict(font=default_font, alignment=_wrapped())
+
+        # Header: rows 1-9 as they are
+        self.header_rows = min(HEADER_ROWS, max_row)
+        self.header: List[Tuple[int, int, Any, Optional[str]]] = []
+        for row in ws.iter_rows(min_row=1, max_row=self.header_rows):
+            for cell in row:
+                style = self._style_name(cell) if cell.has_style else None
+                if cell.value is not None or style:
+                    self.header.append((cell.row, cell.column, cell.value, style))
+
+        # Footer: from the first row after the header with a fill
+        footer_start = None
+        if max_row > HEADER_ROWS:
+            for row_idx in range(max(DATA_START_ROW, max_row - FOOTER_SEARCH_ROWS), max_row + 1):
+                if any(self._has_fill(ws.cell(row=row_idx, column=col_idx))
+                       for col_idx in range(1, FOOTER_COLUMNS + 1)):
+                    footer_start = row_idx
+                    break
+        self.footer_rows = max_row - footer_start + 1 if footer_start else 0
+        self.footer: List[Tuple[int, int, Any, Optional[str]]] = []
+        if footer_start:
+            for row_idx in range(footer_start, max_row + 1):
+                for col_idx in range(1, FOOTER_COLUMNS + 1):
+                    cell = ws.cell(row=row_idx, column=col_idx)
+                    self.footer.append((row_idx - footer_start, col_idx, cell.value, self._footer_style_name(cell)))
+
+        # Row heights and merged ranges of both blocks (footer rows relative to its start)
+        self.header_heights = {
+            r: ws.row_dimensions[r].height for r in range(1, self.header_rows + 1)
+            if r in ws.row_dimensions and ws.row_dimensions[r].height
+        }
+        self.footer_heights = {
+            r - footer_start: ws.row_dimensions[r].height for r in range(footer_start, max_row + 1)
+            if r in ws.row_dimensions and ws.row_dimensions[r].height
+        } if footer_start else {}
+        self.header_merges = [str(r) for r in ws.merged_cells.ranges if r.max_row <= self.header_rows]
+        self.footer_merges = [
+            (r.min_row - footer_start, r.min_col, r.max_row - footer_start, r.max_col)
+            for r in ws.merged_cells.ranges if footer_start and r.min_row >= footer_start
+        ]
+
+        self.column_widths = {
+            letter: dim.width for letter, dim in ws.column_dimensions.items() if dim.width
+        }
+        self.column_widths.update(COLUMN_WIDTHS)
+
+        # Sheet and workbook settings
+        self.title = ws.title
+        self.theme = wb.loaded_theme
+        self.sheet_properties = copy.deepcopy(ws.sheet_properties)
+        self.sheet_format = copy.deepcopy(ws.sheet_format)
+        self.views = copy.deepcopy(ws.views)
+        self.page_margins = copy.deepcopy(ws.page_margins)
+        self.print_options = copy.deepcopy(ws.print_options)
+        self.header_footer = copy.deepcopy(ws.HeaderFooter)
+        self.page_setup = {attr: getattr(ws.page_setup, attr) for attr in PrintPageSetup.__attrs__}
+        self.print_area = ws.print_area
+        self.data_validations = [copy.deepcopy(dv) for dv in ws.data_validations.dataValidation]
+        self.defined_names = {name: copy.deepcopy(dn) for name, dn in wb.defined_names.items()}
+        wb.close()
+
+    @staticmethod
+    def _has_fill(cell) -> bool:
+        fill = cell.fill
+        return bool(fill and fill.start_color and fill.start_color.rgb and fill.start_color.rgb != '00000000')
+
+    def _register(self, key: tuple, spec: Dict[str, Any]) -> str:
+        name = self._style_names.get(key)
+        if name is None:
+            name = f"BOQ Template {len(self._style_names) + 1}"
+            self._style_names[key] = name
+            self.styles[name] = spec
+        return name
+
+    def _style_name(self, cell) -> str:
+        """Named style of a template cell, exactly as formatted."""
+        spec = dict(
+            font=copy.copy(cell.font), fill=copy.copy(cell.fill), border=copy.copy(cell.border),
+            alignment=copy.copy(cell.alignment), number_format=cell.number_format,
+            protection=copy.copy(cell.protection)
+        )
+        return self._register(('cell',) + tuple(cell._style), spec)
+
+    def _footer_style_name(self, cell) -> str:
+        """Font, fill and border of a footer cell; A-L are vertically centred and wrapped like the data."""
+        alignment = _wrapped(cell.alignment) if cell.column <= DATA_COLUMNS else copy.copy(cell.alignment)
+        spec = dict(font=copy.copy(cell.font), fill=copy.copy(cell.fill),
+                    border=copy.copy(cell.border), alignment=alignment)
+        key = ('footer', cell._style.fontId, cell._style.fillId, cell._style.borderId,
+               cell._style.alignmentId, cell.column <= DATA_COLUMNS)
+        return self._register(key, spec)
+
+
+@lru_cache(maxsize=4)
+def _parse_template(path: str, mtime_ns: int) -> BOQTemplate:
+    logger.info(f"Parsing BOQ template {path}")
+    return BOQTemplate(path)
+
+
+def load_boq_template(path: str) -> BOQTemplate:
+    """Parsed template, re-read only when the file changes."""
+    path = os.path.realpath(path)
+    return _parse_template(path, os.stat(path).st_mtime_ns)
+
+
+# ===========================
+# WRITER
+# ===========================
+
+def _line_sort_key(item: Dict[str, Any]):
+    """Single site: by BPO line as stored, lines without a number last."""
+    line = item.get('line')
+    return (line is None, line if line is not None else 0)
+
+
+def _bulk_line_sort_key(pair: Tuple[Dict[str, Any], Dict[str, Any]]):
+    """Bulk: by BPO line number numerically; non-numeric lines as 0, missing lines last."""
+    line = pair[1].get('line')
+    if line is None:
+        return (True, 0)
+    try:
+        return (False, int(line))
+    except (ValueError, TypeError):
+        return (False, 0)
+
+
+class _SheetWriter:
+    """Appends rows to a write-only worksheet set up from the template."""
+
+    def __init__(self, template: BOQTemplate):
+        self.template = template
+        self.wb = Workbook(write_only=True)
+        if template.theme:
+            self.wb.loaded_theme = template.theme
+        for name, defined_name in template.defined_names.items():
+            self.wb.defined_names[name] = copy.deepcopy(defined_name)
+        for name, spec in template.styles.items():
+            self.wb.add_named_style(NamedStyle(name=name, **spec))
+
+        ws = self.ws = self.wb.create_sheet(title=template.title)
+        ws.sheet_properties = copy.deepcopy(template.sheet_properties)
+        ws.sheet_format = copy.deepcopy(template.sheet_format)
+        ws.views = copy.deepcopy(template.views)
+        ws.page_margins = copy.deepcopy(template.page_margins)
+        ws.print_options = copy.deepcopy(template.print_options)
+        ws.HeaderFooter = copy.deepcopy(template.header_footer)
+        ws.page_setup = PrintPageSetup(worksheet=ws, **template.page_setup)
+        if template.print_area:
+            ws.print_area = template.print_area
+        for dv in template.data_validations:
+            ws.data_validations.append(copy.deepcopy(dv))
+        for letter, width in template.column_widths.items():
+            ws.column_dimensions[letter] = ColumnDimension(ws, index=letter, width=width)
+        for row_idx, height in template.header_heights.items():
+            ws.row_dimensions[row_idx] = RowDimension(ws, index=row_idx, ht=height)
+        for cell_range in template.header_merges:
+            ws.merged_cells.add(cell_range)
+        self.row = 0
+
+        # One styled cell per data column, reused for every data row
+        self.line_cells = [self.cell(LINE_STYLE) for _ in range(DATA_COLUMNS)]
+        self.amount_cells = {col: self.cell(LINE_AMOUNT_STYLE) for col in AMOUNT_COLUMNS}
+
+    def cell(self, style: Optional[str], value: Any = None):
+        if style is None:
+            return value
+        cell = WriteOnlyCell(self.ws, value)
+        cell.style = style
+        return cell
+
+    def append(self, values: List[Any]) -> None:
+        self.ws.append(values)
+        self.row += 1
+
+    def append_block(self, cells, rows: int, overrides: Optional[Dict[Tuple[int, int], Any]] = None,
+                     offset: int = 1) -> None:
+        """Append template cells (row, column, value, style) of rows offset..offset + rows - 1."""
+        grid: Dict[int, Dict[int, Any]] = {}
+        for row, col, value, style in cells:
+            if overrides and (row, col) in overrides:
+                value = overrides[(row, col)]
+            grid.setdefault(row, {})[col] = self.cell(style, value)
+        for row in range(offset, offset + rows):
+            columns = grid.get(row, {})
+            self.append([columns.get(col) for col in range(1, max(columns, default=0) + 1)])
+
+    def append_item(self, item: Dict[str, Any]) -> None:
+        row = []
+        for col, field in enumerate(DATA_FIELDS, 1):
+            value = item.get(field) if field else None
+            if col in AMOUNT_COLUMNS and value and isinstance(value, (int, float)):
+                cell = self.amount_cells[col]
+            else:
+                cell = self.line_cells[col - 1]
+            cell.value = value
+            row.append(cell)
+        self.append(row)
+
+    def append_totals(self, first_row: int, last_row: int) -> None:
+        row = [self.cell(TOTAL_STYLE) for _ in range(DATA_COLUMNS)]
+        row[TOTAL_LABEL_COLUMN - 1] = self.cell(TOTAL_LABEL_STYLE, "Total")
+        row[TOTAL_USD_COLUMN - 1] = self.cell(TOTAL_AMOUNT_STYLE, f"=SUM(I{first_row}:I{last_row})")
+        self.append(row)
+
+    def append_footer(self) -> None:
+        template = self.template
+        if not template.footer_rows:
+            return
+        start = self.row + 1
+        for row_idx, height in template.footer_heights.items():
+            self.ws.row_dimensions[start + row_idx] = RowDimension(self.ws, index=start + row_idx, ht=height)
+        for min_row, min_col, max_row, max_col in template.footer_merges:
+            self.ws.merged_cells.add(
+                f"{get_column_letter(min_col)}{start + min_row}:{get_column_letter(max_col)}{start + max_row}"
+            )
+        self.append_block(template.footer, template.footer_rows, offset=0)
+
+    def save(self) -> BinaryIO:
+        output = tempfile.SpooledTemporaryFile(max_size=OD_BOQ_EXCEL_SPOOL_BYTES)
+        try:
+            self.wb.save(output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output
+
+
+def write_boq_workbook(boq_entries: list, template_path: str, is_bulk: bool = False) -> Optional[BinaryIO]:
+    """
+    Write the BOQ Excel of one site, or of several sites combined, from the template.
+
+    Args:
+        boq_entries: BOQ entry dicts (see APIs.DU.OD_BOQ_Generation.BOQBatch.data)
+        template_path: Path to the Excel template file
+        is_bulk: If True, combine all entries in one sheet ordered by BPO line number
+
+    Returns:
+        Binary file positioned at the start (close it when done, iter_file() does),
+        or None in single site mode without data
+    """
+    flag_blocking_call("Excel rendering")
+
+    if not is_bulk and (not boq_entries or not boq_entries[0].get('data')):
+        return None
+
+    template = load_boq_template(template_path)
+    writer = _SheetWriter(template)
+    today = datetime.now().strftime('%d-%b-%y')
+
+    if not is_bulk:
+        entry = boq_entries[0]
+        overrides = {
+            HEADER_PROJECT_PO: entry['project_po'],
+            HEADER_DATE: today,
+            HEADER_SCOPE: entry.get('scope', 'N/A'),
+            HEADER_CATEGORY: entry.get('sps_category', 'N/A'),
+            HEADER_SITE_ID: entry['site_id'],
+        }
+        items = sorted(entry['data'], key=_line_sort_key)
+    else:
+        overrides = {}
+        if boq_entries:
+            overrides = {
+                HEADER_PROJECT_PO: boq_entries[0]['project_po'],
+                HEADER_DATE: today,
+                HEADER_SCOPE: "Multiple Scopes (Bulk)",
+                HEADER_CATEGORY: "Multiple Sites",
+                HEADER_SITE_ID: f"{len(boq_entries)} sites",
+            }
+        # Every line carries its own site's ID and model
+        pairs = sorted(
+            ((entry, item) for entry in boq_entries for item in entry.get('data', [])),
+            key=_bulk_line_sort_key
+        )
+        items = (
+            {**item, 'site_id_list': entry['site_id'], 'po_model': entry.get('po_model', '')}
+            for entry, item in pairs
+        )
+
+    writer.append_block(template.header, template.header_rows, overrides)
+    for item in items:
+        writer.append_item(item)
+
+    last_data_row = writer.row
+    if last_data_row >= DATA_START_ROW:
+        writer.append_totals(DATA_START_ROW, last_data_row)
+        writer.append([writer.cell(GAP_STYLE) for _ in range(DATA_COLUMNS)])
+        writer.append_footer()
+
+    return writer.save()
+
+
+def iter_file(file: BinaryIO, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Stream a file in chunks for a StreamingResponse, closing it at the end."""
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
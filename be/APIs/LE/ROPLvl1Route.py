@@ -4,11 +4,12 @@ import logging
 from fastapi import Depends, HTTPException, APIRouter, status, Request
 from sqlalchemy.orm import Session
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.LE.ROPLvl1 import ROPLvl1
 from Models.LE.ROPLvl2 import ROPLvl2
-from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
+from Models.Admin.User import User
+from utils.access_control import check_rop_project_access, get_accessible_project_ids
+from utils.audit_log import create_audit_log
 from Schemas.LE.ROPLvl1Schema import ROPLvl1Out, ROPLvl1Create
 
 logger = logging.getLogger(__name__)
@@ -23,55 +24,9 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
 # ----------------------------
 # Helper functions
 # ----------------------------
-def check_project_access(current_user: User, pid_po: str, db: Session, required_permission: str = "view"):
-    """Check if user has required access level to a project."""
-    if current_user.role.name == "senior_admin":
-        return True
-
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ropproject_id == pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    hierarchy = {"view": ["view", "edit", "all"], "edit": ["edit", "all"], "all": ["all"]}
-    return access.permission_level in hierarchy.get(required_permission, [])
-
-
 def update_lvl1_dates(lvl1_id: str, db: Session):
     """Auto-sync start/end dates from linked lvl2 entries."""
     lvl2_items = db.query(ROPLvl2).filter(ROPLvl2.lvl1_id == lvl1_id).all()
@@ -106,7 +61,7 @@ def create_lvl1(
 
     # Create audit log
     if request:
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -125,7 +80,7 @@ def create_lvl1(
 def get_all_lvl1(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -133,16 +88,15 @@ def get_all_lvl1(
 
     OPTIMIZED: Added pagination (skip/limit) to prevent loading unlimited records.
     """
-    if current_user.role.name == "senior_admin":
+    project_ids = get_accessible_project_ids(current_user, db, "rop")
+    if project_ids is None:
         # OPTIMIZED: Added pagination for senior admin
         # MSSQL requires ORDER BY when using OFFSET/LIMIT
         return db.query(ROPLvl1).order_by(ROPLvl1.id).offset(skip).limit(limit).all()
 
-    # filter by accessible projects
-    accesses = db.query(UserProjectAccess).filter(UserProjectAccess.user_id == current_user.id).all()
-    if not accesses:
+    # filter by accessible ROP projects
+    if not project_ids:
         return []
-    project_ids = [a.project_id for a in accesses]
     # OPTIMIZED: Added pagination for filtered results
     # MSSQL requires ORDER BY when using OFFSET/LIMIT
     return db.query(ROPLvl1).filter(ROPLvl1.project_id.in_(project_ids)).order_by(ROPLvl1.id).offset(skip).limit(limit).all()
@@ -153,7 +107,7 @@ def get_lvl1_by_project(
     pid_po: str,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -161,7 +115,7 @@ def get_lvl1_by_project(
 
     OPTIMIZED: Added pagination (skip/limit) to prevent loading unlimited records.
     """
-    if not check_project_access(current_user, pid_po, db, "view"):
+    if not check_rop_project_access(current_user, pid_po, db, "view"):
         raise HTTPException(status_code=403, detail="Not authorized to view this project's Lvl1")
     # OPTIMIZED: Added pagination
     # MSSQL requires ORDER BY when using OFFSET/LIMIT
@@ -169,11 +123,11 @@ def get_lvl1_by_project(
 
 
 @ROPLvl1router.get("/{id}", response_model=ROPLvl1Out)
-def get_lvl1_by_id(id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_lvl1_by_id(id: str, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     lvl1 = db.query(ROPLvl1).filter(ROPLvl1.id == id).first()
     if not lvl1:
         raise HTTPException(status_code=404, detail="Lvl1 entry not found")
-    if not check_project_access(current_user, lvl1.project_id, db, "view"):
+    if not check_rop_project_access(current_user, lvl1.project_id, db, "view"):
         raise HTTPException(status_code=403, detail="Not authorized to view this Lvl1")
     return lvl1
 
@@ -184,7 +138,7 @@ def update_lvl1(id: str, data: ROPLvl1Create, request: Request, db: Session = De
     if not lvl1:
         raise HTTPException(status_code=404, detail="Lvl1 entry not found")
 
-    if not check_project_access(current_user, lvl1.project_id, db, "edit"):
+    if not check_rop_project_access(current_user, lvl1.project_id, db, "edit"):
         raise HTTPException(status_code=403, detail="Not authorized to update this Lvl1")
 
     for field, value in data.dict().items():
@@ -193,7 +147,7 @@ def update_lvl1(id: str, data: ROPLvl1Create, request: Request, db: Session = De
     db.refresh(lvl1)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -214,7 +168,7 @@ def delete_lvl1(id: str, request: Request, db: Session = Depends(get_db), curren
     if not lvl1:
         raise HTTPException(status_code=404, detail="Lvl1 entry not found")
 
-    if not check_project_access(current_user, lvl1.project_id, db, "all"):
+    if not check_rop_project_access(current_user, lvl1.project_id, db, "all"):
         raise HTTPException(status_code=403, detail="Not authorized to delete this Lvl1")
 
     # Store for audit
@@ -225,7 +179,7 @@ def delete_lvl1(id: str, request: Request, db: Session = Depends(get_db), curren
     db.commit()
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -4,11 +4,12 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from APIs.LE.ROPLvl1Route import get_lvl1_by_id
 from Models.LE.ROPLvl2 import ROPLvl2, ROPLvl2Distribution
-from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
+from Models.Admin.User import User
+from utils.access_control import check_rop_project_access, get_accessible_project_ids
+from utils.audit_log import create_audit_log
 from Schemas.LE.ROPLvl2Schema import ROPLvl2Create, ROPLvl2Out
 
 logger = logging.getLogger(__name__)
@@ -23,51 +24,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-# ----------------------------
-# Helpers
-# ----------------------------
-def check_project_access(current_user: User, pid_po: str, db: Session, required_permission: str = "view"):
-    if current_user.role.name == "senior_admin":
-        return True
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ropproject_id == pid_po
-    ).first()
-    if not access:
-        return False
-    hierarchy = {"view": ["view", "edit", "all"], "edit": ["edit", "all"], "all": ["all"]}
-    return access.permission_level in hierarchy.get(required_permission, [])
-
-
 # ----------------------------
 # CRUD with admin controls
 # ----------------------------
@@ -97,7 +53,7 @@ def create_lvl2(data: ROPLvl2Create, request: Request = None, db: Session = Depe
 
     # Create audit log
     if request:
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -113,30 +69,29 @@ def create_lvl2(data: ROPLvl2Create, request: Request = None, db: Session = Depe
 
 
 @ROPLvl2router.get("/", response_model=List[ROPLvl2Out])
-def get_all_lvl2(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    if current_user.role.name == "senior_admin":
+def get_all_lvl2(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    project_ids = get_accessible_project_ids(current_user, db, "rop")
+    if project_ids is None:
         return db.query(ROPLvl2).all()
-    accesses = db.query(UserProjectAccess).filter(UserProjectAccess.user_id == current_user.id).all()
-    if not accesses:
+    if not project_ids:
         return []
-    project_ids = [a.project_id for a in accesses]
     return db.query(ROPLvl2).filter(ROPLvl2.project_id.in_(project_ids)).all()
 
 
 @ROPLvl2router.get("/by-lvl1/{lvl1_id}", response_model=List[ROPLvl2Out])
-def get_lvl2_by_lvl1(lvl1_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_lvl2_by_lvl1(lvl1_id: str, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     lvl1 = get_lvl1_by_id(lvl1_id, db=db, current_user=current_user)
-    if not check_project_access(current_user, lvl1.project_id, db, "view"):
+    if not check_rop_project_access(current_user, lvl1.project_id, db, "view"):
         raise HTTPException(status_code=403, detail="Not authorized to view Lvl2 for this Lvl1")
     return db.query(ROPLvl2).filter(ROPLvl2.lvl1_id == lvl1_id).all()
 
 
 @ROPLvl2router.get("/{id}", response_model=ROPLvl2Out)
-def get_lvl2_by_id(id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_lvl2_by_id(id: str, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     lvl2 = db.query(ROPLvl2).filter(ROPLvl2.id == id).first()
     if not lvl2:
         raise HTTPException(status_code=404, detail="Lvl2 entry not found")
-    if not check_project_access(current_user, lvl2.project_id, db, "view"):
+    if not check_rop_project_access(current_user, lvl2.project_id, db, "view"):
         raise HTTPException(status_code=403, detail="Not authorized to view this Lvl2")
     return lvl2
 
@@ -146,7 +101,7 @@ def update_lvl2(id: str, data: ROPLvl2Create, request: Request, db: Session = De
     lvl2 = db.query(ROPLvl2).filter(ROPLvl2.id == id).first()
     if not lvl2:
         raise HTTPException(status_code=404, detail="Lvl2 entry not found")
-    if not check_project_access(current_user, lvl2.project_id, db, "edit"):
+    if not check_rop_project_access(current_user, lvl2.project_id, db, "edit"):
         raise HTTPException(status_code=403, detail="Not authorized to update this Lvl2")
 
     for key, value in data.dict(exclude={"distributions"}).items():
@@ -165,7 +120,7 @@ def update_lvl2(id: str, data: ROPLvl2Create, request: Request, db: Session = De
     db.refresh(lvl2)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -185,7 +140,7 @@ def delete_lvl2(id: str, request: Request, db: Session = Depends(get_db), curren
     lvl2 = db.query(ROPLvl2).filter(ROPLvl2.id == id).first()
     if not lvl2:
         raise HTTPException(status_code=404, detail="Lvl2 entry not found")
-    if not check_project_access(current_user, lvl2.project_id, db, "all"):
+    if not check_rop_project_access(current_user, lvl2.project_id, db, "all"):
         raise HTTPException(status_code=403, detail="Not authorized to delete this Lvl2")
 
     # Store for audit
@@ -196,7 +151,7 @@ def delete_lvl2(id: str, request: Request, db: Session = Depends(get_db), curren
     db.commit()
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -7,13 +7,19 @@ from dateutil.relativedelta import relativedelta
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
 from sqlalchemy.orm import Session
 from typing import List
-from sqlalchemy import and_
 
 logger = logging.getLogger(__name__)
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.Admin.User import UserProjectAccess, User
-from Models.Admin.AuditLog import AuditLog
+from utils.access_control import (
+    check_rop_project_access,
+    get_accessible_projects,
+    get_access_matrix,
+    invalidate_access_matrix,
+)
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
 from APIs.LE.ROPLvl1Route import create_lvl1
 from APIs.LE.ROPLvl2Route import create_lvl2
 from Models.LE.ROPProject import ROPProject
@@ -37,109 +43,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-# --------------------------------------------------------------------------------
-# Access Control Helper Functions
-# --------------------------------------------------------------------------------
-
-def check_rop_project_access(
-        current_user: User,
-        project: ROPProject,
-        db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a ROP project with required permission level.
-    """
-    # Senior admin has all permissions to all projects
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # Admin has all permissions but only to projects they have access to
-    # Check UserProjectAccess for both admin and other roles
-    access = db.query(UserProjectAccess).filter(and_(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ropproject_id == project.pid_po
-    )).first()
-
-    if not access:
-        return False
-
-    # Admin with any access level gets full permissions (same as senior_admin) for their projects
-    if current_user.role.name == "admin":
-        return True
-
-    # For non-admin users, check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_rop_projects(current_user: User, db: Session) -> List[ROPProject]:
-    """
-    Get all ROP projects that the current user has access to.
-
-    Args:
-        current_user: The current user
-        db: Database session
-
-    Returns:
-        List[ROPProject]: List of accessible ROP projects
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(ROPProject).all()
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.Ropproject_id for access in user_accesses]
-
-    # Return projects that match those IDs
-    return (
-        db.query(ROPProject)
-        .filter(
-            (ROPProject.pid_po.in_(accessible_project_ids))
-        )
-        .all()
-    )
-
 # --------------------------------------------------------------------------------
 # CRUD Endpoints
 # --------------------------------------------------------------------------------
@@ -183,10 +86,12 @@ def create_project(
             db.add(access)
         db.commit()
         db.refresh(new_project)
+        if current_user.role.name == "admin":
+            invalidate_access_matrix(current_user.id)
 
         # Create audit log
         if request:
-            create_audit_log_sync(
+            create_audit_log(
                 db=db,
                 user_id=current_user.id,
                 action="create",
@@ -209,7 +114,7 @@ def create_project(
 
 @ROPProjectrouter.get("/", response_model=List[ROPProjectOut])
 def get_all_projects(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -219,7 +124,7 @@ def get_all_projects(
     - user: Can see only projects they have access to
     """
     try:
-        accessible_projects = get_user_accessible_rop_projects(current_user, db)
+        accessible_projects = get_accessible_projects(current_user, db, "rop")
         return accessible_projects
     except Exception as e:
         raise HTTPException(
@@ -231,7 +136,7 @@ def get_all_projects(
 @ROPProjectrouter.get("/{pid_po}", response_model=ROPProjectOut)
 def get_project(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -243,7 +148,7 @@ def get_project(
         raise HTTPException(status_code=404, detail="ROP Project not found")
 
     # Check if user has access to this project
-    if not check_rop_project_access(current_user, project, db, "view"):
+    if not check_rop_project_access(current_user, project, db, "view", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to access this ROP project. Contact the Senior Admin."
@@ -270,7 +175,7 @@ def update_project(
         raise HTTPException(status_code=404, detail="ROP Project not found")
 
     # Check if user has edit permission
-    if not check_rop_project_access(current_user, project, db, "edit"):
+    if not check_rop_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to update this ROP project. Contact the Senior Admin."
@@ -286,7 +191,7 @@ def update_project(
         db.refresh(project)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -326,7 +231,7 @@ def delete_project(
         raise HTTPException(status_code=404, detail="ROP Project not found")
 
     # Check if user has "all" permission (required for deletion)
-    if not check_rop_project_access(current_user, project, db, "all"):
+    if not check_rop_project_access(current_user, project, db, "all", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to delete this ROP project. Contact the Senior Admin."
@@ -367,13 +272,14 @@ def delete_project(
             UserProjectAccess.Ropproject_id == pid_po
         ).delete(synchronize_session=False)
         db.commit()
+        invalidate_access_matrix()
 
         # 8) Finally delete the project
         db.delete(project)
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -397,7 +303,7 @@ def delete_project(
 @ROPProjectrouter.get("/check-permission/{pid_po}")
 def check_user_rop_project_permission(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -421,12 +327,9 @@ def check_user_rop_project_permission(
         }
 
     # Check access for other users
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ropproject_id == project.pid_po
-    ).first()
+    permission_level = get_access_matrix(current_user, db).permission_level("rop", project.pid_po)
 
-    if not access:
+    if not permission_level:
         return {
             "project_id": pid_po,
             "permission_level": "none",
@@ -438,13 +341,13 @@ def check_user_rop_project_permission(
 
     # Determine capabilities based on permission level and role
     can_edit = (current_user.role.name == "admin" and
-                access.permission_level in ["edit", "all"])
+                permission_level in ["edit", "all"])
     can_delete = (current_user.role.name == "admin" and
-                  access.permission_level == "all")
+                  permission_level == "all")
 
     return {
         "project_id": pid_po,
-        "permission_level": access.permission_level,
+        "permission_level": permission_level,
         "can_view": True,
         "can_edit": can_edit,
         "can_delete": can_delete,
@@ -499,7 +402,8 @@ def safe_int(value, default=0):
 # --------------------------------------------------------------------------------
 
 @ROPProjectrouter.post("/upload-csv")
-async def upload_csv(
+@offload(PARSE)
+def upload_csv(
         request: Request,
         file: UploadFile = File(...),
         db: Session = Depends(get_db),
@@ -517,7 +421,7 @@ async def upload_csv(
         )
 
     try:
-        content = await file.read()
+        content = file.file.read()
         decoded = content.decode("utf-8")
         csv_reader = csv.reader(io.StringIO(decoded))
 
@@ -605,7 +509,7 @@ async def upload_csv(
                 raise HTTPException(status_code=400, detail=f"Unknown level: {level}")
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_csv",
@@ -625,7 +529,8 @@ async def upload_csv(
 
 
 @ROPProjectrouter.post("/upload-csv-fix")
-async def upload_csv_fix(
+@offload(PARSE)
+def upload_csv_fix(
         request: Request,
         pid: str = Form(...),
         po: str = Form(...),
@@ -666,7 +571,7 @@ async def upload_csv_fix(
     try:
         create_project(project, db=db, current_user=current_user)
 
-        content = await file.read()
+        content = file.file.read()
         decoded = content.decode("utf-8")
         csv_reader = csv.reader(io.StringIO(decoded))
         rows = list(csv_reader)
@@ -720,7 +625,7 @@ async def upload_csv_fix(
                 raise HTTPException(status_code=400, detail=f"Unknown level: {level}")
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_csv_fix",
@@ -2,14 +2,14 @@ import json
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import insert, delete, select, and_, update, func
+from sqlalchemy import insert, delete, select, update, func
 from typing import List, Optional
 
 # --- Core Imports for Security and DB ---
-from APIs.Core import get_db, get_current_user
-from Models.Admin.User import User, UserProjectAccess
-from Models.Admin.AuditLog import AuditLog
-from Models.LE.ROPProject import ROPProject
+from APIs.Core import get_db, get_read_db, get_current_user
+from Models.Admin.User import User
+from utils.access_control import check_rop_project_access, get_accessible_project_ids
+from utils.audit_log import create_audit_log
 
 logger = logging.getLogger(__name__)
 
@@ -35,83 +35,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-def check_rop_project_access(
-        current_user: User,
-        project: str,
-        db: Session,
-        required_permission: str = "view"):
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(and_(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ropproject_id == project
-    )).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_rop_projects(current_user: User, db: Session) -> List[str]:
-    """
-    Get all ROP projects that the current user has access to.
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return [p.pid_po for p in db.query(ROPProject).all()]
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.Ropproject_id for access in user_accesses]
-    return accessible_project_ids
-
-
 def handle_monthly_distributions(package_id: int, data, db: Session):
     """Handle creation/update of monthly distributions for a package."""
     # Delete existing distributions
@@ -267,7 +190,7 @@ def create_package(
         recompute_consumption_for_lvl1_ids(db, affected_lvl1_ids)
 
     # 7. Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="create",
@@ -287,25 +210,27 @@ def create_package(
 @RopPackageRouter.get("/", response_model=List[RopPackageOut])
 def get_all_packages(
         project_id: Optional[str] = Query(None, description="Filter packages by project ID"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Get all packages accessible to the current user.
     Optionally filter by project_id query parameter.
     """
-    # Get IDs of projects the user can access
-    accessible_pids = get_user_accessible_rop_projects(current_user, db)
-    if not accessible_pids:
+    # Get IDs of projects the user can access (None means unrestricted)
+    accessible_pids = get_accessible_project_ids(current_user, db, "rop")
+    if accessible_pids is not None and not accessible_pids:
         return []
 
     # Build query for packages within accessible projects
-    query = db.query(RopPackage).filter(RopPackage.project_id.in_(accessible_pids))
+    query = db.query(RopPackage)
+    if accessible_pids is not None:
+        query = query.filter(RopPackage.project_id.in_(accessible_pids))
 
     # Apply project_id filter if provided
     if project_id:
         # Verify user has access to the requested project
-        if project_id not in accessible_pids:
+        if accessible_pids is not None and project_id not in accessible_pids:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have access to packages in this project"
@@ -324,7 +249,7 @@ def get_all_packages(
 @RopPackageRouter.get("/{id}", response_model=RopPackageOut)
 def get_package(
         id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     pkg = db.query(RopPackage).filter(RopPackage.id == id).first()
@@ -422,7 +347,7 @@ def update_package(
         recompute_consumption_for_lvl1_ids(db, affected_lvl1_ids)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="update",
@@ -475,7 +400,7 @@ def delete_package(
         recompute_consumption_for_lvl1_ids(db, affected_lvl1_ids)
 
     # Create audit log
-    create_audit_log_sync(
+    create_audit_log(
         db=db,
         user_id=current_user.id,
         action="delete",
@@ -539,7 +464,7 @@ def auto_distribute_package_quantity(
 @RopPackageRouter.get("/{id}/monthly-periods")
 def get_package_monthly_periods(
         id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """Get all available monthly periods for a package based on its start and end dates."""
@@ -12,7 +12,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
+from utils.blocking import offload, PARSE
+from utils.pagination import CursorParams, Keyset, count_total
 from Models.Admin.User import User
 from Models.NDPD.NDPDData import NDPDData
 from Schemas.NDPD.NDPDDataSchema import (
@@ -24,6 +26,9 @@ from Schemas.NDPD.NDPDDataSchema import (
 
 NDPDRoute = APIRouter(prefix="/ndpd", tags=["NDPD Data"])
 
+# Newest first (see utils.pagination)
+NDPD_KEYSET = Keyset(NDPDData.id, descending=True)
+
 
 # ===========================
 # CREATE
@@ -62,7 +67,8 @@ def create_ndpd_record(
 # ===========================
 
 @NDPDRoute.post("/upload-csv", status_code=status.HTTP_200_OK)
-async def upload_ndpd_csv(
+@offload(PARSE)
+def upload_ndpd_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -80,7 +86,7 @@ async def upload_ndpd_csv(
 
     try:
         # Read file content
-        content = await file.read()
+        content = file.file.read()
 
         # Try multiple encodings to handle different CSV formats
         csv_content = None
@@ -299,14 +305,15 @@ def bulk_delete_ndpd_records(
 
 @NDPDRoute.get("/", response_model=NDPDDataPagination)
 def get_all_ndpd_records(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    search: Optional[str] = Query(None, description="Search by period or CT name")
+    search: Optional[str] = Query(None, description="Search by period or CT name"),
+    paging: CursorParams = Depends()
 ):
     """
-    Get all NDPD data records with pagination and search.
+    Get all NDPD data records with pagination (skip/limit or keyset cursor) and search.
     """
     try:
         query = db.query(NDPDData)
@@ -319,13 +326,15 @@ def get_all_ndpd_records(
             )
             query = query.filter(search_filter)
 
-        # Get total count
-        total = query.count()
+        # Get total count (only when asked for in cursor mode)
+        total = count_total(db, paging, query, NDPDData)
 
         # Get paginated results
-        records = query.order_by(NDPDData.id.desc()).offset(skip).limit(limit).all()
+        records = NDPD_KEYSET.paginate(query, paging, skip, limit).all()
 
-        return NDPDDataPagination(records=records, total=total)
+        return NDPDDataPagination(records=records, total=total, next_cursor=NDPD_KEYSET.next_cursor(records, limit))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -340,7 +349,7 @@ def get_all_ndpd_records(
 @NDPDRoute.get("/{record_id}", response_model=NDPDDataOut)
 def get_ndpd_record_by_id(
     record_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
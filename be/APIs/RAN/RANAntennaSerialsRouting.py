@@ -6,9 +6,12 @@ import io
 import json
 import logging
 
-from APIs.Core import get_db, get_current_user
-from Models.Admin.User import UserProjectAccess, User
-from Models.Admin.AuditLog import AuditLog
+from APIs.Core import get_db, get_read_db, get_current_user
+from Models.Admin.User import User
+from utils.access_control import check_ran_project_access, get_accessible_project_ids
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
+from utils.pagination import CursorParams, Keyset, count_total
 
 logger = logging.getLogger(__name__)
 from Schemas.RAN.RANAntennaSerialsSchema import (
@@ -24,6 +27,9 @@ RANAntennaSerialsRouter = APIRouter(
     tags=["RAN Antenna Serials"]
 )
 
+# Sort order of the paginated list (see utils.pagination)
+ANTENNA_SERIAL_KEYSET = Keyset(RANAntennaSerials.id)
+
 
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
@@ -33,80 +39,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-# --------------------------------------------------------------------------------
-# Access Control Helper Functions
-# --------------------------------------------------------------------------------
-
-def check_antenna_serials_project_access(current_user: User, project_id: str, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project for antenna serials operations.
-    """
-    # Senior admin has all permissions
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ranproject_id == project_id
-    ).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_accessible_projects_for_antenna_serials(current_user: User, db: Session):
-    """
-    Get all project IDs that the current user has access to for antenna serials operations.
-    """
-    if current_user.role.name == "senior_admin":
-        return None  # Senior admin can access all projects
-
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    return [access.Ranproject_id for access in user_accesses]
-
-
 # --------------------------------------------------------------------------------
 # CRUD Methods
 # --------------------------------------------------------------------------------
@@ -116,7 +48,8 @@ def get_antenna_serial(db: Session, antenna_serial_id: int):
 
 
 def get_all_antenna_serials(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None,
-                            accessible_projects: List[str] = None, project_id: Optional[str] = None):
+                            accessible_projects: List[str] = None, project_id: Optional[str] = None,
+                            paging: Optional[CursorParams] = None):
     query = db.query(RANAntennaSerials)
 
     # Filter by accessible projects if not senior admin
@@ -141,9 +74,10 @@ def get_all_antenna_serials(db: Session, skip: int = 0, limit: int = 100, search
             RANAntennaSerials.serial_number.ilike(search_pattern)
         )
 
-    total = query.count()
-    records = query.order_by(RANAntennaSerials.id).offset(skip).limit(limit).all()
-    return {"total": total, "records": records}
+    # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+    total = count_total(db, paging, query, RANAntennaSerials)
+    records = ANTENNA_SERIAL_KEYSET.paginate(query, paging, skip, limit).all()
+    return {"total": total, "records": records, "next_cursor": ANTENNA_SERIAL_KEYSET.next_cursor(records, limit)}
 
 
 def create_antenna_serial(db: Session, antenna_serial: RANAntennaSerialsCreate):
@@ -193,7 +127,7 @@ def create_ran_antenna_serial(
     """
     # Check if user has edit permission for the project (if project_id is provided)
     if antenna_serial_data.project_id:
-        if not check_antenna_serials_project_access(current_user, antenna_serial_data.project_id, db, "edit"):
+        if not check_ran_project_access(current_user, antenna_serial_data.project_id, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to create antenna serial records for this project. Contact the Senior Admin."
@@ -208,7 +142,7 @@ def create_ran_antenna_serial(
             )
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -235,7 +169,8 @@ def get_all_ran_antenna_serials(
         limit: int = Query(100, ge=1, le=500),
         search: Optional[str] = Query(None),
         project_id: Optional[str] = Query(None),
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -247,12 +182,18 @@ def get_all_ran_antenna_serials(
         limit: Maximum number of records to return
         search: Search term to filter by MRBTS, antenna model, or serial number
         project_id: Filter by specific project ID
+        paging: Keyset cursor (replaces skip) and total options
     """
     try:
-        accessible_projects = get_accessible_projects_for_antenna_serials(current_user, db)
+        accessible_projects = get_accessible_project_ids(current_user, db, "ran")
         result = get_all_antenna_serials(db=db, skip=skip, limit=limit, search=search,
-                                        accessible_projects=accessible_projects, project_id=project_id)
-        return PaginatedRANAntennaSerials(total=result["total"], records=result["records"])
+                                        accessible_projects=accessible_projects, project_id=project_id,
+                                        paging=paging)
+        return PaginatedRANAntennaSerials(
+            total=result["total"], records=result["records"], next_cursor=result.get("next_cursor")
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -263,7 +204,7 @@ def get_all_ran_antenna_serials(
 @RANAntennaSerialsRouter.get("/stats")
 def get_ran_antenna_serials_stats(
         project_id: Optional[str] = Query(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -273,7 +214,7 @@ def get_ran_antenna_serials_stats(
         project_id: Optional project ID to filter statistics
     """
     try:
-        accessible_projects = get_accessible_projects_for_antenna_serials(current_user, db)
+        accessible_projects = get_accessible_project_ids(current_user, db, "ran")
         query = db.query(RANAntennaSerials)
 
         # Filter by accessible projects if not senior admin
@@ -305,7 +246,7 @@ def get_ran_antenna_serials_stats(
 @RANAntennaSerialsRouter.get("/{antenna_serial_id}", response_model=RANAntennaSerialsOut)
 def get_ran_antenna_serial_by_id(
         antenna_serial_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -317,7 +258,7 @@ def get_ran_antenna_serial_by_id(
 
     # Check if user has view permission for the project (if project_id exists)
     if db_antenna_serial.project_id:
-        if not check_antenna_serials_project_access(current_user, db_antenna_serial.project_id, db, "view"):
+        if not check_ran_project_access(current_user, db_antenna_serial.project_id, db, "view"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to access this antenna serial record. Contact the Senior Admin."
@@ -344,7 +285,7 @@ def update_ran_antenna_serial(
 
     # Check if user has edit permission for the project (if project_id exists)
     if existing_record.project_id:
-        if not check_antenna_serials_project_access(current_user, existing_record.project_id, db, "edit"):
+        if not check_ran_project_access(current_user, existing_record.project_id, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to update this antenna serial record. Contact the Senior Admin."
@@ -355,7 +296,7 @@ def update_ran_antenna_serial(
                                                   antenna_serial_data=antenna_serial_data)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -393,7 +334,7 @@ def delete_ran_antenna_serial(
 
     # Check if user has all permission for the project (required for deletion)
     if existing_record.project_id:
-        if not check_antenna_serials_project_access(current_user, existing_record.project_id, db, "all"):
+        if not check_ran_project_access(current_user, existing_record.project_id, db, "all"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to delete this antenna serial record. Contact the Senior Admin."
@@ -409,7 +350,7 @@ def delete_ran_antenna_serial(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Antenna serial record not found")
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -431,6 +372,7 @@ def delete_ran_antenna_serial(
 
 
 @RANAntennaSerialsRouter.post("/upload-csv", response_model=dict)
+@offload(PARSE)
 def upload_antenna_serials_csv(
         request: Request,
         file: UploadFile = File(...),
@@ -444,7 +386,7 @@ def upload_antenna_serials_csv(
     The project_id parameter will be used for all records in the CSV.
     """
     # Check access for the provided project
-    if not check_antenna_serials_project_access(current_user, project_id, db, "edit"):
+    if not check_ran_project_access(current_user, project_id, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to upload CSV files for this project. Contact the Senior Admin."
@@ -477,7 +419,7 @@ def upload_antenna_serials_csv(
             db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_create",
@@ -515,7 +457,7 @@ def delete_all_ran_antenna_serials_for_project(
     - affected_tables: List of tables that had data deleted
     """
     # Check user has 'all' permission
-    if not check_antenna_serials_project_access(current_user, project_id, db, "all"):
+    if not check_ran_project_access(current_user, project_id, db, "all"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to delete RAN antenna serials for this project."
@@ -534,7 +476,7 @@ def delete_all_ran_antenna_serials_for_project(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_delete",
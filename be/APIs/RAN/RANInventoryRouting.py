@@ -6,10 +6,14 @@ import io
 import json
 import logging
 
-from APIs.Core import safe_int, get_db, get_current_user
-from utils.file_validation import validate_csv_file  # SECURITY: File upload validation
-from Models.Admin.User import UserProjectAccess, User
-from Models.Admin.AuditLog import AuditLog
+from APIs.Core import safe_int, get_db, get_read_db, get_current_user
+from utils.file_validation import validate_csv_file_sync  # SECURITY: File upload validation
+from Models.Admin.User import User
+from utils.access_control import check_ran_project_access, get_accessible_project_ids
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
+from utils.fast_json import FastJSONResponse, rows_to_dicts, schema_columns
+from utils.pagination import CursorParams, Keyset, count_total
 
 logger = logging.getLogger(__name__)
 from Schemas.RAN.RANInventorySchema import (
@@ -25,6 +29,9 @@ RANInventoryRouter = APIRouter(
     tags=["RANInventory"]
 )
 
+# Sort order of the paginated list (see utils.pagination)
+RAN_INVENTORY_KEYSET = Keyset(RANInventory.id)
+
 
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
@@ -34,80 +41,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-# --------------------------------------------------------------------------------
-# Access Control Helper Functions
-# --------------------------------------------------------------------------------
-
-def check_raninventory_project_access(current_user: User, pid_po: str, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project for RANInventory operations.
-    """
-    # Senior admin has all permissions
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ranproject_id == pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_accessible_projects_for_inventory(current_user: User, db: Session):
-    """
-    Get all project IDs that the current user has access to for inventory operations.
-    """
-    if current_user.role.name == "senior_admin":
-        return None  # Senior admin can access all projects
-
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    return [access.Ranproject_id for access in user_accesses]
-
-
 # --------------------------------------------------------------------------------
 # CRUD Methods
 # --------------------------------------------------------------------------------
@@ -117,20 +50,22 @@ def get_raninventory(db: Session, raninventory_id: int):
 
 
 def get_all_raninventory(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None,
-                         accessible_projects: List[str] = None, project_id: Optional[str] = None):
-    query = db.query(RANInventory)
+                         accessible_projects: List[str] = None, project_id: Optional[str] = None,
+                         paging: Optional[CursorParams] = None):
+    # OPTIMIZED: Select only the response columns and return plain dicts (no ORM objects)
+    query = db.query(*schema_columns(RANInventory, RANInventoryInDB))
 
     # Filter by accessible projects if not senior admin
     if accessible_projects is not None:
         if not accessible_projects:  # Empty list means no access
-            return {"total": 0, "records": []}
+            return {"total": 0, "records": [], "next_cursor": None}
         query = query.filter(RANInventory.pid_po.in_(accessible_projects))
 
     # Filter by specific project if provided
     if project_id:
         # Also check if user has access to this specific project
         if accessible_projects is not None and project_id not in accessible_projects:
-            return {"total": 0, "records": []}
+            return {"total": 0, "records": [], "next_cursor": None}
         query = query.filter(RANInventory.pid_po == project_id)
 
     if search:
@@ -144,9 +79,10 @@ def get_all_raninventory(db: Session, skip: int = 0, limit: int = 100, search: O
             RANInventory.serial_number.ilike(search_pattern)
         )
 
-    total = query.count()
-    records = query.order_by(RANInventory.id).offset(skip).limit(limit).all()
-    return {"total": total, "records": records}
+    # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+    total = count_total(db, paging, query, RANInventory)
+    records = rows_to_dicts(RAN_INVENTORY_KEYSET.paginate(query, paging, skip, limit))
+    return {"total": total, "records": records, "next_cursor": RAN_INVENTORY_KEYSET.next_cursor(records, limit)}
 
 
 def create_raninventory(db: Session, raninventory: RANInventoryCreate):
@@ -196,7 +132,7 @@ def create_ran_inventory(
     """
     # Check if user has edit permission for the project (if pid_po is provided)
     if raninventory_data.pid_po:
-        if not check_raninventory_project_access(current_user, raninventory_data.pid_po, db, "edit"):
+        if not check_ran_project_access(current_user, raninventory_data.pid_po, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to create RAN Inventory records for this project. Contact the Senior Admin."
@@ -211,7 +147,7 @@ def create_ran_inventory(
             )
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -238,7 +174,8 @@ def get_all_ran_inventory_records(
         limit: int = Query(100, ge=1, le=500),
         search: Optional[str] = Query(None),
         project_id: Optional[str] = Query(None),
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -250,12 +187,17 @@ def get_all_ran_inventory_records(
         limit: Maximum number of records to return
         search: Search term to filter by MRBTS, Site ID, Serial Number, etc.
         project_id: Filter by specific project ID (pid_po)
+        paging: Keyset cursor (replaces skip) and total options
     """
     try:
-        accessible_projects = get_accessible_projects_for_inventory(current_user, db)
+        accessible_projects = get_accessible_project_ids(current_user, db, "ran")
         result = get_all_raninventory(db=db, skip=skip, limit=limit, search=search,
-                                      accessible_projects=accessible_projects, project_id=project_id)
-        return PaginatedRANInventoryResponse(total=result["total"], records=result["records"])
+                                      accessible_projects=accessible_projects, project_id=project_id,
+                                      paging=paging)
+        # OPTIMIZED: Rows already match RANInventoryInDB; skip response_model validation
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -266,7 +208,7 @@ def get_all_ran_inventory_records(
 @RANInventoryRouter.get("/stats")
 def get_ran_inventory_stats(
         project_id: Optional[str] = Query(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -276,7 +218,7 @@ def get_ran_inventory_stats(
         project_id: Optional project ID to filter statistics
     """
     try:
-        accessible_projects = get_accessible_projects_for_inventory(current_user, db)
+        accessible_projects = get_accessible_project_ids(current_user, db, "ran")
         query = db.query(RANInventory)
 
         # Filter by accessible projects if not senior admin
@@ -308,7 +250,7 @@ def get_ran_inventory_stats(
 @RANInventoryRouter.get("/{raninventory_id}", response_model=RANInventoryInDB)
 def get_ran_inventory_by_id(
         raninventory_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -320,7 +262,7 @@ def get_ran_inventory_by_id(
 
     # Check if user has view permission for the project (if pid_po exists)
     if db_raninventory.pid_po:
-        if not check_raninventory_project_access(current_user, db_raninventory.pid_po, db, "view"):
+        if not check_ran_project_access(current_user, db_raninventory.pid_po, db, "view"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to access this RAN Inventory record. Contact the Senior Admin."
@@ -347,7 +289,7 @@ def update_ran_inventory_record(
 
     # Check if user has edit permission for the project (if pid_po exists)
     if existing_record.pid_po:
-        if not check_raninventory_project_access(current_user, existing_record.pid_po, db, "edit"):
+        if not check_ran_project_access(current_user, existing_record.pid_po, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to update this RAN Inventory record. Contact the Senior Admin."
@@ -358,7 +300,7 @@ def update_ran_inventory_record(
                                               raninventory_data=raninventory_data)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -396,7 +338,7 @@ def delete_ran_inventory_record(
 
     # Check if user has all permission for the project (required for deletion)
     if existing_record.pid_po:
-        if not check_raninventory_project_access(current_user, existing_record.pid_po, db, "all"):
+        if not check_ran_project_access(current_user, existing_record.pid_po, db, "all"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to delete this RAN Inventory record. Contact the Senior Admin."
@@ -412,7 +354,7 @@ def delete_ran_inventory_record(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RAN Inventory record not found")
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -434,7 +376,8 @@ def delete_ran_inventory_record(
 
 
 @RANInventoryRouter.post("/upload-csv", response_model=dict)
-async def upload_ran_inventory_csv(
+@offload(PARSE)
+def upload_ran_inventory_csv(
         request: Request,
         file: UploadFile = File(...),
         pid_po: str = Form(...),
@@ -448,17 +391,17 @@ async def upload_ran_inventory_csv(
     OPTIMIZED: Uses bulk insert operations for better performance.
     """
     # Check access for the provided project
-    if not check_raninventory_project_access(current_user, pid_po, db, "edit"):
+    if not check_ran_project_access(current_user, pid_po, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to upload CSV files for this project. Contact the Senior Admin."
         )
 
     # SECURITY: Validate file size and type
-    await validate_csv_file(file, max_size=50 * 1024 * 1024)  # 50 MB limit
+    validate_csv_file_sync(file, max_size=50 * 1024 * 1024)  # 50 MB limit
 
     try:
-        contents = await file.read()
+        contents = file.file.read()
         csv_reader = csv.DictReader(io.StringIO(contents.decode('utf-8')))
 
         # OPTIMIZED: Build list of dictionaries for bulk insert
@@ -491,7 +434,7 @@ async def upload_ran_inventory_csv(
             db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="upload_csv",
@@ -529,7 +472,7 @@ def delete_all_ran_inventory_for_project(
     - affected_tables: List of tables that had data deleted
     """
     # Check user has 'all' permission
-    if not check_raninventory_project_access(current_user, pid_po, db, "all"):
+    if not check_ran_project_access(current_user, pid_po, db, "all"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to delete RAN inventory for this project."
@@ -548,7 +491,7 @@ def delete_all_ran_inventory_for_project(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete_all",
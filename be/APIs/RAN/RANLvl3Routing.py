@@ -6,9 +6,11 @@ import io
 import json
 import logging
 
-from APIs.Core import safe_int, get_db, get_current_user
-from Models.Admin.User import UserProjectAccess, User
-from Models.Admin.AuditLog import AuditLog
+from APIs.Core import safe_int, get_db, get_read_db, get_current_user
+from Models.Admin.User import User
+from utils.access_control import check_ran_project_access, get_accessible_project_ids
+from utils.blocking import offload, PARSE
+from utils.audit_log import create_audit_log
 
 logger = logging.getLogger(__name__)
 from Schemas.RAN.RANLvl3Schema import (
@@ -35,80 +37,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-# --------------------------------------------------------------------------------
-# Access Control Helper Functions
-# --------------------------------------------------------------------------------
-
-def check_ranlvl3_project_access(current_user: User, project_id: str, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project for RANLvl3 operations.
-    """
-    # Senior admin has all permissions
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ranproject_id == project_id
-    ).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_accessible_projects_for_user(current_user: User, db: Session):
-    """
-    Get all project IDs that the current user has access to.
-    """
-    if current_user.role.name == "senior_admin":
-        return None  # Senior admin can access all projects
-
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    return [access.Ranproject_id for access in user_accesses]
-
-
 # --------------------------------------------------------------------------------
 # CRUD Methods (Refactored from ranlvl3.py)
 # --------------------------------------------------------------------------------
@@ -253,7 +181,7 @@ def update_ran_lvl3_item(
         )
 
     # Check if user has edit permission for the project
-    if not check_ranlvl3_project_access(current_user, parent_record.project_id, db, "edit"):
+    if not check_ran_project_access(current_user, parent_record.project_id, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to edit items in this project. Contact the Senior Admin."
@@ -317,7 +245,7 @@ def delete_ran_lvl3_item(
         )
 
     # Check if user has all permission for the project (required for deletion)
-    if not check_ranlvl3_project_access(current_user, parent_record.project_id, db, "all"):
+    if not check_ran_project_access(current_user, parent_record.project_id, db, "all"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to delete items in this project. Contact the Senior Admin."
@@ -372,7 +300,7 @@ def create_ran_lvl3(
     Create a new RAN Level 3 record with its child items.
     """
     # Check if user has edit permission for the project
-    if not check_ranlvl3_project_access(current_user, ranlvl3_data.project_id, db, "edit"):
+    if not check_ran_project_access(current_user, ranlvl3_data.project_id, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to create RAN Level 3 records in this project. Contact the Senior Admin."
@@ -387,7 +315,7 @@ def create_ran_lvl3(
             )
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -414,7 +342,7 @@ def get_all_ran_lvl3(
         limit: int = Query(100, ge=1, le=500),
         search: Optional[str] = Query(None),
         project_id: Optional[str] = Query(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -428,7 +356,7 @@ def get_all_ran_lvl3(
         project_id: Filter by specific project ID
     """
     try:
-        accessible_projects = get_accessible_projects_for_user(current_user, db)
+        accessible_projects = get_accessible_project_ids(current_user, db, "ran")
         result = get_all_ranlvl3(db=db, skip=skip, limit=limit, search=search,
                                  accessible_projects=accessible_projects, project_id=project_id)
         return PaginatedRANLvl3Response(total=result["total"], records=result["records"])
@@ -442,7 +370,7 @@ def get_all_ran_lvl3(
 @RANLvl3Router.get("/{ranlvl3_id}", response_model=RANLvl3InDB)
 def get_ran_lvl3_by_id(
         ranlvl3_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -453,7 +381,7 @@ def get_ran_lvl3_by_id(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RAN Level 3 record not found")
 
     # Check if user has view permission for the project
-    if not check_ranlvl3_project_access(current_user, db_ranlvl3.project_id, db, "view"):
+    if not check_ran_project_access(current_user, db_ranlvl3.project_id, db, "view"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to access this RAN Level 3 record. Contact the Senior Admin."
@@ -479,7 +407,7 @@ def update_ran_lvl3(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RAN Level 3 record not found")
 
     # Check if user has edit permission for the EXISTING project
-    if not check_ranlvl3_project_access(current_user, existing_record.project_id, db, "edit"):
+    if not check_ran_project_access(current_user, existing_record.project_id, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to update this RAN Level 3 record. Contact the Senior Admin."
@@ -487,7 +415,7 @@ def update_ran_lvl3(
 
     # If project_id is being changed, check permission for the NEW project too
     if ranlvl3_data.project_id != existing_record.project_id:
-        if not check_ranlvl3_project_access(current_user, ranlvl3_data.project_id, db, "edit"):
+        if not check_ran_project_access(current_user, ranlvl3_data.project_id, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to move this record to the new project. Contact the Senior Admin."
@@ -497,7 +425,7 @@ def update_ran_lvl3(
         db_ranlvl3 = update_ranlvl3(db=db, ranlvl3_id=ranlvl3_id, ranlvl3_data=ranlvl3_data)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -534,7 +462,7 @@ def delete_ran_lvl3(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RAN Level 3 record not found")
 
     # Check if user has all permission for the project (required for deletion)
-    if not check_ranlvl3_project_access(current_user, existing_record.project_id, db, "all"):
+    if not check_ran_project_access(current_user, existing_record.project_id, db, "all"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to delete this RAN Level 3 record. Contact the Senior Admin."
@@ -550,7 +478,7 @@ def delete_ran_lvl3(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="RAN Level 3 record not found")
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -572,6 +500,7 @@ def delete_ran_lvl3(
 
 
 @RANLvl3Router.post("/{ranlvl3_id}/items/upload-csv", response_model=dict)
+@offload(PARSE)
 def upload_items_csv_to_ranlvl3(
         ranlvl3_id: int,
         file: UploadFile,
@@ -588,7 +517,7 @@ def upload_items_csv_to_ranlvl3(
         raise HTTPException(status_code=404, detail="RANLvl3 record not found")
 
     # Check if user has edit permission for the project
-    if not check_ranlvl3_project_access(current_user, ranlvl3.project_id, db, "edit"):
+    if not check_ran_project_access(current_user, ranlvl3.project_id, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to upload CSV files for this project. Contact the Senior Admin."
@@ -1,19 +1,22 @@
-from typing import List
 import json
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
-from APIs.Core import get_db, get_current_user
+from APIs.Core import get_db, get_read_db, get_current_user
 from Models.Admin.User import UserProjectAccess, User
-from Models.Admin.AuditLog import AuditLog
+from utils.access_control import (
+    check_ran_project_access,
+    get_accessible_projects,
+    get_access_matrix,
+    invalidate_access_matrix,
+)
+from utils.audit_log import create_audit_log
 
 logger = logging.getLogger(__name__)
-from Models.RAN import RANProject
 from Models.RAN.RANProject import RanProject
-from Schemas.RAN.RANProjectSchema import CreateRANProject, UpdateRANProject, RANProjectOUT, UpdatePOSchema, UpdatePOResponse
+from Schemas.RAN.RANProjectSchema import CreateRANProject, UpdateRANProject, UpdatePOSchema, UpdatePOResponse
 from Models.RAN.RANInventory import RANInventory
 from Models.RAN.RANAntennaSerials import RANAntennaSerials
 from Models.RAN.RANLvl3 import RANLvl3
@@ -30,106 +33,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-def check_ran_project_access(current_user: User, project: RANProject, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a RAN project with required permission level.
-
-    Args:
-        current_user: The current user
-        project: The RAN project to check access for
-        db: Database session
-        required_permission: Required permission level ("view", "edit", "all")
-
-    Returns:
-        bool: True if user has access, False otherwise
-    """
-    # Senior admin has all permissions to all projects
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # Admin has all permissions but only to projects they have access to
-    # Check UserProjectAccess for both admin and other roles
-    access = db.query(UserProjectAccess).filter(and_(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ranproject_id == project.pid_po
-    )).first()
-
-    if not access:
-        return False
-
-    # Admin with any access level gets full permissions (same as senior_admin) for their projects
-    if current_user.role.name == "admin":
-        return True
-
-    # For non-admin users, check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_user_accessible_ran_projects(current_user: User, db: Session) -> List[RANProjectOUT]:
-    """
-    Get all RAN projects that the current user has access to.
-
-    Args:
-        current_user: The current user
-        db: Database session
-
-    Returns:
-        List[RANProject]: List of accessible RAN projects
-    """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(RanProject).all()
-
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    if not user_accesses:
-        return []
-
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.Ranproject_id for access in user_accesses]
-
-    # Return projects that match those IDs
-    return db.query(RanProject).filter(RanProject.pid_po.in_(accessible_project_ids)).all()
-
-
 @RANProjectRoute.post("", response_model=CreateRANProject)
 def add_ran_project(
         project_data: CreateRANProject,
@@ -164,7 +67,7 @@ def add_ran_project(
         db.refresh(new_project_db)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -190,7 +93,7 @@ def get_ran_projects(
         skip: int = 0,
         limit: int = 10,
         search: str = "",
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -205,7 +108,7 @@ def get_ran_projects(
         search: Search term to filter by project name, pid, or po
     """
     try:
-        accessible_projects = get_user_accessible_ran_projects(current_user, db)
+        accessible_projects = get_accessible_projects(current_user, db, "ran")
 
         # Apply search filter if provided
         if search.strip():
@@ -237,7 +140,7 @@ def get_ran_projects(
 @RANProjectRoute.get("/{pid_po}")
 def get_ran_project(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -249,7 +152,7 @@ def get_ran_project(
         raise HTTPException(status_code=404, detail="RAN Project not found")
 
     # Check if user has access to this project
-    if not check_ran_project_access(current_user, project, db, "view"):
+    if not check_ran_project_access(current_user, project, db, "view", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to access this RAN project. Contact the Senior Admin."
@@ -276,7 +179,7 @@ def update_ran_project(
         raise HTTPException(status_code=404, detail="RAN Project not found")
 
     # Check if user has edit permission
-    if not check_ran_project_access(current_user, project, db, "edit"):
+    if not check_ran_project_access(current_user, project, db, "edit", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to update this RAN project. Contact the Senior Admin."
@@ -291,7 +194,7 @@ def update_ran_project(
         db.refresh(project)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -329,7 +232,7 @@ def delete_ran_project(
         raise HTTPException(status_code=404, detail="RAN Project not found")
 
     # Check if user has "all" permission (required for deletion)
-    if not check_ran_project_access(current_user, project, db, "all"):
+    if not check_ran_project_access(current_user, project, db, "all", admin_full_access=True):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to delete this RAN project. Contact the Senior Admin."
@@ -344,7 +247,7 @@ def delete_ran_project(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -368,7 +271,7 @@ def delete_ran_project(
 @RANProjectRoute.get("/check-permission/{pid_po}")
 def check_user_ran_project_permission(
         pid_po: str,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -391,12 +294,9 @@ def check_user_ran_project_permission(
         }
 
     # Check access for other users
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ranproject_id == project.pid_po
-    ).first()
+    permission_level = get_access_matrix(current_user, db).permission_level("ran", project.pid_po)
 
-    if not access:
+    if not permission_level:
         return {
             "project_id": pid_po,
             "permission_level": "none",
@@ -408,13 +308,13 @@ def check_user_ran_project_permission(
 
     # Determine capabilities based on permission level and role
     can_edit = (current_user.role.name == "admin" and
-                access.permission_level in ["edit", "all"])
+                permission_level in ["edit", "all"])
     can_delete = (current_user.role.name == "admin" and
-                  access.permission_level == "all")
+                  permission_level == "all")
 
     return {
         "project_id": pid_po,
-        "permission_level": access.permission_level,
+        "permission_level": permission_level,
         "can_view": True,
         "can_edit": can_edit,
         "can_delete": can_delete,
@@ -536,11 +436,14 @@ def update_project_purchase_order(
         db.commit()
         db.refresh(new_project)
 
+        # Access rows now point at the new PO
+        invalidate_access_matrix()
+
         # Calculate total records updated
         total_records_updated = sum(affected_tables.values())
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update_po",
@@ -2,7 +2,7 @@ import csv
 import os
 import logging
 from io import StringIO
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, status, Form, Body, Request
 from sqlalchemy.orm import Session
@@ -12,7 +12,6 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import joinedload
 
 logger = logging.getLogger(__name__)
-from Models.Admin.AuditLog import AuditLog
 
 # Import PAC generator utility
 from utils.pac_generator import create_boq_zip_package
@@ -20,13 +19,21 @@ from utils.pac_generator import create_boq_zip_package
 from Models.RAN.RANInventory import RANInventory
 from Models.RAN.RANLvl3 import RANLvl3
 from Models.RAN.RANAntennaSerials import RANAntennaSerials
-from Models.Admin.User import UserProjectAccess, User
-from APIs.Core import safe_int, get_db, get_current_user
+from Models.Admin.User import User
+from utils.access_control import check_ran_project_access, get_accessible_project_ids
+from APIs.Core import safe_int, get_db, get_read_db, get_current_user
+from utils.blocking import offload, PARSE, RENDER
+from utils.jobs import job_handler, job_queue, job_accepted, JobContext, JobResult, EXPORT
+from utils.audit_log import create_audit_log
+from utils.pagination import CursorParams, Keyset, count_total
 from Models.RAN.RAN_LLD import RAN_LLD
 from Schemas.RAN.RAN_LLDSchema import RANSiteCreate, RANSiteOut, RANSiteUpdate, PaginatedRANSites
 
 ran_lld_router = APIRouter(prefix="/ran-sites", tags=["RAN Sites"])
 
+# Sort order of the paginated list (see utils.pagination)
+RAN_SITE_KEYSET = Keyset(RAN_LLD.id)
+
 
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
@@ -36,80 +43,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def create_audit_log_sync(
-    db: Session,
-    user_id: int,
-    action: str,
-    resource_type: str,
-    resource_id: str = None,
-    resource_name: str = None,
-    details: str = None,
-    ip_address: str = None,
-    user_agent: str = None
-):
-    """Create an audit log entry (synchronous version)."""
-    try:
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            resource_name=resource_name,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-
-
-# --------------------------------------------------------------------------------
-# Access Control Helper Functions
-# --------------------------------------------------------------------------------
-
-def check_ranlld_project_access(current_user: User, pid_po: str, db: Session, required_permission: str = "view"):
-    """
-    Helper function to check if user has access to a project for RAN LLD operations.
-    """
-    # Senior admin has all permissions
-    if current_user.role.name == "senior_admin":
-        return True
-
-    # For other roles, check UserProjectAccess
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.Ranproject_id == pid_po
-    ).first()
-
-    if not access:
-        return False
-
-    # Check permission levels
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
-
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
-
-
-def get_accessible_projects_for_lld(current_user: User, db: Session):
-    """
-    Get all project IDs that the current user has access to for RAN LLD operations.
-    """
-    if current_user.role.name == "senior_admin":
-        return None  # Senior admin can access all projects
-
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    return [access.Ranproject_id for access in user_accesses]
-
-
 def get_service_type_name(service_types):
     """Helper function to convert service type codes to names."""
     if not service_types:
@@ -134,7 +67,7 @@ def create_ran_site(
     """
     # Check if user has edit permission for the project (if pid_po is provided)
     if site.pid_po:
-        if not check_ranlld_project_access(current_user, site.pid_po, db, "edit"):
+        if not check_ran_project_access(current_user, site.pid_po, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to create RAN Site records for this project. Contact the Senior Admin."
@@ -147,7 +80,7 @@ def create_ran_site(
         db.refresh(db_site)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="create",
@@ -174,7 +107,8 @@ def get_ran_sites(
         limit: int = Query(50, ge=1, le=500),
         search: str = Query(None),
         project_id: str = Query(None),
-        db: Session = Depends(get_db),
+        paging: CursorParams = Depends(),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -185,12 +119,13 @@ def get_ran_sites(
         limit: Maximum number of records to return
         search: Search term to filter by site_id or technical_boq
         project_id: Filter by specific project ID (pid_po)
+        paging: Keyset cursor (replaces skip) and total options
     """
     try:
         query = db.query(RAN_LLD)
 
         # Filter by accessible projects if not senior admin
-        accessible_projects = get_accessible_projects_for_lld(current_user, db)
+        accessible_projects = get_accessible_project_ids(current_user, db, "ran")
         if accessible_projects is not None:
             if not accessible_projects:  # Empty list means no access
                 return {"records": [], "total": 0}
@@ -210,10 +145,13 @@ def get_ran_sites(
                 RAN_LLD.technical_boq.ilike(f"%{search}%")
             )
 
-        total = query.count()
-        sites = query.order_by(RAN_LLD.id).offset(skip).limit(limit).all()
+        # OPTIMIZED: keyset cursor instead of OFFSET, count only when asked for
+        total = count_total(db, paging, query, RAN_LLD)
+        sites = RAN_SITE_KEYSET.paginate(query, paging, skip, limit).all()
 
-        return {"records": sites, "total": total}
+        return {"records": sites, "total": total, "next_cursor": RAN_SITE_KEYSET.next_cursor(sites, limit)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -224,7 +162,7 @@ def get_ran_sites(
 @ran_lld_router.get("/{site_id}", response_model=RANSiteOut)
 def get_ran_site(
         site_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -236,7 +174,7 @@ def get_ran_site(
 
     # Check if user has view permission for the project (if pid_po exists)
     if site.pid_po:
-        if not check_ranlld_project_access(current_user, site.pid_po, db, "view"):
+        if not check_ran_project_access(current_user, site.pid_po, db, "view"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to access this RAN Site record. Contact the Senior Admin."
@@ -263,7 +201,7 @@ def update_ran_site(
 
     # Check if user has edit permission for the project (if pid_po exists)
     if db_site.pid_po:
-        if not check_ranlld_project_access(current_user, db_site.pid_po, db, "edit"):
+        if not check_ran_project_access(current_user, db_site.pid_po, db, "edit"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to update this RAN Site record. Contact the Senior Admin."
@@ -277,7 +215,7 @@ def update_ran_site(
         db.refresh(db_site)
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="update",
@@ -315,7 +253,7 @@ def delete_ran_site(
 
     # Check if user has all permission for the project (required for deletion)
     if db_site.pid_po:
-        if not check_ranlld_project_access(current_user, db_site.pid_po, db, "all"):
+        if not check_ran_project_access(current_user, db_site.pid_po, db, "all"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to delete this RAN Site record. Contact the Senior Admin."
@@ -330,7 +268,7 @@ def delete_ran_site(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="delete",
@@ -352,6 +290,7 @@ def delete_ran_site(
 
 
 @ran_lld_router.post("/upload-csv")
+@offload(PARSE)
 def upload_csv(
         request: Request,
         file: UploadFile = File(...),
@@ -364,7 +303,7 @@ def upload_csv(
     The pid_po parameter will be used for all records in the CSV.
     """
     # Check access for the provided project
-    if not check_ranlld_project_access(current_user, pid_po, db, "edit"):
+    if not check_ran_project_access(current_user, pid_po, db, "edit"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to upload CSV files for this project. Contact the Senior Admin."
@@ -400,7 +339,7 @@ def upload_csv(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_create",
@@ -473,7 +412,8 @@ def _find_matching_serial(child, inventory_pool, used_serials):
 # ✅ Generate BoQ CSV from a RAN Site's key (UPDATED LOGIC)
 # SECURITY: Added authentication requirement
 @ran_lld_router.get("/{site_id}/generate-boq")
-def generate_ran_boq(site_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@offload(RENDER)
+def generate_ran_boq(site_id: int, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     # 1. Fetch the specific RAN Site
 
     site = db.query(RAN_LLD).filter(RAN_LLD.id == site_id).first()
@@ -671,10 +611,99 @@ def generate_ran_boq(site_id: int, db: Session = Depends(get_db), current_user:
     return csv_content
 
 
+def build_ran_boq_zip(db: Session, current_user: User, payload: Dict[str, Any]) -> Tuple[Any, str]:
+    """
+    Build the RAN BOQ ZIP (CSV + PAC Word document) for one site.
+
+    Args:
+        db: Database session
+        current_user: User whose project access applies
+        payload: csv_content and site_id (see download_ran_boq_zip)
+
+    Returns:
+        (ZIP file buffer, filename)
+    """
+    csv_content = payload.get("csv_content")
+    site_db_id = payload.get("site_id")
+
+    if not csv_content:
+        raise HTTPException(status_code=400, detail="csv_content is required")
+    if not site_db_id:
+        raise HTTPException(status_code=400, detail="site_id is required")
+
+    # 1. Get site info
+    site = db.query(RAN_LLD).filter(RAN_LLD.id == site_db_id).first()
+    if not site:
+        raise HTTPException(status_code=404, detail="Site not found")
+
+    # 2. Get project info
+    from Models.RAN.RANProject import RanProject
+    project = db.query(RanProject).filter(RanProject.pid_po == site.pid_po).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # 3. Check access
+    if not check_ran_project_access(current_user, site.pid_po, db, "view"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to download BOQ for this project."
+        )
+
+    # 4. Get template path
+    template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "PAC_Template.docx")
+
+    # 4.5. Extract model name and PO line number from "Implementation services" row
+    model_name = "Implementation services - New Site"  # Default fallback
+    po_line_number_str = "1"  # Default fallback
+
+    try:
+        csv_reader = csv.DictReader(StringIO(csv_content))
+
+        for row in csv_reader:
+            # Look for row with "Implementation services" in Model Name column
+            # Try both possible header formats (with and without space after "Name")
+            model_col = row.get('Model Name / Description', '').strip()
+            if not model_col:
+                model_col = row.get('Model Name/Description', '').strip()
+
+            if 'Implementation services' in model_col:
+                model_name = model_col
+                po_line = row.get('PO Line -L1', '').strip()
+                if po_line:
+                    po_line_number_str = po_line
+                break
+    except Exception:
+        # Use default values if extraction fails
+        pass
+
+    # 5. Generate ZIP package
+    zip_buffer = create_boq_zip_package(
+        csv_content=csv_content,
+        site_id=site.site_id,
+        project_name=project.project_name,
+        project_po=project.pid_po,
+        link_id=site.site_id,  # Use site_id as link_id for certificate number
+        template_path=template_path,
+        csv_filename=f"RAN_BOQ_{site.site_id}.csv",
+        po_line_number=po_line_number_str,
+        model_name=model_name
+    )
+    return zip_buffer, f"RAN_BOQ_{site.site_id}.zip"
+
+
+@job_handler("ran.download_boq_zip", queue=EXPORT)
+def run_ran_boq_zip(ctx: JobContext, payload: Dict[str, Any]):
+    """Job: RAN BOQ ZIP for POST /ran-sites/download-zip?background=true."""
+    zip_buffer, filename = build_ran_boq_zip(ctx.db, ctx.user, payload)
+    return JobResult.from_buffer(zip_buffer, filename, "application/zip")
+
+
 @ran_lld_router.post("/download-zip")
+@offload(RENDER)
 def download_ran_boq_zip(
         payload: Dict[str, Any] = Body(...),
-        db: Session = Depends(get_db),
+        background: bool = Query(False, description="Return a job id (202) instead of the file"),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -683,83 +712,22 @@ def download_ran_boq_zip(
     Expected payload:
     - csv_content: The CSV content (potentially edited by user)
     - site_id: The RAN site ID (database ID, not site_id field)
-    """
-    try:
-        csv_content = payload.get("csv_content")
-        site_db_id = payload.get("site_id")
-
-        if not csv_content:
-            raise HTTPException(status_code=400, detail="csv_content is required")
-        if not site_db_id:
-            raise HTTPException(status_code=400, detail="site_id is required")
-
-        # 1. Get site info
-        site = db.query(RAN_LLD).filter(RAN_LLD.id == site_db_id).first()
-        if not site:
-            raise HTTPException(status_code=404, detail="Site not found")
 
-        # 2. Get project info
-        from Models.RAN.RANProject import RanProject
-        project = db.query(RanProject).filter(RanProject.pid_po == site.pid_po).first()
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        # 3. Check access
-        if not check_ranlld_project_access(current_user, site.pid_po, db, "view"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You are not authorized to download BOQ for this project."
-            )
-
-        # 4. Get template path
-        template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "PAC_Template.docx")
-
-        # 4.5. Extract model name and PO line number from "Implementation services" row
-        model_name = "Implementation services - New Site"  # Default fallback
-        po_line_number_str = "1"  # Default fallback
-
-        try:
-            import csv
-            from io import StringIO
-
-            csv_reader = csv.DictReader(StringIO(csv_content))
-
-            for row in csv_reader:
-                # Look for row with "Implementation services" in Model Name column
-                # Try both possible header formats (with and without space after "Name")
-                model_col = row.get('Model Name / Description', '').strip()
-                if not model_col:
-                    model_col = row.get('Model Name/Description', '').strip()
-
-                if 'Implementation services' in model_col:
-                    model_name = model_col
-                    po_line = row.get('PO Line -L1', '').strip()
-                    if po_line:
-                        po_line_number_str = po_line
-                    break
-        except Exception:
-            # Use default values if extraction fails
-            pass
+    With background=true the ZIP is built on the job queue; poll /jobs/{job_id} for it.
+    """
+    if background:
+        job = job_queue.submit("ran.download_boq_zip", {"payload": payload}, user_id=current_user.id)
+        return job_accepted(job)
 
-        # 5. Generate ZIP package
-        zip_buffer = create_boq_zip_package(
-            csv_content=csv_content,
-            site_id=site.site_id,
-            project_name=project.project_name,
-            project_po=project.pid_po,
-            link_id=site.site_id,  # Use site_id as link_id for certificate number
-            template_path=template_path,
-            csv_filename=f"RAN_BOQ_{site.site_id}.csv",
-            po_line_number=po_line_number_str,
-            model_name=model_name
-        )
+    try:
+        zip_buffer, filename = build_ran_boq_zip(db, current_user, payload)
 
-        # 6. Return ZIP file as download
+        # Return ZIP file as download
         return StreamingResponse(
             zip_buffer,
             media_type="application/zip",
             headers={
-                "Content-Disposition": f"attachment; filename=RAN_BOQ_{site.site_id}.zip"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     except HTTPException:
@@ -784,7 +752,7 @@ def delete_all_ran_sites_for_project(
     - affected_tables: List of tables that had data deleted
     """
     # Check user has 'all' permission
-    if not check_ranlld_project_access(current_user, pid_po, db, "all"):
+    if not check_ran_project_access(current_user, pid_po, db, "all"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to delete RAN sites for this project."
@@ -803,7 +771,7 @@ def delete_all_ran_sites_for_project(
         db.commit()
 
         # Create audit log
-        create_audit_log_sync(
+        create_audit_log(
             db=db,
             user_id=current_user.id,
             action="bulk_delete",
@@ -0,0 +1,81 @@
+"""
+Background Job Model
+
+This module defines the Job model backing the durable job queue (utils.jobs).
+Long operations (bulk Excel/ZIP exports, document processing) are stored as
+rows here, claimed by worker threads and report their progress and result
+through the row, so they survive restarts and can be polled via /jobs/{id}.
+
+Lifecycle:
+    queued -> running -> succeeded | failed | cancelled
+    A failed attempt with retries left goes back to queued with run_after set
+    to the retry time; a running job whose worker stopped heartbeating is
+    requeued the same way.
+
+Attributes:
+    id (str): Job id (uuid4), returned to the client
+    kind (str): Registered handler name (e.g. "od_boq.bulk_boq_excel")
+    queue (str): Worker pool that runs the job ("export", "import", "ai")
+    status (str): queued, running, succeeded, failed or cancelled
+    params (str): JSON encoded handler arguments
+    user_id (int): User who submitted the job (its permissions apply)
+    progress_done / progress_total (int): Units of work done / expected
+    message (str): Last progress message or error summary
+    attempts / max_attempts (int): Executions started / allowed
+    run_after (datetime): Earliest time a worker may claim the job
+    heartbeat_at (datetime): Last sign of life from the running worker
+    worker (str): Worker that claimed the job (host:pid)
+    cancel_requested (bool): Set by DELETE /jobs/{id}; checked at progress updates
+    result_path / result_name / result_media_type: Downloadable result file
+    result_data (str): JSON result for jobs without a file
+    error (str): Final error of a failed job
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
+from Database.session import Base
+
+
+class Job(Base):
+    """Background Job Model - one queued, running or finished background job."""
+    __tablename__ = 'jobs'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(String(100), nullable=False)
+    queue = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default='queued')
+    params = Column(Text, nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=True, index=True)
+
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    message = Column(String(500), nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    run_after = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    heartbeat_at = Column(DateTime, nullable=True)
+    worker = Column(String(100), nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+
+    result_path = Column(String(500), nullable=True)
+    result_name = Column(String(255), nullable=True)
+    result_media_type = Column(String(100), nullable=True)
+    result_data = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True, index=True)
+
+    __table_args__ = (
+        # Claim query: next queued jobs of a queue that are due
+        Index('ix_jobs_claim', 'queue', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
@@ -8,22 +8,26 @@ providing a better user experience while maintaining security.
 Security Features:
 - Longer expiration (7 days) compared to access tokens (30 minutes)
 - Stored in database for validation and revocation
-- Automatic cleanup of expired tokens
+- Automatic cleanup of expired and revoked tokens (utils.auth_cache)
+- Stored and looked up by a fixed-length token digest; the token itself is
+  never stored
 - One refresh token per user (revokes old token on new login)
 
 Attributes:
     id (int): Primary key, auto-incrementing
     user_id (int): Foreign key to User model
-    token (str): The actual refresh token JWT string
+    token_digest (str): SHA-256 hex digest of the refresh token JWT
     expires_at (datetime): When this refresh token expires
     created_at (datetime): When this token was created
     revoked (bool): Whether this token has been manually revoked
 
 Usage:
+    from utils.auth_cache import token_digest
+
     # Create new refresh token on login
     refresh_token = RefreshToken(
         user_id=user.id,
-        token=encoded_jwt,
+        token_digest=token_digest(encoded_jwt),
         expires_at=datetime.utcnow() + timedelta(days=7)
     )
     db.add(refresh_token)
@@ -31,7 +35,7 @@ Usage:
 
     # Validate refresh token
     token_record = db.query(RefreshToken).filter(
-        RefreshToken.token == token,
+        RefreshToken.token_digest == token_digest(token),
         RefreshToken.revoked == False,
         RefreshToken.expires_at > datetime.utcnow()
     ).first()
@@ -41,7 +45,7 @@ Created: 2025-12-17
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
 from sqlalchemy.orm import relationship
 from Database.session import Base
 
@@ -57,7 +61,7 @@ class RefreshToken(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    token = Column(String(500), unique=True, nullable=False, index=True)
+    token_digest = Column(String(64), unique=True, nullable=False, index=True)
     expires_at = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     revoked = Column(Boolean, default=False, nullable=False)
@@ -65,11 +69,6 @@ class RefreshToken(Base):
     # Relationship to User model
     user = relationship("User", back_populates="refresh_tokens")
 
-    # Composite index for common query pattern
-    __table_args__ = (
-        Index('idx_refresh_token_lookup', 'token', 'revoked', 'expires_at'),
-    )
-
     def is_valid(self) -> bool:
         """
         Check if this refresh token is valid.
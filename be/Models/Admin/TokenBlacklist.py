@@ -9,18 +9,21 @@ Security Features:
 - Prevents token reuse after logout
 - Server-side token invalidation
 - Automatic cleanup of expired blacklisted tokens
-- Fast lookup with indexed token field
+- Fast lookup by a fixed-length token digest (unique index); the token
+  itself is never stored
 
 Attributes:
     id (int): Primary key, auto-incrementing
-    token (str): The blacklisted JWT access token
+    token_digest (str): SHA-256 hex digest of the blacklisted JWT access token
     blacklisted_at (datetime): When this token was blacklisted
     expires_at (datetime): When this token naturally expires (for cleanup)
 
 Usage:
+    from utils.auth_cache import token_digest
+
     # Blacklist token on logout
     blacklisted_token = TokenBlacklist(
-        token=access_token,
+        token_digest=token_digest(access_token),
         blacklisted_at=datetime.utcnow(),
         expires_at=token_expiry_from_payload
     )
@@ -29,13 +32,10 @@ Usage:
 
     # Check if token is blacklisted
     is_blacklisted = db.query(TokenBlacklist).filter(
-        TokenBlacklist.token == token
+        TokenBlacklist.token_digest == token_digest(token)
     ).first() is not None
 
-    # Cleanup expired tokens (run periodically)
-    db.query(TokenBlacklist).filter(
-        TokenBlacklist.expires_at < datetime.utcnow()
-    ).delete()
+    # Expired rows are purged periodically by utils.auth_cache
 
 Author: Security Hardening Initiative
 Created: 2025-12-17
@@ -56,7 +56,7 @@ class TokenBlacklist(Base):
     __tablename__ = 'token_blacklist'
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String(500), unique=True, nullable=False, index=True)
+    token_digest = Column(String(64), unique=True, nullable=False, index=True)
     blacklisted_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     expires_at = Column(DateTime, nullable=False, index=True)
 
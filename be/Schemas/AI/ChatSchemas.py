@@ -64,6 +64,7 @@ class DocumentResponse(BaseModel):
     tags: List[str] = Field(default_factory=list)
     summary: Optional[str] = None
     upload_date: datetime
+    job_id: Optional[str] = None  # Background processing job (GET /jobs/{job_id})
 
 
 class DocumentSearch(BaseModel):
@@ -0,0 +1,25 @@
+# Schemas/Admin/JobSchema.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any
+
+
+class JobResponse(BaseModel):
+    """Status of a background job (see utils.jobs)."""
+    id: str
+    kind: str
+    status: str
+    progress_done: int
+    progress_total: Optional[int] = None
+    message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result_name: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
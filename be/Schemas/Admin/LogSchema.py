@@ -45,6 +45,7 @@ class AuditLogResponse(BaseModel):
 class PaginatedAuditLogResponse(BaseModel):
     """Paginated response for audit logs with total count."""
     records: List[AuditLogResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
@@ -28,7 +28,8 @@ class SiteOut(BaseModel):
 
 class SitesResponse(BaseModel):
     records: List[SiteOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class UploadResponse(BaseModel):
@@ -68,6 +69,7 @@ class InventoryOut(CreateInventory):
 
 class InventoryPagination(BaseModel):
     records: List[InventoryOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
     class Config:
         orm_mode = True
\ No newline at end of file
@@ -127,9 +127,10 @@ class PriceBookResponse(BaseModel):
 
 class PriceBookListResponse(BaseModel):
     items: List[PriceBookResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class PriceBookBulkUpload(BaseModel):
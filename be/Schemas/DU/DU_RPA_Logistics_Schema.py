@@ -216,7 +216,8 @@ class DURPADescriptionPagination(BaseModel):
 class DURPAInvoicePagination(BaseModel):
     """Schema for paginated DU RPA Invoice responses."""
     records: List[DURPAInvoiceOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -224,13 +224,15 @@ class ProductWithQuantity(BaseModel):
 class ODBOQSitePagination(BaseModel):
     """Pagination response for sites."""
     records: List[ODBOQSiteOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ODBOQProductPagination(BaseModel):
     """Pagination response for products."""
     records: List[ODBOQProductOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # ===========================
@@ -269,9 +271,59 @@ class UploadResponse(BaseModel):
     site_products_inserted: int = 0
     site_products_updated: int = 0
     skipped: int = 0
+    # Matched rows whose content was already up to date (not rewritten in delta mode)
+    sites_unchanged: int = 0
+    products_unchanged: int = 0
+    site_products_unchanged: int = 0
     message: str
 
 
+class UploadPreviewQuantity(BaseModel):
+    """One quantity an upload would add or change."""
+    product_code: Optional[str] = None
+    description: Optional[str] = None
+    line_number: Optional[str] = None
+    old: Optional[float] = None
+    new: Optional[float] = None
+
+
+class UploadPreviewSite(BaseModel):
+    """A site an upload would add or change, or a project site missing from the file."""
+    site_id: str
+    subscope: Optional[str] = None
+    fields: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Changed field -> {old, new}")
+    quantities: List[UploadPreviewQuantity] = Field(default_factory=list)
+
+
+class UploadPreviewProduct(BaseModel):
+    """A product an upload would add or change."""
+    code: Optional[str] = None
+    description: Optional[str] = None
+    line_number: Optional[str] = None
+    fields: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Changed field -> {old, new}")
+
+
+class UploadPreviewResponse(BaseModel):
+    """Changes an upload of the same file would make; nothing is committed."""
+    sites_added: int = 0
+    sites_changed: int = 0
+    sites_unchanged: int = 0
+    sites_removed: int = Field(0, description="Project sites not in the file (an upload keeps them)")
+    products_added: int = 0
+    products_changed: int = 0
+    products_unchanged: int = 0
+    quantities_added: int = 0
+    quantities_changed: int = 0
+    quantities_unchanged: int = 0
+    skipped: int = 0
+    added_sites: List[UploadPreviewSite] = Field(default_factory=list)
+    changed_sites: List[UploadPreviewSite] = Field(default_factory=list)
+    removed_sites: List[UploadPreviewSite] = Field(default_factory=list)
+    added_products: List[UploadPreviewProduct] = Field(default_factory=list)
+    changed_products: List[UploadPreviewProduct] = Field(default_factory=list)
+    truncated: bool = Field(False, description="True when a detail list was cut at `limit` entries")
+
+
 # ===========================
 # BULK OPERATION SCHEMAS
 # ===========================
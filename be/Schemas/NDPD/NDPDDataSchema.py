@@ -33,7 +33,8 @@ class NDPDDataOut(BaseModel):
 class NDPDDataPagination(BaseModel):
     """Schema for paginated NDPD Data responses."""
     records: List[NDPDDataOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -26,4 +26,5 @@ class RANAntennaSerialsOut(RANAntennaSerialsBase):
 
 class PaginatedRANAntennaSerials(BaseModel):
     records: List[RANAntennaSerialsOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
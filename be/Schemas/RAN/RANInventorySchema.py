@@ -37,5 +37,6 @@ class PaginatedRANInventoryResponse(BaseModel):
     """
     Schema for paginated responses of RAN Inventory records.
     """
-    total: int
+    total: Optional[int] = None
     records: List[RANInventoryInDB]
+    next_cursor: Optional[str] = None
@@ -25,4 +25,5 @@ class RANSiteOut(RANSiteBase):
         orm_mode = True
 class PaginatedRANSites(BaseModel):
     records: List[RANSiteOut]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -23,6 +23,7 @@ from Models.BOQ.Project import *
 
 from Models.Admin.User import *
 from Models.Admin.AuditLog import *
+from Models.Admin.Job import *
 
 
 from Models.LE.ROPLvl1 import *
@@ -0,0 +1,61 @@
+"""add jobs table
+
+Revision ID: e1f2a3b4c5d6
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f2a3b4c5d6'
+down_revision: Union[str, Sequence[str], None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the jobs table used by the background job queue (utils.jobs)."""
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('kind', sa.String(length=100), nullable=False),
+        sa.Column('queue', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('progress_done', sa.Integer(), nullable=False),
+        sa.Column('progress_total', sa.Integer(), nullable=True),
+        sa.Column('message', sa.String(length=500), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+        sa.Column('result_path', sa.String(length=500), nullable=True),
+        sa.Column('result_name', sa.String(length=255), nullable=True),
+        sa.Column('result_media_type', sa.String(length=100), nullable=True),
+        sa.Column('result_data', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_jobs_user_id', 'jobs', ['user_id'], unique=False)
+    op.create_index('ix_jobs_finished_at', 'jobs', ['finished_at'], unique=False)
+    op.create_index('ix_jobs_claim', 'jobs', ['queue', 'status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the jobs table."""
+    op.drop_index('ix_jobs_claim', table_name='jobs')
+    op.drop_index('ix_jobs_finished_at', table_name='jobs')
+    op.drop_index('ix_jobs_user_id', table_name='jobs')
+    op.drop_table('jobs')
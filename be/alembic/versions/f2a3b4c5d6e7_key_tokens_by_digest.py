@@ -0,0 +1,83 @@
+"""key token_blacklist and refresh_tokens by token digest
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a3b4c5d6e7'
+down_revision: Union[str, Sequence[str], None] = 'e1f2a3b4c5d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _backfill_digests(table_name: str) -> None:
+    """Set token_digest = sha256(token) for every row, in batches."""
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('token', sa.String),
+                     sa.column('token_digest', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.token)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id')).values(token_digest=sa.bindparam('digest')),
+            [{'row_id': row.id, 'digest': hashlib.sha256(row.token.encode('utf-8')).hexdigest()} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Replace the stored JWT strings with their SHA-256 digest (64 hex chars, unique)."""
+    op.add_column('token_blacklist', sa.Column('token_digest', sa.String(length=64), nullable=True))
+    _backfill_digests('token_blacklist')
+    op.drop_index('ix_token_blacklist_token', table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'token')
+    op.alter_column('token_blacklist', 'token_digest', existing_type=sa.String(length=64), nullable=False)
+    op.create_index('ix_token_blacklist_token_digest', 'token_blacklist', ['token_digest'], unique=True)
+
+    op.add_column('refresh_tokens', sa.Column('token_digest', sa.String(length=64), nullable=True))
+    _backfill_digests('refresh_tokens')
+    op.drop_index('idx_refresh_token_lookup', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_token', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token')
+    op.alter_column('refresh_tokens', 'token_digest', existing_type=sa.String(length=64), nullable=False)
+    op.create_index('ix_refresh_tokens_token_digest', 'refresh_tokens', ['token_digest'], unique=True)
+
+
+def downgrade() -> None:
+    """
+    Restore the token columns.
+
+    Digests cannot be turned back into tokens, so existing rows are deleted:
+    users log in again and tokens revoked before the downgrade are accepted
+    until they expire.
+    """
+    op.execute(sa.text('DELETE FROM refresh_tokens'))
+    op.drop_index('ix_refresh_tokens_token_digest', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token_digest')
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(length=500), nullable=False))
+    op.create_index('ix_refresh_tokens_token', 'refresh_tokens', ['token'], unique=True)
+    op.create_index('idx_refresh_token_lookup', 'refresh_tokens', ['token', 'revoked', 'expires_at'])
+
+    op.execute(sa.text('DELETE FROM token_blacklist'))
+    op.drop_index('ix_token_blacklist_token_digest', table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'token_digest')
+    op.add_column('token_blacklist', sa.Column('token', sa.String(length=500), nullable=False))
+    op.create_index('ix_token_blacklist_token', 'token_blacklist', ['token'], unique=True)
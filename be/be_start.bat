@@ -1,2 +1,3 @@
+REM Multi-worker mode: set WEB_CONCURRENCY=4 (uvicorn starts that many workers; see utils\deployment.py)
 .venv\Scripts\python.exe -m uvicorn main:app --host 0.0.0.0 --port 8003 --timeout-keep-alive 600 --timeout-graceful-shutdown 30
 REM For HTTPS, use: .venv\Scripts\python.exe -m uvicorn main:app --host 0.0.0.0 --port 8003 --timeout-keep-alive 600 --timeout-graceful-shutdown 30 --ssl-certfile certs\cert.pem --ssl-keyfile certs\key.pem
\ No newline at end of file
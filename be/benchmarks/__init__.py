@@ -0,0 +1,12 @@
+"""
+Benchmarks for the BOQ backend.
+
+Each module is runnable with `python -m benchmarks.<name>` from the be/
+directory and prints its results as JSON.
+
+- datasets: deterministic synthetic data at production volumes
+- endpoints: end-to-end latency, query count and peak RSS of the hot endpoints
+- login: concurrent login throughput and event loop stalls of bcrypt verification
+- serialization: list response serialization pipelines
+- workers: HTTP throughput of the real server by worker process count
+"""
@@ -0,0 +1,408 @@
+"""
+datasets.py -
+Synthetic Benchmark Datasets
+
+Deterministic generator for production-like data volumes, used by the
+endpoint benchmark (benchmarks.endpoints) and usable on its own to fill a
+scratch database for profiling.
+
+Volumes at scale 1.0:
+- OD BOQ: 50,000 sites x 300 products; each site uses `density` of the
+  products (default 0.1, i.e. ~1.5M site-product rows)
+- BOQ inventory: 1,000,000 rows
+- Audit logs: 200,000 rows
+- Price books: 100,000 rows
+- ROP: 10 projects x 50 Level 1 items x 10 Level 2 items with monthly
+  distributions, plus 20 packages per project linked to Level 1 items
+
+Rows are written with Core executemany inserts in chunks, so seeding speed
+is bounded by the database rather than the ORM. The same seed always gives
+the same data, so results of different commits are comparable.
+
+Usage:
+    cd be
+    python -m benchmarks.datasets --database-url sqlite:///./bench.db --scale 0.1
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+BENCH_USERNAME = "bench_admin"
+BENCH_PROJECT_COUNT = 20
+CHUNK_SIZE = 10000
+
+REGIONS = ("AUH", "DXB", "SHJ", "AJM", "RAK", "FUJ", "UAQ", "AAN")
+SCOPES = ("5G", "SRAN", "MW", "Power", "Civil")
+SUBSCOPES = ("New 5G-n78", "Bandswap", "Expansion", "Relocation", "Upgrade", "Swap")
+CATEGORIES = ("Hardware", "SW", "Service")
+PARTNERS = ("Partner A", "Partner B", "Partner C", "Partner D")
+STATUSES = ("Requested", "Approved", "Integrated", "On Hold")
+TRACKER_METADATA_COLUMNS = 13  # After the Sum column of a tracker site row
+AUDIT_ACTIONS = ("create_site", "update_site", "delete_site", "upload_csv", "download_boq_excel", "login")
+AUDIT_RESOURCES = ("od_boq_site", "project", "price_book", "inventory", "user")
+
+
+@dataclass
+class DatasetSpec:
+    """Row counts of one dataset."""
+    od_sites: int = 50000
+    od_products: int = 300
+    density: float = 0.1
+    inventory: int = 1000000
+    audit_logs: int = 200000
+    price_books: int = 100000
+    rop_projects: int = 10
+    rop_lvl1_per_project: int = 50
+    rop_lvl2_per_lvl1: int = 10
+    rop_packages_per_project: int = 20
+
+    @classmethod
+    def scaled(cls, scale: float, density: float = 0.1) -> "DatasetSpec":
+        """Full volumes multiplied by `scale` (product count and ROP fan-out stay fixed)."""
+        full = cls(density=density)
+        return cls(
+            od_sites=max(10, int(full.od_sites * scale)),
+            od_products=full.od_products,
+            density=density,
+            inventory=max(10, int(full.inventory * scale)),
+            audit_logs=max(10, int(full.audit_logs * scale)),
+            price_books=max(10, int(full.price_books * scale)),
+            rop_projects=max(1, int(full.rop_projects * min(1.0, scale * 10))),
+            rop_lvl1_per_project=full.rop_lvl1_per_project,
+            rop_lvl2_per_lvl1=full.rop_lvl2_per_lvl1,
+            rop_packages_per_project=full.rop_packages_per_project,
+        )
+
+
+def _chunks(rows: Iterable[Dict], size: int = CHUNK_SIZE) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(conn, table, rows: Iterable[Dict]) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        conn.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def du_project_ids() -> List[str]:
+    return [f"DU-PID{i:03d}_PO{i:03d}" for i in range(BENCH_PROJECT_COUNT)]
+
+
+def boq_project_ids() -> List[str]:
+    return [f"BOQ-PID{i:03d}_PO{i:03d}" for i in range(BENCH_PROJECT_COUNT)]
+
+
+# ===========================
+# ROW GENERATORS
+# ===========================
+
+def _site_rows(spec: DatasetSpec, rng: random.Random) -> Iterator[Dict]:
+    projects = du_project_ids()
+    for i in range(spec.od_sites):
+        yield {
+            "id": i + 1,
+            "site_id": f"{REGIONS[i % len(REGIONS)]}{i:06d}",
+            "region": REGIONS[i % len(REGIONS)],
+            "distance": str(rng.randint(1, 120)),
+            "scope": rng.choice(SCOPES),
+            "subscope": SUBSCOPES[i % len(SUBSCOPES)],
+            "po_model": f"Model {rng.randint(1, 40)}",
+            "project_id": projects[i % len(projects)],
+            "partner": rng.choice(PARTNERS),
+            "request_status": rng.choice(STATUSES),
+            "du_po_number": f"PO{rng.randint(1000, 9999)}",
+            "year_scope": "2026",
+            "integration_status": rng.choice(STATUSES),
+        }
+
+
+def _product_rows(spec: DatasetSpec, rng: random.Random) -> Iterator[Dict]:
+    for i in range(spec.od_products):
+        yield {
+            "id": i + 1,
+            "description": f"Product {i} {rng.choice(CATEGORIES)} item",
+            "line_number": str(i + 1),
+            "code": f"CODE-{i:05d}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "bu": "Product" if i % 3 else "Services",
+            "unit_price": round(rng.uniform(5, 5000), 2),
+            "total_po_qty": float(rng.randint(100, 100000)),
+            "consumed_in_year": 0.0,
+            "consumed_year": 2026,
+            "remaining_in_po": 0.0,
+        }
+
+
+def _site_product_rows(spec: DatasetSpec, rng: random.Random) -> Iterator[Dict]:
+    per_site = max(1, int(spec.od_products * spec.density))
+    products = list(range(1, spec.od_products + 1))
+    next_id = 1
+    for site_id in range(1, spec.od_sites + 1):
+        for product_id in sorted(rng.sample(products, per_site)):
+            yield {
+                "id": next_id, "site_record_id": site_id, "product_id": product_id,
+                "qty_per_site": float(rng.randint(1, 12)),
+            }
+            next_id += 1
+
+
+def _inventory_rows(spec: DatasetSpec, rng: random.Random) -> Iterator[Dict]:
+    projects = boq_project_ids()
+    for i in range(spec.inventory):
+        yield {
+            "id": i + 1,
+            "site_id": f"S{i // 50:06d}",
+            "site_name": f"Site {i // 50}",
+            "slot_id": i % 16,
+            "port_id": i % 8,
+            "status": rng.choice(("In Service", "Spare", "Faulty")),
+            "company_id": rng.choice(("NOKIA", "ERICSSON", "HUAWEI")),
+            "mnemonic": f"MN{rng.randint(1, 500)}",
+            "part_no": f"PN-{rng.randint(1, 2000):05d}",
+            "software_no": f"SW{rng.randint(18, 24)}.{rng.randint(0, 9)}",
+            "serial_no": f"SN{i:010d}",
+            "manufactured_date": "2024-01-01",
+            "pid_po": projects[i % len(projects)],
+        }
+
+
+def _audit_rows(spec: DatasetSpec, rng: random.Random, user_ids: Sequence[int]) -> Iterator[Dict]:
+    start = datetime(2025, 1, 1)
+    projects = du_project_ids()
+    for i in range(spec.audit_logs):
+        yield {
+            "id": i + 1,
+            "user_id": user_ids[i % len(user_ids)],
+            "action": rng.choice(AUDIT_ACTIONS),
+            "resource_type": rng.choice(AUDIT_RESOURCES),
+            "resource_id": str(rng.randint(1, 50000)),
+            "resource_name": f"resource {i}",
+            "details": json.dumps({"n": i}),
+            "ip_address": f"10.0.{i % 256}.{(i // 256) % 256}",
+            "timestamp": start + timedelta(seconds=i * 60),
+            "project_id": projects[i % len(projects)],
+            "section": 4,
+        }
+
+
+def _price_book_rows(spec: DatasetSpec, rng: random.Random, user_id: int) -> Iterator[Dict]:
+    now = datetime(2026, 1, 1)
+    for i in range(spec.price_books):
+        po = f"PO{i % 200:04d}"
+        yield {
+            "id": i + 1,
+            "project_name": f"Project {i % 200}",
+            "po_number": po,
+            "po_line": str(i % 500),
+            "upl_line": str(i % 300),
+            "merge_po_poline_uplline": f"{po}#{i % 500}#{i % 300}",
+            "vendor_part_number_item_code": f"VPN-{i:07d}",
+            "po_line_item_description": f"Line item {i}",
+            "uom": "EA",
+            "quantity": str(rng.randint(1, 100)),
+            "currency": "SAR",
+            "unit_price_before_discount": f"{rng.uniform(1, 9999):.2f}",
+            "uploaded_by": user_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+# ===========================
+# SEEDING
+# ===========================
+
+def seed(engine, spec: DatasetSpec, seed_value: int = 42, log: Callable[[str], None] = print) -> Dict[str, int]:
+    """
+    Create the schema and fill it with `spec` volumes.
+
+    Returns:
+        Dict of table name -> rows inserted
+    """
+    from Database.session import Base
+    from Models.Admin.AuditLog import AuditLog
+    from Models.Admin.User import Role, User, UserProjectAccess
+    from Models.BOQ.Inventory import Inventory
+    from Models.BOQ.PriceBook import PriceBook
+    from Models.BOQ.Project import Project
+    from Models.DU.OD_BOQ_Product import ODBOQProduct
+    from Models.DU.OD_BOQ_Site import ODBOQSite
+    from Models.DU.OD_BOQ_Site_Product import ODBOQSiteProduct
+    from Models.LE.MonthlyDistribution import MonthlyDistribution
+    from Models.LE.ROPLvl1 import ROPLvl1
+    from Models.LE.ROPLvl2 import ROPLvl2, ROPLvl2Distribution
+    from Models.LE.ROPProject import ROPProject
+    from Models.LE.RopPackages import RopPackage, rop_package_lvl1
+    import importlib
+    DUProject = importlib.import_module("Models.DU.DU_Project").DUProject
+    # Not seeded, but read on every authenticated request or referenced by a FK
+    for module in ("Models.Admin.RefreshToken", "Models.Admin.TokenBlacklist", "Models.RAN.RANProject"):
+        importlib.import_module(module)
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed_value)
+    counts: Dict[str, int] = {}
+
+    def step(name: str, table, rows: Iterable[Dict]) -> None:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            counts[name] = _insert(conn, table, rows)
+        log(f"seeded {name}: {counts[name]} rows in {time.perf_counter() - started:.1f}s")
+
+    step("roles", Role.__table__, [
+        {"id": 1, "name": "senior_admin"}, {"id": 2, "name": "admin"}, {"id": 3, "name": "user"},
+    ])
+    users = [{"id": 1, "username": BENCH_USERNAME, "email": "bench@example.com", "hashed_password": "-",
+              "role_id": 1, "registered_at": datetime(2026, 1, 1)}]
+    users += [{"id": i, "username": f"bench_user{i}", "email": f"user{i}@example.com", "hashed_password": "-",
+               "role_id": 3, "registered_at": datetime(2026, 1, 1)} for i in range(2, 52)]
+    step("users", User.__table__, users)
+
+    step("du_project", DUProject.__table__, [
+        {"pid_po": pid_po, "pid": pid_po.split("_")[0], "po": pid_po.split("_")[1], "project_name": f"DU {pid_po}"}
+        for pid_po in du_project_ids()
+    ])
+    step("projects", Project.__table__, [
+        {"pid_po": pid_po, "pid": pid_po.split("_")[0], "po": pid_po.split("_")[1], "project_name": f"BOQ {pid_po}"}
+        for pid_po in boq_project_ids()
+    ])
+    step("user_project_access", UserProjectAccess.__table__, [
+        {"user_id": user_id, "DUproject_id": du_project_ids()[user_id % BENCH_PROJECT_COUNT], "permission_level": "edit"}
+        for user_id in range(2, 52)
+    ])
+
+    step("du_od_boq_product", ODBOQProduct.__table__, _product_rows(spec, rng))
+    step("du_od_boq_site", ODBOQSite.__table__, _site_rows(spec, rng))
+    step("du_od_boq_site_product", ODBOQSiteProduct.__table__, _site_product_rows(spec, rng))
+    step("inventory", Inventory.__table__, _inventory_rows(spec, rng))
+    step("audit_logs", AuditLog.__table__, _audit_rows(spec, rng, [u["id"] for u in users]))
+    step("price_books", PriceBook.__table__, _price_book_rows(spec, rng, 1))
+
+    # ROP hierarchy: project -> Level 1 -> Level 2 -> monthly distribution, and packages over Level 1
+    rop_projects, lvl1, lvl2, lvl2_dist, packages, links, monthly = [], [], [], [], [], [], []
+    start = date(2026, 1, 1)
+    for p in range(spec.rop_projects):
+        pid_po = f"ROP-PID{p:03d}_PO{p:03d}"
+        rop_projects.append({"pid_po": pid_po, "pid": f"ROP-PID{p:03d}", "po": f"PO{p:03d}",
+                             "project_name": f"ROP {p}", "wbs": f"WBS-{p}", "country": "UAE", "currency": "Euros"})
+        for a in range(spec.rop_lvl1_per_project):
+            lvl1_id = f"{pid_po}-L1-{a}"
+            lvl1.append({"id": lvl1_id, "project_id": pid_po, "project_name": f"ROP {p}", "item_name": f"L1 item {a}",
+                         "region": rng.choice(REGIONS), "total_quantity": rng.randint(10, 1000), "consumption": 0,
+                         "price": round(rng.uniform(100, 10000), 2), "start_date": start,
+                         "end_date": start + timedelta(days=365)})
+            for b in range(spec.rop_lvl2_per_lvl1):
+                lvl2_id = f"{lvl1_id}-L2-{b}"
+                lvl2.append({"id": lvl2_id, "project_id": pid_po, "lvl1_id": lvl1_id, "lvl1_item_name": f"L1 item {a}",
+                             "item_name": f"L2 item {b}", "region": rng.choice(REGIONS),
+                             "total_quantity": rng.randint(1, 100), "price": round(rng.uniform(10, 1000), 2),
+                             "start_date": start, "end_date": start + timedelta(days=365)})
+                lvl2_dist.extend({"lvl2_id": lvl2_id, "year": 2026, "month": m, "allocated_quantity": rng.randint(0, 10)}
+                                 for m in range(1, 13))
+        for k in range(spec.rop_packages_per_project):
+            package_id = len(packages) + 1
+            packages.append({"id": package_id, "project_id": pid_po, "package_name": f"Package {p}-{k}",
+                             "start_date": start, "end_date": start + timedelta(days=365),
+                             "quantity": rng.randint(1, 50), "price": round(rng.uniform(1000, 50000), 2),
+                             "lead_time": rng.randint(10, 90), "currency": "EUR"})
+            for a in rng.sample(range(spec.rop_lvl1_per_project), min(5, spec.rop_lvl1_per_project)):
+                links.append({"package_id": package_id, "lvl1_id": f"{pid_po}-L1-{a}", "quantity": 1, "total_quantity": 1})
+            monthly.extend({"package_id": package_id, "year": 2026, "month": m, "quantity": rng.randint(0, 5)}
+                           for m in range(1, 13))
+    step("rop_projects", ROPProject.__table__, rop_projects)
+    step("rop_lvl1", ROPLvl1.__table__, lvl1)
+    step("rop_lvl2", ROPLvl2.__table__, lvl2)
+    step("rop_lvl2_distribution", ROPLvl2Distribution.__table__, lvl2_dist)
+    step("rop_packages", RopPackage.__table__, packages)
+    step("rop_package_lvl1", rop_package_lvl1, links)
+    step("monthly_distributions", MonthlyDistribution.__table__, monthly)
+    return counts
+
+
+def tracker_csv(sites: int, products: int, density: float = 0.1, seed_value: int = 7,
+                site_prefix: str = "UPL") -> bytes:
+    """
+    Build an OD BOQ tracker CSV in the /od-boq/upload-csv layout.
+
+    Layout: product header rows 0-8 from column 7 (description, #line, BU,
+    unit price, code, category, total PO qty, consumed, remaining), then one
+    row per site: region, distance, scope, subscope, site id, model, (blank),
+    product quantities, Sum and 13 metadata columns. The header rows are
+    padded to the site row width, as in a real tracker: the reader takes the
+    column count from the first row.
+    """
+    rng = random.Random(seed_value)
+    per_site = max(1, int(products * density))
+    out = io.StringIO()
+    writer = csv.writer(out)
+    lead = [""] * 7
+    tail = [""] * (1 + TRACKER_METADATA_COLUMNS)  # Sum and metadata columns
+    header_rows = [
+        [f"Product {i} item" for i in range(products)],
+        [str(i + 1) for i in range(products)],
+        ["Product" if i % 3 else "Services" for i in range(products)],
+        [f"${rng.uniform(5, 5000):,.2f}" for _ in range(products)],
+        [f"CODE-{i:05d}" for i in range(products)],
+        [CATEGORIES[i % len(CATEGORIES)] for i in range(products)],
+        [str(rng.randint(100, 100000)) for _ in range(products)],
+        [""] * products,
+        [""] * products,
+    ]
+    for row in header_rows:
+        writer.writerow(lead + row + tail)
+    for i in range(sites):
+        quantities = [""] * products
+        for p in rng.sample(range(products), per_site):
+            quantities[p] = str(rng.randint(1, 12))
+        total = sum(int(q) for q in quantities if q)
+        metadata = ["", "", "", rng.choice(PARTNERS), rng.choice(STATUSES), "01-Jan-26", f"PO{i % 999}",
+                    "", "2026", rng.choice(STATUSES), "", "", "2026"]
+        writer.writerow(
+            [REGIONS[i % len(REGIONS)], str(rng.randint(1, 120)), rng.choice(SCOPES), SUBSCOPES[i % len(SUBSCOPES)],
+             f"{site_prefix}{i:06d}", f"Model {i % 40}", ""] + quantities + [str(total)] + metadata
+        )
+    return out.getvalue().encode("utf-8")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a database with synthetic benchmark data")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraction of the full volumes")
+    parser.add_argument("--density", type=float, default=0.1, help="Fraction of products used per site")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DATABASE_URL", args.database_url)
+    from sqlalchemy import create_engine
+
+    spec = DatasetSpec.scaled(args.scale, args.density)
+    engine = create_engine(args.database_url)
+    counts = seed(engine, spec, args.seed, log=lambda line: print(line, file=sys.stderr))
+    engine.dispose()
+    print(json.dumps({"spec": asdict(spec), "rows": counts}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+endpoints.py -
+End-to-End Endpoint Benchmark
+
+Boots the FastAPI application in process (TestClient) against a seeded
+database and times the hot endpoints through the full middleware stack:
+
+- OD BOQ: upload-csv (new sites and re-upload), generate-boq,
+  bulk-download-boq-zip, get_sites (first, deep, search and cursor pages),
+  stats and filter options (cold and cached)
+- Audit log pages (first and deep)
+- Price book CSV export (full and one PO)
+- BOQ inventory list
+
+Every scenario reports latency (median / p95 / min / max), SQL statements
+per call, the process peak RSS after the scenario and how much the scenario
+raised it. A scenario whose response is an error (status >= 400) or that
+raises (e.g. a response that fails its schema) is marked failed instead,
+with the status or exception, and the run exits with status 1. Results are written as JSON so two commits can be
+compared:
+
+    python -m benchmarks.endpoints --scale 0.05 --output before.json
+    git checkout <other commit>
+    python -m benchmarks.endpoints --scale 0.05 --output after.json --compare before.json
+
+With --compare the run exits with status 1 when a scenario's median got
+slower than --threshold (default 25%) or it issues more queries.
+
+Database:
+    By default a throwaway SQLite database is seeded (benchmarks.datasets)
+    at --scale of the full volumes. --database-url uses another database;
+    an already seeded one is reused unless --reseed is given.
+
+Usage:
+    cd be
+    python -m benchmarks.endpoints [--scale 1.0] [--rounds 10] [--only od_boq] [--output results.json]
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+
+def _configure_environment(database_url: str) -> None:
+    """Settings the application reads at import time."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("ENVIRONMENT", "benchmark")  # no SQL echo
+    os.environ.setdefault("DB_CREATE_ALL", "false")    # the seeder creates the schema
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "600")  # outlasts a full-scale run
+    os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+    os.environ.setdefault("JOB_EXECUTOR", "inline")
+    os.environ.setdefault("USE_N8N_PROCESSING", "false")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+class Scenario:
+    """
+    One timed request.
+
+    Attributes:
+        name: Result key ("<area>.<endpoint>[variant]")
+        request: Callable(client, round_index) performing the request and returning the response
+        setup: Optional callable(round_index) run before each timed call (not timed)
+        warmup: Whether to make one untimed call first
+    """
+
+    def __init__(self, name: str, request: Callable, setup: Optional[Callable] = None, warmup: bool = True):
+        self.name = name
+        self.request = request
+        self.setup = setup
+        self.warmup = warmup
+
+
+def build_scenarios(spec, upload_sites: int) -> List[Scenario]:
+    from benchmarks.datasets import du_project_ids, tracker_csv
+    from utils.cache import cache
+
+    project_id = du_project_ids()[0]
+    site_ids = list(range(1, spec.od_sites + 1))
+    bulk_ids = site_ids[: min(50, len(site_ids))]
+    uploads: Dict[int, bytes] = {}
+
+    def upload(content: bytes):
+        def request(client, i):
+            return client.post(
+                "/od-boq/upload-csv",
+                files={"file": ("tracker.csv", content, "text/csv")},
+                data={"project_id": project_id, "consumed_year": "2026"},
+            )
+        return request
+
+    def upload_new(client, i):
+        return upload(uploads[i])(client, i)
+
+    def prepare_new_upload(i):
+        uploads[i] = tracker_csv(upload_sites, spec.od_products, spec.density, seed_value=i, site_prefix=f"N{i}R")
+
+    reupload_csv = tracker_csv(upload_sites, spec.od_products, spec.density, seed_value=1, site_prefix="REUP")
+
+    def sites_cursor_page(client, i):
+        first = client.get("/od-boq/sites", params={"limit": 50, "cursor": ""}).json()
+        return client.get("/od-boq/sites", params={"limit": 50, "cursor": first.get("next_cursor") or ""})
+
+    return [
+        Scenario("od_boq.get_sites[first_page]", lambda c, i: c.get("/od-boq/sites", params={"limit": 50})),
+        Scenario("od_boq.get_sites[deep_offset]",
+                 lambda c, i: c.get("/od-boq/sites", params={"skip": spec.od_sites // 2, "limit": 50})),
+        Scenario("od_boq.get_sites[search]", lambda c, i: c.get("/od-boq/sites", params={"search": "DXB00", "limit": 50})),
+        Scenario("od_boq.get_sites[cursor_page_2]", sites_cursor_page),
+        Scenario("od_boq.stats[cold]", lambda c, i: c.get("/od-boq/stats"), setup=lambda i: cache.clear()),
+        Scenario("od_boq.stats[cached]", lambda c, i: c.get("/od-boq/stats")),
+        Scenario("od_boq.filter_options[cold]", lambda c, i: c.get("/od-boq/filters/options"),
+                 setup=lambda i: cache.clear()),
+        Scenario("od_boq.generate_boq",
+                 lambda c, i: c.get(f"/od-boq/sites/{site_ids[(i * 997) % len(site_ids)]}/generate-boq")),
+        Scenario("od_boq.bulk_download_boq_zip[50_sites]",
+                 lambda c, i: c.post("/od-boq/sites/bulk-download-boq-zip", json={"site_record_ids": bulk_ids})),
+        Scenario("od_boq.upload_csv[new_sites]", upload_new, setup=prepare_new_upload, warmup=False),
+        Scenario("od_boq.upload_csv[reupload]", upload(reupload_csv)),
+        Scenario("audit_logs.page[first]", lambda c, i: c.get("/audit-logs", params={"limit": 50})),
+        Scenario("audit_logs.page[deep_offset]",
+                 lambda c, i: c.get("/audit-logs", params={"skip": spec.audit_logs // 2, "limit": 50})),
+        Scenario("price_books.export_csv[all]", lambda c, i: c.get("/price-books/export/csv")),
+        Scenario("price_books.export_csv[one_po]", lambda c, i: c.get("/price-books/export/csv", params={"po_number": "PO0001"})),
+        Scenario("inventory.list[first_page]", lambda c, i: c.get("/inventory", params={"limit": 50})),
+    ]
+
+
+def _failed(response) -> Dict[str, Any]:
+    return {"failed": True, "status": [response.status_code], "error": response.text[:500]}
+
+
+def run_scenario(client, counter: QueryCounter, scenario: Scenario, rounds: int) -> Dict[str, Any]:
+    """
+    Time one scenario; a request that raises marks it failed (see _time_scenario).
+
+    TestClient re-raises server exceptions, such as a ResponseValidationError
+    when seeded rows do not fit the response schema.
+    """
+    try:
+        return _time_scenario(client, counter, scenario, rounds)
+    except Exception as e:
+        return {"failed": True, "error": f"{type(e).__name__}: {e}"[:500]}
+
+
+def _time_scenario(client, counter: QueryCounter, scenario: Scenario, rounds: int) -> Dict[str, Any]:
+    """
+    Time one scenario; responses are read completely (streaming exports included).
+
+    The first error response (status >= 400) ends the scenario: the result is
+    marked failed and holds no timings, since they would time the error path.
+    """
+    rss_before = _peak_rss_mb()
+    if scenario.warmup:
+        if scenario.setup:
+            scenario.setup(-1)
+        response = scenario.request(client, -1)
+        if response.status_code >= 400:
+            return _failed(response)
+
+    samples, queries, statuses = [], [], set()
+    for i in range(rounds):
+        if scenario.setup:
+            scenario.setup(i)
+        before = counter.count
+        start = time.perf_counter()
+        response = scenario.request(client, i)
+        _ = response.content
+        if response.status_code >= 400:
+            return _failed(response)
+        samples.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count - before)
+        statuses.add(response.status_code)
+
+    samples.sort()
+    rss_after = _peak_rss_mb()
+    result = {
+        "median_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "min_ms": round(samples[0], 2),
+        "max_ms": round(samples[-1], 2),
+        "rounds": rounds,
+        "queries": int(statistics.median(queries)),
+        "status": sorted(statuses),
+        "peak_rss_mb": rss_after,
+        "rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+    }
+    return result
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Regression lines of `current` against `baseline`."""
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "median_ms" not in before or "median_ms" not in now:
+            continue
+        ratio = now["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        line = (f"{name}: {before['median_ms']}ms -> {now['median_ms']}ms ({ratio:.2f}x), "
+                f"queries {before['queries']} -> {now['queries']}")
+        print(line, file=sys.stderr)
+        if ratio > 1 + threshold or now["queries"] > before["queries"]:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end endpoint benchmark")
+    parser.add_argument("--database-url", help="Database to benchmark (default: throwaway SQLite)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraction of the full dataset volumes")
+    parser.add_argument("--density", type=float, default=0.1, help="Fraction of products used per site")
+    parser.add_argument("--reseed", action="store_true", help="Seed even if the database already has data")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--upload-sites", type=int, default=2000, help="Sites per upload-csv file")
+    parser.add_argument("--only", help="Run scenarios whose name starts with this prefix")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="boq-bench-"), "bench.db")
+    _configure_environment(database_url)
+
+    from sqlalchemy import inspect, text
+
+    from benchmarks.datasets import BENCH_USERNAME, DatasetSpec, seed
+    from Database.session import engine
+
+    spec = DatasetSpec.scaled(args.scale, args.density)
+    seed_seconds = None
+    seeded = False
+    if inspect(engine).has_table("du_od_boq_site"):
+        with engine.connect() as conn:
+            seeded = bool(conn.execute(text("SELECT COUNT(*) FROM du_od_boq_site")).scalar())
+    if args.reseed or not seeded:
+        started = time.perf_counter()
+        seed(engine, spec, log=lambda line: print(line, file=sys.stderr))
+        seed_seconds = round(time.perf_counter() - started, 1)
+
+    from fastapi.testclient import TestClient
+    from APIs.Core import create_access_token
+    from main import app
+
+    counter = QueryCounter(engine)
+    token = create_access_token({"sub": BENCH_USERNAME})
+    results: Dict[str, Any] = {}
+    with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as client:
+        for scenario in build_scenarios(spec, args.upload_sites):
+            if args.only and not scenario.name.startswith(args.only):
+                continue
+            print(f"running {scenario.name}", file=sys.stderr)
+            results[scenario.name] = run_scenario(client, counter, scenario, args.rounds)
+            if results[scenario.name].get("failed"):
+                print(f"{scenario.name} failed: {results[scenario.name]['error'][:200]}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "scale": args.scale,
+            "spec": spec.__dict__,
+            "seed_seconds": seed_seconds,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    failed = [name for name, result in results.items() if result.get("failed")]
+    if failed:
+        print(f"{len(failed)} scenario(s) failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
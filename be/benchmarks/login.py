@@ -0,0 +1,149 @@
+"""
+login.py -
+Concurrent Login Benchmark
+
+Simulates a login storm: --concurrency clients each verify --logins
+passwords against a bcrypt hash at the production cost, while a probe
+coroutine measures how long the event loop is unresponsive. Three ways of
+running the verification are compared:
+
+- event_loop: pwd_context.verify called directly in the coroutine
+- db_pool: verification on the shared DB thread pool (BLOCKING_DB_THREADS
+  threads, what a plain `def` login route does)
+- password_pool: utils.passwords, the dedicated bounded pool /login uses
+
+Each mode reports logins per second, login latency (median / p95 / max) and
+the worst event loop stall. A last check compares the time of a failed
+login for an unknown username (dummy hash) with a wrong password for a
+known one; the two should be within a few percent.
+
+No database is needed.
+
+Usage:
+    cd be
+    python -m benchmarks.login [--concurrency 50] [--logins 4] [--only password_pool]
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import anyio
+
+from utils.passwords import password_pool, pwd_context, verify_password, verify_password_async
+
+PASSWORD = "Correct-Horse-9"
+DB_THREADS = int(os.getenv("BLOCKING_DB_THREADS", "40"))
+
+
+async def _loop_probe(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Worst delay of a `sleep(interval)` on the loop while the storm runs."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _storm(verify: Callable, hashed: str, concurrency: int, logins: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+
+    async def client():
+        for _ in range(logins):
+            started = time.perf_counter()
+            assert await verify(PASSWORD, hashed)
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_loop_probe(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_stall = await probe
+
+    latencies.sort()
+    return {
+        "logins": len(latencies),
+        "seconds": round(elapsed, 2),
+        "logins_per_second": round(len(latencies) / elapsed, 1),
+        "median_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "max_loop_stall_ms": round(worst_stall * 1000, 1),
+    }
+
+
+def _modes() -> Dict[str, Callable]:
+    db_limiter = anyio.CapacityLimiter(DB_THREADS)
+
+    async def event_loop(password, hashed):
+        return pwd_context.verify(password, hashed)
+
+    async def db_pool(password, hashed):
+        return await anyio.to_thread.run_sync(pwd_context.verify, password, hashed, limiter=db_limiter)
+
+    return {"event_loop": event_loop, "db_pool": db_pool, "password_pool": verify_password_async}
+
+
+def _timing_check(hashed: str, samples: int) -> Dict[str, float]:
+    """Median failed-login time for an unknown user vs a wrong password."""
+    verify_password(PASSWORD, None)  # build the dummy hash outside the samples
+
+    def median_ms(stored):
+        times = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            verify_password("wrong-password", stored)
+            times.append(time.perf_counter() - started)
+        return statistics.median(times) * 1000
+
+    wrong, unknown = median_ms(hashed), median_ms(None)
+    return {
+        "wrong_password_ms": round(wrong, 1),
+        "unknown_user_ms": round(unknown, 1),
+        "difference_pct": round(abs(unknown - wrong) / wrong * 100, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent login benchmark")
+    parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous clients")
+    parser.add_argument("--logins", type=int, default=4, help="Logins per client")
+    parser.add_argument("--only", help="Run only this mode")
+    parser.add_argument("--timing-samples", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    hashed = pwd_context.hash(PASSWORD)
+    results: Dict[str, Any] = {}
+    for name, verify in _modes().items():
+        if args.only and name != args.only:
+            continue
+        print(f"running {name}", file=sys.stderr)
+        results[name] = asyncio.run(_storm(verify, hashed, args.concurrency, args.logins))
+    results["unknown_user_timing"] = _timing_check(hashed, args.timing_samples)
+    password_pool.shutdown()
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "logins_per_client": args.logins,
+        "password_pool": {"executor": password_pool.kind, "workers": password_pool.workers,
+                          "max_pending": password_pool.max_pending},
+        "db_threads": DB_THREADS,
+        "results": results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
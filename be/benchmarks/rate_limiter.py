@@ -0,0 +1,200 @@
+"""
+rate_limiter.py -
+Rate Limiter Backend Check
+
+Runs the same sequence of requests through RedisBackend (the GCRA Lua
+script) and MemoryBackend and checks that they decide the same way:
+
+- burst: a limit of 5 per minute allows 5 requests, then denies, with the
+  same remaining counts and retry delay
+- peek: a cost=0 hit (get_remaining_requests) does not consume the limit
+- refill: after one emission interval one more request is allowed
+- expiry: the Redis key carries a TTL no longer than the window
+- reset: RateLimiter.reset() clears an endpoint's keys in Redis
+- fallback: with Redis unreachable the limit is still enforced per process
+
+It then reports hits per second for both backends.
+
+Redis is taken from --redis-url; without it an in-process fakeredis server
+is used (pip install fakeredis lupa; lupa runs the Lua script). The check
+uses its own key prefix and deletes its keys afterwards.
+
+Usage:
+    cd be
+    python -m benchmarks.rate_limiter [--redis-url redis://localhost:6379/15] [--hits 5000]
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from utils.rate_limiter import MemoryBackend, RateLimiter, RateLimitExceeded, RedisBackend, redis
+
+LIMIT = 5
+WINDOW = 60.0
+# Redis uses its own clock, so retry delays may differ by the script's run time
+TOLERANCE = 0.25
+
+
+def _client(url: str):
+    if url:
+        if redis is None:
+            raise RuntimeError("--redis-url requires the redis package")
+        return redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    try:
+        import fakeredis
+    except ImportError:
+        raise RuntimeError("Pass --redis-url, or pip install fakeredis lupa for an in-process server")
+    return fakeredis.FakeRedis()
+
+
+def _decisions(backend, key: str, hits: int, limit: int = LIMIT, window: float = WINDOW) -> List[Dict[str, Any]]:
+    results = []
+    for _ in range(hits):
+        result = backend.hit(key, limit, window)
+        results.append({"allowed": result.allowed, "remaining": result.remaining,
+                        "retry_after": round(result.retry_after, 2)})
+    return results
+
+
+def _same(redis_results: List[Dict[str, Any]], memory_results: List[Dict[str, Any]]) -> bool:
+    return all(
+        r["allowed"] == m["allowed"] and r["remaining"] == m["remaining"]
+        and abs(r["retry_after"] - m["retry_after"]) <= TOLERANCE
+        for r, m in zip(redis_results, memory_results)
+    ) and len(redis_results) == len(memory_results)
+
+
+# ===========================
+# CHECKS
+# ===========================
+
+def check_burst(shared: RedisBackend, memory: MemoryBackend) -> Dict[str, Any]:
+    redis_results = _decisions(shared, "burst:client", LIMIT + 2)
+    memory_results = _decisions(memory, "burst:client", LIMIT + 2)
+    expected = [True] * LIMIT + [False, False]
+    return {
+        "ok": _same(redis_results, memory_results) and [r["allowed"] for r in redis_results] == expected,
+        "redis": redis_results,
+        "memory": memory_results,
+    }
+
+
+def check_peek(shared: RedisBackend, memory: MemoryBackend) -> Dict[str, Any]:
+    remaining = {}
+    for name, backend in (("redis", shared), ("memory", memory)):
+        backend.hit("peek:client", LIMIT, WINDOW)
+        before = backend.hit("peek:client", LIMIT, WINDOW, cost=0).remaining
+        after = backend.hit("peek:client", LIMIT, WINDOW, cost=0).remaining
+        remaining[name] = [before, after]
+    return {"ok": remaining["redis"] == remaining["memory"] == [LIMIT - 1] * 2, "remaining": remaining}
+
+
+def check_refill(shared: RedisBackend, memory: MemoryBackend, window: float = 0.6) -> Dict[str, Any]:
+    limit = 3
+    decisions = {"redis": [], "memory": []}
+    for name, backend in (("redis", shared), ("memory", memory)):
+        decisions[name] = [backend.hit("refill:client", limit, window).allowed for _ in range(limit + 1)]
+    time.sleep(window / limit + 0.05)
+    for name, backend in (("redis", shared), ("memory", memory)):
+        decisions[name].append(backend.hit("refill:client", limit, window).allowed)
+    expected = [True] * limit + [False, True]
+    return {"ok": decisions["redis"] == decisions["memory"] == expected, "allowed": decisions}
+
+
+def check_expiry(shared: RedisBackend) -> Dict[str, Any]:
+    shared.hit("expiry:client", LIMIT, WINDOW)
+    ttl_ms = shared.client.pttl(shared.prefix + "expiry:client")
+    # One hit leaves a backlog of one emission interval
+    return {"ok": 0 < ttl_ms <= WINDOW / LIMIT * 1000, "ttl_ms": ttl_ms}
+
+
+def check_reset(shared: RedisBackend) -> Dict[str, Any]:
+    limiter = RateLimiter(shared)
+    for _ in range(LIMIT):
+        limiter.check_rate_limit("client", "reset", LIMIT, int(WINDOW))
+    limiter.check_rate_limit("client", "other", LIMIT, int(WINDOW))
+    limiter.reset(endpoint="reset")
+    remaining, _ = limiter.get_remaining_requests("client", "reset", LIMIT, int(WINDOW))
+    other, _ = limiter.get_remaining_requests("client", "other", LIMIT, int(WINDOW))
+    return {"ok": remaining == LIMIT and other == LIMIT - 1, "remaining": {"reset": remaining, "other": other}}
+
+
+def check_fallback() -> Dict[str, Any]:
+    if redis is None:
+        return {"ok": True, "skipped": "redis package not installed"}
+    # Nothing listens on port 1: every call to the shared backend fails
+    unreachable = RedisBackend(redis.Redis(host="127.0.0.1", port=1, socket_timeout=0.1, socket_connect_timeout=0.1))
+    limiter = RateLimiter(unreachable)
+    allowed = 0
+    for _ in range(LIMIT + 2):
+        try:
+            limiter.check_rate_limit("client", "fallback", LIMIT, int(WINDOW))
+            allowed += 1
+        except RateLimitExceeded:
+            pass
+    return {"ok": allowed == LIMIT, "allowed": allowed}
+
+
+# ===========================
+# THROUGHPUT
+# ===========================
+
+def _hits_per_second(hit: Callable[[str], Any], hits: int) -> float:
+    started = time.perf_counter()
+    for i in range(hits):
+        hit(f"bench:{i % 1000}")
+    return round(hits / (time.perf_counter() - started))
+
+
+def run(client, hits: int) -> Dict[str, Any]:
+    prefix = f"ratelimit-check:{uuid.uuid4().hex[:8]}:"
+    shared = RedisBackend(client, prefix=prefix)
+    memory = MemoryBackend()
+    try:
+        checks = {
+            "burst": check_burst(shared, memory),
+            "peek": check_peek(shared, memory),
+            "refill": check_refill(shared, memory),
+            "expiry": check_expiry(shared),
+            "reset": check_reset(shared),
+            "fallback": check_fallback(),
+        }
+        throughput = {
+            "redis_hits_per_s": _hits_per_second(lambda key: shared.hit(key, 100, WINDOW), hits),
+            "memory_hits_per_s": _hits_per_second(lambda key: memory.hit(key, 100, WINDOW), hits),
+        }
+    finally:
+        for key in client.scan_iter(match=prefix + "*", count=500):
+            client.delete(key)
+    return {"ok": all(check["ok"] for check in checks.values()), "checks": checks, "throughput": throughput}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rate limiter backend check")
+    parser.add_argument("--redis-url", help="Redis to check against (default: in-process fakeredis)")
+    parser.add_argument("--hits", type=int, default=5000, help="Hits per backend for the throughput figures")
+    args = parser.parse_args(argv)
+
+    try:
+        client = _client(args.redis_url)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    results = run(client, args.hits)
+    print(json.dumps(results, indent=2))
+    if not results["ok"]:
+        failed = [name for name, check in results["checks"].items() if not check["ok"]]
+        print(f"failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+serialization.py -
+List Response Serialization Benchmark
+
+Compares the two response pipelines for 500 and 1000 row pages:
+
+- legacy: full ORM entities (eager-loaded children) -> Pydantic
+  response_model validation -> standard library JSON encoder
+  (what FastAPI does for a response_model route returning ORM objects)
+- fast: column-projected query -> plain dicts -> orjson
+  (utils.fast_json, used by the optimized list routes)
+
+Data is seeded into a throwaway SQLite database, so the benchmark never
+touches DATABASE_URL.
+
+Usage:
+    cd be
+    python -m benchmarks.serialization [--rounds 20]
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="boq-bench-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_PATH}")
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, selectinload
+from starlette.responses import JSONResponse
+
+from Database.session import Base
+from Models.BOQ.Levels import Lvl3, ItemsForLvl3
+from Models.BOQ.Project import Project
+from Models.RAN.RANInventory import RANInventory
+from Models.RAN.RANProject import RanProject
+from Schemas.BOQ.LevelsSchema import Lvl3Out, ItemsForLvl3Out
+from Schemas.RAN.RANInventorySchema import RANInventoryInDB
+from utils.fast_json import FastJSONResponse, rows_to_dicts, schema_columns
+
+PAGE_SIZES = (500, 1000)
+ITEMS_PER_LVL3 = 3
+
+
+def _seed(session, rows: int) -> None:
+    for i in range(rows):
+        session.add(RANInventory(
+            mrbts=f"MRBTS-{i}", site_id=f"SITE-{i % 97}", identification_code=f"IC-{i}",
+            user_label=f"label {i}", serial_number=f"SN{i:08d}", duplicate=i % 11 == 0,
+            duplicate_remarks=None, pid_po="BENCH",
+        ))
+        lvl3 = Lvl3(
+            project_id="BENCH", project_name="Benchmark", item_name=f"Item {i}", uom="EA",
+            upl_line=str(i), total_quantity=i, total_price=i * 1.25, sequence=i,
+        )
+        lvl3.service_type = ["1", "2"]
+        session.add(lvl3)
+        session.flush()
+        for j in range(ITEMS_PER_LVL3):
+            item = ItemsForLvl3(
+                lvl3_id=lvl3.id, item_name=f"Sub {i}.{j}", item_details="details",
+                vendor_part_number=f"VPN-{i}-{j}", category="HW", uom=1, upl_line=str(j),
+                quantity=j + 1, price=9.5,
+            )
+            item.service_type = ["2"]
+            session.add(item)
+    session.commit()
+
+
+# ===========================
+# PIPELINES
+# ===========================
+
+def _legacy_render(adapter: TypeAdapter, objects) -> bytes:
+    validated = adapter.validate_python(objects, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def legacy_ran(session, limit: int) -> bytes:
+    objects = session.query(RANInventory).order_by(RANInventory.id).limit(limit).all()
+    return _legacy_render(TypeAdapter(List[RANInventoryInDB]), objects)
+
+
+def fast_ran(session, limit: int) -> bytes:
+    rows = session.query(*schema_columns(RANInventory, RANInventoryInDB)).order_by(RANInventory.id).limit(limit)
+    return FastJSONResponse(rows_to_dicts(rows)).body
+
+
+def legacy_lvl3(session, limit: int) -> bytes:
+    objects = session.query(Lvl3).options(selectinload(Lvl3.items)).order_by(Lvl3.id).limit(limit).all()
+    return _legacy_render(TypeAdapter(List[Lvl3Out]), objects)
+
+
+def fast_lvl3(session, limit: int) -> bytes:
+    records = rows_to_dicts(
+        session.query(*schema_columns(Lvl3, Lvl3Out), Lvl3._service_type.label("service_type"))
+        .order_by(Lvl3.id).limit(limit)
+    )
+    by_id = {}
+    for record in records:
+        record["service_type"] = json.loads(record["service_type"])
+        record["items"] = by_id[record["id"]] = []
+    items = rows_to_dicts(
+        session.query(
+            ItemsForLvl3.lvl3_id, *schema_columns(ItemsForLvl3, ItemsForLvl3Out),
+            ItemsForLvl3._service_type.label("service_type"),
+        ).filter(ItemsForLvl3.lvl3_id.in_(list(by_id))).order_by(ItemsForLvl3.id)
+    )
+    for item in items:
+        item["service_type"] = json.loads(item["service_type"])
+        by_id[item.pop("lvl3_id")].append(item)
+    return FastJSONResponse(records).body
+
+
+def _time(fn: Callable, session_factory, limit: int, rounds: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(rounds):
+        session = session_factory()
+        try:
+            start = time.perf_counter()
+            fn(session, limit)
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            session.close()
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2)}
+
+
+def run(rounds: int) -> Dict:
+    engine = create_engine(f"sqlite:///{_DB_PATH}")
+    Base.metadata.create_all(engine, tables=[
+        Project.__table__, RanProject.__table__, RANInventory.__table__, Lvl3.__table__, ItemsForLvl3.__table__,
+    ])
+    session_factory = sessionmaker(bind=engine)
+    seed = session_factory()
+    _seed(seed, max(PAGE_SIZES))
+    seed.close()
+
+    results = {}
+    for name, legacy, fast in (("ran_inventory", legacy_ran, fast_ran), ("lvl3_with_items", legacy_lvl3, fast_lvl3)):
+        for limit in PAGE_SIZES:
+            session = session_factory()
+            same = json.loads(legacy(session, limit)) == json.loads(fast(session, limit))
+            session.close()
+            old = _time(legacy, session_factory, limit, rounds)
+            new = _time(fast, session_factory, limit, rounds)
+            results[f"{name}[{limit}]"] = {
+                "legacy": old,
+                "fast": new,
+                "speedup": round(old["median_ms"] / new["median_ms"], 2) if new["median_ms"] else None,
+                "identical_output": same,
+            }
+    engine.dispose()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rounds), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+workers.py -
+Multi-Worker Throughput Benchmark
+
+Starts the real server (uvicorn, APP_WORKERS processes) against a seeded
+database for each requested worker count and drives it over HTTP with
+--concurrency client threads for --duration seconds. The request mix covers
+CPU-bound and DB-bound hot endpoints:
+
+- GET /od-boq/sites/{id}/generate-boq   (Excel rendering)
+- GET /od-boq/sites                     (list page)
+- GET /od-boq/stats                     (cached aggregate)
+- GET /audit-logs                       (list page)
+
+For every worker count the run reports requests per second, latency
+(median / p95), errors and the speed-up over the first worker count:
+
+    python -m benchmarks.workers --workers 1,2,4 --scale 0.05
+
+Scaling stops at the number of cores and, with the default throwaway SQLite
+database, at SQLite's single-file locking; use --database-url for a server
+database. Shared state goes to Redis when --redis-url is given (as in a
+real multi-worker deployment, see utils.deployment); otherwise every worker
+keeps its own caches and rate limits.
+
+Usage:
+    cd be
+    python -m benchmarks.workers [--workers 1,2,4] [--duration 20] [--concurrency 32]
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _server_environment(database_url: str, workers: int, redis_url: Optional[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "APP_WORKERS": str(workers),
+        "JOB_EXECUTOR": "external",        # no job threads competing for the cores
+        "USE_N8N_PROCESSING": "false",
+    })
+    env.setdefault("ENVIRONMENT", "benchmark")
+    env.setdefault("DB_CREATE_ALL", "false")
+    env.setdefault("SECRET_KEY", "benchmark-secret-key")
+    env.setdefault("ALGORITHM", "HS256")
+    env.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "600")
+    if redis_url:
+        env["SHARED_STATE_BACKEND"] = "redis"
+        env["REDIS_URL"] = redis_url
+    return env
+
+
+def _wait_until_up(port: int, process: subprocess.Popen, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/openapi.json")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server did not start within {timeout:.0f}s")
+
+
+def _load(port: int, token: str, paths: List[str], concurrency: int, duration: float) -> Dict[str, Any]:
+    """Closed-loop load: every client sends its next request as soon as the last one returns."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}
+
+    def client(index: int) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        n = index
+        local_latencies, local_errors = [], {}
+        while time.monotonic() < deadline:
+            path = paths[n % len(paths)]
+            n += 1
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            if status == 200:
+                local_latencies.append(time.perf_counter() - started)
+            else:
+                local_errors[str(status)] = local_errors.get(str(status), 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for key, count in local_errors.items():
+                errors[key] = errors.get(key, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "median_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None,
+        "errors": errors,
+    }
+
+
+def run_worker_count(workers: int, args, database_url: str, token: str, paths: List[str]) -> Dict[str, Any]:
+    env = _server_environment(database_url, workers, args.redis_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    try:
+        _wait_until_up(args.port, process)
+        # Warm every worker (imports, pools, caches) before measuring
+        _load(args.port, token, paths, max(args.concurrency, workers * 2), args.warmup)
+        return _load(args.port, token, paths, args.concurrency, args.duration)
+    finally:
+        process.terminate()
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-worker throughput benchmark")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated worker counts")
+    parser.add_argument("--database-url", help="Database to benchmark (default: throwaway SQLite)")
+    parser.add_argument("--redis-url", help="Run the workers with SHARED_STATE_BACKEND=redis")
+    parser.add_argument("--scale", type=float, default=0.05, help="Fraction of the full dataset volumes")
+    parser.add_argument("--density", type=float, default=0.1, help="Fraction of products used per site")
+    parser.add_argument("--concurrency", type=int, default=32, help="Client threads")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds per worker count")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="boq-bench-"), "bench.db")
+    os.environ.update(_server_environment(database_url, 1, None))  # read by the imports below
+
+    from sqlalchemy import inspect, text
+
+    from benchmarks.datasets import BENCH_USERNAME, DatasetSpec, seed
+    from Database.session import engine
+
+    spec = DatasetSpec.scaled(args.scale, args.density)
+    seeded = False
+    if inspect(engine).has_table("du_od_boq_site"):
+        with engine.connect() as conn:
+            seeded = bool(conn.execute(text("SELECT COUNT(*) FROM du_od_boq_site")).scalar())
+    if not seeded:
+        seed(engine, spec, log=lambda line: print(line, file=sys.stderr))
+    engine.dispose()
+
+    from APIs.Core import create_access_token
+    token = create_access_token({"sub": BENCH_USERNAME})
+    site_ids = range(1, spec.od_sites + 1, max(1, spec.od_sites // 200))
+    paths: List[str] = []
+    for site_id in site_ids:
+        paths += [f"/od-boq/sites/{site_id}/generate-boq", "/od-boq/sites?limit=50",
+                  "/od-boq/stats", "/audit-logs?limit=50"]
+
+    results: Dict[str, Any] = {}
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        print(f"running {workers} worker(s)", file=sys.stderr)
+        result = run_worker_count(workers, args, database_url, token, paths)
+        if baseline is None:
+            baseline = result["requests_per_second"] or None
+        result["speedup"] = round(result["requests_per_second"] / baseline, 2) if baseline else None
+        results[str(workers)] = result
+
+    report = {
+        "meta": {
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "shared_state": "redis" if args.redis_url else "memory",
+            "scale": args.scale,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Gunicorn Configuration (Linux multi-worker deployment)
+
+Runs APP_WORKERS uvicorn worker processes behind one port. Gunicorn does not
+run on Windows; there `python main.py` with APP_WORKERS set starts uvicorn's
+own multi-process mode instead. See utils.deployment for the shared-state
+settings multi-worker mode needs (SHARED_STATE_BACKEND=redis).
+
+Usage:
+    cd be
+    pip install gunicorn
+    APP_WORKERS=4 SHARED_STATE_BACKEND=redis gunicorn -c gunicorn.conf.py main:app
+
+Environment Variables (optional):
+- APP_WORKERS: Worker processes (default: WEB_CONCURRENCY, else 1)
+- APP_BIND: Listen address (default: 0.0.0.0:8003)
+- APP_WORKER_TIMEOUT: Seconds a worker may stay silent before it is restarted (default: 600)
+- APP_MAX_REQUESTS: Restart a worker after this many requests, 0 = never (default: 0)
+"""
+
+import os
+
+from utils.deployment import APP_WORKERS
+
+bind = os.getenv("APP_BIND", "0.0.0.0:8003")
+workers = APP_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Same keep-alive and shutdown behaviour as `python main.py` / be_start.bat
+keepalive = 600
+graceful_timeout = 30
+timeout = int(os.getenv("APP_WORKER_TIMEOUT", "600"))
+
+# Recycling bounds memory growth of long-running workers (pandas / openpyxl)
+max_requests = int(os.getenv("APP_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Every worker imports the app itself: engines, pools and background threads
+# must not be created before the fork
+preload_app = False
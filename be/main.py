@@ -11,6 +11,7 @@ The application handles three main domains:
 
 Key Features:
 - CORS middleware for cross-origin requests
+- gzip / brotli response compression
 - Database initialization and connection
 - Comprehensive API routing for all modules
 - Admin and user management functionality
@@ -27,6 +28,7 @@ Last Modified: [Date]
 
 import os
 import logging
+import threading
 
 # CRITICAL: Disable proxy for localhost connections FIRST
 os.environ['NO_PROXY'] = 'localhost,127.0.0.1'
@@ -50,30 +52,21 @@ logging.basicConfig(
     ]
 )
 
+# Startup timing (STARTUP_TIMING=true also times every imported module)
+from utils.startup_timing import startup_timer
+startup_timer.install()
+
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-
-
-class NoCacheMiddleware(BaseHTTPMiddleware):
-    """Middleware to add Cache-Control headers to API responses.
 
-    This prevents browsers from caching API responses, which can cause
-    stale data issues like API_VALIDATION_ERROR after re-login.
-    """
-    async def dispatch(self, request: Request, call_next):
-        response: Response = await call_next(request)
-        # Add no-cache headers to prevent browser caching of API responses
-        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        return response
+startup_timer.mark("framework imports")
 
 # Admin API imports
 from APIs.Admin.AdminRoute import adminRoute
 from APIs.Admin.UserRoute import userRoute
+from APIs.Admin.MetricsRoute import metricsRoute
+from APIs.Admin.JobRoute import jobRoute
 
 # BOQ (Bill of Quantities) API imports
 from APIs.BOQ import Level3Route
@@ -100,7 +93,7 @@ from APIs.RAN.RANProjectRouting import RANProjectRoute
 from APIs.RAN.RAN_LLDRouting import ran_lld_router
 from APIs.RAN.RANAntennaSerialsRouting import RANAntennaSerialsRouter
 
-# AI API imports
+# AI API imports (the AI stack itself is imported on first use, see AI/__init__.py)
 from APIs.AI import chat_router, document_router
 
 # DU (Digital Transformation) API imports
@@ -116,9 +109,14 @@ from APIs.NDPD.NDPDRoute import NDPDRoute
 # Exchange Rate
 from APIs.ExchangeRateRoute import exchangeRateRoute
 
+startup_timer.mark("router imports")
+
 # Import AI models so SQLAlchemy recognizes them
 from Models.AI import Document, DocumentChunk, ChatHistory, AIAction
 
+# Import background job model
+from Models.Admin.Job import Job
+
 # Import Approval model
 from Models.BOQ.Approval import Approval
 
@@ -141,17 +139,148 @@ from Models.NDPD.NDPDData import NDPDData
 # # PMA (Project Management Assistant) API import
 # from RAG.PMA import pma
 # Database configuration
-from Database.session import engine, Base
+from Database.session import engine, read_engine, async_engine, async_read_engine, create_schema
+from utils.audit_log import audit_sink
+from utils.jobs import job_queue
+from utils.fast_json import FastJSONResponse
+from utils.compression import CompressionMiddleware
+from utils.http_cache import HTTPCacheMiddleware
+from utils.metrics import (
+    MetricsMiddleware,
+    install_db_instrumentation,
+    metrics,
+    start_event_loop_lag_sampler,
+    stop_event_loop_lag_sampler,
+)
 
 # Initialize FastAPI application
 app = FastAPI(
     title="BOQ Management System",
     description="A comprehensive system for managing Bill of Quantities, RAN projects, and resource optimization",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson-backed JSON rendering for every route (see utils.fast_json)
+    default_response_class=FastJSONResponse,
 )
 
-# Create all database tables on startup
-Base.metadata.create_all(bind=engine)
+startup_timer.mark("model and utility imports")
+
+
+@app.on_event("startup")
+def create_database_schema():
+    """Create missing tables when DB_CREATE_ALL is enabled (otherwise Alembic owns the schema)."""
+    if create_schema():
+        logging.getLogger(__name__).info("Database schema created (DB_CREATE_ALL)")
+
+
+@app.on_event("startup")
+def check_deployment():
+    """In multi-worker mode, report components whose state is per process (utils.deployment)."""
+    from utils.deployment import APP_WORKERS, WORKER_ID, check_shared_state
+    if APP_WORKERS > 1:
+        logging.getLogger(__name__).info(f"Worker {WORKER_ID} starting ({APP_WORKERS} workers)")
+    check_shared_state()
+
+
+@app.on_event("startup")
+def warm_auth_caches():
+    """Load revoked tokens into memory so authentication needs no DB lookups; keep them synced."""
+    from utils.auth_cache import warm_token_blacklist
+    warm_token_blacklist()
+
+
+@app.on_event("startup")
+async def configure_blocking_work():
+    """Size the worker pools and flag SQL executed on the event loop."""
+    from utils.blocking import configure_thread_limits, install_blocking_call_detector
+    configure_thread_limits()
+    install_blocking_call_detector(engine)
+    if read_engine is not engine:
+        install_blocking_call_detector(read_engine)
+
+
+@app.on_event("startup")
+async def start_metrics():
+    """Instrument the DB engine and start sampling event loop lag."""
+    install_db_instrumentation(engine)
+    if read_engine is not engine:
+        install_db_instrumentation(read_engine)
+    if async_engine is not None:
+        install_db_instrumentation(async_engine.sync_engine)
+    if async_read_engine is not async_engine:
+        install_db_instrumentation(async_read_engine.sync_engine)
+    start_event_loop_lag_sampler()
+    metrics.start_publishing()
+
+
+@app.on_event("startup")
+def start_audit_sink():
+    """Start the background writer for audit log events."""
+    audit_sink.start()
+
+
+@app.on_event("startup")
+def start_job_workers():
+    """Start the background job workers (JOB_EXECUTOR=threads)."""
+    job_queue.start()
+
+
+@app.on_event("startup")
+def warm_ai_stack():
+    """With AI_WARMUP, load the AI stack in the background without delaying readiness."""
+    import AI
+    if AI.AI_WARMUP:
+        threading.Thread(target=AI.warm_up, name="ai-warmup", daemon=True).start()
+
+
+@app.on_event("startup")
+def report_startup_timing():
+    """Log where startup time went (runs last; see utils.startup_timing)."""
+    startup_timer.mark("startup hooks")
+    startup_timer.report()
+    startup_timer.uninstall()
+
+
+@app.on_event("shutdown")
+def flush_audit_sink():
+    """Write every queued audit log event before the process exits."""
+    audit_sink.stop()
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    """Let running jobs finish; unfinished ones are requeued by the next worker."""
+    job_queue.stop()
+
+
+@app.on_event("shutdown")
+def stop_token_maintenance():
+    """Stop the token blacklist sync and purge thread."""
+    from utils.auth_cache import token_blacklist_cache
+    token_blacklist_cache.stop()
+
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    """Finish queued password hash operations and stop the password pool."""
+    from utils.passwords import password_pool
+    password_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_metrics():
+    """Stop the event loop lag sampler and the metrics publisher."""
+    await stop_event_loop_lag_sampler()
+    metrics.stop_publishing()
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    """Close pooled connections of the async engines (DB_ASYNC_ENABLED)."""
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 # Configure CORS middleware
 # Allows requests from frontend applications running on specified origins
@@ -170,14 +299,24 @@ app.add_middleware(
     allow_headers=["*"],             # Allow all headers
 )
 
-# Add no-cache middleware to prevent browser caching of API responses
-# This fixes API_VALIDATION_ERROR issues after re-login
-app.add_middleware(NoCacheMiddleware)
+# Per-route cache policy: no-store by default (prevents stale responses and the
+# API_VALIDATION_ERROR issues after re-login); routes using
+# utils.http_cache.conditional_get get private ETag revalidation instead
+app.add_middleware(HTTPCacheMiddleware)
+
+# gzip / brotli for JSON, CSV and text bodies, including streamed exports
+# (levels per route class, see utils.compression)
+app.add_middleware(CompressionMiddleware)
+
+# Request latency / DB metrics (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
 
 # Register API routers
 # Admin and User Management
 app.include_router(userRoute)       # User authentication and management
 app.include_router(adminRoute)      # Admin-specific operations
+app.include_router(metricsRoute)    # Admin-only Prometheus metrics
+app.include_router(jobRoute)        # Background job status and results
 
 # BOQ (Bill of Quantities) Management
 app.include_router(projectRoute)    # Project CRUD operations
@@ -221,17 +360,22 @@ app.include_router(exchangeRateRoute)   # USD/AED live exchange rate
 
 # app.include_router(pma)    # Project Management Assistant (PMA) routes
 
+startup_timer.mark("app setup")
+
 # Application entry point
 if __name__ == "__main__":
     # # SSL certificate paths (uncomment for HTTPS)
     # ssl_certfile = os.path.join(os.path.dirname(__file__), "certs", "cert.pem")
     # ssl_keyfile = os.path.join(os.path.dirname(__file__), "certs", "key.pem")
 
-    # Start the HTTP server
+    # Start the HTTP server; APP_WORKERS > 1 runs that many worker processes
+    # (utils.deployment), which uvicorn can only import from a module path
+    from utils.deployment import APP_WORKERS
     uvicorn.run(
-        app,
+        "main:app" if APP_WORKERS > 1 else app,
         host="0.0.0.0",
         port=8003,
+        workers=APP_WORKERS,
         timeout_keep_alive=600,
         # ssl_certfile=ssl_certfile,
         # ssl_keyfile=ssl_keyfile
@@ -3,9 +3,23 @@ Access Control Utilities
 
 Centralized access control and permission checking functions.
 Eliminates duplication across route files.
+
+Project permissions are answered from an AccessMatrix: every
+UserProjectAccess row of a user (BOQ, RAN, ROP and DU) loaded with a single
+query and indexed by project id. The matrix is memoized on the request's
+database session and cached per user across requests in the application
+cache (utils.cache, shared by workers with the Redis backend); entries are
+tagged per user and invalidated by invalidate_access_matrix() whenever access
+rows change.
+
+Routes on `get_async_db` use the *_async variants, which share the same
+matrix cache and only differ in how a cache miss is loaded.
 """
 
-from typing import List, Optional, Set, Dict, Any
+import os
+from threading import Lock
+from typing import List, Optional, Set, Dict, Any, FrozenSet, Tuple, Union
+from sqlalchemy import false, or_, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, Request, status
 
@@ -13,25 +27,227 @@ from Models.Admin.User import User, UserProjectAccess
 from Models.BOQ.Project import Project
 from Models.RAN.RANProject import RanProject
 from Models.LE.ROPProject import ROPProject
+from utils.cache import cache
 import importlib
 du_project_module = importlib.import_module("Models.DU.DU_Project")
 DUProject = du_project_module.DUProject
 
 
-def check_project_access(
+# Define permission hierarchy
+PERMISSION_HIERARCHY = {
+    "view": ("view", "edit", "all"),
+    "edit": ("edit", "all"),
+    "all": ("all",)
+}
+
+# Project sections: 1=BOQ, 2=RAN, 3=ROP, 4=DU
+SECTION_KEYS = {1: "boq", 2: "ran", 3: "rop", 4: "du"}
+
+SECTION_MODELS = {"boq": Project, "ran": RanProject, "rop": ROPProject, "du": DUProject}
+
+# Seconds a cached matrix may be reused (bounds staleness across workers)
+ACCESS_MATRIX_TTL_SECONDS = int(os.getenv("ACCESS_MATRIX_TTL_SECONDS", "60"))
+
+
+class AccessMatrix:
+    """
+    All project permissions of one user, indexed by section and project id.
+
+    Attributes:
+        user_id: Owner of the matrix
+        role_name: Role the matrix was built for
+        grants: {"boq"|"ran"|"rop"|"du": {pid_po: permission_level}}
+    """
+
+    def __init__(self, user_id: int, role_name: str, grants: Dict[str, Dict[str, str]]):
+        self.user_id = user_id
+        self.role_name = role_name
+        self.grants = grants
+        self._project_ids = {kind: frozenset(levels) for kind, levels in grants.items()}
+
+    @staticmethod
+    def grants_statement(user_id: int):
+        """SELECT of every UserProjectAccess row of a user."""
+        return select(
+            UserProjectAccess.project_id,
+            UserProjectAccess.Ranproject_id,
+            UserProjectAccess.Ropproject_id,
+            UserProjectAccess.DUproject_id,
+            UserProjectAccess.permission_level
+        ).where(UserProjectAccess.user_id == user_id)
+
+    @classmethod
+    def from_rows(cls, current_user: User, rows) -> "AccessMatrix":
+        """Index UserProjectAccess rows by section and project id."""
+        grants: Dict[str, Dict[str, str]] = {kind: {} for kind in SECTION_KEYS.values()}
+        for row in rows:
+            for kind, pid in (("boq", row.project_id), ("ran", row.Ranproject_id),
+                              ("rop", row.Ropproject_id), ("du", row.DUproject_id)):
+                if pid:
+                    grants[kind][pid] = row.permission_level
+        return cls(current_user.id, current_user.role.name, grants)
+
+    @classmethod
+    def load(cls, current_user: User, db: Session) -> "AccessMatrix":
+        """Build the matrix for a user with a single UserProjectAccess query."""
+        if current_user.role.name == "senior_admin":
+            return cls.from_rows(current_user, [])
+        return cls.from_rows(current_user, db.execute(cls.grants_statement(current_user.id)).all())
+
+    @classmethod
+    async def load_async(cls, current_user: User, db) -> "AccessMatrix":
+        """Async variant of load() for an AsyncSession."""
+        if current_user.role.name == "senior_admin":
+            return cls.from_rows(current_user, [])
+        result = await db.execute(cls.grants_statement(current_user.id))
+        return cls.from_rows(current_user, result.all())
+
+    @property
+    def is_senior_admin(self) -> bool:
+        return self.role_name == "senior_admin"
+
+    def permission_level(self, kind: str, project_id: Optional[str]) -> Optional[str]:
+        """Return the user's permission level on a project, or None if no access row exists."""
+        if self.is_senior_admin:
+            return "all"
+        return self.grants[kind].get(project_id)
+
+    def has_permission(
+        self,
+        kind: str,
+        project_id: Optional[str],
+        required_permission: str = "view",
+        admin_full_access: bool = False
+    ) -> bool:
+        """
+        Check a permission in O(1).
+
+        Args:
+            kind: Project section key ("boq", "ran", "rop" or "du")
+            project_id: Project pid_po
+            required_permission: Required permission level ("view", "edit", or "all")
+            admin_full_access: Treat any access row as full access for admins
+                               (project-level routes grant admins full control)
+        """
+        if self.is_senior_admin:
+            return True
+
+        level = self.grants[kind].get(project_id)
+        if level is None:
+            return False
+
+        if admin_full_access and self.role_name == "admin":
+            return True
+
+        return level in PERMISSION_HIERARCHY.get(required_permission, ())
+
+    def project_ids(self, kind: str) -> Optional[FrozenSet[str]]:
+        """Return accessible project ids for a section, or None when unrestricted (senior admin)."""
+        if self.is_senior_admin:
+            return None
+        return self._project_ids[kind]
+
+
+# Matrices live in the shared application cache (utils.cache), tagged per user
+MATRIX_CACHE_NAMESPACE = "access_matrix"
+_ALL_MATRICES_TAG = "access:all"
+_matrix_lock = Lock()
+_access_version = 0
+
+
+def _user_tag(user_id: int) -> str:
+    return f"access:user:{user_id}"
+
+
+def invalidate_access_matrix(user_id: Optional[int] = None) -> None:
+    """
+    Drop cached access matrices after UserProjectAccess rows change.
+
+    Args:
+        user_id: User whose access changed, or None to drop every cached matrix
+                 (e.g. when a project id is renamed or a project is deleted)
+    """
+    global _access_version
+    with _matrix_lock:
+        _access_version += 1
+    cache.invalidate_tags(_ALL_MATRICES_TAG if user_id is None else _user_tag(user_id))
+
+
+def _cached_access_matrix(current_user: User, db) -> Tuple[Optional[AccessMatrix], int]:
+    """Return (memoized or cached matrix or None, access version at lookup time)."""
+    memo_key = ("access_matrix", current_user.id)
+    matrix = db.info.get(memo_key)
+    if matrix is not None and matrix.role_name == current_user.role.name:
+        return matrix, _access_version
+
+    with _matrix_lock:
+        version = _access_version
+    matrix = cache.get(MATRIX_CACHE_NAMESPACE, current_user.id)
+    if matrix is not None and matrix.role_name == current_user.role.name:
+        db.info[memo_key] = matrix
+        return matrix, version
+    return None, version
+
+
+def _remember_access_matrix(db, matrix: AccessMatrix, version: int) -> AccessMatrix:
+    """Memoize a freshly loaded matrix on the session and in the shared cache."""
+    with _matrix_lock:
+        # Skip caching if access changed while we were loading, or if it was read
+        # from a replica (it may predate a grant that invalidated the cache)
+        fresh = version == _access_version and not db.info.get("read_only")
+    if fresh:
+        cache.set(
+            MATRIX_CACHE_NAMESPACE, matrix.user_id, matrix,
+            ttl=ACCESS_MATRIX_TTL_SECONDS, tags=(_user_tag(matrix.user_id), _ALL_MATRICES_TAG),
+        )
+    db.info[("access_matrix", matrix.user_id)] = matrix
+    return matrix
+
+
+def get_access_matrix(current_user: User, db: Session) -> AccessMatrix:
+    """
+    Return the AccessMatrix for the current user.
+
+    The matrix is memoized on the session (one per request) and cached per user
+    across requests until invalidate_access_matrix() is called or the TTL expires.
+    """
+    matrix, version = _cached_access_matrix(current_user, db)
+    if matrix is not None:
+        return matrix
+    return _remember_access_matrix(db, AccessMatrix.load(current_user, db), version)
+
+
+async def get_access_matrix_async(current_user: User, db) -> AccessMatrix:
+    """Async variant of get_access_matrix() for routes using get_async_db."""
+    matrix, version = _cached_access_matrix(current_user, db)
+    if matrix is not None:
+        return matrix
+    return _remember_access_matrix(db, await AccessMatrix.load_async(current_user, db), version)
+
+
+def _project_pid(project: Union[Any, str, None]) -> Optional[str]:
+    """Accept either a project model instance or its pid_po."""
+    return getattr(project, "pid_po", project)
+
+
+def check_section_access(
     current_user: User,
-    project: Project,
+    kind: str,
+    project: Union[Any, str, None],
     db: Session,
-    required_permission: str = "view"
+    required_permission: str = "view",
+    admin_full_access: bool = False
 ) -> bool:
     """
-    Helper function to check if a user has access to a project with the required permission level.
+    Check if a user has the required permission on a project of any section.
 
     Args:
         current_user: The current user
-        project: The project to check access for
+        kind: Project section key ("boq", "ran", "rop" or "du")
+        project: Project model instance or its pid_po
         db: Database session
         required_permission: Required permission level ("view", "edit", or "all")
+        admin_full_access: Give admins full control over projects they can access
 
     Returns:
         bool: True if user has required permission, False otherwise
@@ -39,57 +255,151 @@ def check_project_access(
     if not project:
         return False  # No project, no access
 
-    # Senior admins have access to everything
-    if current_user.role.name == "senior_admin":
-        return True
+    return get_access_matrix(current_user, db).has_permission(
+        kind, _project_pid(project), required_permission, admin_full_access
+    )
 
-    # Check user's project access
-    access = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id,
-        UserProjectAccess.project_id == project.pid_po
-    ).first()
 
-    if not access:
-        return False
+def check_project_access(
+    current_user: User,
+    project: Union[Project, str, None],
+    db: Session,
+    required_permission: str = "view",
+    admin_full_access: bool = False
+) -> bool:
+    """
+    Helper function to check if a user has access to a project with the required permission level.
 
-    # Define permission hierarchy
-    permission_hierarchy = {
-        "view": ["view", "edit", "all"],
-        "edit": ["edit", "all"],
-        "all": ["all"]
-    }
+    Args:
+        current_user: The current user
+        project: The BOQ project (or its pid_po) to check access for
+        db: Database session
+        required_permission: Required permission level ("view", "edit", or "all")
+        admin_full_access: Give admins full control over projects they can access
 
-    return access.permission_level in permission_hierarchy.get(required_permission, [])
+    Returns:
+        bool: True if user has required permission, False otherwise
+    """
+    return check_section_access(current_user, "boq", project, db, required_permission, admin_full_access)
 
 
-def get_user_accessible_projects(current_user: User, db: Session) -> List[Project]:
+def check_ran_project_access(
+    current_user: User,
+    project: Union[RanProject, str, None],
+    db: Session,
+    required_permission: str = "view",
+    admin_full_access: bool = False
+) -> bool:
+    """Check access to a RAN project (model instance or pid_po)."""
+    return check_section_access(current_user, "ran", project, db, required_permission, admin_full_access)
+
+
+def check_rop_project_access(
+    current_user: User,
+    project: Union[ROPProject, str, None],
+    db: Session,
+    required_permission: str = "view",
+    admin_full_access: bool = False
+) -> bool:
+    """Check access to a ROP project (model instance or pid_po)."""
+    return check_section_access(current_user, "rop", project, db, required_permission, admin_full_access)
+
+
+def check_du_project_access(
+    current_user: User,
+    project: Union[Any, str, None],
+    db: Session,
+    required_permission: str = "view",
+    admin_full_access: bool = False
+) -> bool:
+    """Check access to a DU project (model instance or pid_po)."""
+    return check_section_access(current_user, "du", project, db, required_permission, admin_full_access)
+
+
+def get_accessible_project_ids(current_user: User, db: Session, kind: str) -> Optional[FrozenSet[str]]:
     """
-    Get all projects that the current user has access to.
+    Get the project ids a user can access in one section.
 
     Args:
         current_user: The current user
         db: Database session
+        kind: Project section key ("boq", "ran", "rop" or "du")
 
     Returns:
-        List[Project]: List of accessible projects
+        Optional[FrozenSet[str]]: Accessible pid_po values, or None for senior admins (no restriction)
     """
-    # Senior admin can see all projects
-    if current_user.role.name == "senior_admin":
-        return db.query(Project).all()
+    return get_access_matrix(current_user, db).project_ids(kind)
 
-    # For other users, get projects they have access to
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
 
-    if not user_accesses:
+def apply_project_filter(query, column, project_ids: Optional[FrozenSet[str]]):
+    """
+    Restrict a Query or Select to the given project ids (None means unrestricted).
+
+    Args:
+        query: SQLAlchemy Query or Select to filter
+        column: Column holding the project pid_po
+        project_ids: Result of get_accessible_project_ids()
+    """
+    if project_ids is None:
+        return query
+    if not project_ids:
+        return query.filter(false())  # This will return no results
+    return query.filter(column.in_(project_ids))
+
+
+def filter_query_by_project_access(current_user: User, query, column, db: Session, kind: str):
+    """
+    Restrict a query to rows whose project column the user can access.
+
+    Args:
+        current_user: The current user
+        query: SQLAlchemy query to filter
+        column: Column holding the project pid_po
+        db: Database session
+        kind: Project section key ("boq", "ran", "rop" or "du")
+    """
+    return apply_project_filter(query, column, get_accessible_project_ids(current_user, db, kind))
+
+
+async def filter_query_by_project_access_async(current_user: User, query, column, db, kind: str):
+    """Async variant of filter_query_by_project_access() for routes using get_async_db."""
+    matrix = await get_access_matrix_async(current_user, db)
+    return apply_project_filter(query, column, matrix.project_ids(kind))
+
+
+def get_accessible_projects(current_user: User, db: Session, kind: str) -> List[Any]:
+    """
+    Get the project rows of one section that the current user has access to.
+
+    Args:
+        current_user: The current user
+        db: Database session
+        kind: Project section key ("boq", "ran", "rop" or "du")
+
+    Returns:
+        List: Project, RanProject, ROPProject or DUProject instances
+    """
+    model = SECTION_MODELS[kind]
+    project_ids = get_accessible_project_ids(current_user, db, kind)
+    if project_ids is None:
+        return db.query(model).all()
+    if not project_ids:
         return []
+    return db.query(model).filter(model.pid_po.in_(project_ids)).all()
 
-    # Get project IDs the user has access to
-    accessible_project_ids = [access.project_id for access in user_accesses]
 
-    # Return projects that match those IDs
-    return db.query(Project).filter(Project.pid_po.in_(accessible_project_ids)).all()
+def get_user_accessible_projects(current_user: User, db: Session) -> List[Project]:
+    """
+    Get all projects that the current user has access to.
+
+    Args:
+        current_user: The current user
+        db: Database session
+
+    Returns:
+        List[Project]: List of accessible projects
+    """
+    return get_accessible_projects(current_user, db, "boq")
 
 
 def get_user_accessible_project_ids(current_user: User, db: Session) -> List[str]:
@@ -107,12 +417,7 @@ def get_user_accessible_project_ids(current_user: User, db: Session) -> List[str
     if current_user.role.name == "senior_admin":
         return [p.pid_po for p in db.query(Project.pid_po).all()]
 
-    # For other users, get project IDs they have access to
-    return [
-        access.project_id for access in db.query(UserProjectAccess.project_id).filter(
-            UserProjectAccess.user_id == current_user.id
-        ).all()
-    ]
+    return list(get_accessible_project_ids(current_user, db, "boq"))
 
 
 def get_client_ip(request: Request) -> str:
@@ -191,20 +496,9 @@ def get_all_user_accessible_project_ids(current_user: User, db: Session) -> Dict
         result["du"] = {p.pid_po for p in db.query(DUProject.pid_po).all()}
         return result
 
-    # Get user's project access records
-    user_accesses = db.query(UserProjectAccess).filter(
-        UserProjectAccess.user_id == current_user.id
-    ).all()
-
-    for access in user_accesses:
-        if access.project_id:
-            result["boq"].add(access.project_id)
-        if access.Ranproject_id:
-            result["ran"].add(access.Ranproject_id)
-        if access.Ropproject_id:
-            result["rop"].add(access.Ropproject_id)
-        if access.DUproject_id:
-            result["du"].add(access.DUproject_id)
+    matrix = get_access_matrix(current_user, db)
+    for kind in result:
+        result[kind] = set(matrix.project_ids(kind))
 
     return result
 
@@ -224,6 +518,35 @@ def get_all_accessible_project_ids_flat(current_user: User, db: Session) -> Set[
     return projects_by_type["boq"] | projects_by_type["ran"] | projects_by_type["rop"] | projects_by_type["du"]
 
 
+async def get_all_accessible_project_ids_flat_async(current_user: User, db) -> Optional[Set[str]]:
+    """
+    Async variant of get_all_accessible_project_ids_flat().
+
+    Returns:
+        Optional[Set[str]]: Combined accessible project IDs, or None for senior admins (no restriction)
+    """
+    matrix = await get_access_matrix_async(current_user, db)
+    if matrix.is_senior_admin:
+        return None
+    return set().union(*(matrix.project_ids(kind) for kind in SECTION_KEYS.values()))
+
+
+def _shared_project_conditions(accessible_projects: Dict[str, Set[str]]) -> List[Any]:
+    """Build UserProjectAccess filters matching any of the given projects."""
+    conditions = []
+
+    if accessible_projects["boq"]:
+        conditions.append(UserProjectAccess.project_id.in_(accessible_projects["boq"]))
+    if accessible_projects["ran"]:
+        conditions.append(UserProjectAccess.Ranproject_id.in_(accessible_projects["ran"]))
+    if accessible_projects["rop"]:
+        conditions.append(UserProjectAccess.Ropproject_id.in_(accessible_projects["rop"]))
+    if accessible_projects["du"]:
+        conditions.append(UserProjectAccess.DUproject_id.in_(accessible_projects["du"]))
+
+    return conditions
+
+
 def get_users_sharing_projects(current_user: User, db: Session) -> Set[int]:
     """
     Get all user IDs that share at least one project with the current user.
@@ -237,8 +560,6 @@ def get_users_sharing_projects(current_user: User, db: Session) -> Set[int]:
     Returns:
         Set[int]: User IDs that share projects with current user
     """
-    from sqlalchemy import or_
-
     if current_user.role.name == "senior_admin":
         return {u.id for u in db.query(User.id).all()}
 
@@ -246,16 +567,7 @@ def get_users_sharing_projects(current_user: User, db: Session) -> Set[int]:
     accessible_projects = get_all_user_accessible_project_ids(current_user, db)
 
     # Build filter conditions for each project type
-    conditions = []
-
-    if accessible_projects["boq"]:
-        conditions.append(UserProjectAccess.project_id.in_(accessible_projects["boq"]))
-    if accessible_projects["ran"]:
-        conditions.append(UserProjectAccess.Ranproject_id.in_(accessible_projects["ran"]))
-    if accessible_projects["rop"]:
-        conditions.append(UserProjectAccess.Ropproject_id.in_(accessible_projects["rop"]))
-    if accessible_projects["du"]:
-        conditions.append(UserProjectAccess.DUproject_id.in_(accessible_projects["du"]))
+    conditions = _shared_project_conditions(accessible_projects)
 
     # If user has no project access, return only their own ID
     if not conditions:
@@ -274,6 +586,27 @@ def get_users_sharing_projects(current_user: User, db: Session) -> Set[int]:
     return shared_user_ids
 
 
+async def get_users_sharing_projects_async(current_user: User, db) -> Set[int]:
+    """Async variant of get_users_sharing_projects() for routes using get_async_db."""
+    if current_user.role.name == "senior_admin":
+        result = await db.execute(select(User.id))
+        return set(result.scalars().all())
+
+    matrix = await get_access_matrix_async(current_user, db)
+    conditions = _shared_project_conditions(
+        {kind: set(matrix.project_ids(kind)) for kind in SECTION_KEYS.values()}
+    )
+    if not conditions:
+        return {current_user.id}
+
+    result = await db.execute(
+        select(UserProjectAccess.user_id).where(or_(*conditions)).distinct()
+    )
+    shared_user_ids = set(result.scalars().all())
+    shared_user_ids.add(current_user.id)
+    return shared_user_ids
+
+
 def can_admin_manage_project(current_user: User, project_id: str, section: int, db: Session) -> bool:
     """
     Check if an admin can manage (grant/revoke access) for a specific project.
@@ -294,36 +627,9 @@ def can_admin_manage_project(current_user: User, project_id: str, section: int,
         return False
 
     # Check if admin has "all" permission on this project
-    accessible_projects = get_all_user_accessible_project_ids(current_user, db)
-
-    section_map = {1: "boq", 2: "ran", 3: "rop", 4: "du"}
-    project_type = section_map.get(section)
-
-    if not project_type or project_id not in accessible_projects[project_type]:
+    project_type = SECTION_KEYS.get(section)
+    if not project_type:
         return False
 
     # Check permission level - admin needs "all" permission to manage
-    if section == 1:
-        access = db.query(UserProjectAccess).filter(
-            UserProjectAccess.user_id == current_user.id,
-            UserProjectAccess.project_id == project_id
-        ).first()
-    elif section == 2:
-        access = db.query(UserProjectAccess).filter(
-            UserProjectAccess.user_id == current_user.id,
-            UserProjectAccess.Ranproject_id == project_id
-        ).first()
-    elif section == 3:
-        access = db.query(UserProjectAccess).filter(
-            UserProjectAccess.user_id == current_user.id,
-            UserProjectAccess.Ropproject_id == project_id
-        ).first()
-    elif section == 4:
-        access = db.query(UserProjectAccess).filter(
-            UserProjectAccess.user_id == current_user.id,
-            UserProjectAccess.DUproject_id == project_id
-        ).first()
-    else:
-        return False
-
-    return access and access.permission_level == "all"
+    return get_access_matrix(current_user, db).permission_level(project_type, project_id) == "all"
@@ -0,0 +1,314 @@
+"""
+audit_log.py -
+Write-Behind Audit Log Sink
+
+Every mutating route records an AuditLog row. Writing it inline costs an
+extra INSERT + COMMIT round trip on the request path (and a second commit on
+bulk endpoints after their main transaction). This module takes those writes
+off the critical path: routes enqueue structured events and a background
+flusher inserts them in batches with `bulk_insert_mappings`.
+
+Flushing:
+- A batch is written when AUDIT_BATCH_SIZE events are queued, or
+  AUDIT_FLUSH_INTERVAL_MS after the first event of the batch arrived.
+- `audit_sink.flush()` blocks until every event queued so far is written.
+- `audit_sink.stop()` (application shutdown / interpreter exit) drains the
+  queue before returning.
+- If the queue is full the event is written by the caller instead of dropped.
+- A failing batch is retried row by row so one bad event does not lose the
+  rest of the batch.
+
+Synchronous mode (AUDIT_LOG_SYNC=true) writes each event on the caller's
+session and commits immediately, so tests can assert on audit rows right
+after a request.
+
+Usage:
+    from utils.audit_log import create_audit_log
+
+    create_audit_log(
+        db=db,
+        user_id=current_user.id,
+        action="update_project",
+        resource_type="project",
+        resource_id=project.pid_po,
+        project_id=project.pid_po,
+        section=1,
+    )
+
+Environment Variables (optional):
+- AUDIT_LOG_SYNC: "true" to write audit events inline (default: false)
+- AUDIT_BATCH_SIZE: Maximum events per INSERT batch (default: 100)
+- AUDIT_FLUSH_INTERVAL_MS: Maximum delay before a queued event is written (default: 500)
+- AUDIT_QUEUE_MAX_SIZE: Maximum queued events (default: 10000)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from Database.session import Session as SessionLocal
+from Models.Admin.AuditLog import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_SYNC = os.getenv("AUDIT_LOG_SYNC", "false").lower() == "true"
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"))
+AUDIT_QUEUE_MAX_SIZE = int(os.getenv("AUDIT_QUEUE_MAX_SIZE", "10000"))
+
+# Queue marker that makes the flusher write its current batch immediately
+_FLUSH = object()
+
+
+class AuditSink:
+    """
+    Batches audit events and writes them from a background thread.
+
+    The flusher thread is started lazily on the first event (or explicitly by
+    `start()`), so scripts that never run the application startup hooks still
+    get their events written.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS,
+        max_queue_size: int = AUDIT_QUEUE_MAX_SIZE,
+        synchronous: bool = AUDIT_LOG_SYNC,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000.0
+        self.synchronous = synchronous
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = Lock()
+        self._atexit_registered = False
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+
+    def record(self, db: Optional[Session] = None, **fields) -> None:
+        """
+        Queue one audit event.
+
+        Args:
+            db: Caller's session; only used in synchronous mode
+            **fields: AuditLog column values (user_id, action, resource_type, ...)
+        """
+        fields.setdefault("timestamp", datetime.now(timezone.utc))
+
+        if self.synchronous:
+            self._write_inline(db, fields)
+            return
+
+        self.start()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            logger.warning("Audit log queue is full; writing event on the request thread")
+            self._write([fields])
+
+    def _write_inline(self, db: Optional[Session], fields: Dict[str, Any]) -> None:
+        """Synchronous mode: add the row on the caller's session and commit."""
+        if db is None or db.info.get("read_only"):
+            self._write([fields])
+            return
+        try:
+            db.add(AuditLog(**fields))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to create audit log: {e}")
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+
+    def start(self) -> None:
+        """Start the flusher thread if it is not running."""
+        if self.synchronous or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-log-flusher", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until every event queued before this call has been written.
+
+        Args:
+            timeout: Seconds to wait for the flusher thread (None waits indefinitely)
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._drain()
+            return
+        self._queue.put(_FLUSH)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logger.warning("Timed out waiting for audit log flush")
+                    return
+                self._queue.all_tasks_done.wait(remaining)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher thread after writing everything still queued."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._stopping.set()
+            self._queue.put(_FLUSH)
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("Audit log flusher did not stop in time")
+        self._drain()
+
+    def pending(self) -> int:
+        """Number of events queued and not yet written."""
+        return self._queue.unfinished_tasks
+
+    # ---------------------------
+    # Consumer side
+    # ---------------------------
+
+    def _run(self) -> None:
+        """Flusher thread main loop."""
+        while True:
+            batch, markers = self._next_batch()
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _next_batch(self):
+        """
+        Collect up to batch_size events, waiting at most flush_interval after
+        the first one. A flush marker ends the batch early.
+
+        Returns:
+            (events, number of flush markers consumed)
+        """
+        batch: List[Dict[str, Any]] = []
+        markers = 0
+        try:
+            item = self._queue.get(timeout=self.flush_interval or None)
+        except queue.Empty:
+            return batch, markers
+
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _FLUSH:
+                markers += 1
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch, markers
+
+    def _drain(self) -> None:
+        """Write whatever is left in the queue from the calling thread."""
+        while True:
+            batch: List[Dict[str, Any]] = []
+            taken = 0
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is not _FLUSH:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+            if not taken:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch; on failure retry row by row so one bad event is all that is lost."""
+        if self._insert(batch) or len(batch) == 1:
+            return
+        for fields in batch:
+            self._insert([fields])
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> bool:
+        session = self.session_factory()
+        try:
+            session.bulk_insert_mappings(AuditLog, batch)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Failed to write {len(batch)} audit log entries: {e}")
+            return False
+        finally:
+            session.close()
+
+
+# Global sink instance
+audit_sink = AuditSink()
+
+
+def create_audit_log(
+    db: Optional[Session],
+    user_id: int,
+    action: str,
+    resource_type: str,
+    resource_id: Optional[str] = None,
+    resource_name: Optional[str] = None,
+    details: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    project_id: Optional[str] = None,
+    section: Optional[int] = None
+) -> None:
+    """
+    Record an audit log entry with optional project tracking for access control.
+
+    The entry is written by the background flusher and the caller's
+    transaction is left alone; `db` is only used in synchronous mode.
+    """
+    audit_sink.record(
+        db=db,
+        user_id=user_id,
+        action=action,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        resource_name=resource_name,
+        details=details,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        project_id=project_id,
+        section=section,
+    )
@@ -0,0 +1,518 @@
+"""
+auth_cache.py -
+Authentication Cache Utility
+
+Provides an in-process principal cache and token blacklist for
+`APIs.Core.get_current_user`. Every protected route resolves the current user
+from its bearer token; without a cache that costs a blacklist lookup, a user
+lookup and a lazy role load per request.
+
+Components:
+- PrincipalCache: bounded LRU of resolved principals keyed by token digest.
+  Entries expire with the token's `exp` claim (capped by a max TTL so role
+  changes made by other processes are picked up).
+- TokenBlacklistCache: revoked token digests known to this process plus a
+  Bloom filter of the whole `token_blacklist` table, warmed at startup and
+  synced every few seconds, so non-revoked tokens need no blacklist query.
+  Each sync re-reads the rows blacklisted within an overlap window, since
+  IDENTITY ids are assigned at insert, not commit: a row with a lower id can
+  become visible after a higher one.
+  Its maintenance thread also purges expired blacklist rows and expired or
+  revoked refresh tokens.
+
+Invalidation:
+- /logout blacklists the token and drops its principal
+- role / approval stage updates drop every principal of the target user
+- deleting a User row drops every principal of that user (mapper event)
+
+Usage:
+    from utils.auth_cache import principal_cache, token_blacklist_cache
+
+    revoked = token_blacklist_cache.check(token)   # True / False / None = ask the DB
+    if revoked:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    principal = principal_cache.get(token) if revoked is False else None
+
+Environment Variables (optional):
+- AUTH_CACHE_MAX_ENTRIES: Maximum cached principals (default: 10000)
+- AUTH_CACHE_TTL_SECONDS: Maximum lifetime of a cached principal (default: 300)
+- TOKEN_BLACKLIST_BLOOM_CAPACITY: Revoked tokens the Bloom filter is sized for (default: 100000)
+- TOKEN_BLACKLIST_BLOOM_ERROR_RATE: Target false positive rate (default: 0.001)
+- TOKEN_BLACKLIST_SYNC_SECONDS: Interval of the blacklist sync; a logout on
+  another worker takes effect here within this time (default: 5)
+- TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS: How far back each sync re-reads blacklist
+  rows, to catch logouts that committed late or from a skewed clock (default: 60)
+- TOKEN_PURGE_INTERVAL_SECONDS: Interval of the expired token purge (default: 3600)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, or_
+
+from Models.Admin.User import User
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+TOKEN_BLACKLIST_BLOOM_CAPACITY = int(os.getenv("TOKEN_BLACKLIST_BLOOM_CAPACITY", "100000"))
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = float(os.getenv("TOKEN_BLACKLIST_BLOOM_ERROR_RATE", "0.001"))
+TOKEN_BLACKLIST_SYNC_SECONDS = float(os.getenv("TOKEN_BLACKLIST_SYNC_SECONDS", "5"))
+TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS = float(os.getenv("TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS", "60"))
+TOKEN_PURGE_INTERVAL_SECONDS = float(os.getenv("TOKEN_PURGE_INTERVAL_SECONDS", "3600"))
+
+
+def _utcnow_naive() -> datetime:
+    """Current UTC time as stored in token_blacklist.blacklisted_at (naive)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def token_digest(token: str) -> str:
+    """Return the fixed-length SHA-256 hex digest used to key a token."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedRole:
+    """Detached, read-only snapshot of a Role row."""
+    id: Optional[int]
+    name: Optional[str]
+
+
+@dataclass(frozen=True)
+class CachedPrincipal:
+    """
+    Detached, read-only snapshot of the authenticated User.
+
+    Exposes the same attributes routes read from `current_user`
+    (`id`, `username`, `email`, `role.name` and the approval stage flags),
+    so it can be returned from `get_current_user` in place of the ORM object.
+    """
+    id: int
+    username: str
+    email: Optional[str]
+    role_id: Optional[int]
+    role: CachedRole
+    can_access_approval: bool = False
+    can_access_triggering: bool = False
+    can_access_logistics: bool = False
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedPrincipal":
+        """Build a principal from a loaded User (role must be loadable)."""
+        role = user.role
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role_id=user.role_id,
+            role=CachedRole(id=role.id if role else None, name=role.name if role else None),
+            can_access_approval=bool(user.can_access_approval),
+            can_access_triggering=bool(user.can_access_triggering),
+            can_access_logistics=bool(user.can_access_logistics),
+        )
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache of authenticated principals keyed by token digest.
+
+    Thread-safe; least recently used entries are evicted once `max_entries`
+    is reached.
+
+    Attributes:
+        _entries: Ordered mapping of digest -> (principal, expires_at epoch)
+        _lock: Thread lock for safe concurrent access
+    """
+
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached principals
+            ttl_seconds: Upper bound on how long a principal stays cached
+        """
+        self._entries: "OrderedDict[str, Tuple[CachedPrincipal, float]]" = OrderedDict()
+        self._lock = Lock()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+
+    def get(self, token: str) -> Optional[CachedPrincipal]:
+        """Return the cached principal for a token, or None if missing/expired."""
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= now:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return principal
+
+    def set(self, token: str, principal: CachedPrincipal, token_exp: Optional[float] = None) -> None:
+        """
+        Cache a principal for a token.
+
+        Args:
+            token: Raw bearer token
+            principal: Resolved principal
+            token_exp: Token `exp` claim (epoch seconds); the entry never outlives it
+        """
+        now = time.time()
+        expires_at = now + self._ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        if expires_at <= now:
+            return
+
+        digest = token_digest(token)
+        with self._lock:
+            self._entries[digest] = (principal, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token: str) -> None:
+        """Drop the cached principal for a single token."""
+        with self._lock:
+            self._entries.pop(token_digest(token), None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached principal belonging to a user."""
+        with self._lock:
+            stale = [d for d, (p, _) in self._entries.items() if p.id == user_id]
+            for digest in stale:
+                del self._entries[digest]
+
+    def clear(self) -> None:
+        """Drop all cached principals."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over token digests.
+
+    Answers "definitely not added" or "maybe added"; the false positive rate
+    stays near `error_rate` until more than `capacity` digests are added.
+    Positions come from the digest itself (double hashing), so no extra
+    hashing is done per lookup.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: str):
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: str) -> None:
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class TokenBlacklistCache:
+    """
+    In-process view of the `token_blacklist` table keyed by token digest.
+
+    Two layers:
+    - confirmed: digests known to be revoked (logged out through this
+      process or confirmed by a DB lookup), dropped once the token expires.
+    - bloom: Bloom filter of every non-expired row of the table, kept
+      current by sync() (new rows since the last sync) and rebuilt after
+      each purge. A token missing from it has not been revoked as of the
+      last sync, so it needs no DB lookup.
+
+    check() returns True (revoked), False (not revoked) or None (maybe
+    revoked; the caller must look up the DB).
+    """
+
+    def __init__(self, purge_interval: int = 300):
+        """
+        Initialize the blacklist.
+
+        Args:
+            purge_interval: Seconds between purges of expired confirmed entries (default: 5 minutes)
+        """
+        self._revoked: Dict[str, float] = {}
+        self._bloom = BloomFilter(TOKEN_BLACKLIST_BLOOM_CAPACITY, TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+        self._last_id = 0
+        self._synced_at: Optional[datetime] = None
+        self._recent: Dict[str, datetime] = {}  # Digests read within the overlap window
+        self._lock = Lock()
+        self._purge_interval = purge_interval
+        self._last_purge = time.time()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.warmed = False
+        self.lookups = {"revoked": 0, "clear": 0, "maybe": 0}
+
+    def _purge_expired(self, now: float) -> None:
+        """Remove entries whose token has expired. Caller holds the lock."""
+        if now - self._last_purge < self._purge_interval:
+            return
+        expired = [d for d, exp in self._revoked.items() if exp <= now]
+        for digest in expired:
+            del self._revoked[digest]
+        self._last_purge = now
+
+    def add(self, token: str, expires_at: Optional[float] = None) -> None:
+        """
+        Mark a token as revoked.
+
+        Args:
+            token: Raw bearer token
+            expires_at: Token expiry (epoch seconds); defaults to never
+        """
+        self.add_digest(token_digest(token), expires_at)
+
+    def add_digest(self, digest: str, expires_at: Optional[float] = None) -> None:
+        """Mark a token digest as revoked."""
+        with self._lock:
+            self._revoked[digest] = float(expires_at) if expires_at is not None else float("inf")
+            self._bloom.add(digest)
+
+    def check(self, token: str) -> Optional[bool]:
+        """
+        Return True if the token is revoked, False if it is not, or None if
+        only the database can tell (Bloom filter hit, or not warmed yet).
+        """
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            if digest in self._revoked:
+                result = True
+            elif self.warmed and digest not in self._bloom:
+                result = False
+            else:
+                result = None
+            self.lookups["revoked" if result else "clear" if result is False else "maybe"] += 1
+        return result
+
+    def contains(self, token: str) -> bool:
+        """Return True if the token is known to be revoked (no DB lookup)."""
+        return self.check(token) is True
+
+    def warm(self, db) -> int:
+        """
+        Rebuild the Bloom filter from all non-expired blacklist rows.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of revoked tokens loaded
+        """
+        from Models.Admin.TokenBlacklist import TokenBlacklist
+
+        # Rows committed while loading arrive with the next sync() (see _overlap_rows)
+        synced_at = _utcnow_naive()
+        last_id = db.query(func.max(TokenBlacklist.id)).scalar() or 0
+        # expires_at is stored as a naive local timestamp (see /logout)
+        digests = [row.token_digest for row in db.query(TokenBlacklist.token_digest).filter(
+            TokenBlacklist.expires_at > datetime.now()
+        )]
+
+        bloom = BloomFilter(max(TOKEN_BLACKLIST_BLOOM_CAPACITY, 2 * len(digests)), TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+        for digest in digests:
+            bloom.add(digest)
+        with self._lock:
+            for digest in self._revoked:
+                bloom.add(digest)
+            self._bloom = bloom
+            self._last_id = max(self._last_id, last_id)
+            self._synced_at = synced_at
+            self._recent.clear()
+            self.warmed = True
+        return len(digests)
+
+    def sync(self, db) -> int:
+        """
+        Add blacklist rows created since the last sync (e.g. logouts handled
+        by other workers) to the Bloom filter.
+
+        Rows with an id above the highest one seen are read, and so are all
+        rows blacklisted within TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS before the
+        previous sync: ids are assigned at insert, so a concurrent logout with
+        a lower id may only have committed after a higher one was read.
+
+        Returns:
+            int: Number of new rows
+        """
+        from Models.Admin.TokenBlacklist import TokenBlacklist
+
+        if not self.warmed:
+            return self.warm(db)
+        synced_at = _utcnow_naive()
+        since = self._synced_at - timedelta(seconds=TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS)
+        rows = db.query(
+            TokenBlacklist.id, TokenBlacklist.token_digest, TokenBlacklist.blacklisted_at
+        ).filter(
+            or_(TokenBlacklist.id > self._last_id, TokenBlacklist.blacklisted_at >= since)
+        ).all()
+        added = 0
+        with self._lock:
+            self._recent = {d: at for d, at in self._recent.items() if at >= since}
+            for row in rows:
+                self._last_id = max(self._last_id, row.id)
+                if row.token_digest in self._recent:
+                    continue
+                # Rows older than the window are still remembered until the next sync
+                self._recent[row.token_digest] = max(row.blacklisted_at or since, since)
+                self._bloom.add(row.token_digest)
+                added += 1
+            self._synced_at = synced_at
+            overfull = self._bloom.count > self._bloom.capacity
+        if overfull:
+            self.warm(db)
+        return added
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._revoked.clear()
+            self._bloom = BloomFilter(TOKEN_BLACKLIST_BLOOM_CAPACITY, TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+            self._last_id = 0
+            self._synced_at = None
+            self._recent.clear()
+            self.warmed = False
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    # ---------------------------
+    # Maintenance thread
+    # ---------------------------
+
+    def start(self) -> None:
+        """Start syncing the Bloom filter and purging expired token rows in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._maintenance, name="token-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the maintenance thread."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join(timeout)
+
+    def _maintenance(self) -> None:
+        from Database.session import Session
+
+        next_purge = time.monotonic() + TOKEN_PURGE_INTERVAL_SECONDS
+        while not self._stopping.wait(TOKEN_BLACKLIST_SYNC_SECONDS):
+            db = Session()
+            try:
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + TOKEN_PURGE_INTERVAL_SECONDS
+                    blacklisted, refresh = purge_expired_tokens(db)
+                    if blacklisted or refresh:
+                        logger.info(f"Purged {blacklisted} expired blacklist rows and {refresh} refresh tokens")
+                    self.warm(db)
+                else:
+                    self.sync(db)
+            except Exception as e:
+                logger.warning(f"Token blacklist maintenance failed: {e}")
+            finally:
+                db.close()
+
+    def render_prometheus(self) -> List[str]:
+        """Metrics lines for utils.metrics."""
+        with self._lock:
+            lookups = dict(self.lookups)
+            bloom_count = self._bloom.count
+        lines = [
+            "# HELP token_blacklist_lookups_total Blacklist checks by result (maybe = DB lookup needed).",
+            "# TYPE token_blacklist_lookups_total counter",
+        ]
+        for result, count in sorted(lookups.items()):
+            lines.append(f'token_blacklist_lookups_total{{result="{result}"}} {count}')
+        lines.append("# HELP token_blacklist_bloom_entries Digests in the blacklist Bloom filter.")
+        lines.append("# TYPE token_blacklist_bloom_entries gauge")
+        lines.append(f"token_blacklist_bloom_entries {bloom_count}")
+        return lines
+
+
+def purge_expired_tokens(db) -> Tuple[int, int]:
+    """
+    Delete expired blacklist rows and expired or revoked refresh tokens.
+
+    Returns:
+        tuple: (blacklist rows deleted, refresh tokens deleted)
+    """
+    from Models.Admin.RefreshToken import RefreshToken
+    from Models.Admin.TokenBlacklist import TokenBlacklist
+
+    # Blacklist expiry is naive local time (see /logout), refresh token expiry UTC
+    blacklisted = db.query(TokenBlacklist).filter(
+        TokenBlacklist.expires_at <= datetime.now()
+    ).delete(synchronize_session=False)
+    refresh = db.query(RefreshToken).filter(
+        (RefreshToken.revoked == True) | (RefreshToken.expires_at <= datetime.now(timezone.utc))  # noqa: E712
+    ).delete(synchronize_session=False)
+    db.commit()
+    return blacklisted, refresh
+
+
+# Global cache instances
+principal_cache = PrincipalCache()
+token_blacklist_cache = TokenBlacklistCache()
+metrics.register_collector(token_blacklist_cache.render_prometheus)
+
+
+def warm_token_blacklist() -> None:
+    """Warm the in-memory blacklist at application startup and start its maintenance thread."""
+    from Database.session import Session
+
+    db = Session()
+    try:
+        count = token_blacklist_cache.warm(db)
+        logger.info(f"Token blacklist cache warmed with {count} revoked tokens")
+    except Exception as e:
+        logger.error(f"Failed to warm token blacklist cache: {e}")
+    finally:
+        db.close()
+    token_blacklist_cache.start()
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    """Drop cached principals when a User row is deleted."""
+    principal_cache.invalidate_user(target.id)
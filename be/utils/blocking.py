@@ -0,0 +1,215 @@
+"""
+blocking.py -
+Blocking Work Execution Utility
+
+The application runs synchronous SQLAlchemy sessions, openpyxl, python-docx
+and pandas. Any of these called directly inside an `async def` route blocks
+the event loop, so one slow Excel export stalls every other request on the
+worker. This module defines where blocking work runs instead.
+
+Execution model:
+- DB: plain `def` routes and dependencies. FastAPI already runs them in
+  AnyIO's default worker pool; its size is set from BLOCKING_DB_THREADS.
+- RENDER: file generation (Excel, ZIP, CSV exports) on its own bounded pool.
+- PARSE: CPU-heavy parsing of uploads (pandas, csv, documents) on its own
+  bounded pool.
+
+RENDER and PARSE have their own capacity limiters, so a burst of exports
+cannot take every DB thread and a large import cannot queue behind exports.
+
+Detection:
+    install_blocking_call_detector(engine) hooks every SQL statement and flags
+    statements executed on the event loop thread (i.e. from coroutine code).
+    Each offending call site is reported once.
+
+Usage:
+    from utils.blocking import offload, run_blocking, RENDER, PARSE
+
+    @router.post("/export")
+    @offload(RENDER)
+    def export(...):            # runs on the RENDER pool
+        ...
+
+    result = await run_blocking(PARSE, parse_csv, contents)
+
+Environment Variables (optional):
+- BLOCKING_DB_THREADS: Concurrent DB-bound route threads (default: 40)
+- BLOCKING_RENDER_THREADS: Concurrent file rendering jobs (default: 4)
+- BLOCKING_PARSE_THREADS: Concurrent parsing jobs (default: 4)
+- BLOCKING_CALL_CHECK: "warn" (default), "raise" or "off"
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+from threading import Lock
+from typing import Any, Callable, Dict, Set, Tuple
+
+import anyio
+from anyio import CapacityLimiter
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Work categories
+DB = "db"
+RENDER = "render"
+PARSE = "parse"
+
+THREAD_LIMITS: Dict[str, int] = {
+    DB: int(os.getenv("BLOCKING_DB_THREADS", "40")),
+    RENDER: int(os.getenv("BLOCKING_RENDER_THREADS", "4")),
+    PARSE: int(os.getenv("BLOCKING_PARSE_THREADS", "4")),
+}
+
+BLOCKING_CALL_CHECK = os.getenv("BLOCKING_CALL_CHECK", "warn").lower()
+
+_limiters: Dict[str, CapacityLimiter] = {}
+
+
+class BlockingCallError(RuntimeError):
+    """Raised in BLOCKING_CALL_CHECK=raise mode when the event loop would block."""
+
+
+def get_limiter(category: str) -> CapacityLimiter:
+    """
+    Return the capacity limiter of a work category.
+
+    DB work shares AnyIO's default limiter, which is also what FastAPI uses
+    for `def` routes and dependencies. Must be called from the event loop.
+    """
+    if category == DB:
+        return anyio.to_thread.current_default_thread_limiter()
+    if category not in THREAD_LIMITS:
+        raise ValueError(f"Unknown blocking work category: {category}")
+    limiter = _limiters.get(category)
+    if limiter is None:
+        limiter = _limiters.setdefault(category, CapacityLimiter(THREAD_LIMITS[category]))
+    return limiter
+
+
+def configure_thread_limits() -> None:
+    """Size the default worker pool for DB-bound work. Call from an async startup hook."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_LIMITS[DB]
+    logger.info(
+        "Blocking work limits: "
+        + ", ".join(f"{category}={limit}" for category, limit in THREAD_LIMITS.items())
+    )
+
+
+async def run_blocking(category: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a synchronous callable in a worker thread of the given category.
+
+    Args:
+        category: DB, RENDER or PARSE
+        func: Blocking callable
+        *args, **kwargs: Arguments passed to func
+
+    Returns:
+        Whatever func returns (exceptions propagate unchanged)
+    """
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=get_limiter(category),
+    )
+
+
+def offload(category: str):
+    """
+    Decorator for `def` routes whose work belongs to a dedicated pool.
+
+    The wrapped function keeps its signature, so FastAPI still resolves its
+    parameters and dependencies; only the thread it runs on changes.
+    """
+    def decorator(func: Callable[..., Any]):
+        if asyncio.iscoroutinefunction(func):
+            raise TypeError(f"offload() expects a synchronous function, got coroutine {func.__name__}")
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await run_blocking(category, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ===========================
+# BLOCKING CALL DETECTION
+# ===========================
+
+_reported_sites: Set[Tuple[str, int]] = set()
+_reported_lock = Lock()
+
+
+def _on_event_loop() -> bool:
+    """Return True if the calling thread is currently running an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _caller_site() -> Tuple[str, int, str]:
+    """Find the innermost application frame (outside SQLAlchemy and this module)."""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if "sqlalchemy" not in filename and filename != __file__:
+            if fallback is None:
+                fallback = frame
+            if "site-packages" not in filename:
+                return filename, frame.f_lineno, frame.f_code.co_name
+        frame = frame.f_back
+    if fallback is not None:
+        return fallback.f_code.co_filename, fallback.f_lineno, fallback.f_code.co_name
+    return "<unknown>", 0, "<unknown>"
+
+
+def flag_blocking_call(description: str) -> None:
+    """
+    Report a blocking call if it is being made on the event loop thread.
+
+    Args:
+        description: What is blocking (e.g. "SQL query", "Excel rendering")
+
+    Raises:
+        BlockingCallError: In BLOCKING_CALL_CHECK=raise mode
+    """
+    if BLOCKING_CALL_CHECK == "off" or not _on_event_loop():
+        return
+
+    filename, lineno, function = _caller_site()
+    message = (
+        f"Blocking {description} on the event loop in {function} "
+        f"({filename}:{lineno}); make the route a plain def or use run_blocking()"
+    )
+    if BLOCKING_CALL_CHECK == "raise":
+        raise BlockingCallError(message)
+
+    with _reported_lock:
+        if (filename, lineno) in _reported_sites:
+            return
+        _reported_sites.add((filename, lineno))
+    logger.warning(message)
+
+
+def _flag_sql_on_event_loop(conn, cursor, statement, parameters, context, executemany):
+    """before_cursor_execute hook: report SQL executed on the event loop."""
+    flag_blocking_call("SQL query")
+
+
+def install_blocking_call_detector(engine) -> None:
+    """Flag SQL statements executed from coroutine code on the given engine."""
+    if BLOCKING_CALL_CHECK == "off":
+        return
+    if not event.contains(engine, "before_cursor_execute", _flag_sql_on_event_loop):
+        event.listen(engine, "before_cursor_execute", _flag_sql_on_event_loop)
@@ -0,0 +1,282 @@
+"""
+bulk_write.py -
+Set-Based Bulk Upsert and Update
+
+Writing row by row (SELECT, then INSERT or UPDATE, then flush) costs one or
+more round trips per row. These helpers write many rows per statement:
+
+- bulk_upsert(): insert rows, updating the ones whose key already exists
+  - MSSQL: MERGE ... WITH (HOLDLOCK) from a VALUES source, null-safe key match
+  - SQLite / PostgreSQL: INSERT ... ON CONFLICT (key) DO UPDATE
+  - MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+  - other dialects: SELECT the existing keys, then INSERT / UPDATE
+- bulk_update(): UPDATE rows by key with one executemany per chunk
+- select_in_chunks(): run a query for a long list of IN values without
+  exceeding the bind parameter limit (2100 on MSSQL)
+
+Statements are chunked so no single statement exceeds the dialect's bind
+parameter limit. Rows with the same key are collapsed before writing (the
+last one wins): neither MERGE nor ON CONFLICT accepts the same target row
+twice in one statement.
+
+On SQLite and PostgreSQL NULL key values never conflict (NULLs are
+distinct in unique constraints), so rows with a NULL key column are always
+inserted there; resolve such rows against the existing ones first.
+
+MERGE is sent as SQL text, which utils.table_versions cannot see; the table
+is recorded with `record_write()` so caches and ETags still move on commit.
+
+Usage:
+    from utils.bulk_write import bulk_upsert, bulk_update
+
+    bulk_upsert(db, ODBOQSiteProduct, rows, key_columns=("site_record_id", "product_id"))
+    bulk_update(db, ODBOQSite, [{"id": 1, "region": "North"}, ...])
+
+Environment Variables (optional):
+- BULK_WRITE_MAX_ROWS: Upper bound of rows per statement (default: 1000)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Table, and_, bindparam, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from utils.table_versions import record_write
+
+logger = logging.getLogger(__name__)
+
+BULK_WRITE_MAX_ROWS = int(os.getenv("BULK_WRITE_MAX_ROWS", "1000"))
+
+# Bind parameters per statement, with headroom below the hard limits
+# (MSSQL 2100, SQLite 999 before 3.32, PostgreSQL / MySQL 65535)
+_MAX_PARAMS = {"mssql": 2000, "sqlite": 999, "postgresql": 30000, "mysql": 30000}
+_DEFAULT_MAX_PARAMS = 999
+
+# IN (...) lists per query
+IN_CLAUSE_CHUNK = 1000
+
+
+def _table(model) -> Table:
+    """Accept an ORM model or a Table."""
+    return getattr(model, "__table__", model)
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def chunked(values: Sequence, size: int) -> Iterator[Sequence]:
+    """Split a sequence into consecutive slices of at most `size` items."""
+    for start in range(0, len(values), max(1, size)):
+        yield values[start:start + size]
+
+
+def rows_per_statement(db: Session, column_count: int) -> int:
+    """Rows that fit in one statement of `column_count` bound values per row."""
+    max_params = _MAX_PARAMS.get(_dialect(db), _DEFAULT_MAX_PARAMS)
+    return max(1, min(BULK_WRITE_MAX_ROWS, max_params // max(1, column_count)))
+
+
+def select_in_chunks(db: Session, build_query: Callable[[Sequence], Any], values: Iterable) -> List[Any]:
+    """
+    Run `build_query(chunk)` for every IN_CLAUSE_CHUNK distinct values and concatenate the rows.
+
+    Args:
+        db: Database session
+        build_query: Returns a select() filtering on `column.in_(chunk)`
+        values: Values of the IN list (duplicates are removed, order kept)
+    """
+    distinct = list(dict.fromkeys(values))
+    rows: List[Any] = []
+    for chunk in chunked(distinct, IN_CLAUSE_CHUNK):
+        rows.extend(db.execute(build_query(chunk)).all())
+    return rows
+
+
+def _collapse(rows: Sequence[Dict[str, Any]], key_columns: Sequence[str]) -> List[Dict[str, Any]]:
+    """Keep the last row per key, in first-seen key order."""
+    by_key: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        by_key[tuple(row[c] for c in key_columns)] = row
+    return list(by_key.values())
+
+
+# ===========================
+# UPSERT
+# ===========================
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    key_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Insert `rows`, updating existing rows that match on `key_columns`.
+
+    Every row must have the same keys. The key columns must be covered by a
+    unique constraint (ON CONFLICT / ON DUPLICATE KEY need it; MERGE relies on
+    it for correctness under concurrency).
+
+    Args:
+        db: Database session (the statements join its transaction)
+        model: ORM model or Table
+        rows: Column name -> value dicts
+        key_columns: Columns identifying a row
+        update_columns: Columns overwritten on a match (default: all non-key columns)
+
+    Returns:
+        int: Rows written (after collapsing duplicate keys)
+    """
+    if not rows:
+        return 0
+    table = _table(model)
+    rows = _collapse(rows, key_columns)
+    columns = list(rows[0].keys())
+    if update_columns is None:
+        update_columns = [c for c in columns if c not in key_columns]
+
+    dialect = _dialect(db)
+    writer = {
+        "mssql": _merge_mssql,
+        "sqlite": _upsert_on_conflict,
+        "postgresql": _upsert_on_conflict,
+        "mysql": _upsert_on_duplicate_key,
+    }.get(dialect, _upsert_select_first)
+
+    for chunk in chunked(rows, rows_per_statement(db, len(columns))):
+        writer(db, table, chunk, columns, key_columns, update_columns)
+    return len(rows)
+
+
+def _upsert_on_conflict(db, table, chunk, columns, key_columns, update_columns) -> None:
+    if _dialect(db) == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table).values(list(chunk))
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[c] for c in key_columns],
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c[c] for c in key_columns])
+    db.execute(stmt)
+
+
+def _upsert_on_duplicate_key(db, table, chunk, columns, key_columns, update_columns) -> None:
+    from sqlalchemy.dialects.mysql import insert
+    stmt = insert(table).values(list(chunk))
+    # A no-op assignment keeps existing rows unchanged when there is nothing to update
+    assignments = {c: stmt.inserted[c] for c in update_columns} or {key_columns[0]: table.c[key_columns[0]]}
+    db.execute(stmt.on_duplicate_key_update(**assignments))
+
+
+def _merge_mssql(db, table, chunk, columns, key_columns, update_columns) -> None:
+    dialect = db.get_bind().dialect
+    quote = dialect.identifier_preparer.quote
+    # CAST keeps the source column types stable when a column holds only NULLs
+    sql_types = {c: table.c[c].type.compile(dialect=dialect) for c in columns}
+
+    params: Dict[str, Any] = {}
+    value_rows = []
+    for i, row in enumerate(chunk):
+        cells = []
+        for j, column in enumerate(columns):
+            name = f"p{i}_{j}"
+            params[name] = row[column]
+            cells.append(f"CAST(:{name} AS {sql_types[column]})")
+        value_rows.append("(" + ", ".join(cells) + ")")
+
+    match = " AND ".join(
+        f"(target.{quote(c)} = source.{quote(c)} OR (target.{quote(c)} IS NULL AND source.{quote(c)} IS NULL))"
+        if table.c[c].nullable else f"target.{quote(c)} = source.{quote(c)}"
+        for c in key_columns
+    )
+    column_list = ", ".join(quote(c) for c in columns)
+    sql = (
+        f"MERGE INTO {quote(table.name)} WITH (HOLDLOCK) AS target "
+        f"USING (VALUES {', '.join(value_rows)}) AS source ({column_list}) "
+        f"ON {match} "
+    )
+    if update_columns:
+        sql += "WHEN MATCHED THEN UPDATE SET " + ", ".join(
+            f"target.{quote(c)} = source.{quote(c)}" for c in update_columns
+        ) + " "
+    sql += (
+        f"WHEN NOT MATCHED THEN INSERT ({column_list}) "
+        f"VALUES ({', '.join('source.' + quote(c) for c in columns)});"
+    )
+
+    connection = db.connection()
+    connection.execute(text(sql), params)
+    record_write(connection, table.name)
+
+
+def _upsert_select_first(db, table, chunk, columns, key_columns, update_columns) -> None:
+    """Portable fallback: two statements per chunk instead of one."""
+    key_cols = [table.c[c] for c in key_columns]
+    keys = [tuple(row[c] for c in key_columns) for row in chunk]
+    if len(key_cols) == 1:
+        condition = key_cols[0].in_([k[0] for k in keys])
+    else:
+        condition = tuple_(*key_cols).in_(keys)
+    existing = {tuple(r) for r in db.execute(select(*key_cols).where(condition)).all()}
+
+    inserts = [row for row, key in zip(chunk, keys) if key not in existing]
+    updates = [row for row, key in zip(chunk, keys) if key in existing]
+    if inserts:
+        db.execute(table.insert(), inserts)
+    if updates and update_columns:
+        _execute_update(db, table, updates, key_columns, update_columns)
+
+
+# ===========================
+# UPDATE
+# ===========================
+
+def _execute_update(db, table, rows, key_columns, update_columns) -> None:
+    # Bind names must differ from the column names used in SET
+    stmt = (
+        table.update()
+        .where(and_(*[table.c[c] == bindparam(f"k_{c}") for c in key_columns]))
+        .values({c: bindparam(f"v_{c}") for c in update_columns})
+    )
+    params = [
+        {**{f"k_{c}": row[c] for c in key_columns}, **{f"v_{c}": row[c] for c in update_columns}}
+        for row in rows
+    ]
+    db.execute(stmt, params)
+
+
+def bulk_update(
+    db: Session,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    key_columns: Sequence[str] = ("id",),
+) -> int:
+    """
+    UPDATE existing rows by key, one executemany per BULK_WRITE_MAX_ROWS rows.
+
+    Every row must have the same keys; all non-key keys are written.
+
+    Returns:
+        int: Rows submitted (after collapsing duplicate keys)
+    """
+    if not rows:
+        return 0
+    table = _table(model)
+    rows = _collapse(rows, key_columns)
+    update_columns = [c for c in rows[0].keys() if c not in key_columns]
+    if not update_columns:
+        return 0
+    for chunk in chunked(rows, BULK_WRITE_MAX_ROWS):
+        _execute_update(db, table, chunk, key_columns, update_columns)
+    return len(rows)
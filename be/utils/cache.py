@@ -0,0 +1,547 @@
+"""
+cache.py -
+Unified Application Cache
+
+One cache layer for DB-derived reference data (filter options, stats,
+catalogs), permission lookups and external API results, replacing ad hoc
+module-level dicts:
+
+- Namespaced get/set API and a `@cached(namespace, ...)` decorator for sync
+  and async functions.
+- Backends: an in-process LRU with TTL and an entry bound (default), or Redis
+  (CACHE_BACKEND=redis) shared by every worker. If Redis fails, lookups
+  degrade to cache misses; the wrapped function still runs.
+- Single-flight: concurrent misses for the same key in one process wait for
+  the first caller's result instead of all hitting the database (stampede).
+- Tag invalidation: entries carry tags and remember the tag versions they
+  were computed with; `invalidate_tags()` bumps versions so every entry with
+  that tag becomes stale. Table names are tags too: every committed write
+  to a table (utils.table_versions) invalidates entries tagged with it, and
+  values computed while a table is still settling after a write are not stored.
+- Hit / miss / stale / eviction / coalesced counters per namespace, exported on
+  the /metrics surface (utils.metrics).
+
+Cached values are shared between callers and must be treated as read-only.
+
+Usage:
+    from utils.cache import cache, cached
+
+    @cached("od_boq.filter_options", ttl=300, tables=(ODBOQSite, ODBOQProduct))
+    def load_filter_options(db, project_ids, project_id):
+        ...
+
+    cache.set("exchange_rate", "USD:AED", rate, ttl=3600)
+    cache.invalidate_tags("access:user:5")
+
+Environment Variables (optional):
+- CACHE_ENABLED: "false" to bypass caching (default: true)
+- CACHE_BACKEND: "memory" or "redis" (default: SHARED_STATE_BACKEND, else memory)
+- REDIS_URL: Redis connection URL for the redis backend (default: redis://localhost:6379/0)
+- CACHE_MAX_ENTRIES: Entry bound of the in-process LRU (default: 10000)
+- CACHE_DEFAULT_TTL_SECONDS: TTL when none is given (default: 300)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.deployment import shared_backend
+from utils.metrics import metrics
+from utils.table_versions import table_names, table_versions
+
+try:
+    import redis
+except ImportError:  # only needed for CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_BACKEND = shared_backend("CACHE_BACKEND")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_DEFAULT_TTL_SECONDS = int(os.getenv("CACHE_DEFAULT_TTL_SECONDS", "300"))
+
+# Keys longer than this are replaced by their digest
+_MAX_KEY_LENGTH = 200
+
+# Seconds between warnings while the Redis backend is failing
+_BACKEND_WARNING_INTERVAL = 60
+
+# Argument types the decorator can turn into a key without help
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+class CacheEntry(tuple):
+    """(value, tags, tag versions at compute time)"""
+    __slots__ = ()
+
+    def __new__(cls, value: Any, tags: Tuple[str, ...], versions: Tuple[int, ...]):
+        return super().__new__(cls, (value, tags, versions))
+
+
+# ===========================
+# BACKENDS
+# ===========================
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU with per-entry expiry and an entry bound."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._tags: Dict[str, int] = {}
+        self._lock = Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._tags.get(tag, 0) for tag in tags)
+
+    def bump_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._tags[tag] = self._tags.get(tag, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Cache entries and tag versions in Redis, shared by every worker.
+
+    Entries are pickled; Redis is trusted internal infrastructure.
+    """
+
+    def __init__(self, client, prefix: str = "cache:"):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0  # Redis evicts on its own (maxmemory policy)
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL) -> "RedisCacheBackend":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self.client.get(self.prefix + key)
+        return CacheEntry(*pickle.loads(raw)) if raw is not None else None
+
+    def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        data = pickle.dumps(tuple(entry), protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, data, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self, prefix: str = "") -> None:
+        for raw in self.client.scan_iter(match=f"{self.prefix}{prefix}*", count=500):
+            self.client.delete(raw)
+
+    def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        if not tags:
+            return ()
+        values = self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return tuple(int(v) if v is not None else 0 for v in values)
+
+    def bump_tags(self, tags: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f"{self.prefix}tag:{tag}")
+        pipe.execute()
+
+    def __len__(self) -> int:
+        return 0
+
+
+# ===========================
+# CACHE
+# ===========================
+
+class _Flight:
+    """Result slot shared by concurrent callers of one key (threads)."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class NamespaceStats:
+    """Counters of one namespace."""
+
+    __slots__ = ("hits", "misses", "stale", "sets", "coalesced", "errors")
+
+    def __init__(self):
+        self.hits = self.misses = self.stale = self.sets = self.coalesced = self.errors = 0
+
+
+class Cache:
+    """
+    Namespaced cache front end: tags, single-flight, statistics.
+
+    Attributes:
+        backend: MemoryCacheBackend or RedisCacheBackend
+    """
+
+    def __init__(self, backend=None, enabled: bool = CACHE_ENABLED):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.enabled = enabled
+        self._stats: Dict[str, NamespaceStats] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[Tuple[int, str], "asyncio.Future"] = {}
+        self._lock = Lock()
+        self._last_warning = 0.0
+
+    # ----- helpers -----
+
+    @staticmethod
+    def make_key(namespace: str, key: Any) -> str:
+        key = key if isinstance(key, str) else repr(key)
+        if len(key) > _MAX_KEY_LENGTH:
+            key = hashlib.sha1(key.encode()).hexdigest()
+        return f"{namespace}:{key}"
+
+    def _count(self, namespace: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats.get(namespace)
+            if stats is None:
+                stats = self._stats[namespace] = NamespaceStats()
+            setattr(stats, field, getattr(stats, field) + 1)
+
+    def _backend_failed(self, namespace: str, e: Exception) -> None:
+        self._count(namespace, "errors")
+        now = time.monotonic()
+        if now - self._last_warning > _BACKEND_WARNING_INTERVAL:
+            self._last_warning = now
+            logger.warning(f"Cache backend error ({namespace}), bypassing cache: {e}")
+
+    # ----- get / set -----
+
+    def lookup(self, namespace: str, key: Any) -> Tuple[bool, Any]:
+        """Return (found, value); expired and tag-invalidated entries are misses."""
+        if not self.enabled:
+            return False, None
+        full_key = self.make_key(namespace, key)
+        try:
+            entry = self.backend.get(full_key)
+            if entry is not None:
+                value, tags, versions = entry
+                if not tags or self.backend.tag_versions(tags) == versions:
+                    self._count(namespace, "hits")
+                    return True, value
+                self.backend.delete(full_key)
+                self._count(namespace, "stale")
+        except Exception as e:
+            self._backend_failed(namespace, e)
+        self._count(namespace, "misses")
+        return False, None
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        found, value = self.lookup(namespace, key)
+        return value if found else default
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: Optional[float] = None,
+            tags: Sequence[str] = (), versions: Optional[Tuple[int, ...]] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            namespace: Cache namespace (e.g. "od_boq.stats")
+            key: Key within the namespace (str or repr-able value)
+            value: Value to cache (treated as read-only afterwards)
+            ttl: Seconds to keep the value (default: CACHE_DEFAULT_TTL_SECONDS)
+            tags: Tags (or table names) invalidating the value when bumped
+            versions: Tag versions read before the value was computed (see
+                tag_versions()); default: the current ones
+        """
+        if not self.enabled:
+            return
+        tags = tuple(tags)
+        try:
+            if versions is None:
+                versions = self.backend.tag_versions(tags)
+            entry = CacheEntry(value, tags, versions)
+            self.backend.set(self.make_key(namespace, key), entry, ttl or CACHE_DEFAULT_TTL_SECONDS)
+            self._count(namespace, "sets")
+        except Exception as e:
+            self._backend_failed(namespace, e)
+
+    def delete(self, namespace: str, key: Any) -> None:
+        try:
+            self.backend.delete(self.make_key(namespace, key))
+        except Exception as e:
+            self._backend_failed(namespace, e)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop one namespace, or everything."""
+        try:
+            self.backend.clear(f"{namespace}:" if namespace else "")
+        except Exception as e:
+            self._backend_failed(namespace or "*", e)
+
+    def tag_versions(self, namespace: str, tags: Sequence[str]) -> Optional[Tuple[int, ...]]:
+        """
+        Current versions of `tags`, to read before computing a value for set().
+
+        A bump between this read and set() then leaves the entry stale instead
+        of being absorbed. None if caching is off or the backend failed.
+        """
+        if not self.enabled:
+            return None
+        try:
+            return self.backend.tag_versions(tuple(tags))
+        except Exception as e:
+            self._backend_failed(namespace, e)
+            return None
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """Make every entry carrying one of the tags stale."""
+        if not tags:
+            return
+        try:
+            self.backend.bump_tags(tags)
+        except Exception as e:
+            self._backend_failed("tags", e)
+
+    # ----- single-flight -----
+
+    def get_or_set(self, namespace: str, key: Any, factory: Callable[[], Any], ttl: Optional[float] = None,
+                   tags: Sequence[str] = (), tables: Sequence[str] = ()) -> Any:
+        """
+        Return the cached value or compute it once with `factory()`.
+
+        Concurrent callers missing the same key wait for the first one.
+        Values computed while one of `tables` is settling are returned but not stored;
+        the value is stored with the tag versions read before `factory()` ran, so a
+        write committed while it runs makes the entry stale.
+        """
+        found, value = self.lookup(namespace, key)
+        if found:
+            return value
+
+        full_key = self.make_key(namespace, key)
+        with self._lock:
+            flight = self._flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[full_key] = _Flight()
+        if not leader:
+            self._count(namespace, "coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            all_tags = tuple(tags) + tuple(tables)
+            settled = table_versions.settled(*tables)
+            versions = self.tag_versions(namespace, all_tags)
+            flight.value = factory()
+            if settled and versions is not None:
+                self.set(namespace, key, flight.value, ttl, all_tags, versions=versions)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(full_key, None)
+            flight.done.set()
+
+    async def get_or_set_async(self, namespace: str, key: Any, factory: Callable[[], Any],
+                               ttl: Optional[float] = None, tags: Sequence[str] = (),
+                               tables: Sequence[str] = ()) -> Any:
+        """get_or_set() for coroutine factories; single-flight per event loop."""
+        found, value = self.lookup(namespace, key)
+        if found:
+            return value
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), self.make_key(namespace, key))
+        future = self._async_flights.get(flight_key)
+        if future is not None:
+            self._count(namespace, "coalesced")
+            return await asyncio.shield(future)
+
+        future = self._async_flights[flight_key] = loop.create_future()
+        try:
+            all_tags = tuple(tags) + tuple(tables)
+            settled = table_versions.settled(*tables)
+            versions = self.tag_versions(namespace, all_tags)
+            value = await factory()
+            if settled and versions is not None:
+                self.set(namespace, key, value, ttl, all_tags, versions=versions)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+    # ----- statistics -----
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {ns: {f: getattr(s, f) for f in NamespaceStats.__slots__} for ns, s in self._stats.items()}
+
+    def render_prometheus(self) -> List[str]:
+        """Metrics lines for utils.metrics."""
+        stats = self.stats()
+        lines = [
+            "# HELP cache_requests_total Cache lookups by namespace and result.",
+            "# TYPE cache_requests_total counter",
+        ]
+        for namespace, counts in sorted(stats.items()):
+            for result in ("hits", "misses", "stale", "coalesced", "errors"):
+                lines.append(f'cache_requests_total{{namespace="{namespace}",result="{result}"}} {counts[result]}')
+        lines.append("# HELP cache_sets_total Values stored by namespace.")
+        lines.append("# TYPE cache_sets_total counter")
+        for namespace, counts in sorted(stats.items()):
+            lines.append(f'cache_sets_total{{namespace="{namespace}"}} {counts["sets"]}')
+        lines.append("# HELP cache_evictions_total Entries evicted by the size bound.")
+        lines.append("# TYPE cache_evictions_total counter")
+        lines.append(f"cache_evictions_total {self.backend.evictions}")
+        lines.append("# HELP cache_entries Entries held by the in-process cache.")
+        lines.append("# TYPE cache_entries gauge")
+        lines.append(f"cache_entries {len(self.backend)}")
+        return lines
+
+
+def _create_cache() -> Cache:
+    if CACHE_BACKEND == "redis":
+        try:
+            return Cache(RedisCacheBackend.from_url(REDIS_URL))
+        except Exception as e:
+            logger.error(f"Redis cache backend unavailable ({e}); using the in-process cache")
+    return Cache(MemoryCacheBackend())
+
+
+# Global instance
+cache = _create_cache()
+
+# Committed writes invalidate entries tagged with the written tables
+table_versions.subscribe(cache.invalidate_tags)
+metrics.register_collector(cache.render_prometheus)
+
+
+# ===========================
+# DECORATOR
+# ===========================
+
+def _default_key(func: Callable, ignore: Sequence[str]):
+    signature = inspect.signature(func)
+
+    def build(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        parts = []
+        for name, value in bound.arguments.items():
+            if name in ignore:
+                continue
+            if isinstance(value, (frozenset, set)):
+                value = tuple(sorted(value))
+            if isinstance(value, (tuple, list)):
+                if not all(isinstance(v, _KEY_TYPES) for v in value):
+                    raise TypeError(f"@cached({func.__qualname__}): pass key= for argument {name!r}")
+                value = tuple(value)
+            elif not isinstance(value, _KEY_TYPES):
+                raise TypeError(f"@cached({func.__qualname__}): pass key= for argument {name!r}")
+            parts.append(value)
+        return tuple(parts)
+
+    return build
+
+
+def cached(namespace: str, ttl: Optional[float] = None, tags: Sequence[str] = (), tables: Sequence = (),
+           key: Optional[Callable[..., Any]] = None, ignore: Sequence[str] = ("db",)):
+    """
+    Cache a function's results under `namespace`.
+
+    Args:
+        namespace: Cache namespace
+        ttl: Seconds to keep results (default: CACHE_DEFAULT_TTL_SECONDS)
+        tags: Extra invalidation tags
+        tables: ORM models / table names the result is derived from; writes
+            to them invalidate it
+        key: Builds the key from the call's arguments (default: the
+            arguments not in `ignore`, which must be plain values)
+        ignore: Argument names left out of the default key
+
+    The wrapper exposes `.invalidate(*args, **kwargs)` and `.namespace`.
+    """
+    watched = table_names(*tables)
+
+    def decorator(func: Callable):
+        build_key = key or _default_key(func, ignore)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.get_or_set_async(
+                    namespace, build_key(*args, **kwargs), lambda: func(*args, **kwargs),
+                    ttl, tags, watched,
+                )
+            wrapper = async_wrapper
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return cache.get_or_set(
+                    namespace, build_key(*args, **kwargs), lambda: func(*args, **kwargs),
+                    ttl, tags, watched,
+                )
+
+        wrapper.namespace = namespace
+        wrapper.invalidate = lambda *args, **kwargs: cache.delete(namespace, build_key(*args, **kwargs))
+        return wrapper
+
+    return decorator
@@ -0,0 +1,298 @@
+"""
+compression.py -
+Response Compression (gzip / brotli)
+
+BOQ CSVs embedded in JSON, bulk generation results, CSV exports and audit-log
+pages cross the WAN between sites uncompressed. This pure ASGI middleware
+compresses them on the way out:
+
+- Negotiates brotli (when the `brotli` package is installed) or gzip from the
+  request's Accept-Encoding, honouring q-values.
+- Only compresses allowlisted content types (JSON, CSV, text, XML, JS).
+  XLSX and ZIP downloads are already deflate-compressed containers and pass
+  through untouched.
+- Complete responses smaller than COMPRESSION_MIN_SIZE are sent as-is.
+- Streaming responses (StreamingResponse exports) are compressed chunk by
+  chunk with a sync flush, so the client keeps receiving data while the
+  export is generated and memory stays flat.
+- Levels are set per route class. Routes default to "default"; a route
+  declares another class with `@compression_class("export")`:
+    default: regular API responses (gzip 6, brotli 4)
+    export:  streamed file exports, favour throughput (gzip 3, brotli 2)
+    bulk:    large one-shot payloads, favour ratio (gzip 9, brotli 6)
+    none:    never compress
+
+Usage:
+    app.add_middleware(CompressionMiddleware)
+
+    @router.get("/export/csv")
+    @compression_class("export")
+    def export_csv(...):
+        ...
+
+Environment Variables (optional):
+- COMPRESSION_ENABLED: "false" to disable compression (default: true)
+- COMPRESSION_MIN_SIZE: Smallest complete body compressed, in bytes (default: 1024)
+- COMPRESSION_TYPES: Comma separated allowlist of content types; entries
+  ending in "/" match a prefix (default: JSON, CSV, text/, XML, JavaScript)
+- COMPRESSION_LEVEL_DEFAULT / COMPRESSION_LEVEL_EXPORT / COMPRESSION_LEVEL_BULK:
+  "gzip_level[:brotli_quality]" for that route class, e.g. "5:3"
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_TYPES = tuple(
+    t.strip().lower()
+    for t in os.getenv(
+        "COMPRESSION_TYPES",
+        "application/json,text/,application/xml,application/javascript,image/svg+xml",
+    ).split(",")
+    if t.strip()
+)
+
+CLASS_ATTRIBUTE = "__compression_class__"
+
+# Route class -> (gzip level, brotli quality)
+_DEFAULT_LEVELS = {
+    "default": (6, 4),
+    "export": (3, 2),
+    "bulk": (9, 6),
+}
+
+
+def _parse_levels(name: str, fallback: Tuple[int, int]) -> Tuple[int, int]:
+    raw = os.getenv(f"COMPRESSION_LEVEL_{name.upper()}")
+    if not raw:
+        return fallback
+    try:
+        parts = [int(p) for p in raw.split(":")]
+        return parts[0], parts[1] if len(parts) > 1 else fallback[1]
+    except ValueError:
+        logger.warning(f"Ignoring invalid COMPRESSION_LEVEL_{name.upper()}={raw!r}")
+        return fallback
+
+
+COMPRESSION_LEVELS: Dict[str, Tuple[int, int]] = {
+    name: _parse_levels(name, levels) for name, levels in _DEFAULT_LEVELS.items()
+}
+
+
+def compression_class(name: str):
+    """
+    Declare the compression route class of an endpoint ("default", "export",
+    "bulk" or "none").
+
+    Works above or below utils.blocking.offload (functools.wraps copies the
+    attribute to the wrapper).
+    """
+    if name != "none" and name not in COMPRESSION_LEVELS:
+        raise ValueError(f"Unknown compression class: {name}")
+
+    def decorator(func: Callable):
+        setattr(func, CLASS_ATTRIBUTE, name)
+        return func
+
+    return decorator
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding ("br" or "gzip") for an Accept-Encoding header, or None."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+
+    wildcard = weights.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if not media_type:
+        return False
+    for allowed in COMPRESSION_TYPES:
+        if media_type == allowed or (allowed.endswith("/") and media_type.startswith(allowed)):
+            return True
+    return False
+
+
+class _Encoder:
+    """Incremental gzip or brotli encoder."""
+
+    def __init__(self, encoding: str, levels: Tuple[int, int]):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=levels[1])
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(levels[0], zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk; flush=True pushes buffered output to the client."""
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+# ===========================
+# MIDDLEWARE
+# ===========================
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing allowlisted response bodies."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(scope, send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Per-response state: holds the start message until the first body chunk decides."""
+
+    def __init__(self, scope, send, encoding: str, minimum_size: int):
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    def _levels(self) -> Optional[Tuple[int, int]]:
+        """Levels of the matched route's class; None when it opted out."""
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        name = getattr(endpoint, CLASS_ATTRIBUTE, "default")
+        return None if name == "none" else COMPRESSION_LEVELS[name]
+
+    def _eligible(self, message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return False
+        content_type = ""
+        for key, value in message.get("headers", []):
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"cache-control" and b"no-transform" in value.lower():
+                return False
+            if key == b"content-type":
+                content_type = value.decode("latin-1")
+        return _compressible(content_type)
+
+    async def send(self, message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if self._eligible(message):
+                self.start_message = message
+            else:
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            levels = self._levels()
+            if levels is None or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            self.encoder = _Encoder(self.encoding, levels)
+            await self._send(self._compressed_start())
+
+        if more_body:
+            chunk = self.encoder.compress(body, flush=True)
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _compressed_start(self):
+        headers = [
+            (k, v) for k, v in self.start_message.get("headers", [])
+            if k.lower() not in (b"content-length", b"etag")
+        ]
+        # Strong validators must change with the encoding; weak ones stay valid
+        for k, v in self.start_message.get("headers", []):
+            if k.lower() == b"etag":
+                headers.append((k, v if v.startswith(b"W/") else b"W/" + v))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        headers = add_vary(headers, b"Accept-Encoding")
+        return {**self.start_message, "headers": headers}
+
+
+def add_vary(headers, value: bytes):
+    """
+    Append `value` to an existing Vary header (CORS sets Vary: Origin) or add one.
+
+    Takes and returns a list of raw ASGI (name, value) header pairs; also used by
+    utils.http_cache.
+    """
+    for i, (key, existing) in enumerate(headers):
+        if key.lower() == b"vary":
+            if value.lower() not in existing.lower():
+                headers[i] = (key, existing + b", " + value)
+            return headers
+    return headers + [(b"vary", value)]
@@ -0,0 +1,126 @@
+"""
+deployment.py -
+Worker Process Configuration
+
+One uvicorn process serves every request and renders every export under a
+single GIL. Multi-worker mode runs APP_WORKERS processes behind the same
+port instead:
+
+    python main.py                                   # uvicorn --workers APP_WORKERS
+    gunicorn -c gunicorn.conf.py main:app            # Linux, see gunicorn.conf.py
+
+Worker processes share nothing in memory, so state that must be global
+needs a shared backend. SHARED_STATE_BACKEND=redis switches all of them at
+once (each keeps its own variable for overrides):
+
+- Rate limits (RATE_LIMIT_BACKEND): per worker, a client gets N x the limit
+- Cache (CACHE_BACKEND): per worker, writes on one worker do not invalidate
+  entries cached by the others until their TTL
+- Table versions (TABLE_VERSION_BACKEND): per worker, ETags of one worker
+  do not change on writes made through another
+- Metrics (METRICS_BACKEND): per worker, /metrics shows one random worker
+- Recent writers (READ_YOUR_WRITES_BACKEND, only with a read replica): per
+  worker, a user who saved on one worker can be sent to the lagging replica
+  by another (see utils.read_replica)
+
+Per-process by design:
+- the token blacklist, synced from the database every few seconds (see
+  utils.auth_cache), so a logout takes effect on other workers within
+  TOKEN_BLACKLIST_SYNC_SECONDS
+- the principal cache: role and approval stage changes only drop the entries
+  of the worker that made them, so other workers pick them up within
+  AUTH_CACHE_TTL_SECONDS
+- the audit log writer, the password pool and the AI singletons (each worker
+  warms its own with AI_WARMUP)
+
+Background jobs run in every worker with JOB_EXECUTOR=threads, so job
+concurrency is multiplied by the worker count; use JOB_EXECUTOR=external
+and `python -m utils.jobs` for a fixed job capacity.
+
+check_shared_state() runs at startup and reports every component still on
+a per-process backend while APP_WORKERS > 1.
+
+Environment Variables (optional):
+- APP_WORKERS: Worker processes (default: WEB_CONCURRENCY, else 1)
+- SHARED_STATE_BACKEND: "memory" (default) or "redis" for every shared component
+- DEPLOYMENT_STRICT: "true" to refuse to start when a component is per-process
+  in multi-worker mode (default: false, log a warning)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+import socket
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+APP_WORKERS = max(1, int(os.getenv("APP_WORKERS", os.getenv("WEB_CONCURRENCY", "1"))))
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory").lower()
+DEPLOYMENT_STRICT = os.getenv("DEPLOYMENT_STRICT", "false").lower() == "true"
+
+# Identifies this process in shared backends and logs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def multi_worker() -> bool:
+    """True when the application is served by more than one process."""
+    return APP_WORKERS > 1
+
+
+def per_worker_share(total: int) -> int:
+    """Split a machine-wide resource (e.g. CPU cores) evenly across the workers."""
+    return max(1, total // APP_WORKERS)
+
+
+def shared_backend(variable: str) -> str:
+    """Backend setting of one component: its own variable, else SHARED_STATE_BACKEND."""
+    return os.getenv(variable, SHARED_STATE_BACKEND).lower()
+
+
+def check_shared_state() -> List[str]:
+    """
+    Report components that keep per-process state while running several workers.
+
+    Returns:
+        list: One problem description per component (empty when fine)
+
+    Raises:
+        RuntimeError: In DEPLOYMENT_STRICT mode when problems were found
+    """
+    if not multi_worker():
+        return []
+
+    # Imported here: these modules pull in the database and Redis clients
+    from utils.cache import cache, RedisCacheBackend
+    from utils.jobs import job_queue
+    from utils.metrics import metrics
+    from utils.rate_limiter import rate_limiter, RedisBackend
+    from utils.read_replica import recent_writers, REPLICA_CONFIGURED
+    from utils.table_versions import table_versions
+
+    problems = []
+    if not isinstance(rate_limiter.backend, RedisBackend):
+        problems.append("rate limits are per worker (set RATE_LIMIT_BACKEND=redis)")
+    if not isinstance(cache.backend, RedisCacheBackend):
+        problems.append("cache entries are per worker (set CACHE_BACKEND=redis)")
+    if not table_versions.shared:
+        problems.append("table versions / ETags are per worker (set TABLE_VERSION_BACKEND=redis)")
+    if not metrics.shared:
+        problems.append("metrics are per worker (set METRICS_BACKEND=redis)")
+    if REPLICA_CONFIGURED and not recent_writers.shared:
+        problems.append("read-your-writes marks are per worker, reads after a write may hit the "
+                        "lagging replica (set READ_YOUR_WRITES_BACKEND=redis)")
+    if job_queue.executor == "threads":
+        problems.append(f"job workers run in each of the {APP_WORKERS} processes "
+                        f"(JOB_EXECUTOR=external runs them once)")
+
+    for problem in problems:
+        logger.warning(f"Multi-worker mode ({APP_WORKERS} workers): {problem}")
+    # Job threads per worker are a capacity choice, not a correctness problem
+    fatal = [p for p in problems if not p.startswith("job workers")]
+    if fatal and DEPLOYMENT_STRICT:
+        raise RuntimeError("DEPLOYMENT_STRICT: " + "; ".join(fatal))
+    return problems
@@ -3,12 +3,15 @@ Exchange Rate Utility - USD/AED
 
 Fetches the live USD/AED rate from a free public API.
 Falls back to the pegged rate (3.6725) if the network is unreachable.
-Caches the result in memory for 1 hour to avoid repeated external calls.
+Caches the result for 1 hour (utils.cache, namespace "exchange_rate") to avoid
+repeated external calls; concurrent requests on a cold cache share one fetch.
 """
 
 import logging
 import httpx
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from utils.cache import cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +20,7 @@ FALLBACK_RATE = 3.6725
 CACHE_TTL_HOURS = 1
 API_TIMEOUT_SECONDS = 3
 API_URL = "https://api.exchangerate-api.com/v4/latest/USD"
-
-# In-memory cache: { "rate": float, "fetched_at": datetime, "source": str }
-_cache: dict | None = None
+CACHE_NAMESPACE = "exchange_rate"
 
 
 async def get_usd_aed_rate() -> dict:
@@ -33,13 +34,12 @@ async def get_usd_aed_rate() -> dict:
             "fetched_at": "2026-02-03T12:00:00"  # when the rate was obtained
         }
     """
-    global _cache
+    return await cache.get_or_set_async(
+        CACHE_NAMESPACE, "USD:AED", _fetch_usd_aed_rate, ttl=CACHE_TTL_HOURS * 3600
+    )
 
-    # Return cached rate if still fresh
-    if _cache and _cache["fetched_at"] + timedelta(hours=CACHE_TTL_HOURS) > datetime.now():
-        return _cache
 
-    # Attempt live fetch
+async def _fetch_usd_aed_rate() -> dict:
     try:
         async with httpx.AsyncClient(timeout=API_TIMEOUT_SECONDS, verify=False) as client:
             response = await client.get(API_URL)
@@ -47,19 +47,17 @@ async def get_usd_aed_rate() -> dict:
             data = response.json()
             rate = float(data["rates"]["AED"])
 
-        _cache = {
+        logger.info(f"USD/AED rate fetched live: {rate}")
+        return {
             "rate": rate,
             "source": "live",
             "fetched_at": datetime.now()
         }
-        logger.info(f"USD/AED rate fetched live: {rate}")
-        return _cache
 
     except Exception as e:
         logger.warning(f"Exchange rate API unreachable ({type(e).__name__}), using fallback rate")
-        _cache = {
+        return {
             "rate": FALLBACK_RATE,
             "source": "fallback",
             "fetched_at": datetime.now()
         }
-        return _cache
@@ -0,0 +1,110 @@
+"""
+fast_json.py -
+Fast JSON Response Pipeline
+
+Large list endpoints used to load full ORM entities, validate each one
+through the route's Pydantic `response_model` and serialize the result with
+the standard library encoder. For 500-1000 row pages that pipeline costs
+more than the SQL. This module provides the pieces of the faster path:
+
+- FastJSONResponse: JSONResponse rendered with orjson. It is the
+  application's default response class (main.py), so every route benefits
+  from the faster encoder; without orjson installed it falls back to the
+  standard encoder.
+- schema_columns(): the model columns a response schema exposes, for
+  column-projected queries (no identity map, no ORM object construction).
+- rows_to_dicts(): plain dicts from projected rows.
+
+Hot routes return `FastJSONResponse(payload)` built from those dicts. FastAPI
+skips `response_model` validation for Response objects, so the declared
+response_model only documents the shape; the route must build exactly that
+shape.
+
+Usage:
+    from utils.fast_json import FastJSONResponse, rows_to_dicts, schema_columns
+
+    rows = db.query(*schema_columns(Model, ModelOut)).limit(500)
+    return FastJSONResponse({"total": total, "records": rows_to_dicts(rows)})
+
+Benchmark: `python -m benchmarks.serialization`
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import json
+import logging
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect
+
+try:
+    import orjson
+except ImportError:  # optional speedup; falls back to the standard encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    # OPT_UTC_Z writes UTC datetimes as "...Z", like Pydantic
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not serialize natively, encoded like fastapi.encoders."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (standard encoder fallback)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+        return json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+def schema_columns(model, schema, exclude: Sequence[str] = ()) -> List:
+    """
+    Mapped columns of `model` named like the fields of a Pydantic `schema`.
+
+    Fields without a same-named column (relationships, properties such as
+    `service_type`, computed values) are skipped; select those explicitly.
+
+    Args:
+        model: ORM model class
+        schema: Pydantic model describing the response row
+        exclude: Field names to leave out
+    """
+    mapped = inspect(model).column_attrs
+    return [
+        getattr(model, name)
+        for name in schema.model_fields
+        if name not in exclude and name in mapped
+    ]
+
+
+def rows_to_dicts(rows: Iterable) -> List[Dict[str, Any]]:
+    """Turn projected rows (Row objects, keyed by column label) into dicts."""
+    rows = list(rows)
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
@@ -201,3 +201,63 @@ async def validate_file_size_only(
         )
 
     await file.seek(0)
+
+
+# ===========================
+# SYNCHRONOUS VARIANTS
+# For plain `def` routes running in a worker thread; they measure the
+# spooled upload with seek/tell instead of reading it into memory.
+# ===========================
+
+def _upload_size(file: UploadFile) -> int:
+    """Return the size of an upload in bytes, leaving the pointer at the start."""
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    return file_size
+
+
+def _check_upload_size(file_size: int, max_size: int) -> None:
+    """Raise if an upload is empty or larger than max_size."""
+    if file_size > max_size:
+        max_mb = max_size / (1024 * 1024)
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {max_mb:.0f} MB."
+        )
+
+    if file_size == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="File is empty."
+        )
+
+
+def validate_csv_file_sync(
+    file: UploadFile,
+    max_size: int = MAX_CSV_FILE_SIZE
+) -> None:
+    """Synchronous version of validate_csv_file (extension and size checks)."""
+    if not file.filename.lower().endswith('.csv'):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file type. Only CSV files are allowed."
+        )
+
+    _check_upload_size(_upload_size(file), max_size)
+
+
+def validate_document_file_sync(
+    file: UploadFile,
+    allowed_extensions: List[str],
+    max_size: int = MAX_DOCUMENT_FILE_SIZE
+) -> None:
+    """Synchronous version of validate_document_file (extension and size checks)."""
+    file_ext = '.' + file.filename.lower().split('.')[-1] if '.' in file.filename else ''
+    if file_ext not in allowed_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(allowed_extensions)}"
+        )
+
+    _check_upload_size(_upload_size(file), max_size)
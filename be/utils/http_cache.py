@@ -0,0 +1,168 @@
+"""
+http_cache.py -
+Per-Route HTTP Cache Policy with ETags
+
+By default every API response is sent with `Cache-Control: no-store` (the old
+NoCacheMiddleware behaviour, which fixed stale responses being reused after
+re-login). Reference and catalog endpoints opt in to conditional GETs
+instead, so the browser keeps the payload and revalidates it:
+
+- `conditional_get(*tables)` is a route dependency. It authenticates the
+  user, builds a weak ETag from the versions of the given tables
+  (utils.table_versions), the user's identity and role, the access-control
+  tables and the request URL, and answers `If-None-Match` with 304 before
+  the route body (and its queries) run.
+- HTTPCacheMiddleware writes the headers: `private, no-cache` plus ETag and
+  `Vary: Authorization` for opted-in 200/304 responses, `no-store` for
+  everything else.
+
+Correctness after re-login: responses are `private` and `no-cache`, so the
+browser revalidates every time, and the ETag is bound to the user and role,
+so a different login never matches a previous user's tag. No ETag is issued
+while a watched table is still settling after a write (see table_versions).
+
+Usage:
+    from utils.http_cache import conditional_get
+
+    @router.get("/po-numbers", dependencies=[Depends(conditional_get(PriceBook))])
+    def get_unique_po_numbers(...):
+        ...
+
+Environment Variables (optional):
+- HTTP_CACHE_ENABLED: "false" to send no-store everywhere (default: true)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import hashlib
+import logging
+import os
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+
+from APIs.Core import get_current_user
+from Models.Admin.User import User, Role, UserProjectAccess
+from utils.compression import add_vary
+from utils.table_versions import table_names, table_versions
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+
+# Tables that decide what a user may see; part of every ETag
+ACCESS_TABLES = table_names(User, Role, UserProjectAccess)
+
+# ASGI scope key carrying the ETag from the dependency to the middleware
+SCOPE_KEY = "http_cache_etag"
+
+NO_STORE_HEADERS = [
+    (b"cache-control", b"no-store, no-cache, must-revalidate, max-age=0"),
+    (b"pragma", b"no-cache"),
+    (b"expires", b"0"),
+]
+REVALIDATE_HEADERS = [(b"cache-control", b"private, no-cache")]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+
+    "*" is not honoured: the route's own permission checks have not run yet.
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def build_etag(request: Request, user: User, tables) -> Optional[str]:
+    """
+    Weak ETag for the current request, or None while a table is settling.
+
+    Args:
+        request: Current request (path and query string are part of the tag)
+        user: Authenticated user
+        tables: Table names the response is derived from
+    """
+    watched = tuple(tables) + ACCESS_TABLES
+    if not table_versions.settled(*watched):
+        return None
+    role = user.role.name if user.role else ""
+    key = "|".join((
+        table_versions.snapshot(*watched),
+        str(user.id),
+        role,
+        request.url.path,
+        request.url.query,
+    ))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def conditional_get(*tables):
+    """
+    Route dependency enabling ETag revalidation for a GET endpoint.
+
+    Args:
+        *tables: ORM models, Table objects or table names the response reads
+
+    Raises:
+        HTTPException(304): If-None-Match matches the current ETag
+    """
+    watched = table_names(*tables)
+
+    def dependency(request: Request, current_user: User = Depends(get_current_user)) -> None:
+        if not HTTP_CACHE_ENABLED or request.method != "GET":
+            return
+        etag = build_etag(request, current_user, watched)
+        if etag is None:
+            return
+        request.scope[SCOPE_KEY] = etag
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+
+    return dependency
+
+
+# ===========================
+# MIDDLEWARE
+# ===========================
+
+class HTTPCacheMiddleware:
+    """
+    Pure ASGI middleware applying the cache policy to every HTTP response.
+
+    Replaces NoCacheMiddleware: no-store unless the route opted in through
+    conditional_get and the response is a 200 or 304.
+    """
+
+    _REPLACED = {b"cache-control", b"pragma", b"expires", b"etag"}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache_headers(message):
+            if message["type"] == "http.response.start":
+                etag = scope.get(SCOPE_KEY)
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in self._REPLACED]
+                if etag and message["status"] in (200, 304):
+                    headers += REVALIDATE_HEADERS + [(b"etag", etag.encode("latin-1"))]
+                    headers = add_vary(headers, b"Authorization")
+                else:
+                    headers += NO_STORE_HEADERS
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
@@ -0,0 +1,687 @@
+"""
+jobs.py -
+Durable Background Job Queue
+
+Bulk Excel/ZIP builds and document processing used to run inside the request
+(or on an ad hoc thread per upload). This module moves them to a job queue
+backed by the `jobs` table (Models.Admin.Job): a route validates the request,
+submits a job and returns its id with 202 Accepted; a worker runs the job and
+the client polls /jobs/{id} and downloads /jobs/{id}/result.
+
+Jobs:
+- Handlers are registered by name with `@job_handler(kind, queue=...)` and
+  called as `handler(ctx, **params)`. Params must be JSON-serializable.
+- `ctx` (JobContext) carries a database session, the submitting user (whose
+  permissions apply) and `ctx.progress(done, total, message)`.
+- A handler returns a JobResult (downloadable file) or any JSON value.
+- JobError and HTTPException fail the job with their message; other
+  exceptions are retried up to the handler's max_attempts with exponential
+  backoff (JOB_RETRY_BACKOFF_SECONDS * 2^(attempt-1)).
+- Cancellation (`job_queue.cancel()`) removes queued jobs at once; running
+  jobs stop at their next `ctx.progress()` call.
+
+Workers:
+- Each queue ("export", "import", "ai") has its own pool of worker threads
+  (JOB_CONCURRENCY_<QUEUE>), so a burst of exports never delays document
+  processing and vice versa.
+- Workers claim a due job with a conditional UPDATE (status queued ->
+  running), so any number of processes can share one table.
+- Running jobs heartbeat; a job whose worker stopped heartbeating for
+  JOB_STALE_SECONDS (crash, restart) is requeued or failed when out of attempts.
+- Finished jobs and their result files are deleted after JOB_RETENTION_HOURS.
+
+Executors (JOB_EXECUTOR):
+- threads: worker threads inside the API process (default, single node).
+- inline: `submit()` runs the job on the calling thread before returning
+  (tests and scripts; the job is finished when the route answers).
+- external: the API only enqueues; run workers with `python -m utils.jobs`.
+  Result files are written to JOB_RESULT_DIR, which must then be shared.
+
+Usage:
+    from utils.jobs import job_handler, job_queue, job_accepted, JobResult, EXPORT
+
+    @job_handler("od_boq.bulk_boq_excel", queue=EXPORT)
+    def run_bulk_boq_excel(ctx, site_record_ids):
+        excel_file, filename, _ = build_bulk_boq_excel(ctx.db, ctx.user, site_record_ids, ctx.progress)
+        return JobResult.from_file(excel_file, filename, XLSX_MEDIA_TYPE)
+
+    job = job_queue.submit("od_boq.bulk_boq_excel", {"site_record_ids": ids}, user_id=current_user.id)
+    return job_accepted(job)
+
+Environment Variables (optional):
+- JOB_EXECUTOR: "threads", "inline" or "external" (default: threads)
+- JOB_CONCURRENCY_EXPORT / JOB_CONCURRENCY_IMPORT / JOB_CONCURRENCY_AI: Worker threads per queue (default: 2 / 1 / 1)
+- JOB_POLL_INTERVAL_SECONDS: Idle worker poll interval (default: 2)
+- JOB_HEARTBEAT_SECONDS: Heartbeat and maintenance interval (default: 15)
+- JOB_STALE_SECONDS: Heartbeat age after which a running job is requeued (default: 120)
+- JOB_RETRY_BACKOFF_SECONDS: Base retry delay (default: 30)
+- JOB_RETENTION_HOURS: Hours finished jobs and results are kept (default: 24)
+- JOB_RESULT_DIR: Directory of result files (default: uploads/jobs)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import importlib
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from Database.session import Session as SessionLocal
+from Models.Admin.Job import Job
+from Models.Admin.User import User
+from utils.fast_json import FastJSONResponse
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Queues
+EXPORT = "export"
+IMPORT = "import"
+AI = "ai"
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "threads").lower()
+JOB_CONCURRENCY = {
+    EXPORT: int(os.getenv("JOB_CONCURRENCY_EXPORT", "2")),
+    IMPORT: int(os.getenv("JOB_CONCURRENCY_IMPORT", "1")),
+    AI: int(os.getenv("JOB_CONCURRENCY_AI", "1")),
+}
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_RESULT_DIR = Path(os.getenv("JOB_RESULT_DIR", "uploads/jobs"))
+
+# Minimum seconds between progress writes of one job
+_PROGRESS_INTERVAL = 1.0
+
+# Modules registering job handlers (imported by `python -m utils.jobs`)
+JOB_HANDLER_MODULES = (
+    "APIs.AI.DocumentRoute",
+    "APIs.BOQ.BOQReferenceRoute",
+    "APIs.DU.OD_BOQ_Route",
+    "APIs.RAN.RAN_LLDRouting",
+)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _utcnow() -> datetime:
+    """Naive UTC timestamp (the DateTime columns are timezone-naive)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobError(Exception):
+    """Fails the job without retrying; the message is shown to the user."""
+
+
+class JobCancelled(Exception):
+    """Raised by ctx.progress() when the job was cancelled."""
+
+
+# ===========================
+# HANDLERS AND RESULTS
+# ===========================
+
+@dataclass
+class JobHandler:
+    kind: str
+    func: Callable[..., Any]
+    queue: str
+    max_attempts: int
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, queue: str = EXPORT, max_attempts: int = 1):
+    """
+    Register a function as the handler of a job kind.
+
+    Args:
+        kind: Job kind passed to job_queue.submit()
+        queue: Worker pool running the job (EXPORT, IMPORT or AI)
+        max_attempts: Executions allowed before the job fails
+    """
+    def decorator(func: Callable[..., Any]):
+        _handlers[kind] = JobHandler(kind, func, queue, max(1, max_attempts))
+        return func
+
+    return decorator
+
+
+class JobResult:
+    """A downloadable job result: bytes, or an open binary file copied to the result file."""
+
+    def __init__(self, content: Optional[bytes], filename: str, media_type: str, file: Optional[BinaryIO] = None):
+        self.content = content
+        self.filename = filename
+        self.media_type = media_type
+        self.file = file
+
+    @classmethod
+    def from_buffer(cls, buffer, filename: str, media_type: str) -> "JobResult":
+        """Wrap a BytesIO (or bytes) as returned by the Excel / ZIP builders."""
+        content = buffer if isinstance(buffer, bytes) else buffer.getvalue()
+        return cls(content, filename, media_type)
+
+    @classmethod
+    def from_file(cls, file: BinaryIO, filename: str, media_type: str) -> "JobResult":
+        """Wrap an open binary file (read from its current position, closed once stored)."""
+        return cls(None, filename, media_type, file=file)
+
+    def write_to(self, path: Path) -> None:
+        if self.file is None:
+            path.write_bytes(self.content)
+            return
+        try:
+            with path.open("wb") as out:
+                shutil.copyfileobj(self.file, out)
+        finally:
+            self.file.close()
+
+
+class JobContext:
+    """
+    What a handler gets besides its params.
+
+    Attributes:
+        job_id: Id of the running job
+        db: Session for the handler's work (closed after the handler returns)
+        user: Submitting user, or None for system jobs
+        attempt: 1 for the first execution, 2 for the first retry, ...
+    """
+
+    def __init__(self, queue: "JobQueue", job: Job, db: Session, user: Optional[User]):
+        self._queue = queue
+        self.job_id = job.id
+        self.db = db
+        self.user = user
+        self.attempt = job.attempts
+        self._last_progress = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """
+        Report progress (throttled) and stop if the job was cancelled.
+
+        Raises:
+            JobCancelled: The job was cancelled; let it propagate
+        """
+        now = time.monotonic()
+        if now - self._last_progress < _PROGRESS_INTERVAL and (total is None or done < total):
+            return
+        self._last_progress = now
+        if self._queue.update_progress(self.job_id, done, total, message):
+            raise JobCancelled()
+
+
+# ===========================
+# QUEUE
+# ===========================
+
+class JobQueue:
+    """
+    Submits jobs and runs them on per-queue worker threads.
+
+    Attributes:
+        session_factory: Creates sessions for queue bookkeeping and handlers
+        executor: "threads", "inline" or "external"
+        concurrency: Worker threads per queue
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        executor: str = JOB_EXECUTOR,
+        concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.session_factory = session_factory
+        self.executor = executor
+        self.concurrency = dict(concurrency or JOB_CONCURRENCY)
+        self._wakeups: Dict[str, threading.Event] = {q: threading.Event() for q in self.concurrency}
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._running: Set[str] = set()
+        self._finished: Dict[tuple, int] = {}
+        self._lock = Lock()
+
+    # ---------------------------
+    # Submission
+    # ---------------------------
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None,
+               message: Optional[str] = None) -> Job:
+        """
+        Queue a job and return its row.
+
+        Args:
+            kind: Registered handler name
+            params: JSON-serializable keyword arguments of the handler
+            user_id: Submitting user (the handler acts with their permissions)
+            message: Initial status message
+        """
+        handler = _handlers.get(kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        now = _utcnow()
+        job = Job(
+            kind=kind,
+            queue=handler.queue,
+            status=QUEUED,
+            params=json.dumps(params or {}),
+            user_id=user_id,
+            message=message or "Queued",
+            max_attempts=handler.max_attempts,
+            run_after=now,
+            created_at=now,
+        )
+        db = self.session_factory()
+        try:
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            db.expunge(job)
+        finally:
+            db.close()
+
+        if self.executor == "inline":
+            if self._claim(handler.queue, job.id):
+                self._execute(job.id)
+            return self.get(job.id) or job
+
+        wakeup = self._wakeups.get(handler.queue)
+        if wakeup is not None:
+            wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Load a job row detached from its session."""
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if job is not None:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask a running job to stop. Returns False if already finished."""
+        db = self.session_factory()
+        try:
+            now = _utcnow()
+            cancelled = db.query(Job).filter(Job.id == job_id, Job.status == QUEUED).update(
+                {"status": CANCELLED, "message": "Cancelled", "finished_at": now}, synchronize_session=False
+            )
+            if not cancelled:
+                cancelled = db.query(Job).filter(Job.id == job_id, Job.status == RUNNING).update(
+                    {"cancel_requested": True, "message": "Cancelling"}, synchronize_session=False
+                )
+            db.commit()
+            return bool(cancelled)
+        finally:
+            db.close()
+
+    def update_progress(self, job_id: str, done: int, total: Optional[int], message: Optional[str]) -> bool:
+        """Store progress and heartbeat; returns True if cancellation was requested."""
+        values: Dict[str, Any] = {"progress_done": done, "heartbeat_at": _utcnow()}
+        if total is not None:
+            values["progress_total"] = total
+        if message is not None:
+            values["message"] = message[:500]
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+            return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to record progress of job {job_id}: {e}")
+            return False
+        finally:
+            db.close()
+
+    # ---------------------------
+    # Execution
+    # ---------------------------
+
+    def _claim(self, queue: str, job_id: Optional[str] = None) -> Optional[str]:
+        """Move one due job of `queue` (or the given job) from queued to running."""
+        now = _utcnow()
+        db = self.session_factory()
+        try:
+            if job_id is not None:
+                candidates = [job_id]
+            else:
+                candidates = [row[0] for row in db.query(Job.id).filter(
+                    Job.queue == queue, Job.status == QUEUED, Job.run_after <= now
+                ).order_by(Job.run_after, Job.created_at).limit(5).all()]
+            for candidate in candidates:
+                claimed = db.query(Job).filter(Job.id == candidate, Job.status == QUEUED).update(
+                    {
+                        "status": RUNNING,
+                        "attempts": Job.attempts + 1,
+                        "started_at": now,
+                        "heartbeat_at": now,
+                        "worker": WORKER_ID,
+                        "message": "Running",
+                    },
+                    synchronize_session=False,
+                )
+                db.commit()
+                if claimed:
+                    return candidate
+            return None
+        finally:
+            db.close()
+
+    def _execute(self, job_id: str) -> None:
+        """Run a claimed job and record its outcome."""
+        with self._lock:
+            self._running.add(job_id)
+        db = self.session_factory()
+        kind = "unknown"
+        try:
+            job = db.get(Job, job_id)
+            kind = job.kind
+            handler = _handlers.get(job.kind)
+            if handler is None:
+                self._finish(job_id, kind, FAILED, error=f"Unknown job kind: {job.kind}")
+                return
+
+            params = json.loads(job.params or "{}")
+            user = db.get(User, job.user_id) if job.user_id is not None else None
+            ctx = JobContext(self, job, db, user)
+            attempts, max_attempts = job.attempts, job.max_attempts
+            started = time.monotonic()
+            try:
+                result = handler.func(ctx, **params)
+            except JobCancelled:
+                db.rollback()
+                self._finish(job_id, kind, CANCELLED, message="Cancelled")
+                return
+            except (JobError, HTTPException) as e:
+                db.rollback()
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                self._finish(job_id, kind, FAILED, error=str(detail))
+                return
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Job {job_id} ({kind}) attempt {attempts}/{max_attempts} failed")
+                if attempts < max_attempts:
+                    self._retry(job_id, attempts, e)
+                else:
+                    self._finish(job_id, kind, FAILED, error=f"{type(e).__name__}: {e}")
+                return
+
+            self._finish(job_id, kind, SUCCEEDED, result=result)
+            logger.info(f"Job {job_id} ({kind}) finished in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            logger.exception(f"Job {job_id} could not be executed")
+            self._finish(job_id, kind, FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._running.discard(job_id)
+
+    def _retry(self, job_id: str, attempts: int, error: Exception) -> None:
+        delay = JOB_RETRY_BACKOFF_SECONDS * (2 ** (attempts - 1))
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(
+                {
+                    "status": QUEUED,
+                    "run_after": _utcnow() + timedelta(seconds=delay),
+                    "message": f"Attempt {attempts} failed, retrying in {int(delay)}s: {error}"[:500],
+                    "worker": None,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, kind: str, state: str, result: Any = None,
+                error: Optional[str] = None, message: Optional[str] = None) -> None:
+        values: Dict[str, Any] = {"status": state, "finished_at": _utcnow(), "heartbeat_at": None}
+        if isinstance(result, JobResult):
+            JOB_RESULT_DIR.mkdir(parents=True, exist_ok=True)
+            path = JOB_RESULT_DIR / f"{job_id}{Path(result.filename).suffix}"
+            result.write_to(path)
+            values.update(
+                result_path=str(path), result_name=result.filename, result_media_type=result.media_type
+            )
+        elif result is not None:
+            values["result_data"] = json.dumps(result, default=str)
+        if error is not None:
+            values["error"] = error
+            values["message"] = error[:500]
+        else:
+            values["message"] = message or ("Done" if state == SUCCEEDED else state.capitalize())
+
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            key = (kind, state)
+            self._finished[key] = self._finished.get(key, 0) + 1
+
+    def run_pending(self, queue: Optional[str] = None) -> int:
+        """Run every due job on the calling thread (tests, scripts). Returns the number run."""
+        count = 0
+        for name in ([queue] if queue else list(self.concurrency)):
+            while True:
+                job_id = self._claim(name)
+                if job_id is None:
+                    break
+                self._execute(job_id)
+                count += 1
+        return count
+
+    # ---------------------------
+    # Maintenance
+    # ---------------------------
+
+    def heartbeat(self) -> None:
+        """Refresh the heartbeat of jobs running in this process."""
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id.in_(running), Job.status == RUNNING).update(
+                {"heartbeat_at": _utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def requeue_stale(self) -> int:
+        """Requeue (or fail) running jobs whose worker stopped heartbeating."""
+        cutoff = _utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+        stale = or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < cutoff)
+        db = self.session_factory()
+        try:
+            requeued = db.query(Job).filter(
+                Job.status == RUNNING, stale, Job.attempts < Job.max_attempts
+            ).update(
+                {"status": QUEUED, "run_after": _utcnow(), "worker": None, "message": "Requeued after worker loss"},
+                synchronize_session=False,
+            )
+            failed = db.query(Job).filter(Job.status == RUNNING, stale).update(
+                {"status": FAILED, "finished_at": _utcnow(), "error": "Worker stopped responding",
+                 "message": "Worker stopped responding"},
+                synchronize_session=False,
+            )
+            db.commit()
+            if requeued or failed:
+                logger.warning(f"Stale jobs: {requeued} requeued, {failed} failed")
+            return requeued + failed
+        finally:
+            db.close()
+
+    def cleanup(self) -> int:
+        """Delete finished jobs older than JOB_RETENTION_HOURS and their result files."""
+        cutoff = _utcnow() - timedelta(hours=JOB_RETENTION_HOURS)
+        db = self.session_factory()
+        try:
+            expired = db.query(Job.id, Job.result_path).filter(
+                Job.status.in_(FINISHED_STATES), Job.finished_at < cutoff
+            ).all()
+            for _, result_path in expired:
+                if result_path:
+                    Path(result_path).unlink(missing_ok=True)
+            if expired:
+                db.query(Job).filter(Job.id.in_([job_id for job_id, _ in expired])).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+            return len(expired)
+        finally:
+            db.close()
+
+    # ---------------------------
+    # Worker threads
+    # ---------------------------
+
+    def start(self, force: bool = False) -> None:
+        """Start worker and maintenance threads (only with JOB_EXECUTOR=threads unless forced)."""
+        if self.executor != "threads" and not force:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for queue, workers in self.concurrency.items():
+                for n in range(max(0, workers)):
+                    thread = threading.Thread(
+                        target=self._worker, args=(queue,), name=f"job-{queue}-{n}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+            thread = threading.Thread(target=self._maintenance, name="job-maintenance", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job workers started: {self.concurrency}")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop the threads, waiting up to `timeout` seconds for running jobs."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        if not threads:
+            return
+        self._stopping.set()
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            if self._running:
+                logger.warning(f"Jobs still running at shutdown (requeued later): {sorted(self._running)}")
+
+    def _worker(self, queue: str) -> None:
+        wakeup = self._wakeups[queue]
+        while not self._stopping.is_set():
+            try:
+                job_id = self._claim(queue)
+            except Exception as e:
+                logger.warning(f"Job worker ({queue}) could not claim a job: {e}")
+                job_id = None
+            if job_id is not None:
+                self._execute(job_id)
+                continue
+            wakeup.wait(JOB_POLL_INTERVAL_SECONDS)
+            wakeup.clear()
+
+    def _maintenance(self) -> None:
+        while not self._stopping.wait(JOB_HEARTBEAT_SECONDS):
+            for task in (self.heartbeat, self.requeue_stale, self.cleanup):
+                try:
+                    task()
+                except Exception as e:
+                    logger.warning(f"Job maintenance ({task.__name__}) failed: {e}")
+
+    # ---------------------------
+    # Metrics
+    # ---------------------------
+
+    def render_prometheus(self) -> List[str]:
+        """Metrics lines for utils.metrics."""
+        with self._lock:
+            finished = dict(self._finished)
+            running = len(self._running)
+        lines = [
+            "# HELP jobs_finished_total Jobs finished by this process by kind and status.",
+            "# TYPE jobs_finished_total counter",
+        ]
+        for (kind, state), count in sorted(finished.items()):
+            lines.append(f'jobs_finished_total{{kind="{kind}",status="{state}"}} {count}')
+        lines.append("# HELP jobs_running Jobs running in this process.")
+        lines.append("# TYPE jobs_running gauge")
+        lines.append(f"jobs_running {running}")
+        return lines
+
+
+# Global instance
+job_queue = JobQueue()
+metrics.register_collector(job_queue.render_prometheus)
+
+
+def job_accepted(job: Job) -> FastJSONResponse:
+    """202 response for a route that handed its work to the job queue."""
+    return FastJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}",
+            "result_url": f"/jobs/{job.id}/result",
+        },
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+def _run_workers() -> None:
+    """`python -m utils.jobs`: standalone worker process for JOB_EXECUTOR=external."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
+    for module in JOB_HANDLER_MODULES:
+        importlib.import_module(module)
+    job_queue.start(force=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        job_queue.stop()
+
+
+if __name__ == "__main__":
+    # Run through the importable module so handlers register with the same queue
+    importlib.import_module("utils.jobs")._run_workers()
@@ -0,0 +1,589 @@
+"""
+metrics.py -
+Request, Database and Event Loop Metrics
+
+Collects the numbers needed to see where request time goes and renders them
+in the Prometheus text exposition format for the admin-only /metrics route.
+
+Recorded:
+- Per-route latency summaries (p50/p95/p99 over a sliding window of samples)
+- Per-route request counts by status, DB query count and DB time
+  (SQLAlchemy engine events, attributed to the request through a ContextVar)
+- Connection pool checkout wait time and current checked-out connections
+- Event loop lag, sampled by a background task
+
+Slow request log:
+    When SLOW_REQUEST_MS is set, requests slower than the threshold are logged
+    with their query count, DB time and the most expensive SQL statements.
+
+Collectors:
+    Other modules add their own series with `metrics.register_collector(fn)`,
+    where fn() returns exposition lines (e.g. utils.cache hit/miss counters).
+
+Multiple workers:
+    Each worker process has its own registry. With METRICS_BACKEND=redis every
+    worker publishes its exposition to Redis every METRICS_PUBLISH_SECONDS and
+    `render_all()` (the /metrics route) merges all live workers, adding a
+    `worker` label to each series so Prometheus can sum across them.
+
+Query budgets:
+    Finished requests are handed to utils.query_budget.check_request_budget
+    (per-route @query_budget limits and repeated-statement detection).
+
+Usage:
+    from utils.metrics import MetricsMiddleware, metrics, install_db_instrumentation
+
+    app.add_middleware(MetricsMiddleware)
+    install_db_instrumentation(engine)
+    text = metrics.render_prometheus()
+
+Environment Variables (optional):
+- METRICS_ENABLED: Set to "false" to disable collection (default: true)
+- METRICS_WINDOW_SIZE: Latency samples kept per route for quantiles (default: 1024)
+- EVENT_LOOP_LAG_INTERVAL: Seconds between event loop lag samples (default: 0.5)
+- SLOW_REQUEST_MS: Log requests slower than this many ms (default: 0 = off)
+- SLOW_REQUEST_TOP_SQL: SQL statements listed per slow request (default: 5)
+- METRICS_BACKEND: "memory" or "redis" (default: SHARED_STATE_BACKEND, else memory)
+- METRICS_PUBLISH_SECONDS: Interval of publishing to Redis (default: 10)
+- REDIS_URL: Redis connection URL (default: redis://localhost:6379/0)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from utils.deployment import WORKER_ID, shared_backend
+from utils.query_budget import QUERY_BUDGET_MODE, check_request_budget
+
+try:
+    import redis
+except ImportError:  # only needed for METRICS_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+METRICS_WINDOW_SIZE = int(os.getenv("METRICS_WINDOW_SIZE", "1024"))
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_TOP_SQL = int(os.getenv("SLOW_REQUEST_TOP_SQL", "5"))
+METRICS_BACKEND = shared_backend("METRICS_BACKEND")
+METRICS_PUBLISH_SECONDS = float(os.getenv("METRICS_PUBLISH_SECONDS", "10"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Per-statement counts are only kept when something reads them
+COLLECT_REQUEST_STATEMENTS = SLOW_REQUEST_MS > 0 or QUERY_BUDGET_MODE != "off"
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Statement text kept per SQL entry in the slow request log
+_SQL_PREVIEW_CHARS = 300
+
+
+class Summary:
+    """
+    Running count/sum plus a sliding window of samples for quantiles.
+
+    Not thread-safe on its own; the owning registry holds the lock.
+    """
+
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self, window_size: int = METRICS_WINDOW_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=window_size)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self, qs=QUANTILES) -> List[Tuple[float, float]]:
+        """Return [(q, value)] computed over the current window (nearest rank)."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [(q, math.nan) for q in qs]
+        last = len(ordered) - 1
+        return [(q, ordered[min(last, int(math.ceil(q * len(ordered))) - 1)]) for q in qs]
+
+
+@dataclass
+class RouteStats:
+    """Aggregated metrics of one (method, route) pair."""
+    latency: Summary = field(default_factory=Summary)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+
+
+@dataclass
+class RequestStats:
+    """DB activity of the request currently being served."""
+    query_count: int = 0
+    db_seconds: float = 0.0
+    collect_statements: bool = False
+    statements: Dict[str, List[float]] = field(default_factory=dict)  # sql -> [count, seconds]
+
+    def record_query(self, statement: str, elapsed: float) -> None:
+        self.query_count += 1
+        self.db_seconds += elapsed
+        if self.collect_statements:
+            entry = self.statements.get(statement)
+            if entry is None:
+                self.statements[statement] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def top_statements(self, limit: int) -> List[Tuple[str, int, float]]:
+        """Return the most expensive statements as (sql, count, seconds)."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [(sql, int(count), seconds) for sql, (count, seconds) in ranked[:limit]]
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics store.
+
+    Attributes:
+        _routes: (method, route template) -> RouteStats
+        _pool_wait: Connection pool checkout wait summary
+        _loop_lag: Event loop lag summary
+        _collectors: Callables returning extra exposition lines
+        _lock: Thread lock for safe concurrent access
+        client: Redis client with METRICS_BACKEND=redis (see render_all)
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._pool_wait = Summary()
+        self._loop_lag = Summary()
+        self._loop_lag_max = 0.0
+        self._untracked_queries = 0
+        self._untracked_db_seconds = 0.0
+        self._pool = None
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = Lock()
+        self.client = None
+        self.prefix = "metrics:worker:"
+        self._publisher: Optional[threading.Thread] = None
+        self._stop_publishing = threading.Event()
+
+    # ----- recording -----
+
+    def record_request(self, method: str, route: str, status_code: int, elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            route_stats = self._routes.get(key)
+            if route_stats is None:
+                route_stats = self._routes[key] = RouteStats()
+            route_stats.latency.observe(elapsed)
+            route_stats.statuses[status_code] = route_stats.statuses.get(status_code, 0) + 1
+            route_stats.db_queries += stats.query_count
+            route_stats.db_seconds += stats.db_seconds
+
+    def record_untracked_query(self, elapsed: float) -> None:
+        """Queries issued outside any request (startup, background jobs)."""
+        with self._lock:
+            self._untracked_queries += 1
+            self._untracked_db_seconds += elapsed
+
+    def record_pool_wait(self, elapsed: float) -> None:
+        with self._lock:
+            self._pool_wait.observe(elapsed)
+
+    def record_loop_lag(self, lag: float) -> None:
+        with self._lock:
+            self._loop_lag.observe(lag)
+            self._loop_lag_max = max(self._loop_lag_max, lag)
+
+    def reset(self) -> None:
+        """Drop all recorded values (used by benchmarks between runs)."""
+        with self._lock:
+            self._routes.clear()
+            self._pool_wait = Summary()
+            self._loop_lag = Summary()
+            self._loop_lag_max = 0.0
+            self._untracked_queries = 0
+            self._untracked_db_seconds = 0.0
+
+    # ----- exposition -----
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Add a callable whose exposition lines are appended to every scrape."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            routes = [(key, stats.latency.count, stats.latency.total, stats.latency.quantiles(),
+                       dict(stats.statuses), stats.db_queries, stats.db_seconds)
+                      for key, stats in sorted(self._routes.items())]
+            pool_wait = (self._pool_wait.count, self._pool_wait.total, self._pool_wait.quantiles())
+            loop_lag = (self._loop_lag.count, self._loop_lag.total, self._loop_lag.quantiles())
+            loop_lag_max = self._loop_lag_max
+            untracked = (self._untracked_queries, self._untracked_db_seconds)
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route.")
+        lines.append("# TYPE http_request_duration_seconds summary")
+        for (method, route), count, total, quantiles, _, _, _ in routes:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for q, value in quantiles:
+                lines.append(f'http_request_duration_seconds{{{labels},quantile="{q}"}} {_fmt(value)}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {_fmt(total)}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines.append("# HELP http_requests_total Requests by route and status code.")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route), _, _, _, statuses, _, _ in routes:
+            for status_code, count in sorted(statuses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status_code}"}} {count}'
+                )
+
+        lines.append("# HELP http_request_db_queries_total SQL statements executed while serving a route.")
+        lines.append("# TYPE http_request_db_queries_total counter")
+        for (method, route), _, _, _, _, db_queries, _ in routes:
+            lines.append(f'http_request_db_queries_total{{method="{method}",route="{_escape(route)}"}} {db_queries}')
+        lines.append(f'http_request_db_queries_total{{method="",route="<none>"}} {untracked[0]}')
+
+        lines.append("# HELP http_request_db_seconds_total Time spent in SQL while serving a route.")
+        lines.append("# TYPE http_request_db_seconds_total counter")
+        for (method, route), _, _, _, _, _, db_seconds in routes:
+            lines.append(f'http_request_db_seconds_total{{method="{method}",route="{_escape(route)}"}} {_fmt(db_seconds)}')
+        lines.append(f'http_request_db_seconds_total{{method="",route="<none>"}} {_fmt(untracked[1])}')
+
+        _render_summary(lines, "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", pool_wait)
+
+        pool = self._pool
+        if pool is not None and hasattr(pool, "checkedout") and hasattr(pool, "size"):
+            lines.append("# HELP db_pool_checked_out Connections currently checked out of the pool.")
+            lines.append("# TYPE db_pool_checked_out gauge")
+            lines.append(f"db_pool_checked_out {pool.checkedout()}")
+            lines.append("# HELP db_pool_size Configured pool size.")
+            lines.append("# TYPE db_pool_size gauge")
+            lines.append(f"db_pool_size {pool.size()}")
+
+        _render_summary(lines, "event_loop_lag_seconds", "Delay of the event loop behind its schedule.", loop_lag)
+        lines.append("# HELP event_loop_lag_max_seconds Largest event loop lag observed.")
+        lines.append("# TYPE event_loop_lag_max_seconds gauge")
+        lines.append(f"event_loop_lag_max_seconds {_fmt(loop_lag_max)}")
+
+        for collector in collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
+
+        return "\n".join(lines) + "\n"
+
+    # ----- multiple workers -----
+
+    @property
+    def shared(self) -> bool:
+        """True when /metrics merges the registries of every worker (Redis)."""
+        return self.client is not None
+
+    def publish(self) -> None:
+        """Store this worker's exposition in Redis; it expires if the worker dies."""
+        ttl = max(1, int(METRICS_PUBLISH_SECONDS * 3))
+        self.client.set(self.prefix + WORKER_ID, self.render_prometheus(), ex=ttl)
+
+    def render_all(self) -> str:
+        """Exposition of every live worker, or of this process without a shared backend."""
+        if self.client is None:
+            return self.render_prometheus()
+        try:
+            self.publish()
+            keys = sorted(self.client.scan_iter(match=self.prefix + "*", count=100))
+            texts = {}
+            for key, text in zip(keys, self.client.mget(keys) if keys else []):
+                if text is not None:
+                    worker = key.decode()[len(self.prefix):]
+                    texts[worker] = text.decode()
+        except Exception as e:
+            logger.warning(f"Shared metrics unavailable, reporting this worker only: {e}")
+            return self.render_prometheus()
+        return merge_expositions(texts)
+
+    def start_publishing(self) -> None:
+        """Publish to Redis every METRICS_PUBLISH_SECONDS in a background thread."""
+        if self.client is None or (self._publisher is not None and self._publisher.is_alive()):
+            return
+        self._stop_publishing.clear()
+        self._publisher = threading.Thread(target=self._publish_loop, name="metrics-publisher", daemon=True)
+        self._publisher.start()
+
+    def stop_publishing(self) -> None:
+        publisher, self._publisher = self._publisher, None
+        if publisher is None:
+            return
+        self._stop_publishing.set()
+        publisher.join(5.0)
+        try:
+            self.client.delete(self.prefix + WORKER_ID)
+        except Exception:
+            pass
+
+    def _publish_loop(self) -> None:
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning(f"Publishing metrics to Redis failed: {e}")
+            if self._stop_publishing.wait(METRICS_PUBLISH_SECONDS):
+                return
+
+
+def _with_worker_label(line: str, worker: str) -> str:
+    label = f'worker="{_escape(worker)}"'
+    name, brace, rest = line.partition("{")
+    if brace:
+        return f"{name}{{{label},{rest}"
+    name, _, value = line.partition(" ")
+    return f"{name}{{{label}}} {value}"
+
+
+def merge_expositions(texts: Dict[str, str]) -> str:
+    """
+    Merge per-worker expositions into one, keeping each metric family together.
+
+    Args:
+        texts: Worker id -> Prometheus text of that worker
+
+    Returns:
+        str: One exposition with a `worker` label on every sample
+    """
+    families: Dict[str, Tuple[List[str], List[str]]] = {}
+    for worker, text in sorted(texts.items()):
+        family = ""
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("#"):
+                parts = line.split(" ", 3)
+                family = parts[2] if len(parts) > 2 else ""
+                meta, _ = families.setdefault(family, ([], []))
+                if line not in meta:
+                    meta.append(line)
+                continue
+            families.setdefault(family, ([], []))[1].append(_with_worker_label(line, worker))
+
+    lines: List[str] = []
+    for meta, samples in families.values():
+        lines.extend(meta)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def _render_summary(lines: List[str], name: str, help_text: str, data) -> None:
+    count, total, quantiles = data
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} summary")
+    for q, value in quantiles:
+        lines.append(f'{name}{{quantile="{q}"}} {_fmt(value)}')
+    lines.append(f"{name}_sum {_fmt(total)}")
+    lines.append(f"{name}_count {count}")
+
+
+def _fmt(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    return f"{value:.6f}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _create_metrics() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    if METRICS_BACKEND == "redis":
+        try:
+            if redis is None:
+                raise RuntimeError("METRICS_BACKEND=redis requires the redis package")
+            registry.client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+        except Exception as e:
+            logger.error(f"Redis metrics backend unavailable ({e}); reporting per worker")
+    return registry
+
+
+# Global metrics instance
+metrics = _create_metrics()
+
+
+# ===========================
+# DATABASE INSTRUMENTATION
+# ===========================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current_request.get()
+    if stats is None:
+        metrics.record_untracked_query(elapsed)
+    else:
+        stats.record_query(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            starts.pop()
+
+
+def install_db_instrumentation(engine) -> None:
+    """
+    Attach query timing and pool wait instrumentation to an engine.
+
+    Query events are attributed to the request in progress. Pool wait is
+    measured around `pool.connect()`, which is where a checkout blocks when
+    the pool is exhausted.
+    """
+    if not METRICS_ENABLED:
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    pool = engine.pool
+    if getattr(pool, "_metrics_instrumented", False):
+        return
+    original_connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return original_connect()
+        finally:
+            metrics.record_pool_wait(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+    # Pool gauges describe the first (primary, sync) engine instrumented
+    if metrics._pool is None:
+        metrics._pool = pool
+
+
+# ===========================
+# EVENT LOOP LAG SAMPLER
+# ===========================
+
+async def _sample_event_loop_lag(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.record_loop_lag(max(0.0, loop.time() - scheduled))
+
+
+_lag_task: Optional[asyncio.Task] = None
+
+
+def start_event_loop_lag_sampler() -> None:
+    """Start the background lag sampler on the running loop (call from a startup hook)."""
+    global _lag_task
+    if not METRICS_ENABLED or (_lag_task is not None and not _lag_task.done()):
+        return
+    _lag_task = asyncio.get_running_loop().create_task(_sample_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+
+
+async def stop_event_loop_lag_sampler() -> None:
+    """Cancel the background lag sampler (call from a shutdown hook)."""
+    global _lag_task
+    if _lag_task is None:
+        return
+    _lag_task.cancel()
+    try:
+        await _lag_task
+    except asyncio.CancelledError:
+        pass
+    _lag_task = None
+
+
+# ===========================
+# MIDDLEWARE
+# ===========================
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request.
+
+    Requests are grouped by their route template (e.g. /od-boq/sites/{id}), not
+    by raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(collect_statements=COLLECT_REQUEST_STATEMENTS)
+        token = _current_request.set(stats)
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            method = scope.get("method", "")
+            metrics.record_request(method, route_path, status_holder[0], elapsed, stats)
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                _log_slow_request(method, scope.get("path", ""), status_holder[0], elapsed, stats)
+
+        if stats.collect_statements:
+            check_request_budget(method, scope.get("path", ""), route, stats)
+
+
+def _log_slow_request(method: str, path: str, status_code: int, elapsed: float, stats: RequestStats) -> None:
+    lines = [
+        f"Slow request {method} {path} -> {status_code} in {elapsed * 1000:.0f} ms "
+        f"({stats.query_count} queries, {stats.db_seconds * 1000:.0f} ms in DB)"
+    ]
+    for sql, count, seconds in stats.top_statements(SLOW_REQUEST_TOP_SQL):
+        preview = " ".join(sql.split())[:_SQL_PREVIEW_CHARS]
+        lines.append(f"  {seconds * 1000:8.1f} ms  x{count:<4} {preview}")
+    logger.warning("\n".join(lines))
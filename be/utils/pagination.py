@@ -0,0 +1,316 @@
+"""
+pagination.py -
+Keyset (Cursor) Pagination and Cheap Totals
+
+List endpoints page with `.offset(skip).limit(limit)` and return an exact
+`query.count()`. On MSSQL both get slower linearly with the table: OFFSET
+reads and discards every skipped row, and COUNT scans the filtered set.
+
+This module adds, next to the existing skip/limit:
+- Cursor tokens: each page returns `next_cursor`, an opaque token holding the
+  sort key and id of its last row. Passing it back as `?cursor=` continues
+  with `WHERE (sort_key, id) > (last values)` (an index seek) instead of
+  OFFSET. `?cursor=` with an empty value starts a cursor walk.
+- `include_total`: counting is opt-in for cursor requests and stays on by
+  default for skip/limit requests (backward compatible). Lists without a
+  total return `"total": null`.
+- `approximate_total=true`: for unfiltered lists the total is read from the
+  table statistics (sys.partitions on MSSQL, pg_class, information_schema,
+  SQLite rowid) instead of COUNT(*). Filtered lists always count exactly.
+
+Sort keys must be the same direction for every column and end with a unique,
+non-null column (the primary key). Nullable sort columns are supported for
+dialects that sort NULL as the smallest value (MSSQL, SQLite, MySQL).
+
+Usage:
+    SITE_KEYSET = Keyset(ODBOQSite.site_id, ODBOQSite.id)
+
+    @router.get("/sites")
+    def get_sites(skip: int = 0, limit: int = 50, paging: CursorParams = Depends(), ...):
+        total = count_total(db, paging, query, ODBOQSite)
+        records = SITE_KEYSET.paginate(query, paging, skip, limit).all()
+        return {"records": records, "total": total,
+                "next_cursor": SITE_KEYSET.next_cursor(records, limit)}
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import base64
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import and_, func, or_, select, text
+
+from Database.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================
+# CURSOR TOKENS
+# ===========================
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque URL-safe token for a tuple of sort key values."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> List[Any]:
+    """
+    Decode a token from encode_cursor().
+
+    Raises:
+        HTTPException(400): Malformed token
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list):
+            raise ValueError("cursor is not a list")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+class CursorParams:
+    """
+    Route dependency with the cursor pagination query parameters.
+
+    Routes keep declaring skip/limit themselves (their defaults and maxima
+    differ); this adds cursor, include_total and approximate_total.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(
+            None, description="Keyset cursor from a previous page's next_cursor; empty to start. Replaces skip."
+        ),
+        include_total: Optional[bool] = Query(
+            None, description="Return the total count (default: true with skip or approximate_total, false with cursor)"
+        ),
+        approximate_total: bool = Query(
+            False, description="Use table statistics for the total of unfiltered lists"
+        ),
+    ):
+        self.cursor = cursor
+        self.include_total = include_total
+        self.approximate_total = approximate_total
+        self.values = decode_cursor(cursor) if cursor else None
+
+    @property
+    def keyset(self) -> bool:
+        """True when the client pages by cursor instead of skip."""
+        return self.cursor is not None
+
+    @property
+    def wants_total(self) -> bool:
+        if self.include_total is None:
+            return not self.keyset or self.approximate_total
+        return self.include_total
+
+
+# ===========================
+# KEYSET
+# ===========================
+
+class Keyset:
+    """
+    Sort order of a list endpoint, used for ORDER BY and for cursor seeks.
+
+    Works with both `Session.query()` queries and 2.0 `select()` statements.
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        if not columns:
+            raise ValueError("Keyset needs at least one column")
+        self.columns = columns
+        self.descending = descending
+
+    @property
+    def order_by(self) -> list:
+        return [c.desc() if self.descending else c.asc() for c in self.columns]
+
+    def paginate(self, query, paging: Optional[CursorParams], skip: int, limit: int):
+        """
+        Apply ORDER BY plus either the cursor seek or OFFSET, then LIMIT.
+
+        `paging=None` (callers outside a request) pages by skip only.
+        """
+        query = query.order_by(*self.order_by)
+        if paging is not None and paging.keyset:
+            if paging.values is not None:
+                query = query.filter(self.after(paging.values))
+        elif skip:
+            query = query.offset(skip)
+        return query.limit(limit)
+
+    def after(self, values: Sequence[Any]):
+        """Condition selecting the rows that sort after `values`."""
+        if len(values) != len(self.columns):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor: it belongs to a different list",
+            )
+        return self._after(0, values)
+
+    def _after(self, i: int, values: Sequence[Any]):
+        column, value = self.columns[i], values[i]
+        last = i == len(self.columns) - 1
+        if last:
+            return column < value if self.descending else column > value
+
+        rest = self._after(i + 1, values)
+        nullable = getattr(getattr(column, "expression", column), "nullable", False)
+        # NULL sorts as the smallest value: first ascending, last descending
+        if value is None:
+            if self.descending:
+                return and_(column.is_(None), rest)
+            return or_(column.isnot(None), and_(column.is_(None), rest))
+        if self.descending:
+            beyond = [column < value] + ([column.is_(None)] if nullable else [])
+        else:
+            beyond = [column > value]
+        return or_(*beyond, and_(column == value, rest))
+
+    def cursor_for(self, row) -> str:
+        """Cursor token of a row (ORM object, Row or dict)."""
+        keys = [c.key for c in self.columns]
+        if isinstance(row, dict):
+            return encode_cursor([row[k] for k in keys])
+        return encode_cursor([getattr(row, k) for k in keys])
+
+    def next_cursor(self, rows: Sequence, limit: int) -> Optional[str]:
+        """Cursor for the page after `rows`, or None when this was the last page."""
+        if not rows or len(rows) < limit:
+            return None
+        return self.cursor_for(rows[-1])
+
+
+# ===========================
+# TOTALS
+# ===========================
+
+def _approximate_count_sql(table_name: str):
+    """Statement reading a table's row count from the catalog, or None if unsupported."""
+    dialect = engine.dialect.name
+    if dialect == "mssql":
+        return text(
+            "SELECT SUM(p.rows) FROM sys.partitions p "
+            "WHERE p.object_id = OBJECT_ID(:table) AND p.index_id IN (0, 1)"
+        ).bindparams(table=table_name)
+    if dialect == "postgresql":
+        return text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)").bindparams(
+            table=table_name
+        )
+    if dialect == "mysql":
+        return text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        ).bindparams(table=table_name)
+    if dialect == "sqlite":
+        return text(f"SELECT MAX(rowid) FROM {engine.dialect.identifier_preparer.quote(table_name)}")
+    return None
+
+
+def _usable(count) -> Optional[int]:
+    # pg_class reports -1 for never-analyzed tables
+    return int(count) if count is not None and count >= 0 else None
+
+
+def approximate_row_count(db, table) -> Optional[int]:
+    """Row count of a whole table from statistics; None if unavailable."""
+    statement = _approximate_count_sql(table.__tablename__)
+    if statement is None:
+        return None
+    try:
+        return _usable(db.execute(statement).scalar())
+    except Exception as e:
+        logger.warning(f"Approximate count for {table.__tablename__} failed, counting exactly: {e}")
+        db.rollback()
+        return None
+
+
+async def approximate_row_count_async(db, table) -> Optional[int]:
+    """approximate_row_count() for async sessions."""
+    statement = _approximate_count_sql(table.__tablename__)
+    if statement is None:
+        return None
+    try:
+        return _usable(await db.scalar(statement))
+    except Exception as e:
+        logger.warning(f"Approximate count for {table.__tablename__} failed, counting exactly: {e}")
+        await db.rollback()
+        return None
+
+
+# Stand-in params for callers without a request: exact total, skip/limit paging
+_EXACT_TOTAL = CursorParams(cursor=None, include_total=True, approximate_total=False)
+
+
+def _is_filtered(query) -> bool:
+    # Query and Select both expose their combined WHERE clause
+    return getattr(query, "whereclause", None) is not None
+
+
+def count_total(db, paging: Optional[CursorParams], query, table=None, count: Optional[Callable[[], int]] = None) -> Optional[int]:
+    """
+    Total for a list response according to the request's pagination params.
+
+    Approximate totals are only used when `query` has no WHERE clause
+    (no search, filters or access restrictions); otherwise it is counted
+    exactly.
+
+    Args:
+        db: Session
+        paging: Request pagination params; None counts exactly
+        query: The filtered list query, before ordering and paging
+        table: ORM model of the listed table, for approximate totals
+        count: Exact count, called only when needed (default: query.count)
+
+    Returns:
+        The total, or None when the client did not ask for it
+    """
+    if paging is None:
+        paging = _EXACT_TOTAL
+    if not paging.wants_total:
+        return None
+    if paging.approximate_total and table is not None and not _is_filtered(query):
+        approximate = approximate_row_count(db, table)
+        if approximate is not None:
+            return approximate
+    return count() if count is not None else query.count()
+
+
+async def count_total_async(db, paging: Optional[CursorParams], query, table=None) -> Optional[int]:
+    """count_total() for async sessions; `query` is a select() statement."""
+    if paging is None:
+        paging = _EXACT_TOTAL
+    if not paging.wants_total:
+        return None
+    if paging.approximate_total and table is not None and not _is_filtered(query):
+        approximate = await approximate_row_count_async(db, table)
+        if approximate is not None:
+            return approximate
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
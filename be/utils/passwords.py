@@ -0,0 +1,212 @@
+"""
+passwords.py -
+Password Hashing Utility
+
+bcrypt is deliberately slow (~200 ms per hash at the default cost). Run on
+the event loop it freezes every request of the worker; run on the shared DB
+thread pool a login burst occupies dozens of threads that all compete for a
+few cores, so every login gets slower and DB routes starve for threads.
+
+This module runs every bcrypt hash and verification on a dedicated pool:
+- At most PASSWORD_HASH_WORKERS operations run at once (default: this
+  worker's share of the CPU cores), the throughput limit of the hardware anyway.
+- At most PASSWORD_HASH_MAX_PENDING operations may be running or waiting.
+  Beyond that the request is rejected with 503 and Retry-After instead of
+  queueing for longer than any client would wait (login burst handling).
+- Unknown users are verified against a dummy hash, so a failed login takes
+  as long for a missing username as for a wrong password.
+
+bcrypt releases the GIL while hashing, so the default thread pool scales
+with cores. PASSWORD_HASH_EXECUTOR=process uses worker processes instead.
+
+Usage:
+    from utils.passwords import hash_password, verify_password_async
+
+    ok = await verify_password_async(form_data.password, user.hashed_password if user else None)
+    hashed = hash_password(new_password)   # from a `def` route
+
+Environment Variables (optional):
+- PASSWORD_HASH_EXECUTOR: "thread" (default) or "process"
+- PASSWORD_HASH_WORKERS: Concurrent hash operations (default: CPU count / APP_WORKERS)
+- PASSWORD_HASH_MAX_PENDING: Running plus waiting operations before new ones
+  are rejected (default: 16 x workers)
+- PASSWORD_HASH_RETRY_AFTER: Retry-After seconds of a rejected request (default: 2)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from utils.deployment import per_worker_share
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread").lower()
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(per_worker_share(os.cpu_count() or 2))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 16)))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")  # Password hashing context
+
+
+class PasswordHashingBusy(HTTPException):
+    """Raised when the password pool already has PASSWORD_HASH_MAX_PENDING operations."""
+    def __init__(self, retry_after: int = PASSWORD_HASH_RETRY_AFTER):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Too many sign-in attempts in progress. Please try again in {retry_after} seconds.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+# ===========================
+# POOL OPERATIONS
+# ===========================
+# Module level so they can be sent to worker processes.
+
+_dummy_hash: Optional[str] = None
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed_password: Optional[str]) -> bool:
+    global _dummy_hash
+    if not hashed_password:
+        # Unknown user: spend the same time as a real verification
+        if _dummy_hash is None:
+            _dummy_hash = pwd_context.hash("dummy-password-for-timing")
+        pwd_context.verify(password, _dummy_hash)
+        return False
+    try:
+        return pwd_context.verify(password, hashed_password)
+    except ValueError:
+        # Malformed or unknown hash format in the users table
+        logger.warning("Stored password hash could not be identified; treating as a failed login")
+        return False
+
+
+# ===========================
+# POOL
+# ===========================
+
+class PasswordPool:
+    """Bounded executor for bcrypt work with load shedding."""
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor: Optional[Executor] = None
+        self._lock = Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix="password-hash")
+                    logger.info(f"Password hashing pool: {self.kind} x {self.workers}, "
+                                f"max pending {self.max_pending}")
+        return self._executor
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Queue one operation.
+
+        Raises:
+            PasswordHashingBusy: If max_pending operations are already queued or running
+        """
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHashingBusy()
+            self._pending += 1
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def render_prometheus(self) -> List[str]:
+        """Metrics lines for utils.metrics."""
+        with self._lock:
+            pending, completed, rejected = self._pending, self._completed, self._rejected
+        return [
+            "# HELP password_hash_pending Password hash operations running or waiting.",
+            "# TYPE password_hash_pending gauge",
+            f"password_hash_pending {pending}",
+            "# HELP password_hash_operations_total Password hash operations finished.",
+            "# TYPE password_hash_operations_total counter",
+            f"password_hash_operations_total {completed}",
+            "# HELP password_hash_rejected_total Operations rejected because the pool was saturated.",
+            "# TYPE password_hash_rejected_total counter",
+            f"password_hash_rejected_total {rejected}",
+        ]
+
+
+# Global password pool instance
+password_pool = PasswordPool(PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+metrics.register_collector(password_pool.render_prometheus)
+
+
+# ===========================
+# PUBLIC API
+# ===========================
+
+def hash_password(password: str) -> str:
+    """Hash a password on the password pool. For `def` routes (blocks the calling thread)."""
+    return password_pool.submit(_hash, password).result()
+
+
+def verify_password(password: str, hashed_password: Optional[str]) -> bool:
+    """
+    Verify a password on the password pool. For `def` routes (blocks the calling thread).
+
+    Args:
+        password: Plain text password
+        hashed_password: Stored hash, or None for an unknown user (always False,
+            but takes as long as a real verification)
+    """
+    return password_pool.submit(_verify, password, hashed_password).result()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password pool without blocking the event loop."""
+    return await asyncio.wrap_future(password_pool.submit(_hash, password))
+
+
+async def verify_password_async(password: str, hashed_password: Optional[str]) -> bool:
+    """Async counterpart of verify_password."""
+    return await asyncio.wrap_future(password_pool.submit(_verify, password, hashed_password))
@@ -0,0 +1,245 @@
+"""
+query_budget.py -
+SQL Query Budgets and N+1 Detection
+
+Many endpoints were hand-fixed for N+1 queries (marked "OPTIMIZED"), but
+nothing stops a later change from reintroducing a query per row. This module
+makes the number of SQL statements an endpoint runs something that can be
+declared and checked.
+
+Components:
+- query_budget(n): route decorator declaring the maximum statements a
+  request may run (authentication and access checks included).
+- QueryCounter / count_queries(): context manager counting statements on
+  one or more engines through `before_cursor_execute`.
+- check_request_budget(): called by utils.metrics.MetricsMiddleware at the end
+  of each request with the request's statement counts. Depending on
+  QUERY_BUDGET_MODE it logs or raises QueryBudgetExceeded when the route's
+  budget is exceeded, and logs statements repeated within one request (the
+  signature of an N+1 loop).
+- pytest fixtures `query_counter` and `enforce_query_budgets`, available to
+  a test suite through `pytest_plugins = ["utils.query_budget"]`.
+
+Usage:
+    @router.get("/items")
+    @query_budget(6)
+    def list_items(...):
+        ...
+
+    with count_queries(engine) as counter:
+        client.get("/items")
+    counter.assert_at_most(6)
+
+Environment Variables (optional):
+- QUERY_BUDGET_MODE: "off", "warn" or "raise"
+  (default: "warn" when ENVIRONMENT=development, otherwise "off")
+- QUERY_REPEAT_THRESHOLD: Log a statement run this many times in one request (default: 5)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+from collections import Counter
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_environment = os.getenv("ENVIRONMENT", "development").lower()
+
+QUERY_BUDGET_MODE = os.getenv(
+    "QUERY_BUDGET_MODE", "warn" if _environment == "development" else "off"
+).lower()
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+# Statement text kept per SQL entry in log messages
+_SQL_PREVIEW_CHARS = 200
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in QUERY_BUDGET_MODE=raise (and by QueryCounter) when a budget is exceeded."""
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the maximum number of SQL statements a route may run per request.
+
+    Works above or below utils.blocking.offload (functools.wraps copies the
+    attribute to the wrapper).
+    """
+    def decorator(func: Callable):
+        setattr(func, BUDGET_ATTRIBUTE, max_queries)
+        return func
+
+    return decorator
+
+
+def get_route_budget(route) -> Optional[int]:
+    """Return the budget declared on a Starlette route's endpoint, if any."""
+    endpoint = getattr(route, "endpoint", None)
+    return getattr(endpoint, BUDGET_ATTRIBUTE, None)
+
+
+def _preview(sql: str) -> str:
+    return " ".join(sql.split())[:_SQL_PREVIEW_CHARS]
+
+
+def repeated_statements(statements: Dict[str, int], threshold: int = QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+    """Return (sql, count) for statements run at least `threshold` times, most repeated first."""
+    repeated = [(sql, count) for sql, count in statements.items() if count >= threshold]
+    return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+def _format_statements(entries: List[Tuple[str, int]]) -> str:
+    return "\n".join(f"  x{count:<4} {_preview(sql)}" for sql, count in entries)
+
+
+def check_request_budget(method: str, path: str, route, stats) -> None:
+    """
+    Check one finished request against its route's query budget.
+
+    Args:
+        method: HTTP method
+        path: Request path (for the log message)
+        route: Matched Starlette route, or None
+        stats: utils.metrics.RequestStats of the request (statements collected)
+
+    Raises:
+        QueryBudgetExceeded: In QUERY_BUDGET_MODE=raise when over budget
+    """
+    if QUERY_BUDGET_MODE == "off":
+        return
+
+    statement_counts = {sql: int(entry[0]) for sql, entry in stats.statements.items()}
+    repeated = repeated_statements(statement_counts)
+    if repeated:
+        logger.warning(
+            f"Repeated SQL in {method} {path} ({stats.query_count} queries) - possible N+1:\n"
+            + _format_statements(repeated)
+        )
+
+    budget = get_route_budget(route)
+    if budget is None or stats.query_count <= budget:
+        return
+
+    message = (
+        f"{method} {getattr(route, 'path', path)} ran {stats.query_count} SQL statements "
+        f"(budget {budget})"
+    )
+    if QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+# ===========================
+# QUERY COUNTER
+# ===========================
+
+class QueryCounter:
+    """
+    Count SQL statements executed on the given engines while active.
+
+    Counts statements from every thread (worker-thread routes included), so
+    use it around a single request or test step.
+    """
+
+    def __init__(self, *engines, max_queries: Optional[int] = None):
+        self.engines = engines
+        self.max_queries = max_queries
+        self.statements: Counter = Counter()
+        self._lock = Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements[statement] += 1
+
+    @property
+    def count(self) -> int:
+        return sum(self.statements.values())
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times."""
+        return repeated_statements(dict(self.statements), threshold)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements.clear()
+
+    def assert_at_most(self, max_queries: int) -> None:
+        """Raise QueryBudgetExceeded if more than max_queries statements ran."""
+        if self.count > max_queries:
+            raise QueryBudgetExceeded(
+                f"Expected at most {max_queries} SQL statements, got {self.count}:\n"
+                + _format_statements(self.statements.most_common())
+            )
+
+    def __enter__(self) -> "QueryCounter":
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._on_execute)
+        if exc_type is None and self.max_queries is not None:
+            self.assert_at_most(self.max_queries)
+
+
+def _default_engines() -> tuple:
+    """Every distinct engine of the application (primary, replica, async)."""
+    from Database.session import engine, read_engine, async_engine, async_read_engine
+
+    engines = [engine, read_engine]
+    engines += [e.sync_engine for e in (async_engine, async_read_engine) if e is not None]
+    unique = []
+    for candidate in engines:
+        if all(candidate is not seen for seen in unique):
+            unique.append(candidate)
+    return tuple(unique)
+
+
+def count_queries(*engines, max_queries: Optional[int] = None) -> QueryCounter:
+    """
+    Count statements on the given engines (default: all application engines).
+
+    Args:
+        *engines: SQLAlchemy engines to watch
+        max_queries: If set, raise QueryBudgetExceeded on exit when exceeded
+    """
+    return QueryCounter(*(engines or _default_engines()), max_queries=max_queries)
+
+
+# ===========================
+# PYTEST FIXTURES
+# ===========================
+
+try:
+    import pytest
+except ImportError:  # pytest is a test-only dependency
+    pytest = None
+
+if pytest is not None:
+
+    @pytest.fixture
+    def query_counter():
+        """
+        Factory for query counting contexts:
+
+            with query_counter(max_queries=5):
+                client.get("/items")
+        """
+        return count_queries
+
+    @pytest.fixture
+    def enforce_query_budgets(monkeypatch):
+        """Fail the test when any request exceeds its route's @query_budget."""
+        import utils.metrics
+
+        monkeypatch.setattr(f"{__name__}.QUERY_BUDGET_MODE", "raise")
+        monkeypatch.setattr(utils.metrics, "COLLECT_REQUEST_STATEMENTS", True)
@@ -2,34 +2,75 @@
 rate_limiter.py -
 Rate Limiter Utility
 
-Provides simple in-memory rate limiting for API endpoints.
-This implementation is suitable for single-instance deployments.
-For multi-instance deployments, replace with Redis-based implementation.
+Rate limiting for authentication and other expensive endpoints, using the
+Generic Cell Rate Algorithm (GCRA):
+
+- Constant memory per key: one number, the "theoretical arrival time" (TAT).
+  A limit of N requests per W seconds admits a burst of N and then one
+  request every W/N seconds, the same steady state as a sliding window but
+  without keeping a timestamp per request.
+- Pluggable backends:
+    MemoryBackend: per-process state in sharded dicts, each shard with its own
+        lock, so unrelated keys don't contend; expired keys are purged shard
+        by shard.
+    RedisBackend: state shared by every worker and instance, updated
+        atomically by a Lua script using the Redis server clock.
+- If the Redis backend becomes unreachable, limits are enforced per process
+  with an in-memory fallback instead of failing open.
 
 Security Features:
 - Prevents brute force attacks on authentication endpoints
 - Configurable requests per window
-- IP-based tracking
+- IP-based (auth endpoints) or user-based (AI endpoints) tracking
 - Automatic cleanup of expired entries
 
 Usage:
-    from utils.rate_limiter import rate_limiter, RateLimitExceeded
+    from utils.rate_limiter import check_auth_rate_limit, rate_limit
 
     @router.post("/login")
-    async def login(request: Request):
-        client_ip = get_client_ip(request)
-        rate_limiter.check_rate_limit(client_ip, "login", max_requests=5, window_seconds=60)
+    def login(request: Request):
+        check_auth_rate_limit(get_client_ip(request), "login")
         # ... rest of the endpoint
 
+    @router.post("/chat", dependencies=[Depends(rate_limit("ai_chat", per="user"))])
+    def chat(...):
+        ...
+
+Environment Variables (optional):
+- RATE_LIMIT_BACKEND: "memory" or "redis" (default: SHARED_STATE_BACKEND, else memory)
+- REDIS_URL: Redis connection URL for the redis backend (default: redis://localhost:6379/0)
+- RATE_LIMIT_SHARDS: Lock shards of the memory backend (default: 16)
+
 Author: Security Hardening Initiative
 Created: 2025
 """
 
+import logging
+import math
+import os
 import time
-from collections import defaultdict
+import zlib
+from dataclasses import dataclass
 from threading import Lock
-from typing import Dict, Tuple
-from fastapi import HTTPException, status
+from typing import Callable, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from utils.deployment import shared_backend
+
+try:
+    import redis
+except ImportError:  # only needed for RATE_LIMIT_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = shared_backend("RATE_LIMIT_BACKEND")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+
+# Seconds between warnings while the shared backend is failing
+_FALLBACK_WARNING_INTERVAL = 60
 
 
 class RateLimitExceeded(HTTPException):
@@ -42,50 +83,159 @@ class RateLimitExceeded(HTTPException):
         )
 
 
-class InMemoryRateLimiter:
-    """
-    In-memory rate limiter using sliding window algorithm.
+@dataclass
+class RateLimitResult:
+    """Outcome of one rate limit check."""
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until the next request is allowed (0 if allowed)
+    reset_after: float  # seconds until the full burst is available again
 
-    Thread-safe implementation suitable for single-instance deployments.
-    For distributed systems, use Redis-based rate limiting instead.
 
-    Attributes:
-        _requests: Dictionary storing request timestamps by key
-        _lock: Thread lock for safe concurrent access
-        _cleanup_interval: How often to clean up expired entries
-        _last_cleanup: Timestamp of last cleanup
+def _result(allowed: bool, backlog: float, retry_after: float, interval: float, window: float) -> RateLimitResult:
+    """Build a result from the GCRA backlog (TAT - now) after the decision."""
+    remaining = int((window - backlog) // interval) if allowed else 0
+    return RateLimitResult(allowed, max(0, remaining), max(0.0, retry_after), max(0.0, backlog))
+
+
+# ===========================
+# BACKENDS
+# ===========================
+
+class MemoryBackend:
     """
+    Per-process GCRA state, sharded by key hash.
 
-    def __init__(self, cleanup_interval: int = 300):
-        """
-        Initialize the rate limiter.
+    Each shard maps key -> TAT; a key expires once its TAT has passed.
+    """
 
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, cleanup_interval: int = 300):
+        """
         Args:
-            cleanup_interval: Seconds between cleanup of expired entries (default: 5 minutes)
+            shards: Number of independently locked dicts
+            cleanup_interval: Seconds between purges of a shard's expired keys
         """
-        self._requests: Dict[str, list] = defaultdict(list)
-        self._lock = Lock()
+        self._shards = [dict() for _ in range(max(1, shards))]
+        self._locks = [Lock() for _ in self._shards]
+        self._last_cleanup = [time.monotonic()] * len(self._shards)
         self._cleanup_interval = cleanup_interval
-        self._last_cleanup = time.time()
 
-    def _cleanup_expired(self, current_time: float, window_seconds: int = 3600) -> None:
-        """Remove entries older than the maximum window."""
-        if current_time - self._last_cleanup < self._cleanup_interval:
+    def _shard(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self._shards)
+
+    def _purge(self, index: int, now: float) -> None:
+        """Drop expired keys of one shard (caller holds its lock)."""
+        if now - self._last_cleanup[index] < self._cleanup_interval:
             return
+        shard = self._shards[index]
+        for key in [k for k, tat in shard.items() if tat <= now]:
+            del shard[key]
+        self._last_cleanup[index] = now
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        interval = window / limit
+        now = time.monotonic()
+        index = self._shard(key)
+        with self._locks[index]:
+            self._purge(index, now)
+            shard = self._shards[index]
+            tat = max(shard.get(key, now), now)
+            new_tat = tat + interval * cost
+            allow_at = new_tat - window
+            if now < allow_at:
+                return _result(False, tat - now, allow_at - now, interval, window)
+            if cost:
+                shard[key] = new_tat
+            return _result(True, new_tat - now, 0.0, interval, window)
+
+    def reset(self, match: Callable[[str], bool]) -> None:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                for key in [k for k in shard if match(k)]:
+                    del shard[key]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+# KEYS[1] = key; ARGV = interval, window, cost.
+# Returns {allowed, backlog, retry_after}; floats as strings (Lua numbers
+# returned to Redis are truncated to integers).
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - window
+if now < allow_at then
+    return {0, tostring(tat - now), tostring(allow_at - now)}
+end
+if cost > 0 then
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.max(1, math.ceil((new_tat - now) * 1000)))
+end
+return {1, tostring(new_tat - now), '0'}
+"""
+
+
+class RedisBackend:
+    """GCRA state in Redis, shared by every worker and instance."""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_GCRA_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL) -> "RedisBackend":
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package")
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
 
-        cutoff = current_time - window_seconds
-        keys_to_remove = []
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        interval = window / limit
+        allowed, backlog, retry_after = self._script(keys=[self.prefix + key], args=[interval, window, cost])
+        return _result(bool(int(allowed)), float(backlog), float(retry_after), interval, window)
 
-        for key, timestamps in self._requests.items():
-            # Filter out expired timestamps
-            self._requests[key] = [t for t in timestamps if t > cutoff]
-            if not self._requests[key]:
-                keys_to_remove.append(key)
+    def reset(self, match: Callable[[str], bool]) -> None:
+        for raw in self.client.scan_iter(match=self.prefix + "*", count=500):
+            key = raw.decode() if isinstance(raw, bytes) else raw
+            if match(key[len(self.prefix):]):
+                self.client.delete(raw)
 
-        for key in keys_to_remove:
-            del self._requests[key]
 
-        self._last_cleanup = current_time
+# ===========================
+# LIMITER
+# ===========================
+
+class RateLimiter:
+    """
+    Rate limiter on top of a backend, keyed by "endpoint:identifier".
+
+    Attributes:
+        backend: MemoryBackend or RedisBackend
+        fallback: MemoryBackend used while a shared backend is unreachable
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.fallback = MemoryBackend() if not isinstance(self.backend, MemoryBackend) else None
+        self._last_warning = 0.0
+
+    def _hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        if self.fallback is None:
+            return self.backend.hit(key, limit, window, cost)
+        try:
+            return self.backend.hit(key, limit, window, cost)
+        except Exception as e:
+            now = time.monotonic()
+            if now - self._last_warning > _FALLBACK_WARNING_INTERVAL:
+                self._last_warning = now
+                logger.warning(f"Rate limit backend unavailable, limiting per process: {e}")
+            return self.fallback.hit(key, limit, window, cost)
 
     def check_rate_limit(
         self,
@@ -109,31 +259,9 @@ class InMemoryRateLimiter:
         Raises:
             RateLimitExceeded: If rate limit is exceeded
         """
-        current_time = time.time()
-        key = f"{endpoint}:{identifier}"
-
-        with self._lock:
-            # Cleanup old entries periodically
-            self._cleanup_expired(current_time)
-
-            # Get timestamps for this key
-            timestamps = self._requests[key]
-
-            # Remove timestamps outside the window
-            cutoff = current_time - window_seconds
-            timestamps = [t for t in timestamps if t > cutoff]
-
-            # Check if limit exceeded
-            if len(timestamps) >= max_requests:
-                # Calculate retry-after time
-                oldest_in_window = min(timestamps) if timestamps else current_time
-                retry_after = int(oldest_in_window + window_seconds - current_time) + 1
-                raise RateLimitExceeded(retry_after=max(1, retry_after))
-
-            # Add current request
-            timestamps.append(current_time)
-            self._requests[key] = timestamps
-
+        result = self._hit(f"{endpoint}:{identifier}", max_requests, window_seconds)
+        if not result.allowed:
+            raise RateLimitExceeded(retry_after=max(1, math.ceil(result.retry_after)))
         return True
 
     def get_remaining_requests(
@@ -155,23 +283,8 @@ class InMemoryRateLimiter:
         Returns:
             Tuple of (remaining_requests, seconds_until_reset)
         """
-        current_time = time.time()
-        key = f"{endpoint}:{identifier}"
-
-        with self._lock:
-            timestamps = self._requests.get(key, [])
-            cutoff = current_time - window_seconds
-            valid_timestamps = [t for t in timestamps if t > cutoff]
-
-            remaining = max(0, max_requests - len(valid_timestamps))
-
-            if valid_timestamps:
-                oldest = min(valid_timestamps)
-                reset_in = int(oldest + window_seconds - current_time) + 1
-            else:
-                reset_in = window_seconds
-
-            return remaining, max(0, reset_in)
+        result = self._hit(f"{endpoint}:{identifier}", max_requests, window_seconds, cost=0)
+        return result.remaining, math.ceil(result.reset_after)
 
     def reset(self, identifier: str = None, endpoint: str = None) -> None:
         """
@@ -181,31 +294,36 @@ class InMemoryRateLimiter:
             identifier: Specific identifier to reset (or all if None)
             endpoint: Specific endpoint to reset (or all if None)
         """
-        with self._lock:
-            if identifier is None and endpoint is None:
-                self._requests.clear()
-            elif identifier is None:
-                keys_to_remove = [k for k in self._requests if k.startswith(f"{endpoint}:")]
-                for key in keys_to_remove:
-                    del self._requests[key]
-            elif endpoint is None:
-                keys_to_remove = [k for k in self._requests if k.endswith(f":{identifier}")]
-                for key in keys_to_remove:
-                    del self._requests[key]
-            else:
-                key = f"{endpoint}:{identifier}"
-                self._requests.pop(key, None)
+        def match(key: str) -> bool:
+            key_endpoint, _, key_identifier = key.partition(":")
+            return ((endpoint is None or key_endpoint == endpoint)
+                    and (identifier is None or key_identifier == identifier))
+
+        for backend in (self.backend, self.fallback):
+            if backend is not None:
+                backend.reset(match)
+
+
+def _create_rate_limiter() -> RateLimiter:
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RateLimiter(RedisBackend.from_url(REDIS_URL))
+        except Exception as e:
+            logger.error(f"Redis rate limit backend unavailable ({e}); using in-memory rate limiting")
+    return RateLimiter(MemoryBackend())
 
 
 # Global rate limiter instance
-rate_limiter = InMemoryRateLimiter()
+rate_limiter = _create_rate_limiter()
 
 
 # Default rate limit configurations for different endpoint types
 RATE_LIMITS = {
     "login": {"max_requests": 5, "window_seconds": 60},      # 5 attempts per minute
+    "refresh": {"max_requests": 10, "window_seconds": 60},   # 10 refreshes per minute
     "register": {"max_requests": 3, "window_seconds": 300},  # 3 registrations per 5 minutes
     "password_reset": {"max_requests": 3, "window_seconds": 300},  # 3 resets per 5 minutes
+    "ai_chat": {"max_requests": 20, "window_seconds": 60},   # 20 LLM calls per minute per user
     "api_default": {"max_requests": 100, "window_seconds": 60},    # 100 requests per minute
 }
 
@@ -231,3 +349,38 @@ def check_auth_rate_limit(client_ip: str, endpoint: str) -> bool:
         max_requests=config["max_requests"],
         window_seconds=config["window_seconds"]
     )
+
+
+def _client_ip(request: Request) -> str:
+    forwarded = request.headers.get("X-Forwarded-For")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(endpoint: str, per: str = "ip"):
+    """
+    Route dependency applying RATE_LIMITS[endpoint].
+
+    Args:
+        endpoint: Key in RATE_LIMITS (and the bucket name)
+        per: "ip" to limit per client IP, "user" per authenticated user
+
+    Raises:
+        RateLimitExceeded: If rate limit exceeded
+    """
+    config = RATE_LIMITS.get(endpoint, RATE_LIMITS["api_default"])
+
+    if per == "user":
+        # Imported here: APIs.Core pulls in the database and auth stack
+        from APIs.Core import get_current_user
+
+        def user_dependency(current_user=Depends(get_current_user)) -> None:
+            rate_limiter.check_rate_limit(f"user:{current_user.id}", endpoint, **config)
+
+        return user_dependency
+
+    def ip_dependency(request: Request) -> None:
+        rate_limiter.check_rate_limit(_client_ip(request), endpoint, **config)
+
+    return ip_dependency
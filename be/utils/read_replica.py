@@ -0,0 +1,215 @@
+"""
+read_replica.py -
+Read Replica Routing Utility
+
+List, stat and export routes read through `APIs.Core.get_read_db`, which
+hands out a session on the read replica (Database.session.ReadSession).
+Replicas lag the primary, so a user who just saved something and reloads the
+list could see the old data. To prevent that, every commit made on behalf of
+an authenticated user marks that user as a recent writer, and their reads go
+to the primary for READ_YOUR_WRITES_SECONDS afterwards.
+
+How the user is known:
+- `get_current_user` calls set_request_user() for every authenticated request;
+  the value lives in a ContextVar, so it follows the request into worker threads.
+- A session `after_commit` hook marks the request's user as a recent writer.
+- get_read_db reads the bearer token's `sub` claim (unverified; it only decides
+  routing, authentication still happens in get_current_user).
+
+Replica sessions carry info["read_only"]; flushing one raises
+ReadOnlySessionError so an accidental write fails loudly instead of hitting
+the replica.
+
+Without READ_DATABASE_URL every read goes to the primary and this module only
+does the bookkeeping.
+
+With several workers (utils.deployment) a user's next read may be served by
+another process, so READ_YOUR_WRITES_BACKEND=redis keeps the recent-writer
+marks in Redis as keys expiring after READ_YOUR_WRITES_SECONDS; if Redis is
+unreachable the marks of this process still apply.
+
+Usage:
+    from APIs.Core import get_read_db
+
+    @router.get("/items")
+    def list_items(db: Session = Depends(get_read_db), ...):
+        ...
+
+Environment Variables (optional):
+- READ_YOUR_WRITES_SECONDS: How long a user's reads stay on the primary after
+  a commit (default: 5)
+- READ_YOUR_WRITES_BACKEND: "memory" or "redis" (default: SHARED_STATE_BACKEND, else memory)
+- REDIS_URL: Redis connection URL (default: redis://localhost:6379/0)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Optional
+
+from jose import jwt, JWTError
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+from Database.session import READ_DATABASE_URL
+from utils.deployment import shared_backend
+
+try:
+    import redis
+except ImportError:  # only needed for READ_YOUR_WRITES_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_BACKEND = shared_backend("READ_YOUR_WRITES_BACKEND")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+REPLICA_CONFIGURED = bool(READ_DATABASE_URL)
+
+# Username of the authenticated user of the current request
+_request_user: ContextVar[Optional[str]] = ContextVar("request_user", default=None)
+
+
+class ReadOnlySessionError(RuntimeError):
+    """Raised when a write is flushed on a read replica session."""
+
+
+class RecentWriters:
+    """
+    Users who committed within the read-your-writes window, optionally mirrored in Redis.
+
+    Memory is bounded by the number of users writing within the window; expired
+    entries are pruned on insert. Redis keys expire by themselves.
+    """
+
+    def __init__(self, window_seconds: float = READ_YOUR_WRITES_SECONDS, client=None,
+                 prefix: str = "recentwriter:"):
+        self.window_seconds = window_seconds
+        self.client = client
+        self.prefix = prefix
+        self._until: Dict[str, float] = {}
+        self._lock = Lock()
+        self._next_prune = 0.0
+        self._redis_failing = False
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL) -> "RecentWriters":
+        if redis is None:
+            raise RuntimeError("READ_YOUR_WRITES_BACKEND=redis requires the redis package")
+        return cls(client=redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
+
+    @property
+    def shared(self) -> bool:
+        """True when the marks are shared by every worker (Redis)."""
+        return self.client is not None
+
+    def _redis_error(self, e: Exception) -> None:
+        if not self._redis_failing:
+            logger.warning(f"Shared recent-writer marks unavailable, using local marks: {e}")
+        self._redis_failing = True
+
+    def mark(self, username: str) -> None:
+        """Keep a user's reads on the primary for the next window_seconds."""
+        now = time.monotonic()
+        with self._lock:
+            self._until[username] = now + self.window_seconds
+            if now >= self._next_prune:
+                self._until = {u: t for u, t in self._until.items() if t > now}
+                self._next_prune = now + self.window_seconds
+        if self.client is not None:
+            try:
+                self.client.set(self.prefix + username, 1, px=max(1, int(self.window_seconds * 1000)))
+                self._redis_failing = False
+            except Exception as e:
+                self._redis_error(e)
+
+    def is_recent(self, username: Optional[str]) -> bool:
+        """Return True if the user committed within the window (on any worker when shared)."""
+        if not username:
+            return False
+        with self._lock:
+            until = self._until.get(username)
+        if until is not None and until > time.monotonic():
+            return True
+        if self.client is None:
+            return False
+        try:
+            recent = bool(self.client.exists(self.prefix + username))
+        except Exception as e:
+            self._redis_error(e)
+            return False
+        self._redis_failing = False
+        return recent
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
+
+def _create_recent_writers() -> RecentWriters:
+    if READ_YOUR_WRITES_BACKEND == "redis":
+        try:
+            return RecentWriters.from_url(REDIS_URL)
+        except Exception as e:
+            logger.error(f"Redis recent-writer backend unavailable ({e}); using in-process marks")
+    return RecentWriters()
+
+
+# Global instance
+recent_writers = _create_recent_writers()
+
+
+def set_request_user(username: Optional[str]) -> None:
+    """Remember the authenticated user of the current request (called by get_current_user)."""
+    _request_user.set(username)
+
+
+def _username_from_request(request) -> Optional[str]:
+    """Read the `sub` claim of the request's bearer token without verifying it."""
+    authorization = request.headers.get("Authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.get_unverified_claims(authorization[7:]).get("sub")
+    except JWTError:
+        return None
+
+
+def use_primary_for_read(request) -> bool:
+    """
+    Decide whether a read request must go to the primary.
+
+    True when no replica is configured or the user wrote recently.
+    """
+    if not REPLICA_CONFIGURED:
+        return True
+    return recent_writers.is_recent(_username_from_request(request))
+
+
+# ===========================
+# SESSION HOOKS
+# ===========================
+
+@event.listens_for(OrmSession, "after_commit")
+def _record_commit(session) -> None:
+    """Mark the request's user as a recent writer after a commit on the primary."""
+    if session.info.get("read_only"):
+        return
+    username = _request_user.get()
+    if username:
+        recent_writers.mark(username)
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _refuse_replica_writes(session, flush_context, instances) -> None:
+    """Fail loudly if a replica session tries to write."""
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError(
+            "Attempted to write through a read replica session; use get_db for mutations"
+        )
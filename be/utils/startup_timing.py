@@ -0,0 +1,160 @@
+"""
+startup_timing.py -
+Startup and Import Timing Report
+
+Worker start and autoreload time is dominated by imports. This module
+measures where that time goes:
+
+- Phases: `startup_timer.mark(name)` records the time since the previous mark
+  (e.g. "framework", "routers", "models"). Always on; costs one clock read.
+- Per-module import cost: with STARTUP_TIMING=true an import hook (a
+  sys.meta_path finder) times every module executed after `install()`, the
+  same numbers `python -X importtime` prints, with self and cumulative time.
+- `startup_timer.report()` logs the phases and, when enabled, the
+  STARTUP_TIMING_TOP most expensive modules. main.py calls it from its last
+  startup hook, so it also covers application startup.
+
+Usage:
+    from utils.startup_timing import startup_timer
+    startup_timer.install()       # as early as possible in main.py
+
+    import heavy_module
+    startup_timer.mark("heavy imports")
+    ...
+    startup_timer.report()
+
+Environment Variables (optional):
+- STARTUP_TIMING: "true" to time each imported module (default: false)
+- STARTUP_TIMING_TOP: Number of modules listed in the report (default: 25)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STARTUP_TIMING = os.getenv("STARTUP_TIMING", "false").lower() == "true"
+STARTUP_TIMING_TOP = int(os.getenv("STARTUP_TIMING_TOP", "25"))
+
+
+class _ImportTimingFinder:
+    """
+    Meta path finder that delegates to the real finders and wraps the
+    returned loader's exec_module with a timer.
+    """
+
+    def __init__(self, timer: "StartupTimer"):
+        self.timer = timer
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+
+        loader = getattr(spec, "loader", None)
+        # Builtin/frozen importers are classes shared by every module; leave them alone
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            loader.exec_module = self.timer._timed_exec(fullname, loader.exec_module)
+        return spec
+
+
+class StartupTimer:
+    """Collects startup phases and (optionally) per-module import times."""
+
+    def __init__(self, enabled: bool = STARTUP_TIMING):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self._last_mark = self.started_at
+        self.phases: List[Tuple[str, float]] = []
+        # module -> [cumulative seconds, self seconds]
+        self.modules: Dict[str, List[float]] = {}
+        self._finder: Optional[_ImportTimingFinder] = None
+        self._local = threading.local()
+        self._lock = Lock()
+
+    def install(self) -> None:
+        """Start timing imports (no-op unless enabled)."""
+        if not self.enabled or self._finder is not None:
+            return
+        self._finder = _ImportTimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self) -> None:
+        """Stop timing imports."""
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def mark(self, phase: str) -> float:
+        """Record the time elapsed since the previous mark under `phase`."""
+        now = time.perf_counter()
+        elapsed = now - self._last_mark
+        self._last_mark = now
+        self.phases.append((phase, elapsed))
+        return elapsed
+
+    def elapsed(self) -> float:
+        """Seconds since this module was imported."""
+        return time.perf_counter() - self.started_at
+
+    def _timed_exec(self, name: str, exec_module):
+        def exec_with_timing(module):
+            # Per-thread stack of child durations, to split self from cumulative time
+            stack = getattr(self._local, "stack", None)
+            if stack is None:
+                stack = self._local.stack = []
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += cumulative
+                with self._lock:
+                    self.modules[name] = [cumulative, cumulative - children]
+
+        return exec_with_timing
+
+    def slowest_modules(self, limit: int = STARTUP_TIMING_TOP) -> List[Tuple[str, float, float]]:
+        """(module, cumulative seconds, self seconds), most expensive first."""
+        with self._lock:
+            items = [(name, times[0], times[1]) for name, times in self.modules.items()]
+        return sorted(items, key=lambda item: item[1], reverse=True)[:limit]
+
+    def report(self, limit: int = STARTUP_TIMING_TOP) -> str:
+        """Log and return the startup timing report."""
+        lines = [f"Startup took {self.elapsed():.2f}s"]
+        for phase, seconds in self.phases:
+            lines.append(f"  {phase:<30} {seconds * 1000:9.1f} ms")
+        if self.enabled:
+            lines.append(f"Slowest imports (cumulative / self, top {limit}):")
+            for name, cumulative, own in self.slowest_modules(limit):
+                lines.append(f"  {cumulative * 1000:9.1f} ms {own * 1000:9.1f} ms  {name}")
+        text = "\n".join(lines)
+        logger.info(text)
+        return text
+
+
+# Global instance
+startup_timer = StartupTimer()
@@ -0,0 +1,272 @@
+"""
+table_versions.py -
+Per-Table Version Counters
+
+Every committed INSERT / UPDATE / DELETE bumps a version counter for the table
+it touched. Anything derived from a set of tables (an HTTP ETag, a cached
+payload) can use the counters as its validity key: if none of the versions
+moved, the derived value is still current.
+
+How writes are detected:
+- An engine-level `after_cursor_execute` hook records the target table of
+  every compiled DML statement (ORM flushes, query.update()/delete(),
+  bulk_insert_mappings, Core insert/update/delete) on the connection.
+- The connection's `commit` hook bumps those tables; `rollback` discards them.
+- Raw SQL text is not parsed; code that writes with text() must call
+  `record_write(connection, "table_name")` (bumped with the transaction)
+  or `table_versions.bump("table_name")` itself.
+- Listeners registered with `subscribe()` are called with the bumped table
+  names (utils.cache uses this to invalidate entries tagged with them).
+
+Commit hooks fire just before the database commit completes, and a read
+replica lags further behind. `settled(tables)` is False while any table was
+bumped within TABLE_VERSION_SETTLE_SECONDS, so callers can refuse to cache
+a value that may have been read before the write became visible.
+
+Counters live in process memory and start from a random epoch, so a restart
+invalidates everything derived from them. With several worker processes each
+worker only sees its own writes; derived values must not outlive
+TABLE_VERSION_TTL_SECONDS (see `snapshot()`). TABLE_VERSION_BACKEND=redis
+keeps the counters and last write times in Redis as well, so every worker
+sees every worker's writes (utils.deployment); if Redis is unreachable the
+local counters are used under the local epoch.
+
+Usage:
+    from utils.table_versions import table_versions
+
+    key = table_versions.snapshot("price_books", "roles")
+    if table_versions.settled("price_books"):
+        ...
+
+Environment Variables (optional):
+- TABLE_VERSION_SETTLE_SECONDS: Grace period after a write before derived values
+  are cached again (default: 2, or READ_YOUR_WRITES_SECONDS with a read replica)
+- TABLE_VERSION_TTL_SECONDS: Lifetime of a snapshot key, bounds staleness from
+  writes made outside this process (default: 300)
+- TABLE_VERSION_BACKEND: "memory" or "redis" (default: SHARED_STATE_BACKEND, else memory)
+- REDIS_URL: Redis connection URL (default: redis://localhost:6379/0)
+
+Author: Performance Initiative
+Created: 2026
+"""
+
+import logging
+import os
+import time
+import uuid
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.deployment import shared_backend
+from utils.read_replica import READ_YOUR_WRITES_SECONDS, REPLICA_CONFIGURED
+
+try:
+    import redis
+except ImportError:  # only needed for TABLE_VERSION_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSION_SETTLE_SECONDS = float(os.getenv(
+    "TABLE_VERSION_SETTLE_SECONDS",
+    str(max(2.0, READ_YOUR_WRITES_SECONDS) if REPLICA_CONFIGURED else 2.0),
+))
+TABLE_VERSION_TTL_SECONDS = int(os.getenv("TABLE_VERSION_TTL_SECONDS", "300"))
+TABLE_VERSION_BACKEND = shared_backend("TABLE_VERSION_BACKEND")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Key in Connection.info collecting tables written in the open transaction
+_PENDING_KEY = "table_versions_pending"
+
+
+class TableVersions:
+    """Thread-safe version counters keyed by table name, optionally mirrored in Redis."""
+
+    def __init__(
+        self,
+        settle_seconds: float = TABLE_VERSION_SETTLE_SECONDS,
+        ttl_seconds: int = TABLE_VERSION_TTL_SECONDS,
+        client=None,
+        prefix: str = "tableversions:",
+    ):
+        self.settle_seconds = settle_seconds
+        self.ttl_seconds = max(1, ttl_seconds)
+        self.epoch = uuid.uuid4().hex[:8]
+        self.client = client
+        self.prefix = prefix
+        self.shared_epoch = None
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+        self._listeners: List[Callable[..., None]] = []
+        self._lock = Lock()
+        self._redis_failing = False
+        if client is not None:
+            # First worker to start picks the epoch every worker uses
+            client.set(prefix + "epoch", self.epoch, nx=True)
+            self.shared_epoch = (client.get(prefix + "epoch") or b"").decode() or self.epoch
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL) -> "TableVersions":
+        if redis is None:
+            raise RuntimeError("TABLE_VERSION_BACKEND=redis requires the redis package")
+        return cls(client=redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
+
+    @property
+    def shared(self) -> bool:
+        """True when the counters are shared by every worker (Redis)."""
+        return self.client is not None
+
+    def _redis_error(self, e: Exception) -> None:
+        if not self._redis_failing:
+            logger.warning(f"Shared table versions unavailable, using local counters: {e}")
+        self._redis_failing = True
+
+    def bump(self, *tables: str) -> None:
+        """Record a committed write to the given tables."""
+        now = time.monotonic()
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._bumped_at[table] = now
+            listeners = list(self._listeners)
+        if self.client is not None:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                wall_clock = time.time()
+                for table in tables:
+                    pipe.hincrby(self.prefix + "versions", table, 1)
+                    pipe.hset(self.prefix + "bumped_at", table, wall_clock)
+                pipe.execute()
+            except Exception as e:
+                self._redis_error(e)
+        for listener in listeners:
+            try:
+                listener(*tables)
+            except Exception as e:
+                logger.warning(f"Table version listener {listener!r} failed: {e}")
+
+    def subscribe(self, listener: Callable[..., None]) -> None:
+        """Call `listener(*tables)` after every bump."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _shared_values(self, key: str, tables: Tuple[str, ...]):
+        """Values of a Redis hash for the tables, or None if Redis is unavailable."""
+        if self.client is None or not tables:
+            return None
+        try:
+            values = self.client.hmget(self.prefix + key, tables)
+        except Exception as e:
+            self._redis_error(e)
+            return None
+        self._redis_failing = False
+        return values
+
+    def version(self, table: str) -> int:
+        return self.versions(table)[0]
+
+    def versions(self, *tables: str) -> Tuple[int, ...]:
+        shared = self._shared_values("versions", tables)
+        if shared is not None:
+            return tuple(int(v) if v is not None else 0 for v in shared)
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def settled(self, *tables: str) -> bool:
+        """True if none of the tables was written within the settle period."""
+        cutoff = time.monotonic() - self.settle_seconds
+        with self._lock:
+            if not all(self._bumped_at.get(table, 0.0) <= cutoff for table in tables):
+                return False
+        shared = self._shared_values("bumped_at", tables)
+        if shared is None:
+            return True
+        wall_cutoff = time.time() - self.settle_seconds
+        return all(float(v) <= wall_cutoff for v in shared if v is not None)
+
+    def snapshot(self, *tables: str) -> str:
+        """
+        Validity key for a value derived from `tables`.
+
+        Changes when any table is written, when the process restarts (local
+        counters only) and every TABLE_VERSION_TTL_SECONDS.
+        """
+        tables = tuple(sorted(set(tables)))
+        bucket = int(time.time() // self.ttl_seconds)
+        shared = self._shared_values("versions", tables)
+        if shared is not None:
+            epoch = self.shared_epoch
+            versions = ".".join(str(int(v) if v is not None else 0) for v in shared)
+        else:
+            epoch = self.epoch
+            with self._lock:
+                versions = ".".join(str(self._versions.get(table, 0)) for table in tables)
+        return f"{epoch}:{bucket}:{versions}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._bumped_at.clear()
+
+
+def _create_table_versions() -> TableVersions:
+    if TABLE_VERSION_BACKEND == "redis":
+        try:
+            return TableVersions.from_url(REDIS_URL)
+        except Exception as e:
+            logger.error(f"Redis table version backend unavailable ({e}); using in-process counters")
+    return TableVersions()
+
+
+# Global instance
+table_versions = _create_table_versions()
+
+
+def table_names(*tables) -> Tuple[str, ...]:
+    """Accept table names, Table objects or ORM models; return table names."""
+    names = []
+    for table in tables:
+        if isinstance(table, str):
+            names.append(table)
+        else:
+            names.append(getattr(table, "__tablename__", None) or table.name)
+    return tuple(names)
+
+
+# ===========================
+# ENGINE HOOKS
+# ===========================
+
+def _written_table(context) -> str:
+    if context is None or not (context.isinsert or context.isupdate or context.isdelete):
+        return ""
+    compiled = getattr(context, "compiled", None)
+    table = getattr(getattr(compiled, "statement", None), "table", None)
+    return getattr(table, "name", "") or ""
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_write(conn, cursor, statement, parameters, context, executemany) -> None:
+    table = _written_table(context)
+    if table:
+        conn.info.setdefault(_PENDING_KEY, set()).add(table)
+
+
+def record_write(conn, *tables) -> None:
+    """Record tables written on `conn` by SQL the hooks cannot see (text()); bumped on commit."""
+    conn.info.setdefault(_PENDING_KEY, set()).update(table_names(*tables))
+
+
+@event.listens_for(Engine, "commit")
+def _bump_committed(conn) -> None:
+    tables: Iterable[str] = conn.info.pop(_PENDING_KEY, None) or ()
+    if tables:
+        table_versions.bump(*tables)
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_rolled_back(conn) -> None:
+    conn.info.pop(_PENDING_KEY, None)